@@ -51,6 +51,9 @@ const IPC_HANDLE_CHANNELS = Object.freeze([
   CHANNELS.UNCHAIN.DELETE_CHARACTER_STORAGE_ENTRY,
   CHANNELS.UNCHAIN.GET_MEMORY_PROJECTION,
   CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROJECTION,
+  CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROJECTION_PAGE,
+  CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_TEXT,
+  CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROFILE,
   CHANNELS.UNCHAIN.REPLACE_SESSION_MEMORY,
   CHANNELS.UNCHAIN.GET_SESSION_MEMORY_EXPORT,
   CHANNELS.UNCHAIN.LIST_SEED_CHARACTERS,
@@ -354,6 +357,21 @@ const registerIpcHandlers = ({ ipcMain, app, services }) => {
   ipcMain.handle(CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROJECTION, async () =>
     unchainService.getMisoLongTermMemoryProjection(),
   );
+  ipcMain.handle(
+    CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROJECTION_PAGE,
+    async (_event, payload = {}) =>
+      unchainService.getMisoLongTermMemoryProjectionPage(payload),
+  );
+  ipcMain.handle(
+    CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_TEXT,
+    async (_event, payload = {}) =>
+      unchainService.getMisoLongTermMemoryText(payload.ids),
+  );
+  ipcMain.handle(
+    CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROFILE,
+    async (_event, payload = {}) =>
+      unchainService.getMisoLongTermMemoryProfile(payload.storageKey),
+  );
   ipcMain.handle(
     CHANNELS.UNCHAIN.REPLACE_SESSION_MEMORY,
     async (_event, payload = {}) =>
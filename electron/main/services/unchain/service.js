@@ -33,6 +33,11 @@ const UNCHAIN_MCP_STORE_REGISTRY_VALIDATE_ENDPOINT =
 const UNCHAIN_MEMORY_PROJECTION_ENDPOINT = "/memory/projection";
 const UNCHAIN_LONG_TERM_MEMORY_PROJECTION_ENDPOINT =
   "/memory/long-term/projection";
+const UNCHAIN_LONG_TERM_MEMORY_PROJECTION_V2_ENDPOINT =
+  "/memory/long-term/projection/v2";
+const UNCHAIN_LONG_TERM_MEMORY_TEXT_ENDPOINT =
+  "/memory/long-term/projection/v2/text";
+const UNCHAIN_LONG_TERM_MEMORY_PROFILES_ENDPOINT = "/memory/long-term/profiles";
 const UNCHAIN_REPLACE_SESSION_MEMORY_ENDPOINT = "/memory/session/replace";
 const UNCHAIN_SESSION_MEMORY_EXPORT_ENDPOINT = "/memory/session/export";
 const UNCHAIN_CHARACTERS_ENDPOINT = "/characters";
@@ -1004,6 +1009,10 @@ const createUnchainService = ({
     const source = payload && typeof payload === "object" ? payload : {};
     const entryIdRaw = source.entry_id ?? source.entryId;
     const entryId = typeof entryIdRaw === "string" ? entryIdRaw.trim() : "";
+    const body = entryId ? { entry_id: entryId } : {};
+    if (typeof source.force === "boolean") {
+      body.force = source.force;
+    }
     const response = await fetch(
       buildMisoUrl(UNCHAIN_MCP_STORE_METADATA_RELOAD_ENDPOINT),
       {
@@ -1012,7 +1021,7 @@ const createUnchainService = ({
           "Content-Type": "application/json",
           ...(unchainAuthToken ? { "x-unchain-auth": unchainAuthToken } : {}),
         },
-        body: JSON.stringify(entryId ? { entry_id: entryId } : {}),
+        body: JSON.stringify(body),
       },
     );
 
@@ -1287,6 +1296,90 @@ const createUnchainService = ({
     );
   };
 
+  const getMisoLongTermMemoryProjectionPage = async (payload = {}) => {
+    ensureMisoReady();
+
+    const query = new URLSearchParams();
+    const cursor = typeof payload?.cursor === "string" ? payload.cursor : "";
+    if (cursor) {
+      query.set("cursor", cursor);
+    }
+    const limit = Number(payload?.limit);
+    if (Number.isInteger(limit) && limit > 0) {
+      query.set("limit", String(limit));
+    }
+    const queryString = query.toString();
+
+    const response = await fetch(
+      `http://${UNCHAIN_HOST}:${unchainPort}${UNCHAIN_LONG_TERM_MEMORY_PROJECTION_V2_ENDPOINT}${queryString ? `?${queryString}` : ""}`,
+      {
+        method: "GET",
+        headers: unchainAuthToken ? { "x-unchain-auth": unchainAuthToken } : {},
+      },
+    );
+
+    return readJsonResponse(
+      response,
+      "Miso long-term memory projection page request failed",
+      {},
+      "Invalid Miso long-term memory projection page response",
+    );
+  };
+
+  const getMisoLongTermMemoryText = async (ids) => {
+    ensureMisoReady();
+
+    const cleanIds = Array.isArray(ids)
+      ? ids.filter((id) => typeof id === "string" && id)
+      : [];
+    if (cleanIds.length === 0) {
+      throw new Error("ids are required");
+    }
+
+    const response = await fetch(
+      `http://${UNCHAIN_HOST}:${unchainPort}${UNCHAIN_LONG_TERM_MEMORY_TEXT_ENDPOINT}`,
+      {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          ...(unchainAuthToken ? { "x-unchain-auth": unchainAuthToken } : {}),
+        },
+        body: JSON.stringify({ ids: cleanIds }),
+      },
+    );
+
+    return readJsonResponse(
+      response,
+      "Miso long-term memory text request failed",
+      {},
+      "Invalid Miso long-term memory text response",
+    );
+  };
+
+  const getMisoLongTermMemoryProfile = async (storageKey) => {
+    ensureMisoReady();
+
+    const cleanKey = typeof storageKey === "string" ? storageKey.trim() : "";
+    if (!cleanKey) {
+      throw new Error("storageKey is required");
+    }
+
+    const response = await fetch(
+      `http://${UNCHAIN_HOST}:${unchainPort}${UNCHAIN_LONG_TERM_MEMORY_PROFILES_ENDPOINT}/${encodeURIComponent(cleanKey)}`,
+      {
+        method: "GET",
+        headers: unchainAuthToken ? { "x-unchain-auth": unchainAuthToken } : {},
+      },
+    );
+
+    return readJsonResponse(
+      response,
+      "Miso long-term memory profile request failed",
+      {},
+      "Invalid Miso long-term memory profile response",
+    );
+  };
+
   const replaceMisoSessionMemory = async (payload = {}) => {
     ensureMisoReady();
 
@@ -2481,6 +2574,9 @@ const createUnchainService = ({
     revokeMisoMcpStoreEntryApproval,
     getMisoMemoryProjection,
     getMisoLongTermMemoryProjection,
+    getMisoLongTermMemoryProjectionPage,
+    getMisoLongTermMemoryText,
+    getMisoLongTermMemoryProfile,
     replaceMisoSessionMemory,
     replaceUnchainSessionMemory: replaceMisoSessionMemory,
     getMisoSessionMemoryExport,
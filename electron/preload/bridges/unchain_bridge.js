@@ -104,6 +104,17 @@ const createMisoBridge = (ipcRenderer, streamClient) => ({
     ipcRenderer.invoke(CHANNELS.UNCHAIN.GET_MEMORY_PROJECTION, { sessionId }),
   getLongTermMemoryProjection: () =>
     ipcRenderer.invoke(CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROJECTION),
+  getLongTermMemoryProjectionPage: (payload = {}) =>
+    ipcRenderer.invoke(
+      CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROJECTION_PAGE,
+      payload,
+    ),
+  getLongTermMemoryText: (ids) =>
+    ipcRenderer.invoke(CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_TEXT, { ids }),
+  getLongTermMemoryProfile: (storageKey) =>
+    ipcRenderer.invoke(CHANNELS.UNCHAIN.GET_LONG_TERM_MEMORY_PROFILE, {
+      storageKey,
+    }),
   replaceSessionMemory: (payload = {}) =>
     ipcRenderer.invoke(CHANNELS.UNCHAIN.REPLACE_SESSION_MEMORY, payload),
   getSessionMemoryExport: (sessionId) =>
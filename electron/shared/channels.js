@@ -64,6 +64,10 @@ const CHANNELS = Object.freeze({
     DELETE_CHARACTER_STORAGE_ENTRY: "unchain:delete-character-storage-entry",
     GET_MEMORY_PROJECTION: "unchain:get-memory-projection",
     GET_LONG_TERM_MEMORY_PROJECTION: "unchain:get-long-term-memory-projection",
+    GET_LONG_TERM_MEMORY_PROJECTION_PAGE:
+      "unchain:get-long-term-memory-projection-page",
+    GET_LONG_TERM_MEMORY_TEXT: "unchain:get-long-term-memory-text",
+    GET_LONG_TERM_MEMORY_PROFILE: "unchain:get-long-term-memory-profile",
     REPLACE_SESSION_MEMORY: "unchain:replace-session-memory",
     GET_SESSION_MEMORY_EXPORT: "unchain:get-session-memory-export",
     LIST_SEED_CHARACTERS: "unchain:list-seed-characters",
@@ -27,6 +27,37 @@ import Button from "../../BUILTIN_COMPONENTs/input/button";
 
 const unchainApi = createUnchainApi();
 
+/* Long-term projections can hold hundreds of thousands of points, so they are
+   read as paged id/x/y/cluster columns; text and profile documents are only
+   fetched for what the user opens. */
+const LONG_TERM_PAGE_LIMIT = 50000;
+
+const appendProjectionColumns = (points, page) => {
+  const ids = Array.isArray(page?.ids) ? page.ids : [];
+  ids.forEach((id, index) => {
+    const x = page.x?.[index] ?? 0;
+    const y = page.y?.[index] ?? 0;
+    points.push({
+      id,
+      x,
+      y,
+      pc1: x,
+      pc2: y,
+      group: `Cluster ${(page.cluster?.[index] ?? 0) + 1}`,
+    });
+  });
+};
+
+const valueRange = (values) => {
+  let min = Infinity;
+  let max = -Infinity;
+  for (const value of values) {
+    if (value < min) min = value;
+    if (value > max) max = value;
+  }
+  return max >= min ? max - min : 0;
+};
+
 const renderConversationText = (value, depth = 0) => {
   if (depth >= 8 || value == null) {
     return "";
@@ -343,6 +374,8 @@ const MemoryInspectModal = ({
   const [variance, setVariance] = useState([0, 0, 0, 0, 0]);
   const [selectedPoint, setSelectedPoint] = useState(null);
   const [selectedProfileId, setSelectedProfileId] = useState("");
+  const [pointTexts, setPointTexts] = useState({});
+  const [profileDocuments, setProfileDocuments] = useState({});
   const [errorMsg, setErrorMsg] = useState("");
 
   /* ── Profile side-panel toggle (long-term only) ── */
@@ -360,6 +393,42 @@ const MemoryInspectModal = ({
     if (mode === "session" && !sessionId) return;
 
     let cancelled = false;
+    let loadedVersion = "";
+    let loadedComplete = false;
+
+    const loadLongTermProjection = async ({ silent }) => {
+      if (silent && loadedVersion && loadedComplete) {
+        const head = await unchainApi.getLongTermMemoryProjectionPage({
+          limit: 1,
+        });
+        if (head?.version === loadedVersion && head?.status !== "computing") {
+          return null;
+        }
+      }
+
+      const first = await unchainApi.getLongTermMemoryProjectionPage({
+        limit: LONG_TERM_PAGE_LIMIT,
+      });
+      const pts = [];
+      appendProjectionColumns(pts, first);
+      let cursor = first?.cursor;
+      while (cursor && !cancelled) {
+        const page = await unchainApi.getLongTermMemoryProjectionPage({
+          cursor,
+          limit: LONG_TERM_PAGE_LIMIT,
+        });
+        appendProjectionColumns(pts, page);
+        cursor = page?.cursor;
+      }
+      loadedVersion = typeof first?.version === "string" ? first.version : "";
+      loadedComplete = first?.status !== "computing";
+      return {
+        points: pts,
+        variance: first?.variance,
+        profiles: first?.profiles,
+      };
+    };
+
     const loadProjection = ({ silent = false } = {}) => {
       if (!silent) {
         setStatus("loading");
@@ -368,16 +437,18 @@ const MemoryInspectModal = ({
         setVariance([0, 0, 0, 0, 0]);
         setSelectedPoint(null);
         setSelectedProfileId("");
+        setPointTexts({});
+        setProfileDocuments({});
         setErrorMsg("");
       }
 
       const fetchPromise =
         mode === "long_term"
-          ? unchainApi.getLongTermMemoryProjection()
+          ? loadLongTermProjection({ silent })
           : unchainApi.getMemoryProjection(sessionId);
       fetchPromise
         .then((data) => {
-          if (cancelled) return;
+          if (cancelled || data === null) return;
           const pts = Array.isArray(data?.points) ? data.points : [];
           const nextProfiles = Array.isArray(data?.profiles)
             ? data.profiles
@@ -441,6 +512,37 @@ const MemoryInspectModal = ({
     };
   }, [open, sessionId, mode]);
 
+  /* Long-term points carry coordinates only; fetch text for the opened one */
+  const selectedPointId =
+    mode === "long_term" && selectedPoint ? String(selectedPoint.id) : "";
+  useEffect(() => {
+    if (!selectedPointId || pointTexts[selectedPointId]) return;
+
+    let cancelled = false;
+    unchainApi
+      .getLongTermMemoryText([selectedPointId])
+      .then((data) => {
+        if (cancelled) return;
+        const found = Array.isArray(data?.points)
+          ? data.points.find((item) => String(item?.id) === selectedPointId)
+          : null;
+        setPointTexts((current) => ({
+          ...current,
+          [selectedPointId]: found || { text: "" },
+        }));
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [selectedPointId, pointTexts]);
+
+  const selectedPointDetail = useMemo(() => {
+    if (!selectedPoint) return null;
+    const text = pointTexts[String(selectedPoint.id)];
+    return text ? { ...selectedPoint, ...text } : selectedPoint;
+  }, [selectedPoint, pointTexts]);
+
   /* ── Theme tokens ── */
   const meta_color = isDark ? "rgba(255,255,255,0.28)" : "rgba(0,0,0,0.28)";
 
@@ -456,10 +558,8 @@ const MemoryInspectModal = ({
     const ky = `pc${y_pc + 1}`;
     let jitter_scale = 0;
     if (jitter > 0) {
-      const xs = points.map((p) => p[kx] ?? p.x ?? 0);
-      const ys = points.map((p) => p[ky] ?? p.y ?? 0);
-      const xr = Math.max(...xs) - Math.min(...xs);
-      const yr = Math.max(...ys) - Math.min(...ys);
+      const xr = valueRange(points.map((p) => p[kx] ?? p.x ?? 0));
+      const yr = valueRange(points.map((p) => p[ky] ?? p.y ?? 0));
       jitter_scale = Math.max(xr, yr, 1e-6) * (jitter / 10) * 0.08;
     }
     const rng = make_rng(jitter_seed);
@@ -476,8 +576,12 @@ const MemoryInspectModal = ({
 
   /* ── Theme tokens (cont.) ── */
 
-  /* PC selector options — only show PCs with non-zero explained variance */
-  const n_pcs = variance.filter((v) => v > 0).length || 2;
+  /* PC selector options — only show PCs with non-zero explained variance;
+     long-term pages carry PC1/PC2 only */
+  const n_pcs =
+    mode === "long_term"
+      ? 2
+      : variance.filter((v) => v > 0).length || 2;
   const pc_options = Array.from({ length: n_pcs }, (_, i) => ({
     value: String(i),
     label: `PC${i + 1} (${((variance[i] || 0) * 100).toFixed(0)}%)`,
@@ -497,6 +601,38 @@ const MemoryInspectModal = ({
     showProfile && mode === "long_term" && profiles.length > 0;
   const hasDetail = hasChunkDetail || hasProfileOpen;
 
+  const openProfile = hasProfileOpen
+    ? profiles.find((p) => String(p?.id) === String(selectedProfileId)) ||
+      profiles[0]
+    : null;
+  const openProfileKey =
+    openProfile && !openProfile.document
+      ? String(openProfile.storage_key || "")
+      : "";
+
+  /* Profile documents are fetched when a profile is opened */
+  useEffect(() => {
+    if (!openProfileKey || profileDocuments[openProfileKey]) return;
+
+    let cancelled = false;
+    unchainApi
+      .getLongTermMemoryProfile(openProfileKey)
+      .then((data) => {
+        if (cancelled) return;
+        setProfileDocuments((current) => ({
+          ...current,
+          [openProfileKey]:
+            data?.document && typeof data.document === "object"
+              ? data.document
+              : {},
+        }));
+      })
+      .catch(() => {});
+    return () => {
+      cancelled = true;
+    };
+  }, [openProfileKey, profileDocuments]);
+
   return (
     <Modal
       open={open}
@@ -907,15 +1043,11 @@ const MemoryInspectModal = ({
         >
           {hasProfileOpen ? (
             (() => {
-              const selectedProfile =
-                profiles.find(
-                  (p) => String(p?.id) === String(selectedProfileId),
-                ) || profiles[0];
               const doc =
-                selectedProfile?.document &&
-                typeof selectedProfile.document === "object"
-                  ? selectedProfile.document
-                  : {};
+                openProfile?.document &&
+                typeof openProfile.document === "object"
+                  ? openProfile.document
+                  : profileDocuments[openProfileKey] || {};
               const { data: explorerData, root: explorerRoot } =
                 buildExplorerFromProfile(doc);
               return explorerRoot.length > 0 ? (
@@ -942,9 +1074,9 @@ const MemoryInspectModal = ({
                 </div>
               );
             })()
-          ) : hasChunkDetail && selectedPoint ? (
+          ) : hasChunkDetail && selectedPointDetail ? (
             <SelectedCard
-              point={selectedPoint}
+              point={selectedPointDetail}
               isDark={isDark}
               fontFamily={fontFamily}
               color={color}
@@ -1,4 +1,4 @@
-import { render, screen, waitFor } from "@testing-library/react";
+import { fireEvent, render, screen, waitFor } from "@testing-library/react";
 
 import { ConfigContext, LocaleContext } from "../../CONTAINERs/config/context";
 import { __mockApi as mockApi } from "../../SERVICEs/api.unchain";
@@ -6,7 +6,9 @@ import { MemoryInspectModal } from "./memory_inspect_modal";
 
 jest.mock("../../SERVICEs/api.unchain", () => {
   const api = {
-    getLongTermMemoryProjection: jest.fn(),
+    getLongTermMemoryProjectionPage: jest.fn(),
+    getLongTermMemoryText: jest.fn(),
+    getLongTermMemoryProfile: jest.fn(),
     getMemoryProjection: jest.fn(),
   };
   return {
@@ -22,7 +24,11 @@ jest.mock("../../BUILTIN_COMPONENTs/modal/modal", () => {
 });
 
 jest.mock("../../BUILTIN_COMPONENTs/scatter", () => ({
-  Scatter: () => <div data-testid="scatter" />,
+  Scatter: ({ points, on_point_click }) => (
+    <div data-testid="scatter" data-count={points.length}>
+      <span onClick={() => on_point_click(points[0])}>pick-point</span>
+    </div>
+  ),
 }));
 
 jest.mock("../../BUILTIN_COMPONENTs/select/select", () => ({
@@ -51,44 +57,103 @@ jest.mock("../../BUILTIN_COMPONENTs/explorer/explorer", () => {
   };
 });
 
+const renderLongTermModal = () =>
+  render(
+    <ConfigContext.Provider value={{ theme: {}, onThemeMode: "light_mode" }}>
+      <LocaleContext.Provider value={{ locale: "en", setLocale: jest.fn() }}>
+        <MemoryInspectModal open={true} onClose={() => {}} mode="long_term" />
+      </LocaleContext.Provider>
+    </ConfigContext.Provider>,
+  );
+
 describe("MemoryInspectModal long-term profiles", () => {
   beforeEach(() => {
     jest.clearAllMocks();
   });
 
   test("shows stored long-term profiles when there are no vectors", async () => {
-    mockApi.getLongTermMemoryProjection.mockResolvedValue({
-      points: [],
+    mockApi.getLongTermMemoryProjectionPage.mockResolvedValue({
+      ids: [],
+      x: [],
+      y: [],
+      cluster: [],
       variance: [0, 0],
+      version: "v1",
+      cursor: null,
       profiles: [
         {
-          id: "pupu_default.json",
           storage_key: "pupu_default",
-          size_bytes: 64,
+          bytes: 64,
           preview: '{"preferences":{"tone":"concise"}}',
-          document: {
-            preferences: {
-              tone: "concise",
-            },
-          },
         },
       ],
     });
+    mockApi.getLongTermMemoryProfile.mockResolvedValue({
+      storage_key: "pupu_default",
+      document: {
+        preferences: {
+          tone: "concise",
+        },
+      },
+    });
+
+    renderLongTermModal();
 
-    render(
-      <ConfigContext.Provider value={{ theme: {}, onThemeMode: "light_mode" }}>
-        <LocaleContext.Provider value={{ locale: "en", setLocale: jest.fn() }}>
-          <MemoryInspectModal open={true} onClose={() => {}} mode="long_term" />
-        </LocaleContext.Provider>
-      </ConfigContext.Provider>,
+    /* Auto-switches to Profiles view and fetches the document lazily */
+    await waitFor(() => {
+      expect(screen.getByText("preferences")).toBeInTheDocument();
+    });
+    expect(mockApi.getLongTermMemoryProjectionPage).toHaveBeenCalledTimes(1);
+    expect(mockApi.getLongTermMemoryProfile).toHaveBeenCalledWith(
+      "pupu_default",
     );
+    expect(screen.getByTestId("explorer")).toBeInTheDocument();
+  });
+
+  test("pages projection columns and fetches text for the opened point", async () => {
+    mockApi.getLongTermMemoryProjectionPage
+      .mockResolvedValueOnce({
+        ids: ["long_term_a:1"],
+        x: [0.5],
+        y: [-0.5],
+        cluster: [0],
+        variance: [0.6, 0.3, 0.1, 0, 0],
+        version: "v1",
+        cursor: "v1:1",
+        profiles: [],
+      })
+      .mockResolvedValueOnce({
+        ids: ["long_term_b:1"],
+        x: [1.5],
+        y: [2.5],
+        cluster: [1],
+        variance: [0.6, 0.3, 0.1, 0, 0],
+        version: "v1",
+        cursor: null,
+      });
+    mockApi.getLongTermMemoryText.mockResolvedValue({
+      points: [{ id: "long_term_a:1", text: "remember the tea" }],
+      missing: [],
+    });
+
+    renderLongTermModal();
 
     await waitFor(() => {
-      expect(mockApi.getLongTermMemoryProjection).toHaveBeenCalledTimes(1);
+      expect(screen.getByTestId("scatter")).toHaveAttribute("data-count", "2");
+    });
+    expect(mockApi.getLongTermMemoryProjectionPage).toHaveBeenLastCalledWith({
+      cursor: "v1:1",
+      limit: 50000,
     });
+    expect(mockApi.getLongTermMemoryText).not.toHaveBeenCalled();
 
-    /* Auto-switches to Profiles view when no vectors exist */
-    expect(screen.getByTestId("explorer")).toBeInTheDocument();
-    expect(screen.getByText("preferences")).toBeInTheDocument();
+    fireEvent.click(screen.getByText("pick-point"));
+
+    await waitFor(() => {
+      expect(screen.getByText("remember the tea")).toBeInTheDocument();
+    });
+    expect(mockApi.getLongTermMemoryText).toHaveBeenCalledWith([
+      "long_term_a:1",
+    ]);
   });
 });
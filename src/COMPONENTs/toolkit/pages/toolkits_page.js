@@ -172,7 +172,9 @@ const ToolkitsPage = ({ isDark }) => {
     setMetadataRefreshing(true);
     setMetadataError(null);
     try {
-      const payload = await api.unchain.reloadMcpStoreMetadata({});
+      // An explicit refresh bypasses the metadata TTL; unchanged entries
+      // still come back as cheap 304s.
+      const payload = await api.unchain.reloadMcpStoreMetadata({ force: true });
       applyStoreMetadata(payload);
       installedHandlersRef.current?.reload?.();
     } catch (error) {
@@ -482,7 +482,9 @@ describe("ToolkitsPage", () => {
       fireEvent.click(screen.getByText("Refresh Metadata"));
     });
 
-    expect(api.unchain.reloadMcpStoreMetadata).toHaveBeenCalledWith({});
+    expect(api.unchain.reloadMcpStoreMetadata).toHaveBeenCalledWith({
+      force: true,
+    });
     expect(setMcpStoreMetadataCache).toHaveBeenLastCalledWith(
       expect.objectContaining({
         entries: [
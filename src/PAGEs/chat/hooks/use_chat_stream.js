@@ -2573,6 +2573,8 @@ export const useChatStream = ({
                     : {};
                 unchainLogger.log("memory_commit", {
                   applied: payload.applied,
+                  queued: payload.queued,
+                  job_id: payload.job_id,
                   session_id: payload.session_id,
                   stored_message_count: payload.stored_message_count,
                   vector_indexed_count: payload.vector_indexed_count,
@@ -1466,6 +1466,42 @@ export const createUnchainApi = () => {
       );
     },
 
+    getLongTermMemoryProjectionPage: async (payload = {}) => {
+      const method = assertBridgeMethod(
+        "unchainAPI",
+        "getLongTermMemoryProjectionPage",
+      );
+      return withTimeout(
+        () => method(payload),
+        15000,
+        "long_term_memory_projection_timeout",
+        "Long-term memory projection request timed out",
+      );
+    },
+
+    getLongTermMemoryText: async (ids) => {
+      const method = assertBridgeMethod("unchainAPI", "getLongTermMemoryText");
+      return withTimeout(
+        () => method(ids),
+        10000,
+        "long_term_memory_text_timeout",
+        "Long-term memory text request timed out",
+      );
+    },
+
+    getLongTermMemoryProfile: async (storageKey) => {
+      const method = assertBridgeMethod(
+        "unchainAPI",
+        "getLongTermMemoryProfile",
+      );
+      return withTimeout(
+        () => method(storageKey),
+        10000,
+        "long_term_memory_profile_timeout",
+        "Long-term memory profile request timed out",
+      );
+    },
+
     cancelStream: (requestId) => {
       if (typeof requestId !== "string" || !requestId.trim()) {
         return;
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Tuple
+
+# Immutable agent construction inputs shared across chat requests.
+#
+# A blueprint holds everything _create_agent derives from files and options
+# that does not change between turns: the loaded recipe, the resolved
+# provider/model, compiled instructions, the optimizer config, parsed subagent
+# templates and the context-window budget. Live objects (toolkits, memory
+# managers, cancel events, session ids) are never stored here; they are bound
+# per request on top of the blueprint.
+
+DEFAULT_MAX_BLUEPRINTS = 64
+
+
+@dataclass(frozen=True)
+class AgentBlueprint:
+    recipe: Any
+    provider: str
+    model: str
+    display_model: str
+    max_iterations: int
+    instructions: str
+    optimizer_config: Any
+    subagent_templates: Tuple[Any, ...] | None
+    max_context_window_tokens: int
+
+
+_cache_lock = threading.Lock()
+_blueprints: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+_generation = 0
+_cache_stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "invalidations": 0,
+}
+
+
+def blueprint_cache_enabled() -> bool:
+    raw = os.environ.get("UNCHAIN_AGENT_BLUEPRINT_CACHE_ENABLED", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def _max_blueprints() -> int:
+    raw = os.environ.get("UNCHAIN_AGENT_BLUEPRINT_CACHE_SIZE", "").strip()
+    if not raw:
+        return DEFAULT_MAX_BLUEPRINTS
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        return DEFAULT_MAX_BLUEPRINTS
+
+
+def get_agent_blueprint(
+    key: tuple,
+    build: Callable[[], AgentBlueprint],
+    *,
+    recipe: Any = None,
+) -> AgentBlueprint:
+    """Return the cached blueprint for *key*, building it on a miss.
+
+    ``recipe`` is the recipe object resolved for this request. A cached entry
+    built from a different recipe object (the file was reloaded) is rebuilt.
+    """
+    if not blueprint_cache_enabled():
+        return build()
+
+    with _cache_lock:
+        entry = _blueprints.get(key)
+        if entry is not None and entry["blueprint"].recipe is recipe:
+            _blueprints.move_to_end(key)
+            _cache_stats["hits"] += 1
+            return entry["blueprint"]
+        _cache_stats["misses"] += 1
+        generation = _generation
+
+    blueprint = build()
+    recipe_name = str(getattr(recipe, "name", "") or "")
+
+    with _cache_lock:
+        # An invalidation that raced the build may have made it stale.
+        if generation == _generation:
+            _blueprints[key] = {"blueprint": blueprint, "recipe_name": recipe_name}
+            _blueprints.move_to_end(key)
+            limit = _max_blueprints()
+            while len(_blueprints) > limit:
+                _blueprints.popitem(last=False)
+    return blueprint
+
+
+def invalidate_agent_blueprints(*, recipe_name: str | None = None) -> int:
+    """Drop cached blueprints. With *recipe_name*, only that recipe's entries."""
+    global _generation
+    normalized = str(recipe_name or "").strip()
+    with _cache_lock:
+        _generation += 1
+        if normalized:
+            stale = [
+                key
+                for key, entry in _blueprints.items()
+                if entry["recipe_name"] == normalized
+            ]
+        else:
+            stale = list(_blueprints.keys())
+        for key in stale:
+            _blueprints.pop(key, None)
+        _cache_stats["invalidations"] += 1
+    return len(stale)
+
+
+def agent_blueprint_stats() -> Dict[str, int]:
+    with _cache_lock:
+        return {**_cache_stats, "entries": len(_blueprints)}
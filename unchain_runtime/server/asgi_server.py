@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+import route_chat
+from stream_coalescing import WaitForEvents
+
+try:
+    import uvicorn
+except ImportError:  # pragma: no cover - shipped as a dependency of mcp
+    uvicorn = None  # type: ignore
+
+# asyncio serving mode (UNCHAIN_SERVER_MODE=asgi).
+#
+# POST /chat/stream/v2 is served natively: its frame generator runs in
+# cooperative mode, so while the agent is working the stream costs one
+# asyncio task waiting on the runner's EventChannel instead of a pinned
+# HTTP thread plus a cancel-watcher thread. Only the initial agent setup
+# (recipe loading, MCP connects), which can block, runs on a worker thread.
+#
+# Every other route, including resumable v2 runs and the v3/v4 streams, goes
+# through a WSGI bridge onto the Flask app using a bounded thread pool. When
+# the client disconnects, the bridge sets the cancel event it passed in the
+# environ (see route_chat._stream_cancel_event), waits for the in-flight
+# ``next()`` to return, and only then closes the response iterable.
+
+DEFAULT_WSGI_THREADS = 64
+DISCONNECT_DRAIN_SECONDS = 5.0
+
+_SSE_HEADERS = [
+    (b"content-type", b"text/event-stream; charset=utf-8"),
+    (b"cache-control", b"no-cache"),
+    (b"connection", b"keep-alive"),
+    (b"x-accel-buffering", b"no"),
+]
+_END = object()
+
+
+def _build_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    server = scope.get("server") or ("127.0.0.1", 80)
+    client = scope.get("client") or ("", 0)
+    environ: Dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "REMOTE_PORT": str(client[1]),
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").lower()
+        value = raw_value.decode("latin-1")
+        if name == "content-length":
+            continue
+        if name == "content-type":
+            environ["CONTENT_TYPE"] = value
+            continue
+        key = "HTTP_" + name.upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+async def _read_body(receive: Callable) -> bytes:
+    chunks: List[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+async def _wait_for_disconnect(receive: Callable) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def wait_for_events(marker: WaitForEvents) -> None:
+    """Await a ``WaitForEvents`` marker without blocking the loop."""
+    if marker.channel is None:
+        await asyncio.sleep(marker.timeout or 0)
+        return
+
+    loop = asyncio.get_running_loop()
+    ready = asyncio.Event()
+
+    def wake() -> None:
+        try:
+            loop.call_soon_threadsafe(ready.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    marker.channel.set_waker(wake)
+    try:
+        if marker.channel.empty():
+            await asyncio.wait_for(ready.wait(), marker.timeout)
+    except asyncio.TimeoutError:
+        pass
+    finally:
+        marker.channel.set_waker(None)
+
+
+async def iterate_cooperative(
+    frames: Iterable[Any],
+    *,
+    inflight: Optional[Dict[str, Any]] = None,
+) -> AsyncIterator[Any]:
+    """Drive a cooperative frame generator from the event loop.
+
+    Steps run on a worker thread until the first ``WaitForEvents`` marker
+    (setup before the runner starts may block); after that every step is
+    non-blocking and runs on the loop itself. The worker-thread step is kept
+    in ``inflight["step"]`` so a caller that stops iterating can wait for it
+    before closing the generator.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(frames)
+    setup_phase = True
+    while True:
+        if setup_phase:
+            step = loop.run_in_executor(None, next, iterator, _END)
+            if inflight is not None:
+                inflight["step"] = step
+            item = await asyncio.shield(step)
+        else:
+            item = next(iterator, _END)
+        if item is _END:
+            return
+        if isinstance(item, WaitForEvents):
+            setup_phase = False
+            await wait_for_events(item)
+            continue
+        yield item
+
+
+def _close_quietly(iterable: object) -> None:
+    close = getattr(iterable, "close", None)
+    if not callable(close):
+        return
+    try:
+        close()
+    except ValueError:
+        pass  # "generator already executing": only if a step is still running
+
+
+async def _close_after_step(
+    executor: ThreadPoolExecutor,
+    iterable: object,
+    pending: Optional["asyncio.Future[Any]"],
+) -> None:
+    """Close ``iterable`` on a worker thread once its in-flight ``next()`` returns.
+
+    Closing a generator while another thread is inside it raises
+    ``ValueError`` and leaves it open, so the close is chained behind the
+    pending step. The caller sets the run's cancel event first; a step that
+    still has not returned after ``DISCONNECT_DRAIN_SECONDS`` gets its close
+    scheduled for when it does, instead of holding up the connection.
+    """
+    loop = asyncio.get_running_loop()
+    if pending is not None and not pending.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(pending), DISCONNECT_DRAIN_SECONDS)
+        except asyncio.TimeoutError:
+            def close_later(_future: "asyncio.Future[Any]") -> None:
+                try:
+                    executor.submit(_close_quietly, iterable)
+                except RuntimeError:
+                    pass  # executor shut down
+
+            pending.add_done_callback(close_later)
+            return
+        except Exception:
+            pass  # the step's own error; the client is gone
+    try:
+        await loop.run_in_executor(executor, _close_quietly, iterable)
+    except RuntimeError:
+        _close_quietly(iterable)  # executor shut down
+
+
+class UnchainAsgiApp:
+    def __init__(self, flask_app, *, wsgi_threads: int = DEFAULT_WSGI_THREADS) -> None:
+        self._flask_app = flask_app
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, wsgi_threads),
+            thread_name_prefix="unchain-wsgi",
+        )
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        body = await _read_body(receive)
+        if scope["method"] == "POST" and scope["path"] == "/chat/stream/v2":
+            await self._chat_stream_v2(scope, body, receive, send)
+            return
+        await self._call_wsgi(scope, body, receive, send)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False)
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _send_flask_response(self, response, send: Callable) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.lower().encode("latin-1"), value.encode("latin-1"))
+                    for name, value in response.headers.items()
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": response.get_data()})
+
+    async def _chat_stream_v2(
+        self,
+        scope: Dict[str, Any],
+        body: bytes,
+        receive: Callable,
+        send: Callable,
+    ) -> None:
+        root = route_chat._root()
+        error_response = None
+        with self._flask_app.request_context(_build_environ(scope, body)):
+            early = self._flask_app.preprocess_request()
+            if early is not None:
+                stream_request, error = None, early
+            else:
+                stream_request, error = route_chat._prepare_chat_stream_v2(root)
+            if error is not None:
+                error_response = self._flask_app.make_response(error)
+
+        if error_response is not None:
+            await self._send_flask_response(error_response, send)
+            return
+        if stream_request["resumable"]:
+            # Resumable runs already live on their own pump thread.
+            await self._call_wsgi(scope, body, receive, send)
+            return
+
+        cancel_event = threading.Event()
+        frames = route_chat._iter_chat_stream_v2_frames(
+            root,
+            stream_request,
+            cancel_event,
+            cooperative=True,
+        )
+
+        inflight: Dict[str, Any] = {}
+
+        async def pump() -> None:
+            async for text in iterate_cooperative(frames, inflight=inflight):
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": text.encode("utf-8"),
+                        "more_body": True,
+                    }
+                )
+
+        await send({"type": "http.response.start", "status": 200, "headers": _SSE_HEADERS})
+        disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+        pumping = asyncio.ensure_future(pump())
+        try:
+            await asyncio.wait({pumping, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+            if pumping.done():
+                pumping.result()
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            cancel_event.set()
+            root.cancel_tool_confirmations(cancel_event)
+            pumping.cancel()
+            try:
+                await pumping
+            except asyncio.CancelledError:
+                pass
+        finally:
+            disconnect.cancel()
+            await _close_after_step(self._executor, frames, inflight.get("step"))
+
+    async def _call_wsgi(
+        self,
+        scope: Dict[str, Any],
+        body: bytes,
+        receive: Callable,
+        send: Callable,
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        environ = _build_environ(scope, body)
+        cancel_event = threading.Event()
+        environ[route_chat.CLIENT_DISCONNECT_ENVIRON_KEY] = cancel_event
+        started: Dict[str, Any] = {}
+
+        def start_response(status: str, headers: List[Tuple[str, str]], exc_info=None):
+            started["status"] = int(status.split(" ", 1)[0])
+            started["headers"] = headers
+            return lambda _data: None
+
+        result = await loop.run_in_executor(
+            self._executor,
+            self._flask_app,
+            environ,
+            start_response,
+        )
+        iterator = iter(result)
+        disconnect = asyncio.ensure_future(_wait_for_disconnect(receive))
+        pending: Optional["asyncio.Future[Any]"] = None
+        try:
+            chunk = await loop.run_in_executor(self._executor, next, iterator, _END)
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": started.get("status", 500),
+                    "headers": [
+                        (name.lower().encode("latin-1"), value.encode("latin-1"))
+                        for name, value in started.get("headers", [])
+                    ],
+                }
+            )
+            while chunk is not _END:
+                if chunk:
+                    await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                pending = loop.run_in_executor(self._executor, next, iterator, _END)
+                await asyncio.wait({pending, disconnect}, return_when=asyncio.FIRST_COMPLETED)
+                if disconnect.done():
+                    cancel_event.set()
+                    return
+                chunk = pending.result()
+                pending = None
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            disconnect.cancel()
+            if pending is not None and not pending.done():
+                cancel_event.set()
+            await _close_after_step(self._executor, result, pending)
+
+
+class AsgiServer:
+    """uvicorn-backed counterpart of ``ThreadedFlaskServer``."""
+
+    def __init__(self, app, host: str, port: int) -> None:
+        if uvicorn is None:
+            raise RuntimeError("uvicorn is not installed")
+        self._asgi_app = UnchainAsgiApp(app)
+        self._host = host
+        self._port = port
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+
+        config = uvicorn.Config(
+            self._asgi_app,
+            host=self._host,
+            port=self._port,
+            loop="asyncio",
+            lifespan="off",
+            log_level="warning",
+            timeout_keep_alive=30,
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(
+            target=self._server.run,
+            name="unchain-asgi-thread",
+            daemon=True,
+        )
+        self._thread.start()
+        for _ in range(40):
+            if getattr(self._server, "started", False):
+                break
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+        self._asgi_app.close()
+        self._thread = None
+        self._server = None
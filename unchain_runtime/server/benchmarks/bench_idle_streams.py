@@ -0,0 +1,179 @@
+"""Load-test concurrent idle /chat/stream/v2 connections per serving mode.
+
+Starts the runtime server in-process (threaded Werkzeug or the asyncio/ASGI
+mode behind ``UNCHAIN_SERVER_MODE=asgi``) with ``stream_chat_events``
+replaced by an agent stand-in: one runner thread per stream that stays idle
+until released, then emits a token and finishes. Opens N streaming clients,
+waits for every ``stream_started`` frame, reports OS threads and RSS while
+all streams are idle, then releases them and times the drain.
+
+    python benchmarks/bench_idle_streams.py --streams 500 --modes threaded,asgi
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import re
+import resource
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import routes  # noqa: E402
+from app import create_app  # noqa: E402
+from server_thread import ThreadedFlaskServer  # noqa: E402
+from stream_coalescing import EventChannel, drain_event_queue  # noqa: E402
+
+_release = threading.Event()
+_DONE_FRAME = re.compile(rb'"type":\s*"done"')
+
+
+def _idle_stream_chat_events(*, cancel_event=None, cooperative=False, **_kwargs):
+    channel = EventChannel()
+    done = object()
+
+    def run_agent() -> None:
+        _release.wait()
+        channel.put({"type": "token_delta", "run_id": "bench", "iteration": 0, "delta": "hi"})
+        channel.put(done)
+
+    threading.Thread(target=run_agent, name="unchain-runner-events", daemon=True).start()
+    if cancel_event is not None and not cooperative:
+        # Mirrors the confirmation cancel watcher of the threaded path.
+        threading.Thread(target=cancel_event.wait, daemon=True).start()
+    for item in drain_event_queue(channel, done, cooperative=cooperative):
+        yield item
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def _open_stream(port: int, started: asyncio.Queue, finished: asyncio.Queue) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps({"message": "hello", "threadId": f"bench-{id(writer)}"}).encode()
+    writer.write(
+        b"POST /chat/stream/v2 HTTP/1.1\r\nHost: 127.0.0.1\r\n"
+        b"Content-Type: application/json\r\n"
+        + f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    buffer = b""
+    announced = False
+    try:
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                break
+            buffer += chunk
+            if not announced and b"stream_started" in buffer:
+                announced = True
+                await started.put(time.perf_counter())
+            if _DONE_FRAME.search(buffer):
+                break
+    finally:
+        await finished.put(time.perf_counter())
+        writer.close()
+
+
+async def _drive(port: int, streams: int) -> dict:
+    started: asyncio.Queue = asyncio.Queue()
+    finished: asyncio.Queue = asyncio.Queue()
+    t0 = time.perf_counter()
+    tasks = [asyncio.ensure_future(_open_stream(port, started, finished)) for _ in range(streams)]
+    for _ in range(streams):
+        await asyncio.wait_for(started.get(), timeout=120)
+    connect_s = time.perf_counter() - t0
+    await asyncio.sleep(1.0)
+    idle_threads = threading.active_count()
+    idle_rss = _rss_mb()
+
+    t1 = time.perf_counter()
+    _release.set()
+    await asyncio.gather(*tasks)
+    drain_s = time.perf_counter() - t1
+    return {
+        "connect_s": connect_s,
+        "idle_threads": idle_threads,
+        "idle_rss_mb": idle_rss,
+        "drain_s": drain_s,
+    }
+
+
+def run(mode: str, streams: int) -> dict | None:
+    _release.clear()
+    port = _free_port()
+    app = create_app()
+    if mode == "asgi":
+        try:
+            from asgi_server import AsgiServer
+
+            server = AsgiServer(app, host="127.0.0.1", port=port)
+        except RuntimeError as exc:
+            print(f"{mode:>9}: skipped ({exc})")
+            return None
+    else:
+        server = ThreadedFlaskServer(app, host="127.0.0.1", port=port)
+
+    original = routes.stream_chat_events
+    routes.stream_chat_events = _idle_stream_chat_events
+    baseline_threads = threading.active_count()
+    server.start()
+    try:
+        row = asyncio.run(_drive(port, streams))
+    finally:
+        _release.set()
+        server.stop()
+        routes.stream_chat_events = original
+    row["mode"] = mode
+    row["threads_per_stream"] = (row["idle_threads"] - baseline_threads) / streams
+    return row
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=500)
+    parser.add_argument("--modes", default="threaded,asgi")
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    wanted = min(hard, max(soft, args.streams * 4 + 256))
+    resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+
+    print(f"{args.streams} concurrent idle /chat/stream/v2 streams")
+    print(f"{'mode':>9} {'connect s':>10} {'threads':>8} {'thr/stream':>11} {'rss MB':>8} {'drain s':>8}")
+    for mode in (value.strip() for value in args.modes.split(",") if value.strip()):
+        row = run(mode, args.streams)
+        if row is None:
+            continue
+        print(
+            f"{row['mode']:>9} {row['connect_s']:>10.2f} {row['idle_threads']:>8} "
+            f"{row['threads_per_stream']:>11.2f} {row['idle_rss_mb']:>8.0f} {row['drain_s']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
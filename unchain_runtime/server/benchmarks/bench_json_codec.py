@@ -0,0 +1,122 @@
+"""Compare the stdlib and orjson backends of ``json_codec``.
+
+Measures SSE frames/s through ``route_chat._sse_event`` and encode time for a
+/memory/projection payload (built by ``route_projection._build_vector_payload``
+from random vectors) and a synthetic /toolkits/catalog/v2 payload. The
+orjson rows are skipped when orjson is not importable.
+
+    python benchmarks/bench_json_codec.py --frames 50000 --points 5000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import types
+from pathlib import Path
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import json_codec  # noqa: E402
+from route_chat import _build_trace_frame, _sse_event  # noqa: E402
+from route_projection import _build_vector_payload  # noqa: E402
+
+
+def _frames_per_second(count: int) -> float:
+    started = time.perf_counter()
+    for seq in range(count):
+        _sse_event(
+            "frame",
+            _build_trace_frame(
+                seq=seq,
+                event_type="token_delta",
+                payload={"delta": "token ", "accumulated_text": "some streamed text so far"},
+                run_id="run-bench",
+                iteration=1,
+            ),
+        )
+    return count / (time.perf_counter() - started)
+
+
+def _projection_payload(points: int, dims: int) -> dict:
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((points, dims), dtype=np.float32)
+    scroll = [
+        types.SimpleNamespace(
+            id=f"p{index}",
+            vector=vectors[index].tolist(),
+            payload={"text": f"user: question {index}\nassistant: answer {index}"},
+        )
+        for index in range(points)
+    ]
+    return _build_vector_payload(scroll)
+
+
+def _catalog_payload(toolkits: int, tools: int) -> dict:
+    return {
+        "toolkits": [
+            {
+                "toolkitId": f"toolkit-{t}",
+                "toolkitName": f"Toolkit {t}",
+                "tools": [
+                    {
+                        "name": f"tool_{t}_{i}",
+                        "description": "Does a thing with a reasonably long description " * 3,
+                        "parameters": {
+                            "type": "object",
+                            "properties": {f"arg{k}": {"type": "string"} for k in range(6)},
+                        },
+                    }
+                    for i in range(tools)
+                ],
+            }
+            for t in range(toolkits)
+        ]
+    }
+
+
+def _encode_ms(payload: object, repeat: int = 5) -> tuple[float, int]:
+    best = float("inf")
+    size = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(json_codec.dumps_bytes(payload))
+        best = min(best, time.perf_counter() - started)
+    return best * 1000, size
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=50000)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--dims", type=int, default=384)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    projection = _projection_payload(args.points, args.dims)
+    build_ms = (time.perf_counter() - started) * 1000
+    catalog = _catalog_payload(60, 25)
+    print(f"projection payload: {args.points} points x {args.dims} dims, built in {build_ms:.0f} ms")
+
+    backends = ["stdlib"] + (["orjson"] if json_codec._orjson is not None else [])
+    print(f"{'backend':>8} {'frames/s':>10} {'projection ms':>14} {'MB':>6} {'catalog ms':>11} {'MB':>6}")
+    for backend in backends:
+        os.environ["UNCHAIN_JSON_BACKEND"] = backend
+        frames = _frames_per_second(args.frames)
+        projection_ms, projection_size = _encode_ms(projection)
+        catalog_ms, catalog_size = _encode_ms(catalog)
+        print(
+            f"{backend:>8} {frames:>10.0f} {projection_ms:>14.1f} {projection_size / 1e6:>6.2f} "
+            f"{catalog_ms:>11.1f} {catalog_size / 1e6:>6.2f}"
+        )
+    os.environ.pop("UNCHAIN_JSON_BACKEND", None)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
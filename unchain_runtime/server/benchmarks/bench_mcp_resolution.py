@@ -0,0 +1,185 @@
+"""Time the per-chat-turn MCP resolution path against the JSON stores.
+
+Populates a temporary data dir with N installed stdio toolkits (each with
+secrets) and an external registry of M approved entries, then times:
+
+  build     build_mcp_runtime_toolkit + release for every toolkit, with the
+            session pool handing back the same fake connected session, so
+            only record, secret and pool lookups are measured
+  external  approved_external_registry_entry for every external entry
+  list      list_installed_mcp_toolkits (the catalog path)
+
+Each is run with the in-memory store cache ("cached") and with every cache
+cleared before each call ("reparse"), which approximates the previous
+read-and-parse-per-call behaviour.
+
+    python benchmarks/bench_mcp_resolution.py --toolkits 30 --external 200 --rounds 50
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import mcp_external_registries  # noqa: E402
+import mcp_secrets  # noqa: E402
+import mcp_store_metadata  # noqa: E402
+import mcp_toolkits  # noqa: E402
+from mcp_session_pool import close_all_mcp_sessions  # noqa: E402
+
+STORES = (
+    mcp_toolkits._STORE,
+    mcp_secrets._STORE,
+    mcp_external_registries._STORE,
+    mcp_external_registries._APPROVAL_STORE,
+    mcp_store_metadata._STORE,
+)
+
+
+class _FakeToolkit:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.tools = {}
+
+    def connect(self):
+        return self
+
+    def disconnect(self):
+        pass
+
+
+def _populate(data_dir: Path, toolkits: int, external: int) -> tuple[list[str], list[str]]:
+    toolkit_ids = [f"mcp.bench.toolkit-{index}" for index in range(toolkits)]
+    mcp_toolkits._write_store(
+        {
+            "version": 1,
+            "toolkits": [
+                {
+                    "entry_id": f"bench.toolkit-{index}",
+                    "toolkit_id": toolkit_id,
+                    "toolkit_name": f"Bench {index}",
+                    "transport": "stdio",
+                    "command": "npx",
+                    "args": ["-y", f"@bench/server-{index}"],
+                    "secret_keys": ["API_KEY", "API_URL"],
+                    "tools": [
+                        {"name": f"tool_{tool}", "title": f"Tool {tool}", "description": "x" * 200}
+                        for tool in range(12)
+                    ],
+                    "status": "available",
+                }
+                for index, toolkit_id in enumerate(toolkit_ids)
+            ],
+        },
+        data_dir,
+    )
+    for toolkit_id in toolkit_ids:
+        mcp_secrets.save_mcp_secret_values(
+            toolkit_id,
+            {"API_KEY": "k" * 40, "API_URL": "https://example.test"},
+            data_dir=data_dir,
+        )
+    entry_ids = [f"external.bench-{index}" for index in range(external)]
+    entries = [
+        {
+            "entry_id": entry_id,
+            "toolkit_id": f"mcp.{entry_id}",
+            "registry_id": "bench",
+            "recipe_hash": f"hash-{index}",
+            "toolkit_name": entry_id,
+            "mcp": {"transport": "stdio", "command": "uvx", "args": [entry_id]},
+        }
+        for index, entry_id in enumerate(entry_ids)
+    ]
+    mcp_external_registries._write_store(
+        {"version": 1, "registries": [{"registry_id": "bench", "entries": entries}]},
+        data_dir,
+    )
+    mcp_external_registries._write_approval_store(
+        {
+            "version": 1,
+            "approvals": [
+                {"registry_id": "bench", "entry_id": entry["entry_id"], "recipe_hash": entry["recipe_hash"]}
+                for entry in entries
+            ],
+        },
+        data_dir,
+    )
+    return toolkit_ids, entry_ids
+
+
+def _time_calls(calls, rounds: int, reparse: bool) -> dict:
+    samples = []
+    for _ in range(rounds):
+        for call in calls:
+            if reparse:
+                for store in STORES:
+                    store.clear()
+            started = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        "p50_us": statistics.median(samples),
+        "p95_us": samples[int(0.95 * (len(samples) - 1))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--toolkits", type=int, default=30)
+    parser.add_argument("--external", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = Path(tmp)
+        os.environ["UNCHAIN_DATA_DIR"] = str(data_dir)
+        toolkit_ids, entry_ids = _populate(data_dir, args.toolkits, args.external)
+
+        def build(toolkit_id):
+            def run():
+                toolkit = mcp_toolkits.build_mcp_runtime_toolkit(
+                    toolkit_id,
+                    data_dir=data_dir,
+                    toolkit_factory=_FakeToolkit,
+                )
+                mcp_toolkits.release_mcp_runtime_toolkit(toolkit)
+            return run
+
+        def external(entry_id):
+            return lambda: mcp_external_registries.approved_external_registry_entry(
+                entry_id,
+                data_dir=data_dir,
+            )
+
+        cases = {
+            "build": [build(toolkit_id) for toolkit_id in toolkit_ids],
+            "external": [external(entry_id) for entry_id in entry_ids],
+            "list": [lambda: mcp_toolkits.list_installed_mcp_toolkits(data_dir)],
+        }
+        print(
+            f"{args.toolkits} installed toolkits, {args.external} external entries, "
+            f"{args.rounds} rounds"
+        )
+        print(f"{'path':<10} {'mode':<8} {'p50 us':>10} {'p95 us':>10}")
+        for name, calls in cases.items():
+            for reparse in (True, False):
+                result = _time_calls(calls, args.rounds, reparse)
+                print(
+                    f"{name:<10} {'reparse' if reparse else 'cached':<8}"
+                    f" {result['p50_us']:>10.1f} {result['p95_us']:>10.1f}"
+                )
+        close_all_mcp_sessions()
+
+
+if __name__ == "__main__":
+    main()
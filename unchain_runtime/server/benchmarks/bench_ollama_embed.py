@@ -0,0 +1,145 @@
+"""Reindex a synthetic 2,000-turn session against a local Ollama stub.
+
+Compares the legacy one-request-per-text ``/api/embeddings`` loop (fresh
+connection per call) with the batched, keep-alive runtime returned by
+``memory_embeddings._build_embed_runtime``.
+
+    python benchmarks/bench_ollama_embed.py --turns 2000 --latency-ms 2
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import memory_embeddings  # noqa: E402
+import memory_factory  # noqa: E402
+from ollama_client import close_ollama_clients  # noqa: E402
+
+VECTOR_SIZE = 768
+
+
+class _StubState:
+    latency_s = 0.0
+    requests = 0
+    lock = threading.Lock()
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *_args) -> None:
+        return
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+        with _StubState.lock:
+            _StubState.requests += 1
+        time.sleep(_StubState.latency_s)
+        if self.path == "/api/embed":
+            inputs = body.get("input") or []
+            payload = {"embeddings": [[0.001] * VECTOR_SIZE for _ in inputs]}
+        elif self.path == "/api/embeddings":
+            payload = {"embedding": [0.001] * VECTOR_SIZE}
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        encoded = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+
+def _session_turn_texts(turns: int) -> list[str]:
+    return [
+        f"user: question {index} about the project plan\n"
+        f"assistant: answer {index} with some supporting detail"
+        for index in range(turns)
+    ]
+
+
+def _legacy_embed(base_url: str, model: str, texts: list[str]) -> list[list[float]]:
+    import httpx
+
+    vectors = []
+    for text in texts:
+        resp = httpx.post(
+            f"{base_url}/api/embeddings",
+            json={"model": model, "prompt": text},
+            timeout=30.0,
+        )
+        resp.raise_for_status()
+        vectors.append(resp.json()["embedding"])
+    return vectors
+
+
+def _timed(label: str, fn) -> dict[str, object]:
+    with _StubState.lock:
+        _StubState.requests = 0
+    started = time.perf_counter()
+    vectors = fn()
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": label,
+        "vectors": len(vectors),
+        "requests": _StubState.requests,
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    _StubState.latency_s = max(0.0, args.latency_ms) / 1000.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    model = "nomic-embed-text"
+    texts = _session_turn_texts(args.turns)
+
+    results = []
+    try:
+        if not args.skip_legacy:
+            results.append(_timed("legacy", lambda: _legacy_embed(base_url, model, texts)))
+        embed_fn, _ = memory_factory._build_embed_runtime(
+            {
+                "provider": "ollama",
+                "model": model,
+                "vector_size": VECTOR_SIZE,
+                "base_url": base_url,
+                "batch_size": args.batch_size,
+                "max_concurrency": args.concurrency,
+            }
+        )
+        results.append(_timed("batched", lambda: embed_fn(texts)))
+        memory_embeddings._ollama_legacy_embed_hosts.clear()
+    finally:
+        close_ollama_clients()
+        server.shutdown()
+        server.server_close()
+
+    print(json.dumps({"turns": args.turns, "latency_ms": args.latency_ms, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""Benchmark the streaming projection engine against the exact SVD path.
+
+Generates synthetic embedding-like vectors (low-rank signal plus noise) one
+scroll page at a time and feeds them to ``StreamingProjector``, then labels
+the 2-D coords with ``_kmeans_2d_numpy`` (mini-batch above 4096 points) and,
+for comparison, with full Lloyd passes. The exact float64 SVD is only run
+where it fits in memory (``--exact-max``). Peak allocations of the fit are
+measured with tracemalloc.
+
+    python benchmarks/bench_projection_engine.py --sizes 10000,100000,500000 --dims 1536
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from memory_projection_engine import StreamingProjector  # noqa: E402
+from route_projection import (  # noqa: E402
+    _MEMORY_PROJECTION_PAGE_SIZE,
+    _kmeans_2d_numpy,
+    _project_vectors,
+)
+
+_SIGNAL_RANK = 24
+
+
+def _pages(points: int, dims: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((_SIGNAL_RANK, dims)).astype(np.float32)
+    scales = np.geomspace(8.0, 0.5, _SIGNAL_RANK).astype(np.float32)
+    for start in range(0, points, _MEMORY_PROJECTION_PAGE_SIZE):
+        rows = min(_MEMORY_PROJECTION_PAGE_SIZE, points - start)
+        signal = (rng.standard_normal((rows, _SIGNAL_RANK), dtype=np.float32) * scales) @ basis
+        noise = rng.standard_normal((rows, dims), dtype=np.float32)
+        yield signal / np.sqrt(dims) + noise * 0.02
+
+
+def _streaming(points: int, dims: int) -> dict:
+    tracemalloc.start()
+    started = time.perf_counter()
+    projector = StreamingProjector(dims)
+    generate_s = 0.0
+    pages = _pages(points, dims)
+    while True:
+        page_started = time.perf_counter()
+        block = next(pages, None)
+        generate_s += time.perf_counter() - page_started
+        if block is None:
+            break
+        projector.partial_fit(block)
+    coords, variance = projector.finish()
+    fit_s = time.perf_counter() - started - generate_s
+    cluster_started = time.perf_counter()
+    _kmeans_2d_numpy(coords[:, :2])
+    cluster_s = time.perf_counter() - cluster_started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    lloyd_started = time.perf_counter()
+    with _full_lloyd():
+        _kmeans_2d_numpy(coords[:, :2])
+    return {
+        "fit_s": fit_s,
+        "cluster_s": cluster_s,
+        "lloyd_s": time.perf_counter() - lloyd_started,
+        "peak_mb": peak / 1e6,
+        "coords": coords,
+        "variance": variance,
+    }
+
+
+def _exact(points: int, dims: int) -> dict:
+    rows = np.vstack(list(_pages(points, dims))).astype(np.float64).tolist()
+    tracemalloc.start()
+    started = time.perf_counter()
+    coords, variance = _project_vectors(rows)
+    fit_s = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"fit_s": fit_s, "peak_mb": peak / 1e6, "coords": coords, "variance": variance}
+
+
+class _full_lloyd:
+    def __enter__(self):
+        import route_projection
+
+        self._module = route_projection
+        self._saved = route_projection.MINIBATCH_KMEANS_MIN_POINTS
+        route_projection.MINIBATCH_KMEANS_MIN_POINTS = sys.maxsize
+
+    def __exit__(self, *_exc):
+        self._module.MINIBATCH_KMEANS_MIN_POINTS = self._saved
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,500000")
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--exact-max", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(
+        f"{'points':>8} {'path':>9} {'fit s':>8} {'peak MB':>8} {'pc1 var':>8} "
+        f"{'|r| pc1/pc2':>12} {'mb-kmeans s':>12} {'lloyd s':>8}"
+    )
+    for points in (int(value) for value in args.sizes.split(",") if value.strip()):
+        streaming = _streaming(points, args.dims)
+        exact = _exact(points, args.dims) if points <= args.exact_max else None
+        agreement = "-"
+        if exact is not None:
+            agreement = "/".join(
+                f"{abs(np.corrcoef(exact['coords'][:, pc], streaming['coords'][:, pc])[0, 1]):.3f}"
+                for pc in range(2)
+            )
+            print(
+                f"{points:>8} {'exact':>9} {exact['fit_s']:>8.2f} "
+                f"{exact['peak_mb']:>8.0f} {exact['variance'][0]:>8.3f}"
+            )
+        print(
+            f"{points:>8} {'streaming':>9} {streaming['fit_s']:>8.2f} "
+            f"{streaming['peak_mb']:>8.0f} {streaming['variance'][0]:>8.3f} {agreement:>12} "
+            f"{streaming['cluster_s']:>12.2f} {streaming['lloyd_s']:>8.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,101 @@
+"""Measure peak RSS of a cold /memory/projection build.
+
+Runs ``route_projection._cached_vector_payload`` (projection cache disabled)
+against an in-memory stand-in for the Qdrant client that, like the real one,
+materialises every scroll page as fresh point objects with list vectors.
+Each size runs in its own subprocess so ``ru_maxrss`` is a clean peak; the
+reported number is the growth over the process' RSS right before the call.
+
+    python benchmarks/bench_projection_memory.py --sizes 2000,10000 --dims 1536
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+import types
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+
+class _PagedClient:
+    def __init__(self, points: int, dims: int) -> None:
+        import numpy as np
+
+        self._vectors = np.random.default_rng(5).standard_normal((points, dims), dtype=np.float32)
+
+    def count(self, **_kwargs):
+        return types.SimpleNamespace(count=len(self._vectors))
+
+    def scroll(self, *, limit, with_vectors=True, offset=None, **_kwargs):
+        start = int(offset or 0)
+        stop = min(len(self._vectors), start + limit)
+        page = [
+            types.SimpleNamespace(
+                id=f"p{index}",
+                vector=self._vectors[index].tolist() if with_vectors else None,
+                payload={
+                    "conversation": [
+                        {"role": "user", "content": f"question {index}"},
+                        {"role": "assistant", "content": f"answer {index} " * 20},
+                    ]
+                },
+            )
+            for index in range(start, stop)
+        ]
+        return page, (stop if stop < len(self._vectors) else None)
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(points: int, dims: int) -> None:
+    os.environ["UNCHAIN_PROJECTION_CACHE_ENABLED"] = "0"
+    import route_projection
+
+    client = _PagedClient(points, dims)
+    before = _peak_rss_mb()
+    started = time.perf_counter()
+    payload = route_projection._cached_vector_payload(
+        client,
+        ["chat_bench"],
+        data_dir="",
+        scope="bench",
+    )
+    elapsed = time.perf_counter() - started
+    print(f"{points} {len(payload['points'])} {_peak_rss_mb() - before:.1f} {elapsed:.2f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="2000,10000")
+    parser.add_argument("--dims", type=int, default=1536)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(int(args.sizes), args.dims)
+        return 0
+
+    print(f"{'points':>8} {'returned':>9} {'peak RSS +MB':>13} {'seconds':>8}")
+    for size in (value.strip() for value in args.sizes.split(",") if value.strip()):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", "--sizes", size, "--dims", str(args.dims)],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        points, returned, rss_mb, seconds = output
+        print(f"{points:>8} {returned:>9} {float(rss_mb):>13.1f} {float(seconds):>8.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,195 @@
+"""Compare Qdrant provisioning policies on recall quality and search latency.
+
+Builds a clustered synthetic corpus shaped like memory embeddings and, for
+every policy in memory_qdrant_policy.POLICIES, reports recall@k against an
+exact float32 brute-force search plus the resident vector footprint.
+
+Two measurements:
+
+  model   numpy model of the policy's search path (int8 scalar quantization
+          with quantile clipping, optional oversampled rescoring). Runs
+          anywhere and isolates the quality cost of quantization.
+  qdrant  the real collection configs and search params against a Qdrant
+          server (--url), with p50/p95 latency. Skipped when qdrant_client is
+          missing; the embedded :memory: mode ignores on_disk, quantization
+          and HNSW settings, so only --url gives meaningful numbers.
+
+    python benchmarks/bench_qdrant_policy.py --points 20000 --dim 768 --queries 200
+    python benchmarks/bench_qdrant_policy.py --url http://localhost:6333
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from memory_qdrant_policy import (  # noqa: E402
+    POLICIES,
+    collection_kwargs,
+    qdrant_policy,
+    search_params,
+)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _corpus(points: int, dim: int, queries: int, spread: float, seed: int):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(8, points // 200), dim)).astype(np.float32)
+    labels = rng.integers(0, len(centers), size=points)
+    data = centers[labels] + spread * rng.standard_normal((points, dim)).astype(np.float32)
+    query_labels = rng.integers(0, len(centers), size=queries)
+    query = centers[query_labels] + spread * rng.standard_normal((queries, dim)).astype(np.float32)
+    return _normalize(data).astype(np.float32), _normalize(query).astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    top = np.argpartition(-scores, kth=min(k, scores.shape[1] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(scores, top, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+    return hits / float(truth.size)
+
+
+def _quantize_int8(data: np.ndarray, quantile: float):
+    low = float(np.quantile(data, 1.0 - quantile))
+    high = float(np.quantile(data, quantile))
+    scale = (high - low) / 255.0 or 1.0
+    codes = np.clip(np.round((data - low) / scale), 0, 255).astype(np.uint8)
+    return codes, low, scale
+
+
+def _model_search(policy, data, query, k):
+    settings = policy.get("quantization")
+    if not settings:
+        return _top_k(query @ data.T, k)
+    codes, low, scale = _quantize_int8(data, float(settings.get("quantile") or 1.0))
+    approx = codes.astype(np.float32) * scale + low
+    if not policy.get("rescore"):
+        return _top_k(query @ approx.T, k)
+    candidates = _top_k(query @ approx.T, int(k * float(policy.get("oversampling") or 1.0)))
+    exact = np.einsum("qd,qcd->qc", query, data[candidates])
+    order = exact.argsort(axis=1)[:, ::-1][:, :k]
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def _resident_mb(policy, points: int, dim: int) -> float:
+    if policy.get("quantization") and policy["quantization"].get("always_ram"):
+        per_vector = dim
+    elif policy.get("on_disk"):
+        per_vector = 0
+    else:
+        per_vector = dim * 4
+    return points * per_vector / (1024 * 1024)
+
+
+def _run_qdrant(policy, data, query, truth, k, url):
+    from qdrant_client import QdrantClient
+    from qdrant_client.http import models
+
+    client = QdrantClient(url=url) if url else QdrantClient(":memory:")
+    name = f"chat_bench_{uuid.uuid4().hex[:8]}"
+    client.create_collection(
+        collection_name=name,
+        **collection_kwargs(
+            policy,
+            models.VectorParams(size=data.shape[1], distance=models.Distance.COSINE),
+        ),
+    )
+    try:
+        for start in range(0, len(data), 512):
+            batch = data[start:start + 512]
+            client.upsert(
+                collection_name=name,
+                points=models.Batch(
+                    ids=list(range(start, start + len(batch))),
+                    vectors=batch.tolist(),
+                ),
+                wait=True,
+            )
+        params = search_params(policy)
+        latencies = []
+        found = []
+        for vector in query:
+            started = time.perf_counter()
+            response = client.query_points(
+                collection_name=name,
+                query=vector.tolist(),
+                limit=k,
+                search_params=params,
+            )
+            latencies.append((time.perf_counter() - started) * 1000.0)
+            found.append([int(point.id) for point in response.points])
+        latencies.sort()
+        return {
+            "recall": _recall(np.asarray(found), truth),
+            "p50_ms": statistics.median(latencies),
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+        }
+    finally:
+        client.delete_collection(collection_name=name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--spread",
+        type=float,
+        default=1.0,
+        help="within-topic noise; small values make near-duplicate turns that are hard to rank",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--url", default="", help="Qdrant server URL for the live run")
+    args = parser.parse_args()
+
+    data, query = _corpus(args.points, args.dim, args.queries, args.spread, args.seed)
+    truth = _top_k(query @ data.T, args.k)
+    try:
+        import qdrant_client  # noqa: F401
+        live = True
+    except ImportError:
+        live = False
+
+    print(f"{args.points} points x {args.dim} dims, {args.queries} queries, recall@{args.k}")
+    header = f"{'policy':<10} {'resident MB':>12} {'model recall':>13}"
+    if live:
+        header += f" {'qdrant recall':>14} {'p50 ms':>8} {'p95 ms':>8}"
+    print(header)
+    for name in POLICIES:
+        policy = qdrant_policy(name)
+        line = (
+            f"{name:<10} {_resident_mb(policy, args.points, args.dim):>12.1f}"
+            f" {_recall(_model_search(policy, data, query, args.k), truth):>13.4f}"
+        )
+        if live:
+            measured = _run_qdrant(policy, data, query, truth, args.k, args.url)
+            line += (
+                f" {measured['recall']:>14.4f}"
+                f" {measured['p50_ms']:>8.2f} {measured['p95_ms']:>8.2f}"
+            )
+        print(line)
+    if not live:
+        print("qdrant_client is not installed; live recall/latency skipped")
+
+
+if __name__ == "__main__":
+    main()
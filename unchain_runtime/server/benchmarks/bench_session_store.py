@@ -0,0 +1,122 @@
+"""Compare the JSON-file and SQLite session stores on long sessions.
+
+Simulates the per-turn store traffic of a chat turn against a session that
+already holds N messages: three loads (vector tag, prepare sanitizer,
+commit overlap merge), one save that appends a user/assistant pair, and one
+more load (/memory/session/export). Uses unchain's JsonFileSessionStore when
+importable, otherwise a stand-in with the same whole-file read/rewrite
+behaviour.
+
+    python benchmarks/bench_session_store.py --messages 5000 --turns 50
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from memory_session_store import SqliteSessionStore, close_session_stores  # noqa: E402
+
+
+class _JsonFileStandIn:
+    def __init__(self, base_dir: str) -> None:
+        self.base_dir = base_dir
+
+    def _path(self, session_id: str) -> str:
+        return os.path.join(self.base_dir, f"{session_id}.json")
+
+    def load(self, session_id: str) -> dict:
+        try:
+            with open(self._path(session_id), "r", encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, session_id: str, state: dict) -> None:
+        path = self._path(session_id)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(state, handle, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+
+def _json_store(base_dir: str):
+    try:
+        from unchain.memory.qdrant import JsonFileSessionStore
+
+        return JsonFileSessionStore(base_dir=base_dir), "unchain JsonFileSessionStore"
+    except ImportError:
+        return _JsonFileStandIn(base_dir), "json stand-in"
+
+
+def _message(index: int) -> dict:
+    role = "user" if index % 2 == 0 else "assistant"
+    return {"role": role, "content": f"{role} message {index} " + "lorem ipsum " * 30}
+
+
+def _run_turns(store, messages: int, turns: int) -> dict:
+    state = {
+        "messages": [_message(index) for index in range(messages)],
+        "vector_collection_tag": "bench",
+        "vector_indexed_until": messages,
+    }
+    store.save("bench", state)
+    load_s = save_s = 0.0
+    started = time.perf_counter()
+    for turn in range(turns):
+        for _ in range(3):
+            t0 = time.perf_counter()
+            state = store.load("bench")
+            load_s += time.perf_counter() - t0
+        state["messages"].extend(
+            [_message(messages + 2 * turn), _message(messages + 2 * turn + 1)]
+        )
+        state["vector_indexed_until"] = len(state["messages"])
+        t0 = time.perf_counter()
+        store.save("bench", state)
+        save_s += time.perf_counter() - t0
+        t0 = time.perf_counter()
+        store.load("bench")
+        load_s += time.perf_counter() - t0
+    total = time.perf_counter() - started
+    return {
+        "turn_ms": total / turns * 1000,
+        "load_ms": load_s / (turns * 4) * 1000,
+        "save_ms": save_s / turns * 1000,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"session with {args.messages} messages, {args.turns} turns")
+    print(f"{'store':>30} {'turn ms':>8} {'load ms':>8} {'save ms':>8} {'disk MB':>8}")
+    for name in ("json", "sqlite"):
+        with tempfile.TemporaryDirectory() as base_dir:
+            if name == "json":
+                store, label = _json_store(base_dir)
+            else:
+                store, label = SqliteSessionStore(base_dir), "sqlite (WAL)"
+            row = _run_turns(store, args.messages, args.turns)
+            disk = sum(path.stat().st_size for path in Path(base_dir).iterdir()) / 1e6
+            close_session_stores()
+        print(
+            f"{label:>30} {row['turn_ms']:>8.1f} {row['load_ms']:>8.2f} "
+            f"{row['save_ms']:>8.2f} {disk:>8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,128 @@
+"""Measure SSE frame rate and consumer CPU per token with and without
+delta coalescing.
+
+Each simulated stream has a producer thread pushing ``token_delta`` events
+into a queue at a fixed token rate (like the agent runner does), and a
+consumer that drains the queue through ``stream_coalescing.drain_event_queue``
+and builds /chat/stream/v2 frames with ``route_chat._build_trace_frame`` and
+``route_chat._sse_event``.
+
+    python benchmarks/bench_sse_coalescing.py --streams 20 --tokens 2000 --rate 150
+"""
+from __future__ import annotations
+
+import argparse
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+from route_chat import _build_trace_frame, _sse_event  # noqa: E402
+from stream_coalescing import drain_event_queue  # noqa: E402
+
+
+def _produce(event_queue: "queue.Queue[object]", done: object, tokens: int, rate: float) -> None:
+    interval = 1.0 / rate if rate > 0 else 0.0
+    next_at = time.perf_counter()
+    for index in range(tokens):
+        event_queue.put(
+            {
+                "type": "token_delta",
+                "run_id": "run-bench",
+                "iteration": 0,
+                "timestamp": time.time(),
+                "delta": f"tok{index % 10} ",
+            }
+        )
+        if interval:
+            next_at += interval
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+    event_queue.put(done)
+
+
+def _consume(
+    event_queue: "queue.Queue[object]",
+    done: object,
+    coalesce_ms: float,
+    result: dict,
+) -> None:
+    cpu_start = time.thread_time()
+    seq = 0
+    written = 0
+    for item in drain_event_queue(event_queue, done, coalesce_ms=coalesce_ms):
+        payload = {key: value for key, value in item.items() if key not in {"type", "run_id", "iteration", "timestamp"}}
+        seq += 1
+        frame = _sse_event(
+            "frame",
+            _build_trace_frame(
+                seq=seq,
+                event_type=item["type"],
+                payload=payload,
+                run_id=item["run_id"],
+                iteration=item["iteration"],
+            ),
+        )
+        written += len(frame)
+    result["frames"] = seq
+    result["bytes"] = written
+    result["cpu"] = time.thread_time() - cpu_start
+
+
+def run(streams: int, tokens: int, rate: float, coalesce_ms: float) -> dict:
+    results = [dict() for _ in range(streams)]
+    threads = []
+    started = time.perf_counter()
+    for index in range(streams):
+        event_queue: "queue.Queue[object]" = queue.Queue()
+        done = object()
+        threads.append(threading.Thread(target=_produce, args=(event_queue, done, tokens, rate)))
+        threads.append(
+            threading.Thread(target=_consume, args=(event_queue, done, coalesce_ms, results[index]))
+        )
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    frames = sum(item["frames"] for item in results)
+    cpu = sum(item["cpu"] for item in results)
+    total_tokens = streams * tokens
+    return {
+        "coalesce_ms": coalesce_ms,
+        "frames": frames,
+        "frames_per_s": frames / elapsed,
+        "tokens_per_frame": total_tokens / max(1, frames),
+        "cpu_us_per_token": cpu / total_tokens * 1e6,
+        "elapsed_s": elapsed,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=150.0, help="tokens/s per stream")
+    parser.add_argument("--windows", default="0,10,25,50", help="coalesce_ms values")
+    args = parser.parse_args()
+
+    print(f"{args.streams} streams x {args.tokens} tokens at {args.rate:g} tok/s")
+    print(f"{'coalesce_ms':>11} {'frames':>8} {'frames/s':>10} {'tok/frame':>10} {'cpu us/tok':>11}")
+    for window in (float(value) for value in args.windows.split(",") if value.strip()):
+        row = run(args.streams, args.tokens, args.rate, window)
+        print(
+            f"{row['coalesce_ms']:>11g} {row['frames']:>8} {row['frames_per_s']:>10.0f} "
+            f"{row['tokens_per_frame']:>10.1f} {row['cpu_us_per_token']:>11.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,383 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+# Chat runs decoupled from the HTTP connection that started them.
+#
+# A run's frames are produced on a pump thread and appended to a bounded,
+# per-thread_id ring buffer. HTTP responses only tail that buffer, so a client
+# that drops its connection can reattach with Last-Event-ID (the frame seq)
+# and replay what it missed. Frames that fall out of the ring can optionally
+# be spilled to <UNCHAIN_DATA_DIR>/chat_streams/ so long runs stay replayable.
+#
+# A resumable run keeps going without subscribers until it is cancelled
+# explicitly or stays unattended for the idle TTL. A non-resumable run is
+# cancelled as soon as its last subscriber disconnects (the pre-existing
+# behaviour). Finished runs stay replayable for a retention period.
+
+DEFAULT_BUFFER_FRAMES = 2000
+DEFAULT_IDLE_TTL_SECONDS = 120.0
+DEFAULT_RETENTION_SECONDS = 300.0
+KEEPALIVE_SECONDS = 15.0
+REAPER_INTERVAL_SECONDS = 5.0
+
+_registry_lock = threading.Lock()
+_runs: Dict[str, "ChatRun"] = {}
+_reaper_thread: threading.Thread | None = None
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return default
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    raw = os.environ.get(name, "").strip().lower()
+    if not raw:
+        return default
+    return raw in {"1", "true", "yes", "on"}
+
+
+def resumable_by_default() -> bool:
+    return _env_flag("UNCHAIN_CHAT_RESUMABLE_DEFAULT")
+
+
+def _buffer_frames() -> int:
+    return max(1, int(_env_float("UNCHAIN_CHAT_RESUME_BUFFER_FRAMES", DEFAULT_BUFFER_FRAMES)))
+
+
+def _idle_ttl_seconds() -> float:
+    return _env_float("UNCHAIN_CHAT_RESUME_IDLE_SECONDS", DEFAULT_IDLE_TTL_SECONDS)
+
+
+def _retention_seconds() -> float:
+    return _env_float("UNCHAIN_CHAT_RESUME_RETENTION_SECONDS", DEFAULT_RETENTION_SECONDS)
+
+
+def _spill_dir() -> Path | None:
+    if not _env_flag("UNCHAIN_CHAT_RESUME_SPILL"):
+        return None
+    data_dir = os.environ.get("UNCHAIN_DATA_DIR", "").strip()
+    if not data_dir:
+        return None
+    return Path(data_dir) / "chat_streams"
+
+
+def _safe_filename(value: str) -> str:
+    cleaned = "".join(char if char.isalnum() or char in "-_" else "_" for char in value)
+    return cleaned[:120] or "thread"
+
+
+class ChatRun:
+    def __init__(
+        self,
+        thread_id: str,
+        *,
+        resumable: bool,
+        on_cancel: Callable[[], None] | None = None,
+        now_fn: Callable[[], float] = time.time,
+    ) -> None:
+        self.thread_id = thread_id
+        self.resumable = resumable
+        self._on_cancel = on_cancel
+        self._now = now_fn
+        self._cond = threading.Condition()
+        self._frames: "deque[Tuple[int, str]]" = deque(maxlen=_buffer_frames())
+        self._last_seq = 0
+        self._subscribers = 0
+        self._finished = False
+        self._cancelled = False
+        self._finished_at = 0.0
+        self._last_attended_at = now_fn()
+        self._spilled_through = 0
+        spill_dir = _spill_dir()
+        self._spill_path = (
+            spill_dir / f"{_safe_filename(thread_id)}-{int(self._last_attended_at * 1000)}.jsonl"
+            if spill_dir is not None
+            else None
+        )
+
+    # ── producer side ──
+
+    def append(self, seq: int, text: str) -> None:
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self._spill(self._frames[0])
+            self._frames.append((seq, text))
+            self._last_seq = seq
+            self._cond.notify_all()
+
+    def finish(self) -> None:
+        with self._cond:
+            self._finished = True
+            self._finished_at = self._now()
+            self._cond.notify_all()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def finished(self) -> bool:
+        return self._finished
+
+    def cancel(self) -> None:
+        with self._cond:
+            if self._cancelled or self._finished:
+                already = True
+            else:
+                already = False
+                self._cancelled = True
+            self._cond.notify_all()
+        if not already and callable(self._on_cancel):
+            try:
+                self._on_cancel()
+            except Exception:
+                pass
+
+    def _spill(self, frame: Tuple[int, str]) -> None:
+        if self._spill_path is None:
+            return
+        try:
+            self._spill_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._spill_path.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps({"seq": frame[0], "text": frame[1]}, ensure_ascii=False))
+                handle.write("\n")
+            self._spilled_through = frame[0]
+        except OSError:
+            self._spill_path = None
+
+    def _read_spill(self, after_seq: int, before_seq: int) -> List[Tuple[int, str]]:
+        if self._spill_path is None or not self._spill_path.exists():
+            return []
+        frames: List[Tuple[int, str]] = []
+        try:
+            with self._spill_path.open("r", encoding="utf-8") as handle:
+                for line in handle:
+                    record = json.loads(line)
+                    seq = int(record["seq"])
+                    if after_seq < seq < before_seq:
+                        frames.append((seq, str(record["text"])))
+        except (OSError, ValueError, KeyError):
+            return frames
+        return frames
+
+    def discard_spill(self) -> None:
+        if self._spill_path is None:
+            return
+        try:
+            self._spill_path.unlink()
+        except OSError:
+            pass
+
+    # ── consumer side ──
+
+    def attach(self) -> None:
+        with self._cond:
+            self._subscribers += 1
+            self._last_attended_at = self._now()
+
+    def detach(self, *, disconnected: bool = False) -> None:
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+            self._last_attended_at = self._now()
+            orphaned = self._subscribers == 0 and not self._finished
+        if disconnected and orphaned and not self.resumable:
+            self.cancel()
+
+    def read_after(
+        self,
+        after_seq: int,
+        *,
+        timeout: float,
+    ) -> Tuple[List[Tuple[int, str]], int | None, bool]:
+        """Return ``(frames, gap_until, done)`` for frames with seq > after_seq.
+
+        Blocks up to *timeout* when nothing new is buffered. ``gap_until`` is
+        the first available seq when frames between were lost.
+        """
+        with self._cond:
+            if self._last_seq <= after_seq and not self._finished and not self._cancelled:
+                self._cond.wait(timeout=timeout)
+            buffered = [frame for frame in self._frames if frame[0] > after_seq]
+            oldest = self._frames[0][0] if self._frames else self._last_seq + 1
+            done = self._finished or self._cancelled
+            self._last_attended_at = self._now()
+
+        frames: List[Tuple[int, str]] = []
+        gap_until = None
+        if after_seq + 1 < oldest and buffered:
+            frames = self._read_spill(after_seq, oldest)
+            first_seq = frames[0][0] if frames else oldest
+            if first_seq > after_seq + 1:
+                gap_until = first_seq
+        frames.extend(buffered)
+        return frames, gap_until, done and not buffered
+
+    def is_expired(self, now: float) -> bool:
+        with self._cond:
+            if self._finished or self._cancelled:
+                finished_at = self._finished_at or self._last_attended_at
+                return now - finished_at >= _retention_seconds()
+            return False
+
+    def is_abandoned(self, now: float) -> bool:
+        with self._cond:
+            return (
+                not self._finished
+                and not self._cancelled
+                and self._subscribers == 0
+                and now - self._last_attended_at >= _idle_ttl_seconds()
+            )
+
+    def status(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "thread_id": self.thread_id,
+                "last_seq": self._last_seq,
+                "first_buffered_seq": self._frames[0][0] if self._frames else 0,
+                "subscribers": self._subscribers,
+                "finished": self._finished,
+                "cancelled": self._cancelled,
+                "resumable": self.resumable,
+            }
+
+
+def _ensure_reaper_locked() -> None:
+    global _reaper_thread
+    if _reaper_thread is not None and _reaper_thread.is_alive():
+        return
+
+    def reap() -> None:
+        while True:
+            time.sleep(REAPER_INTERVAL_SECONDS)
+            sweep_chat_runs()
+
+    _reaper_thread = threading.Thread(
+        target=reap,
+        name="unchain-chat-run-reaper",
+        daemon=True,
+    )
+    _reaper_thread.start()
+
+
+def sweep_chat_runs(now_fn: Callable[[], float] | None = None) -> int:
+    """Cancel abandoned runs and forget expired ones. Returns runs removed."""
+    now = (now_fn or time.time)()
+    with _registry_lock:
+        runs = list(_runs.items())
+    removed = 0
+    for thread_id, run in runs:
+        if run.is_abandoned(now):
+            run.cancel()
+        if run.is_expired(now):
+            with _registry_lock:
+                if _runs.get(thread_id) is run:
+                    _runs.pop(thread_id, None)
+                    removed += 1
+            run.discard_spill()
+    return removed
+
+
+def start_chat_run(
+    thread_id: str,
+    frames: Callable[["ChatRun"], Iterable[Tuple[int, str]]],
+    *,
+    resumable: bool,
+    on_cancel: Callable[[], None] | None = None,
+) -> ChatRun:
+    """Register a run for *thread_id* and pump ``frames(run)`` on a thread.
+
+    ``frames`` yields ``(seq, sse_text)`` pairs and should stop promptly once
+    ``run.cancelled`` is set. A previous unfinished run on the same thread is
+    cancelled.
+    """
+    run = ChatRun(thread_id, resumable=resumable, on_cancel=on_cancel)
+    with _registry_lock:
+        previous = _runs.get(thread_id)
+        _runs[thread_id] = run
+        _ensure_reaper_locked()
+    if previous is not None:
+        previous.cancel()
+        previous.discard_spill()
+
+    def pump() -> None:
+        iterator = iter(frames(run))
+        try:
+            for seq, text in iterator:
+                run.append(seq, text)
+                if run.cancelled:
+                    break
+        finally:
+            close = getattr(iterator, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:
+                    pass
+            run.finish()
+
+    threading.Thread(target=pump, name="unchain-chat-run-pump", daemon=True).start()
+    return run
+
+
+def get_chat_run(thread_id: str) -> ChatRun | None:
+    with _registry_lock:
+        return _runs.get(str(thread_id or "").strip())
+
+
+def cancel_chat_run(thread_id: str) -> bool:
+    run = get_chat_run(thread_id)
+    if run is None or run.finished:
+        return False
+    run.cancel()
+    return True
+
+
+def iter_chat_run_frames(
+    run: ChatRun,
+    *,
+    after_seq: int = 0,
+    keepalive_seconds: float = KEEPALIVE_SECONDS,
+) -> Iterator[str]:
+    """Replay frames after *after_seq*, then tail live ones until the run ends."""
+    run.attach()
+    disconnected = False
+    cursor = max(0, int(after_seq))
+    try:
+        while True:
+            frames, gap_until, done = run.read_after(cursor, timeout=keepalive_seconds)
+            if gap_until is not None:
+                yield (
+                    "event: replay_gap\n"
+                    f"data: {json.dumps({'after_seq': cursor, 'resumed_at_seq': gap_until})}\n\n"
+                )
+            for seq, text in frames:
+                cursor = seq
+                yield text
+            if done:
+                return
+            if not frames:
+                yield ": keep-alive\n\n"
+    except GeneratorExit:
+        disconnected = True
+        raise
+    finally:
+        run.detach(disconnected=disconnected)
+
+
+def chat_run_stats() -> Dict[str, Any]:
+    with _registry_lock:
+        runs = list(_runs.values())
+    return {"runs": [run.status() for run in runs]}
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import dataclasses
+import decimal
+import json
+import os
+import uuid
+from datetime import date
+from functools import lru_cache
+from typing import Any
+
+from flask import Response
+from werkzeug.http import http_date
+
+try:
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - optional speedup
+    _orjson = None  # type: ignore
+
+try:
+    import numpy as _np
+except ImportError:  # pragma: no cover - numpy ships with the projection deps
+    _np = None  # type: ignore
+
+# JSON encoding for SSE frames and large JSON routes.
+#
+# orjson is used when importable (about an order of magnitude faster, and it
+# writes numpy arrays/scalars without a Python round trip); otherwise the
+# stdlib encoder with the same output settings the routes always used.
+# UNCHAIN_JSON_BACKEND=stdlib forces the fallback.
+
+if _orjson is not None:
+    _ORJSON_OPTIONS = _orjson.OPT_SERIALIZE_NUMPY | _orjson.OPT_NON_STR_KEYS
+    # Responses keep jsonify's output: sorted keys, and dates/dataclasses
+    # routed through _response_default instead of orjson's native encoding.
+    _ORJSON_RESPONSE_OPTIONS = (
+        _ORJSON_OPTIONS
+        | _orjson.OPT_SORT_KEYS
+        | _orjson.OPT_PASSTHROUGH_DATETIME
+        | _orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+else:
+    _ORJSON_OPTIONS = 0
+    _ORJSON_RESPONSE_OPTIONS = 0
+
+
+def _default(value: Any) -> Any:
+    if _np is not None:
+        if isinstance(value, _np.ndarray):
+            return value.tolist()
+        if isinstance(value, _np.generic):
+            return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    return str(value)
+
+
+def _response_default(value: Any) -> Any:
+    # Same conversions as Flask's DefaultJSONProvider, then the shared fallback.
+    if isinstance(value, date):
+        return http_date(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return dataclasses.asdict(value)
+    if hasattr(value, "__html__"):
+        return str(value.__html__())
+    return _default(value)
+
+
+def json_backend() -> str:
+    forced = os.environ.get("UNCHAIN_JSON_BACKEND", "").strip().lower()
+    if forced == "stdlib" or _orjson is None:
+        return "stdlib"
+    return "orjson"
+
+
+def _stdlib_dumps(payload: Any) -> str:
+    return json.dumps(payload, ensure_ascii=False, default=_default)
+
+
+def dumps_bytes(payload: Any) -> bytes:
+    """Encode *payload* as UTF-8 JSON bytes."""
+    if json_backend() == "orjson":
+        try:
+            return _orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. ints beyond 64 bits or non-str dict keys orjson refuses
+            pass
+    return _stdlib_dumps(payload).encode("utf-8")
+
+
+def dumps_text(payload: Any) -> str:
+    """Encode *payload* as a JSON string."""
+    if json_backend() == "orjson":
+        try:
+            return _orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS).decode("utf-8")
+        except TypeError:
+            pass
+    return _stdlib_dumps(payload)
+
+
+@lru_cache(maxsize=64)
+def sse_prefix(event_name: str) -> str:
+    """Static ``event:``/``data:`` head of an SSE frame, built once per name."""
+    return f"event: {event_name}\ndata: "
+
+
+def sse_event_text(event_name: str, payload: Any) -> str:
+    return f"{sse_prefix(event_name)}{dumps_text(payload)}\n\n"
+
+
+def _dumps_response(payload: Any) -> bytes:
+    if json_backend() == "orjson":
+        try:
+            return _orjson.dumps(
+                payload,
+                default=_response_default,
+                option=_ORJSON_RESPONSE_OPTIONS,
+            )
+        except TypeError:
+            pass
+    return json.dumps(
+        payload,
+        ensure_ascii=False,
+        sort_keys=True,
+        default=_response_default,
+    ).encode("utf-8")
+
+
+def json_response(payload: Any, status: int = 200) -> Response:
+    """``jsonify`` replacement that encodes through the fast backend.
+
+    Keys are sorted and dates, decimals, UUIDs and dataclasses are converted
+    as Flask's default provider does; non-ASCII text is written as UTF-8
+    rather than ``\\u`` escapes, which decodes to the same values.
+    """
+    return Response(_dumps_response(payload), status=status, mimetype="application/json")
@@ -30,6 +30,18 @@ def _read_parent_pid() -> int:
         return 0
 
 
+def _create_server(app, host: str, port: int):
+    mode = os.environ.get("UNCHAIN_SERVER_MODE", "").strip().lower()
+    if mode == "asgi":
+        try:
+            from asgi_server import AsgiServer
+
+            return AsgiServer(app, host=host, port=port)
+        except Exception as exc:
+            print(f"[unchain] asgi mode unavailable ({exc}), using threaded server", flush=True)
+    return ThreadedFlaskServer(app, host=host, port=port)
+
+
 def main() -> int:
     host = os.environ.get("UNCHAIN_HOST", "127.0.0.1")
     port = _read_port()
@@ -56,7 +68,7 @@ def main() -> int:
         )
 
     app = create_app()
-    server = ThreadedFlaskServer(app, host=host, port=port)
+    server = _create_server(app, host, port)
 
     shutdown_event = threading.Event()
 
@@ -96,12 +108,60 @@ def main() -> int:
     try:
         server.start()
         print(f"[unchain] listening on http://{host}:{port}", flush=True)
+        try:
+            from ollama_inventory import start_ollama_inventory_refresher
+
+            start_ollama_inventory_refresher()
+        except Exception:
+            pass
+        try:
+            from memory_commit_worker import start_memory_commit_worker
+
+            start_memory_commit_worker()
+        except Exception:
+            pass
+        try:
+            from mcp_session_pool import start_mcp_session_warmer
+
+            start_mcp_session_warmer()
+        except Exception:
+            pass
+        try:
+            from mcp_health_monitor import start_mcp_health_monitor
+
+            start_mcp_health_monitor()
+        except Exception:
+            pass
         while not shutdown_event.is_set():
             time.sleep(0.2)
     except KeyboardInterrupt:
         shutdown_event.set()
     finally:
         server.stop()
+        try:
+            from memory_commit_worker import close_memory_commit_workers
+
+            close_memory_commit_workers()
+        except Exception:
+            pass
+        try:
+            from mcp_health_monitor import stop_mcp_health_monitor
+
+            stop_mcp_health_monitor()
+        except Exception:
+            pass
+        try:
+            from mcp_session_pool import close_all_mcp_sessions
+
+            close_all_mcp_sessions()
+        except Exception:
+            pass
+        try:
+            from ollama_client import close_ollama_clients
+
+            close_ollama_clients()
+        except Exception:
+            pass
         print("[unchain] server stopped", flush=True)
 
     return 0
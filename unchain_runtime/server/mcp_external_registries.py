@@ -11,6 +11,7 @@ from urllib.parse import urlparse
 from urllib.request import Request, urlopen
 
 import mcp_registry
+from mcp_json_store import JsonDocumentStore
 from mcp_permission_audit import (
     audit_mcp_registry_entry,
     recipe_hash_for_entry,
@@ -61,52 +62,64 @@ def _empty_approval_store() -> Dict[str, Any]:
     return {"version": 1, "approvals": []}
 
 
-def _read_store(data_dir: str | Path | None = None) -> Dict[str, Any]:
-    path = _store_path(data_dir)
-    if not path.exists():
-        return _empty_store()
-    try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return _empty_store()
+def _normalize_store(raw: Any) -> Dict[str, Any] | None:
     if not isinstance(raw, dict) or not isinstance(raw.get("registries"), list):
-        return _empty_store()
+        return None
     return {
         "version": 1,
         "registries": [item for item in raw["registries"] if isinstance(item, dict)],
     }
 
 
-def _read_approval_store(data_dir: str | Path | None = None) -> Dict[str, Any]:
-    path = _approval_store_path(data_dir)
-    if not path.exists():
-        return _empty_approval_store()
-    try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return _empty_approval_store()
+def _normalize_approval_store(raw: Any) -> Dict[str, Any] | None:
     if not isinstance(raw, dict) or not isinstance(raw.get("approvals"), list):
-        return _empty_approval_store()
+        return None
     return {
         "version": 1,
         "approvals": [item for item in raw["approvals"] if isinstance(item, dict)],
     }
 
 
+def _index_store(store: Dict[str, Any]) -> Dict[str, Any]:
+    """entry id and toolkit id -> (registry, entry), first match wins."""
+    index: Dict[str, Any] = {}
+    for registry in store["registries"]:
+        for entry in registry.get("entries") or []:
+            if not isinstance(entry, dict):
+                continue
+            for key in (entry.get("entry_id"), entry.get("toolkit_id")):
+                if key:
+                    index.setdefault(str(key), (registry, entry))
+    return index
+
+
+_STORE = JsonDocumentStore(empty=_empty_store, normalize=_normalize_store, index=_index_store)
+_APPROVAL_STORE = JsonDocumentStore(
+    empty=_empty_approval_store,
+    normalize=_normalize_approval_store,
+    private=True,
+)
+
+
+def _read_store(data_dir: str | Path | None = None) -> Dict[str, Any]:
+    return _STORE.read(_store_path(data_dir))
+
+
+def _read_approval_store(data_dir: str | Path | None = None) -> Dict[str, Any]:
+    return _APPROVAL_STORE.read(_approval_store_path(data_dir))
+
+
+def _approvals(data_dir: str | Path | None = None) -> List[Dict[str, Any]]:
+    """Stored approvals; shared with the store cache."""
+    return _APPROVAL_STORE.snapshot(_approval_store_path(data_dir))["approvals"]
+
+
 def _write_store(store: Dict[str, Any], data_dir: str | Path | None = None) -> None:
-    path = _store_path(data_dir)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(store, indent=2, sort_keys=True), encoding="utf-8")
+    _STORE.write(_store_path(data_dir), store)
 
 
 def _write_approval_store(store: Dict[str, Any], data_dir: str | Path | None = None) -> None:
-    path = _approval_store_path(data_dir)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(store, indent=2, sort_keys=True), encoding="utf-8")
-    try:
-        path.chmod(0o600)
-    except OSError:
-        pass
+    _APPROVAL_STORE.write(_approval_store_path(data_dir), store)
 
 
 def _clean_str(value: Any) -> str:
@@ -179,7 +192,8 @@ def _parse_inline_registry(raw: Any) -> Dict[str, Any]:
 
 
 def _all_external_records(data_dir: str | Path | None = None) -> List[Dict[str, Any]]:
-    return list(_read_store(data_dir)["registries"])
+    """Stored registries; shared with the store cache, do not mutate."""
+    return list(_STORE.snapshot(_store_path(data_dir))["registries"])
 
 
 def _external_id_sets(
@@ -467,10 +481,7 @@ def external_entry_exists(
     normalized = str(entry_or_toolkit_id or "").strip()
     if not normalized:
         return False
-    for entry in external_registry_entries(data_dir=data_dir):
-        if entry.get("entry_id") == normalized or entry.get("toolkit_id") == normalized:
-            return True
-    return False
+    return _STORE.lookup(_store_path(data_dir), normalized) is not None
 
 
 def external_registry_entry(
@@ -479,10 +490,14 @@ def external_registry_entry(
     data_dir: str | Path | None = None,
 ) -> Dict[str, Any] | None:
     normalized = str(entry_id or "").strip()
-    for entry in external_registry_entries(data_dir=data_dir):
-        if entry.get("entry_id") == normalized:
-            return copy.deepcopy(entry)
-    return None
+    found = _STORE.lookup(_store_path(data_dir), normalized) if normalized else None
+    if found is None or found[1].get("entry_id") != normalized:
+        for registry in _all_external_records(data_dir):
+            for entry in registry.get("entries") or []:
+                if isinstance(entry, dict) and entry.get("entry_id") == normalized:
+                    return copy.deepcopy(entry)
+        return None
+    return copy.deepcopy(found[1])
 
 
 def _external_entry_record(
@@ -493,6 +508,11 @@ def _external_entry_record(
 ) -> tuple[Dict[str, Any], Dict[str, Any]]:
     normalized_entry_id = str(entry_id or "").strip()
     normalized_registry_id = str(registry_id or "").strip()
+    found = _STORE.lookup(_store_path(data_dir), normalized_entry_id) if normalized_entry_id else None
+    if found is not None and (
+        not normalized_registry_id or found[0].get("registry_id") == normalized_registry_id
+    ):
+        return found
     for registry in _all_external_records(data_dir):
         if normalized_registry_id and registry.get("registry_id") != normalized_registry_id:
             continue
@@ -517,7 +537,7 @@ def approved_external_registry_entry(
     data_dir: str | Path | None = None,
 ) -> Dict[str, Any]:
     registry, entry = _external_entry_record(entry_id, data_dir=data_dir)
-    approval = _approval_for_entry(entry, _read_approval_store(data_dir)["approvals"])
+    approval = _approval_for_entry(entry, _approvals(data_dir))
     status = _approval_status(entry, approval)
     if status == "missing":
         raise McpExternalRegistryError(
@@ -540,7 +560,7 @@ def list_mcp_store_entries(
 ) -> Dict[str, Any]:
     curated = [_entry_to_frontend(entry) for entry in mcp_registry.registry_entries()]
     external: List[Dict[str, Any]] = []
-    approvals = _read_approval_store(data_dir)["approvals"]
+    approvals = _approvals(data_dir)
     for registry in _all_external_records(data_dir):
         for entry in registry.get("entries") or []:
             if isinstance(entry, dict):
@@ -564,7 +584,7 @@ def list_mcp_store_registries(
     *,
     data_dir: str | Path | None = None,
 ) -> Dict[str, Any]:
-    approvals = _read_approval_store(data_dir)["approvals"]
+    approvals = _approvals(data_dir)
     registries = [_registry_to_frontend(record, approvals) for record in _all_external_records(data_dir)]
     return {"registries": registries, "count": len(registries), "status": "ok"}
 
@@ -809,7 +829,7 @@ def import_mcp_store_registry(
     }
     store["registries"].append(record)
     _write_store(store, data_dir)
-    return {"registry": _registry_to_frontend(record, _read_approval_store(data_dir)["approvals"])}
+    return {"registry": _registry_to_frontend(record, _approvals(data_dir))}
 
 
 def _registry_record(
@@ -867,7 +887,7 @@ def refresh_mcp_store_registry(
         record["last_error"] = str(exc)
         record["status"] = "error"
     _write_store(store, data_dir)
-    return {"registry": _registry_to_frontend(record, _read_approval_store(data_dir)["approvals"])}
+    return {"registry": _registry_to_frontend(record, _approvals(data_dir))}
 
 
 def delete_mcp_store_registry(
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import mcp_toolkits
+from agent_blueprint_cache import invalidate_agent_blueprints
+
+# Background health monitor for installed MCP toolkits.
+#
+# Status and tool lists used to change only when someone called
+# check_mcp_toolkit_health or reload_mcp_toolkits. A daemon thread now wakes
+# every few seconds and checks at most a small batch of toolkits that are due:
+#
+#   healthy   due again after the interval, plus up to 10% per-toolkit jitter
+#             so toolkits installed or reloaded together drift apart
+#   failing   retried after 60s, 120s, 240s, ... capped at an hour
+#
+# A toolkit with an idle session in mcp_session_pool is checked on that live
+# session (probe + its tool list) instead of spawning the server again; the
+# rest go through the same bounded, deadline-guarded checks as reload.
+#
+# Results land in mcp_toolkits.json with the tool manifest's schema hash and
+# the schedule (next_check_at, consecutive_failures), so
+# list_installed_mcp_toolkits and the toolkit catalogs keep reading the store
+# and never start a subprocess. A changed schema hash invalidates cached
+# agent blueprints. A result is dropped when the record was rewritten (install,
+# configure, reload) while the check ran.
+
+DEFAULT_INTERVAL_SECONDS = 900.0
+DEFAULT_FAILURE_BACKOFF_SECONDS = 60.0
+DEFAULT_MAX_BACKOFF_SECONDS = 3600.0
+DEFAULT_BATCH_SIZE = 2
+DEFAULT_TICK_SECONDS = 15.0
+STAGGER_FRACTION = 0.1
+
+_monitor_lock = threading.Lock()
+_monitor_wakeup = threading.Event()
+_monitor_stop = threading.Event()
+_monitor_thread: threading.Thread | None = None
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1.0, float(raw))
+    except ValueError:
+        return default
+
+
+def monitor_enabled() -> bool:
+    raw = os.environ.get("UNCHAIN_MCP_HEALTH_MONITOR", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def _interval_seconds() -> float:
+    return _env_float("UNCHAIN_MCP_HEALTH_INTERVAL_SECONDS", DEFAULT_INTERVAL_SECONDS)
+
+
+def _tick_seconds() -> float:
+    return _env_float("UNCHAIN_MCP_HEALTH_TICK_SECONDS", DEFAULT_TICK_SECONDS)
+
+
+def _batch_size() -> int:
+    return _env_int("UNCHAIN_MCP_HEALTH_BATCH", DEFAULT_BATCH_SIZE)
+
+
+def _stagger(toolkit_id: str) -> float:
+    digest = hashlib.sha1(toolkit_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:4], "big") / float(1 << 32)
+
+
+def _toolkit_id(record: Dict[str, Any]) -> str:
+    return str(record.get("toolkit_id") or "")
+
+
+def _due_at(record: Dict[str, Any], interval: float) -> float:
+    next_check_at = record.get("next_check_at")
+    if isinstance(next_check_at, (int, float)) and next_check_at > 0:
+        return float(next_check_at)
+    last_checked_at = float(record.get("last_checked_at") or 0)
+    return last_checked_at + interval * (1.0 + STAGGER_FRACTION * _stagger(_toolkit_id(record)))
+
+
+def _schedule_next(
+    checked: Dict[str, Any],
+    previous: Dict[str, Any],
+    *,
+    now: float,
+    interval: float,
+) -> None:
+    if checked.get("status") == "available":
+        failures = 0
+        delay = interval * (1.0 + STAGGER_FRACTION * _stagger(_toolkit_id(checked)))
+    else:
+        failures = int(previous.get("consecutive_failures") or 0) + 1
+        delay = min(
+            DEFAULT_MAX_BACKOFF_SECONDS,
+            DEFAULT_FAILURE_BACKOFF_SECONDS * (2 ** min(failures - 1, 16)),
+        )
+    checked["consecutive_failures"] = failures
+    checked["next_check_at"] = now + delay
+
+
+def run_mcp_health_checks(
+    data_dir: str | Path | None = None,
+    *,
+    limit: int | None = None,
+    toolkit_factory: Callable[..., Any] | None = None,
+    now_fn: Callable[[], float] | None = None,
+) -> Dict[str, Any]:
+    """Check the toolkits that are due, oldest first, and store the results."""
+    clock = now_fn or time.time
+    interval = _interval_seconds()
+    now = clock()
+    records = mcp_toolkits._read_store(data_dir)["toolkits"]
+    due = sorted(
+        (record for record in records if _due_at(record, interval) <= now),
+        key=lambda record: _due_at(record, interval),
+    )[: limit or _batch_size()]
+    if not due:
+        return {"checked": [], "pooled": [], "schemaChanged": []}
+
+    checked: Dict[str, Dict[str, Any]] = {}
+    pooled: List[str] = []
+    spawn: List[Dict[str, Any]] = []
+    for record in due:
+        result = mcp_toolkits._check_record_with_pooled_session(record, now_fn=clock)
+        if result is None:
+            spawn.append(record)
+            continue
+        checked[_toolkit_id(record)] = result
+        pooled.append(_toolkit_id(record))
+    for index, result in mcp_toolkits._iter_record_health(
+        spawn,
+        data_dir=data_dir,
+        toolkit_factory=toolkit_factory,
+        now_fn=clock,
+    ):
+        checked[_toolkit_id(spawn[index])] = result
+
+    finished_at = clock()
+    schema_changed = []
+    for record in due:
+        result = checked[_toolkit_id(record)]
+        _schedule_next(result, record, now=finished_at, interval=interval)
+        if (
+            result.get("status") == "available"
+            and result.get("tools_schema_hash") != record.get("tools_schema_hash")
+        ):
+            schema_changed.append(_toolkit_id(record))
+    mcp_toolkits._merge_checked_records(
+        checked,
+        data_dir,
+        checked_since={_toolkit_id(record): record.get("last_checked_at") for record in due},
+    )
+    if schema_changed:
+        invalidate_agent_blueprints()
+    return {
+        "checked": [_toolkit_id(record) for record in due],
+        "pooled": pooled,
+        "schemaChanged": schema_changed,
+    }
+
+
+def _monitor_loop(data_dir: str | Path | None) -> None:
+    while not _monitor_stop.is_set():
+        _monitor_wakeup.wait(timeout=_tick_seconds())
+        _monitor_wakeup.clear()
+        if _monitor_stop.is_set():
+            break
+        try:
+            run_mcp_health_checks(data_dir)
+        except Exception:
+            # A broken store or registry must not kill the monitor; the next
+            # tick retries.
+            continue
+
+
+def start_mcp_health_monitor(data_dir: str | Path | None = None) -> bool:
+    """Start the background monitor; returns False when it is disabled."""
+    global _monitor_thread
+    if not monitor_enabled():
+        return False
+    with _monitor_lock:
+        if _monitor_thread is not None and _monitor_thread.is_alive():
+            return True
+        _monitor_stop.clear()
+        _monitor_thread = threading.Thread(
+            target=_monitor_loop,
+            args=(data_dir,),
+            name="unchain-mcp-health-monitor",
+            daemon=True,
+        )
+        _monitor_thread.start()
+    return True
+
+
+def stop_mcp_health_monitor(timeout: float = 5.0) -> None:
+    global _monitor_thread
+    with _monitor_lock:
+        thread = _monitor_thread
+        _monitor_thread = None
+    _monitor_stop.set()
+    _monitor_wakeup.set()
+    if thread is not None:
+        thread.join(timeout)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+# Shared storage for the MCP JSON files (installed toolkits, external
+# registries and approvals, store metadata, secrets).
+#
+# Each file used to be read and json-parsed on every call, and lookups by id
+# scanned the parsed lists; resolving one toolkit for a chat turn read two or
+# three files. A JsonDocumentStore keeps the parsed document in memory per
+# path, together with an id index, and revalidates it with a single stat()
+# (mtime_ns, inode, size), so edits made outside the process are still
+# picked up.
+#
+#   snapshot / lookup   the cached document and index entries; shared, so
+#                       callers must not mutate them
+#   read                a private deep copy for read-modify-write callers
+#   write               atomic: temp file + fsync + os.replace, under the
+#                       store's lock; the cache is refreshed from the text
+#                       that was written
+#   update              read + mutate + write under one lock hold, so a batch
+#                       of record changes lands in a single write and cannot
+#                       interleave with another writer in this process
+#
+# A JSON document is still rewritten whole; the saving is on the read side
+# and in collapsing several record updates into one write.
+
+T = TypeVar("T")
+
+_Signature = Tuple[int, int, int]
+
+
+def _signature(path: Path) -> _Signature | None:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+
+class JsonDocumentStore:
+    def __init__(
+        self,
+        *,
+        empty: Callable[[], Dict[str, Any]],
+        normalize: Callable[[Any], Dict[str, Any] | None],
+        index: Callable[[Dict[str, Any]], Dict[str, Any]] | None = None,
+        private: bool = False,
+    ):
+        self._empty = empty
+        self._normalize = normalize
+        self._index = index
+        self._private = private
+        self._lock = threading.RLock()
+        self._cache: Dict[str, Tuple[_Signature | None, Dict[str, Any], Dict[str, Any]]] = {}
+
+    def _parse(self, text: str | None) -> Dict[str, Any]:
+        if text is None:
+            return self._empty()
+        try:
+            document = self._normalize(json.loads(text))
+        except Exception:
+            document = None
+        return document if document is not None else self._empty()
+
+    def _load(self, path: Path) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        key = str(path)
+        signature = _signature(path)
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1], cached[2]
+        with self._lock:
+            signature = _signature(path)
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == signature:
+                return cached[1], cached[2]
+            try:
+                text = path.read_text(encoding="utf-8") if signature is not None else None
+            except OSError:
+                text = None
+            document = self._parse(text)
+            index = self._index(document) if self._index is not None else {}
+            self._cache[key] = (signature, document, index)
+            return document, index
+
+    def snapshot(self, path: Path) -> Dict[str, Any]:
+        """The cached document. Shared: do not mutate."""
+        return self._load(path)[0]
+
+    def lookup(self, path: Path, key: str) -> Any:
+        """The index entry for ``key``, or None. Shared: do not mutate."""
+        return self._load(path)[1].get(key)
+
+    def read(self, path: Path) -> Dict[str, Any]:
+        return copy.deepcopy(self._load(path)[0])
+
+    def write(self, path: Path, document: Dict[str, Any]) -> None:
+        text = json.dumps(document, indent=2, sort_keys=True)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            fd = os.open(
+                temp_path,
+                os.O_WRONLY | os.O_CREAT | os.O_TRUNC,
+                0o600 if self._private else 0o644,
+            )
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                    handle.write(text)
+                    handle.flush()
+                    os.fsync(handle.fileno())
+                os.replace(temp_path, path)
+            except BaseException:
+                try:
+                    temp_path.unlink()
+                except OSError:
+                    pass
+                raise
+            if self._private:
+                try:
+                    path.chmod(0o600)
+                except OSError:
+                    pass
+            cached = self._parse(text)
+            index = self._index(cached) if self._index is not None else {}
+            self._cache[str(path)] = (_signature(path), cached, index)
+
+    def update(self, path: Path, mutate: Callable[[Dict[str, Any]], T]) -> T:
+        """Apply ``mutate`` to a fresh copy and write it back in one step."""
+        with self._lock:
+            document = self.read(path)
+            result = mutate(document)
+            self.write(path, document)
+            return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
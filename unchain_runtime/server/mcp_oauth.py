@@ -15,6 +15,7 @@ from typing import Any, Callable, Dict
 
 from mcp_oauth_apps import get_mcp_oauth_app
 from mcp_registry import oauth_recipe_for_entry, oauth_registry_entry
+from mcp_session_pool import invalidate_mcp_sessions
 
 
 class McpOAuthError(RuntimeError):
@@ -313,6 +314,7 @@ def save_mcp_oauth_token(
     store = _read_store(data_dir)
     store["toolkits"][clean_toolkit_id] = clean_token
     _write_store(store, data_dir)
+    invalidate_mcp_sessions(clean_toolkit_id)
     return {"ok": True, "toolkitId": clean_toolkit_id}
 
 
@@ -363,6 +365,7 @@ def delete_mcp_oauth_token(
     store = _read_store(data_dir)
     store["toolkits"].pop(entry["toolkit_id"], None)
     _write_store(store, data_dir)
+    invalidate_mcp_sessions(entry["toolkit_id"])
     return {"ok": True, "toolkitId": entry["toolkit_id"]}
 
 
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-import json
 import os
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List
+
+from mcp_json_store import JsonDocumentStore
 
 MCP_SECRETS_FILENAME = "mcp_secrets.json"
 
@@ -23,27 +24,19 @@ def _empty_store() -> Dict:
     return {"version": 1, "toolkits": {}}
 
 
-def _read_store(data_dir: str | Path | None = None) -> Dict:
-    path = _store_path(data_dir)
-    if not path.exists():
-        return _empty_store()
-    try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return _empty_store()
+def _normalize_store(raw: Any) -> Dict | None:
     if not isinstance(raw, dict) or not isinstance(raw.get("toolkits"), dict):
-        return _empty_store()
+        return None
     return {"version": 1, "toolkits": raw["toolkits"]}
 
 
-def _write_store(store: Dict, data_dir: str | Path | None = None) -> None:
-    path = _store_path(data_dir)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(store, indent=2, sort_keys=True), encoding="utf-8")
-    try:
-        path.chmod(0o600)
-    except OSError:
-        pass
+_STORE = JsonDocumentStore(empty=_empty_store, normalize=_normalize_store, private=True)
+
+
+def _stored_values(toolkit_id: str, data_dir: str | Path | None) -> Dict:
+    store = _STORE.snapshot(_store_path(data_dir))
+    values = store["toolkits"].get(str(toolkit_id or "").strip(), {})
+    return values if isinstance(values, dict) else {}
 
 
 def save_mcp_secret_values(
@@ -59,9 +52,10 @@ def save_mcp_secret_values(
         if str(key).strip() and str(value)
     }
 
-    store = _read_store(data_dir)
-    store["toolkits"][clean_toolkit_id] = clean_values
-    _write_store(store, data_dir)
+    def _save(store: Dict) -> None:
+        store["toolkits"][clean_toolkit_id] = clean_values
+
+    _STORE.update(_store_path(data_dir), _save)
     return {"ok": True, "toolkitId": clean_toolkit_id}
 
 
@@ -71,10 +65,7 @@ def get_mcp_secret_value(
     *,
     data_dir: str | Path | None = None,
 ) -> str:
-    store = _read_store(data_dir)
-    values = store["toolkits"].get(str(toolkit_id or "").strip(), {})
-    if not isinstance(values, dict):
-        return ""
+    values = _stored_values(toolkit_id, data_dir)
     return str(values.get(str(key or "").strip(), "") or "")
 
 
@@ -84,10 +75,8 @@ def get_mcp_secret_values(
     *,
     data_dir: str | Path | None = None,
 ) -> Dict[str, str]:
-    return {
-        key: get_mcp_secret_value(toolkit_id, key, data_dir=data_dir)
-        for key in keys
-    }
+    values = _stored_values(toolkit_id, data_dir)
+    return {key: str(values.get(str(key or "").strip(), "") or "") for key in keys}
 
 
 def list_mcp_secret_status(
@@ -95,10 +84,7 @@ def list_mcp_secret_status(
     *,
     data_dir: str | Path | None = None,
 ) -> List[Dict[str, object]]:
-    store = _read_store(data_dir)
-    values = store["toolkits"].get(str(toolkit_id or "").strip(), {})
-    if not isinstance(values, dict):
-        return []
+    values = _stored_values(toolkit_id, data_dir)
     return [
         {"key": key, "configured": bool(value)}
         for key, value in sorted(values.items())
@@ -111,7 +97,8 @@ def delete_mcp_secret_values(
     data_dir: str | Path | None = None,
 ) -> Dict[str, object]:
     clean_toolkit_id = str(toolkit_id or "").strip()
-    store = _read_store(data_dir)
-    store["toolkits"].pop(clean_toolkit_id, None)
-    _write_store(store, data_dir)
+    _STORE.update(
+        _store_path(data_dir),
+        lambda store: store["toolkits"].pop(clean_toolkit_id, None),
+    )
     return {"ok": True, "toolkitId": clean_toolkit_id}
@@ -0,0 +1,729 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+# Connected MCP toolkits are kept alive between chat turns and leased out
+# exclusively to one run at a time. Sessions are keyed by toolkit id plus a
+# hash of the resolved runtime config, so any change to command, args, env,
+# url or auth headers (e.g. an OAuth refresh) lands on a fresh session.
+#
+# Warm spares: every lease of a stdio toolkit records how to connect it and
+# bumps a usage score that halves every 30 minutes. While the warmer thread
+# runs (start_mcp_session_warmer, started from main), the most used toolkits
+# keep one or two already-connected idle sessions (initialize handshake and
+# tool listing done) that are exempt from the idle TTL, so a new chat leases
+# a live server instead of cold-starting npx/uvx. Spares are sized by usage
+# and bounded by the same per-toolkit and global caps as ordinary sessions.
+#
+# Recycling: a session is disconnected instead of pooled once it has served
+# UNCHAIN_MCP_POOL_MAX_USES leases, when its server process grows past
+# UNCHAIN_MCP_POOL_MAX_RSS_MB, or when an idle probe finds it dead; the warmer
+# then replaces it. RSS is only known when the toolkit exposes its server
+# process (``pid`` / ``process.pid``); otherwise the cap is not applied.
+
+DEFAULT_MAX_SESSIONS = 16
+DEFAULT_MAX_SESSIONS_PER_TOOLKIT = 2
+DEFAULT_IDLE_TTL_SECONDS = 300.0
+REAPER_INTERVAL_SECONDS = 30.0
+DEFAULT_MAX_USES = 50
+DEFAULT_MAX_RSS_MB = 512
+DEFAULT_WARM_TOOLKITS = 4
+DEFAULT_MAX_SPARES_PER_TOOLKIT = 2
+USAGE_HALF_LIFE_SECONDS = 1800.0
+WARM_MIN_SCORE = 0.5
+LEASES_PER_SPARE = 4.0
+
+_POOL_LEASE_ATTR = "_pupu_mcp_pool_lease"
+
+_pool_lock = threading.Lock()
+_idle_sessions: Dict[str, List[Dict[str, Any]]] = {}
+_leased_sessions: Dict[int, Dict[str, Any]] = {}
+_toolkit_generations: Dict[str, int] = {}
+_pool_stats: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "evictions": 0,
+    "probe_failures": 0,
+    "invalidations": 0,
+    "warm_spawns": 0,
+    "warm_failures": 0,
+    "recycled": 0,
+}
+_reaper_thread: threading.Thread | None = None
+_warm_recipes: Dict[str, Dict[str, Any]] = {}
+_usage: Dict[str, Dict[str, float]] = {}
+_warming: Dict[str, int] = {}
+_warm_wakeup = threading.Event()
+_warmer_thread: threading.Thread | None = None
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0, int(raw))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return default
+
+
+def pool_enabled() -> bool:
+    raw = os.environ.get("UNCHAIN_MCP_POOL_ENABLED", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def _max_sessions() -> int:
+    return _env_int("UNCHAIN_MCP_POOL_MAX_SESSIONS", DEFAULT_MAX_SESSIONS)
+
+
+def _max_sessions_per_toolkit() -> int:
+    return _env_int(
+        "UNCHAIN_MCP_POOL_MAX_PER_TOOLKIT",
+        DEFAULT_MAX_SESSIONS_PER_TOOLKIT,
+    )
+
+
+def _idle_ttl_seconds() -> float:
+    return _env_float("UNCHAIN_MCP_POOL_IDLE_SECONDS", DEFAULT_IDLE_TTL_SECONDS)
+
+
+def _max_uses() -> int:
+    return _env_int("UNCHAIN_MCP_POOL_MAX_USES", DEFAULT_MAX_USES)
+
+
+def _max_rss_mb() -> float:
+    return _env_float("UNCHAIN_MCP_POOL_MAX_RSS_MB", DEFAULT_MAX_RSS_MB)
+
+
+def _warm_toolkits() -> int:
+    return _env_int("UNCHAIN_MCP_POOL_WARM_TOOLKITS", DEFAULT_WARM_TOOLKITS)
+
+
+def _max_spares_per_toolkit() -> int:
+    return _env_int(
+        "UNCHAIN_MCP_POOL_MAX_SPARES",
+        DEFAULT_MAX_SPARES_PER_TOOLKIT,
+    )
+
+
+def session_config_hash(config: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        config,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _pool_key(toolkit_id: str, config_hash: str) -> str:
+    return f"{toolkit_id}#{config_hash}"
+
+
+def _disconnect_quietly(toolkit: Any) -> None:
+    disconnect = getattr(toolkit, "disconnect", None)
+    if not callable(disconnect):
+        return
+    try:
+        disconnect()
+    except Exception:
+        pass
+
+
+def _probe_session(toolkit: Any) -> bool:
+    for attr in ("ping", "health_check", "is_connected"):
+        probe = getattr(toolkit, attr, None)
+        if not callable(probe):
+            continue
+        try:
+            result = probe()
+        except Exception:
+            return False
+        return result is not False
+    connected = getattr(toolkit, "connected", None)
+    if isinstance(connected, bool):
+        return connected
+    return True
+
+
+def _session_pid(toolkit: Any) -> int | None:
+    for path in ("pid", "process.pid", "_process.pid", "server_process.pid"):
+        value: Any = toolkit
+        for attr in path.split("."):
+            value = getattr(value, attr, None)
+            if value is None:
+                break
+        if isinstance(value, int) and value > 0:
+            return value
+    return None
+
+
+def _session_rss_mb(toolkit: Any) -> float | None:
+    pid = _session_pid(toolkit)
+    if pid is None:
+        return None
+    try:
+        import psutil
+
+        process = psutil.Process(pid)
+        rss = process.memory_info().rss + sum(
+            child.memory_info().rss for child in process.children(recursive=True)
+        )
+        return rss / (1024 * 1024)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as handle:
+            for line in handle:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def _should_recycle(toolkit: Any, uses: int) -> bool:
+    max_uses = _max_uses()
+    if max_uses and uses >= max_uses:
+        return True
+    max_rss = _max_rss_mb()
+    if max_rss:
+        rss = _session_rss_mb(toolkit)
+        if rss is not None and rss > max_rss:
+            return True
+    return False
+
+
+def _usage_score_locked(toolkit_id: str, now: float) -> float:
+    entry = _usage.get(toolkit_id)
+    if not entry:
+        return 0.0
+    elapsed = max(0.0, now - entry["at"])
+    return entry["score"] * math.pow(0.5, elapsed / USAGE_HALF_LIFE_SECONDS)
+
+
+def _record_usage_locked(toolkit_id: str, now: float) -> None:
+    _usage[toolkit_id] = {
+        "score": _usage_score_locked(toolkit_id, now) + 1.0,
+        "at": now,
+    }
+
+
+def _spare_targets_locked(now: float) -> Dict[str, int]:
+    """Warm spare count per pool key for the most used warmable toolkits."""
+    ranked = sorted(
+        (
+            (_usage_score_locked(toolkit_id, now), toolkit_id)
+            for toolkit_id in _warm_recipes
+        ),
+        reverse=True,
+    )
+    targets: Dict[str, int] = {}
+    for score, toolkit_id in ranked[: _warm_toolkits()]:
+        if score < WARM_MIN_SCORE:
+            break
+        spares = min(
+            _max_spares_per_toolkit(),
+            _max_sessions_per_toolkit(),
+            max(1, math.ceil(score / LEASES_PER_SPARE)),
+        )
+        targets[_warm_recipes[toolkit_id]["key"]] = spares
+    return targets
+
+
+def _idle_count_locked() -> int:
+    return sum(len(items) for items in _idle_sessions.values())
+
+
+def _total_count_locked() -> int:
+    return _idle_count_locked() + sum(
+        1 for lease in _leased_sessions.values() if lease["pooled"]
+    )
+
+
+def _toolkit_count_locked(toolkit_id: str) -> int:
+    idle = sum(
+        len(items)
+        for key, items in _idle_sessions.items()
+        if key.split("#", 1)[0] == toolkit_id
+    )
+    leased = sum(
+        1
+        for lease in _leased_sessions.values()
+        if lease["pooled"] and lease["toolkit_id"] == toolkit_id
+    )
+    return idle + leased
+
+
+def _warmer_running() -> bool:
+    return _warmer_thread is not None and _warmer_thread.is_alive()
+
+
+def _pop_expired_locked(now: float) -> List[Any]:
+    ttl = _idle_ttl_seconds()
+    spares = _spare_targets_locked(now) if _warmer_running() else {}
+    expired: List[Any] = []
+    for key in list(_idle_sessions.keys()):
+        kept = []
+        protected = spares.get(key, 0)
+        # newest first, so the spares that survive are the freshest ones
+        for session in reversed(_idle_sessions[key]):
+            if now - session["released_at"] >= ttl and protected <= 0:
+                expired.append(session["toolkit"])
+            else:
+                protected -= 1
+                kept.insert(0, session)
+        if kept:
+            _idle_sessions[key] = kept
+        else:
+            _idle_sessions.pop(key, None)
+    _pool_stats["evictions"] += len(expired)
+    return expired
+
+
+def _pop_oldest_idle_locked() -> Any | None:
+    oldest_key = ""
+    oldest_index = -1
+    oldest_at = float("inf")
+    for key, items in _idle_sessions.items():
+        for index, session in enumerate(items):
+            if session["released_at"] < oldest_at:
+                oldest_key, oldest_index, oldest_at = key, index, session["released_at"]
+    if oldest_index < 0:
+        return None
+    session = _idle_sessions[oldest_key].pop(oldest_index)
+    if not _idle_sessions[oldest_key]:
+        _idle_sessions.pop(oldest_key, None)
+    _pool_stats["evictions"] += 1
+    return session["toolkit"]
+
+
+def _pop_other_configs_locked(toolkit_id: str, keep_key: str) -> List[Any]:
+    stale: List[Any] = []
+    for key in list(_idle_sessions.keys()):
+        if key == keep_key or key.split("#", 1)[0] != toolkit_id:
+            continue
+        stale.extend(session["toolkit"] for session in _idle_sessions.pop(key))
+    for lease in _leased_sessions.values():
+        if lease["toolkit_id"] == toolkit_id and lease["key"] != keep_key:
+            lease["pooled"] = False
+    return stale
+
+
+def _mark_lease(toolkit: Any, lease_id: int) -> None:
+    try:
+        setattr(toolkit, _POOL_LEASE_ATTR, lease_id)
+    except Exception:
+        pass
+
+
+def _ensure_reaper_locked() -> None:
+    global _reaper_thread
+    if _reaper_thread is not None and _reaper_thread.is_alive():
+        return
+
+    def reap() -> None:
+        while True:
+            time.sleep(REAPER_INTERVAL_SECONDS)
+            evict_idle_mcp_sessions()
+
+    _reaper_thread = threading.Thread(
+        target=reap,
+        name="unchain-mcp-pool-reaper",
+        daemon=True,
+    )
+    _reaper_thread.start()
+
+
+def _take_idle_session(key: str) -> Dict[str, Any] | None:
+    """Pop idle sessions for *key* until one answers its probe.
+
+    Probing talks to the server, so each candidate is taken out of the pool
+    under the lock and probed outside it, as in ``_recycle_idle_sessions``;
+    one hung server then cannot stall every other lease and release.
+    """
+    while True:
+        with _pool_lock:
+            candidates = _idle_sessions.get(key)
+            if not candidates:
+                _idle_sessions.pop(key, None)
+                return None
+            session = candidates.pop()
+            if not candidates:
+                _idle_sessions.pop(key, None)
+        if _probe_session(session["toolkit"]):
+            return session
+        with _pool_lock:
+            _pool_stats["probe_failures"] += 1
+        _disconnect_quietly(session["toolkit"])
+
+
+def lease_mcp_session(
+    toolkit_id: str,
+    config: Dict[str, Any],
+    connect: Callable[[], Any],
+    *,
+    warm: bool = False,
+    now_fn: Callable[[], float] | None = None,
+) -> Any:
+    """Return a connected toolkit for *toolkit_id*, reusing an idle session.
+
+    ``connect`` is only called on a pool miss. The returned toolkit must be
+    handed back with :func:`release_mcp_session` instead of disconnected.
+    With ``warm``, the warmer may call ``connect`` ahead of time to keep
+    spares for this toolkit.
+    """
+    now = (now_fn or time.time)()
+    config_hash = session_config_hash(config)
+    key = _pool_key(toolkit_id, config_hash)
+    to_close: List[Any] = []
+    reused = None
+    uses = 0
+
+    with _pool_lock:
+        if pool_enabled():
+            _record_usage_locked(toolkit_id, now)
+            if warm:
+                _warm_recipes[toolkit_id] = {"key": key, "connect": connect}
+            else:
+                _warm_recipes.pop(toolkit_id, None)
+        to_close.extend(_pop_expired_locked(now))
+        to_close.extend(_pop_other_configs_locked(toolkit_id, key))
+        generation = _toolkit_generations.get(toolkit_id, 0)
+
+    for stale in to_close:
+        _disconnect_quietly(stale)
+    session = _take_idle_session(key)
+    if session is not None:
+        reused = session["toolkit"]
+        uses = session.get("uses", 0)
+    with _pool_lock:
+        _pool_stats["hits" if reused is not None else "misses"] += 1
+    if reused is not None:
+        # a spare was taken; let the warmer top it up
+        _warm_wakeup.set()
+
+    toolkit = reused if reused is not None else connect()
+    if not pool_enabled():
+        return toolkit
+
+    to_close = []
+    with _pool_lock:
+        pooled = _toolkit_generations.get(toolkit_id, 0) == generation
+        if pooled and reused is None:
+            max_total = _max_sessions()
+            if _toolkit_count_locked(toolkit_id) >= _max_sessions_per_toolkit():
+                pooled = False
+            else:
+                while _total_count_locked() >= max_total:
+                    evicted = _pop_oldest_idle_locked()
+                    if evicted is None:
+                        pooled = False
+                        break
+                    to_close.append(evicted)
+        lease_id = id(toolkit)
+        _leased_sessions[lease_id] = {
+            "toolkit": toolkit,
+            "toolkit_id": toolkit_id,
+            "key": key,
+            "generation": generation,
+            "pooled": pooled,
+            "leased_at": now,
+            "uses": uses + 1,
+        }
+        _mark_lease(toolkit, lease_id)
+
+    for stale in to_close:
+        _disconnect_quietly(stale)
+    return toolkit
+
+
+def lease_idle_mcp_session(
+    toolkit_id: str,
+    *,
+    now_fn: Callable[[], float] | None = None,
+) -> Any | None:
+    """Lease an already-connected idle session for *toolkit_id*, if any.
+
+    Never connects: returns ``None`` when no live idle session is pooled.
+    The toolkit must be handed back with :func:`release_mcp_session`.
+    """
+    normalized = str(toolkit_id or "").strip()
+    now = (now_fn or time.time)()
+    with _pool_lock:
+        to_close = _pop_expired_locked(now)
+        keys = [key for key in _idle_sessions if key.split("#", 1)[0] == normalized]
+    for stale in to_close:
+        _disconnect_quietly(stale)
+    for key in keys:
+        session = _take_idle_session(key)
+        if session is None:
+            continue
+        reused = session["toolkit"]
+        with _pool_lock:
+            lease_id = id(reused)
+            _leased_sessions[lease_id] = {
+                "toolkit": reused,
+                "toolkit_id": normalized,
+                "key": key,
+                "generation": _toolkit_generations.get(normalized, 0),
+                "pooled": True,
+                "leased_at": now,
+                "uses": session.get("uses", 0),
+            }
+            _mark_lease(reused, lease_id)
+        return reused
+    return None
+
+
+def is_leased_mcp_session(toolkit: Any) -> bool:
+    lease_id = getattr(toolkit, _POOL_LEASE_ATTR, None)
+    if lease_id is None:
+        return False
+    with _pool_lock:
+        return lease_id in _leased_sessions
+
+
+def release_mcp_session(
+    toolkit: Any,
+    *,
+    discard: bool = False,
+    now_fn: Callable[[], float] | None = None,
+) -> None:
+    lease_id = getattr(toolkit, _POOL_LEASE_ATTR, None)
+    with _pool_lock:
+        lease = _leased_sessions.get(lease_id) if lease_id is not None else None
+    recycle = (
+        lease is not None
+        and not discard
+        and _should_recycle(toolkit, lease.get("uses", 0))
+    )
+    with _pool_lock:
+        lease = _leased_sessions.pop(lease_id, None) if lease_id is not None else None
+        keep = (
+            lease is not None
+            and lease["pooled"]
+            and not discard
+            and not recycle
+            and pool_enabled()
+            and _toolkit_generations.get(lease["toolkit_id"], 0) == lease["generation"]
+        )
+        if keep:
+            _idle_sessions.setdefault(lease["key"], []).append(
+                {
+                    "toolkit": toolkit,
+                    "released_at": (now_fn or time.time)(),
+                    "uses": lease.get("uses", 0),
+                }
+            )
+            _ensure_reaper_locked()
+        elif recycle:
+            _pool_stats["recycled"] += 1
+    if not keep:
+        _disconnect_quietly(toolkit)
+    if recycle:
+        _warm_wakeup.set()
+
+
+def invalidate_mcp_sessions(toolkit_id: str) -> int:
+    normalized = str(toolkit_id or "").strip()
+    if not normalized:
+        return 0
+    stale: List[Any] = []
+    with _pool_lock:
+        _toolkit_generations[normalized] = _toolkit_generations.get(normalized, 0) + 1
+        _warm_recipes.pop(normalized, None)
+        for key in list(_idle_sessions.keys()):
+            if key.split("#", 1)[0] == normalized:
+                stale.extend(session["toolkit"] for session in _idle_sessions.pop(key))
+        for lease in _leased_sessions.values():
+            if lease["toolkit_id"] == normalized:
+                lease["pooled"] = False
+        _pool_stats["invalidations"] += 1
+    for toolkit in stale:
+        _disconnect_quietly(toolkit)
+    return len(stale)
+
+
+def evict_idle_mcp_sessions(now_fn: Callable[[], float] | None = None) -> int:
+    with _pool_lock:
+        expired = _pop_expired_locked((now_fn or time.time)())
+    for toolkit in expired:
+        _disconnect_quietly(toolkit)
+    return len(expired)
+
+
+def close_all_mcp_sessions() -> int:
+    with _pool_lock:
+        stale = [
+            session["toolkit"]
+            for items in _idle_sessions.values()
+            for session in items
+        ]
+        _idle_sessions.clear()
+        _warm_recipes.clear()
+        _usage.clear()
+        for lease in _leased_sessions.values():
+            lease["pooled"] = False
+    for toolkit in stale:
+        _disconnect_quietly(toolkit)
+    return len(stale)
+
+
+def _recycle_idle_sessions() -> int:
+    """Drop idle sessions whose server died or outgrew the RSS cap."""
+    with _pool_lock:
+        snapshot = [
+            session for items in _idle_sessions.values() for session in items
+        ]
+    # Probing talks to the server, so it runs outside the lock; a session
+    # leased in the meantime is simply no longer found below.
+    dead = {
+        id(session["toolkit"])
+        for session in snapshot
+        if not _probe_session(session["toolkit"])
+        or _should_recycle(session["toolkit"], session.get("uses", 0))
+    }
+    if not dead:
+        return 0
+    removed: List[Any] = []
+    with _pool_lock:
+        for key in list(_idle_sessions.keys()):
+            kept = []
+            for session in _idle_sessions[key]:
+                if id(session["toolkit"]) in dead:
+                    removed.append(session["toolkit"])
+                else:
+                    kept.append(session)
+            if kept:
+                _idle_sessions[key] = kept
+            else:
+                _idle_sessions.pop(key, None)
+        _pool_stats["recycled"] += len(removed)
+    for toolkit in removed:
+        _disconnect_quietly(toolkit)
+    return len(removed)
+
+
+def warm_mcp_sessions(now_fn: Callable[[], float] | None = None) -> int:
+    """Connect spares until each hot toolkit has its target; returns spawns."""
+    clock = now_fn or time.time
+    _recycle_idle_sessions()
+    with _pool_lock:
+        expired = _pop_expired_locked(clock())
+        plans = []
+        for key, target in _spare_targets_locked(clock()).items():
+            toolkit_id = key.split("#", 1)[0]
+            missing = (
+                target
+                - len(_idle_sessions.get(key) or [])
+                - _warming.get(toolkit_id, 0)
+            )
+            for _ in range(max(0, missing)):
+                if (
+                    _total_count_locked() + sum(_warming.values()) >= _max_sessions()
+                    or _toolkit_count_locked(toolkit_id) + _warming.get(toolkit_id, 0)
+                    >= _max_sessions_per_toolkit()
+                ):
+                    break
+                _warming[toolkit_id] = _warming.get(toolkit_id, 0) + 1
+                plans.append(
+                    (
+                        toolkit_id,
+                        key,
+                        _warm_recipes[toolkit_id]["connect"],
+                        _toolkit_generations.get(toolkit_id, 0),
+                    )
+                )
+    for stale in expired:
+        _disconnect_quietly(stale)
+
+    spawned = 0
+    for toolkit_id, key, connect, generation in plans:
+        try:
+            toolkit = connect()
+        except Exception:
+            toolkit = None
+        with _pool_lock:
+            _warming[toolkit_id] -= 1
+            if not _warming[toolkit_id]:
+                _warming.pop(toolkit_id, None)
+            recipe = _warm_recipes.get(toolkit_id)
+            keep = (
+                toolkit is not None
+                and pool_enabled()
+                and recipe is not None
+                and recipe["key"] == key
+                and _toolkit_generations.get(toolkit_id, 0) == generation
+            )
+            if toolkit is None:
+                _pool_stats["warm_failures"] += 1
+            elif keep:
+                _idle_sessions.setdefault(key, []).append(
+                    {"toolkit": toolkit, "released_at": clock(), "uses": 0}
+                )
+                _pool_stats["warm_spawns"] += 1
+                spawned += 1
+        if toolkit is not None and not keep:
+            _disconnect_quietly(toolkit)
+    return spawned
+
+
+def start_mcp_session_warmer() -> bool:
+    """Start the thread that keeps warm spares; returns False when pooling is off."""
+    global _warmer_thread
+    if not pool_enabled():
+        return False
+    with _pool_lock:
+        if _warmer_running():
+            return True
+
+        def warm() -> None:
+            while True:
+                _warm_wakeup.wait(timeout=REAPER_INTERVAL_SECONDS)
+                _warm_wakeup.clear()
+                try:
+                    warm_mcp_sessions()
+                except Exception:
+                    continue
+
+        _warmer_thread = threading.Thread(
+            target=warm,
+            name="unchain-mcp-pool-warmer",
+            daemon=True,
+        )
+        _warmer_thread.start()
+    _warm_wakeup.set()
+    return True
+
+
+def mcp_session_pool_stats() -> Dict[str, Any]:
+    with _pool_lock:
+        return {
+            **_pool_stats,
+            "idle": _idle_count_locked(),
+            "leased": len(_leased_sessions),
+            "warm_toolkits": len(_spare_targets_locked(time.time())),
+        }
@@ -2,15 +2,21 @@ from __future__ import annotations
 
 import base64
 import copy
+import hashlib
 import json
 import os
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Any, Callable, Dict, List
+from urllib.error import HTTPError
 from urllib.parse import urlparse
 from urllib.request import Request, urlopen
 
 import mcp_registry
+from mcp_json_store import JsonDocumentStore
 
 
 class McpStoreMetadataError(RuntimeError):
@@ -20,11 +26,46 @@ class McpStoreMetadataError(RuntimeError):
         self.status = status
 
 
+class McpStoreMetadataNotModified(Exception):
+    """Raised by a JSON fetcher when the server answers 304 Not Modified."""
+
+
+class _JsonResponse(dict):
+    """A fetched JSON object plus the ETag/Last-Modified it was served with."""
+
+    def __init__(self, payload: Dict[str, Any], validators: Dict[str, str]):
+        super().__init__(payload)
+        self.validators = validators
+
+
 MCP_STORE_METADATA_FILENAME = "mcp_store_metadata_cache.json"
+MCP_STORE_ICONS_DIRNAME = "mcp_store_icons"
 DEFAULT_CACHE_TTL_MS = 86400000
 HTTP_TIMEOUT_SECONDS = 8
 MAX_ICON_BYTES = 262144
 ALLOWED_ICON_MIME = {"image/png", "image/jpeg", "image/svg+xml"}
+ICON_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/svg+xml": "svg"}
+
+# Metadata reloads fan out over a bounded thread pool, so refreshing the whole
+# store costs about one round trip instead of one per entry. Requests to the
+# same host are capped in concurrency and spaced out a little. Entries whose
+# cache has not expired are skipped unless the reload is forced (a reload of
+# a single entry always is). Refetches send If-None-Match/If-Modified-Since
+# from the stored validators; a 304 only extends the expiry. Icons are written
+# once per content hash under mcp_store_icons/ and only referenced from the
+# cache file; an unchanged icon URL is not fetched again. Unreferenced icon
+# files are pruned inside the store update of the last reload still running,
+# so a concurrent reload cannot lose an icon it wrote but has not stored yet.
+DEFAULT_FETCH_WORKERS = 16
+DEFAULT_HOST_CONCURRENCY = 8
+DEFAULT_HOST_INTERVAL_SECONDS = 0.02
+ICON_CACHE_MAX_CHARS = 8 * 1024 * 1024
+
+_icon_cache_lock = threading.Lock()
+_icon_content_cache: "OrderedDict[str, str]" = OrderedDict()
+_icon_cache_chars = 0
+_icon_files_lock = threading.Lock()
+_active_reloads = 0
 
 
 def _data_dir(data_dir: str | Path | None = None) -> Path:
@@ -38,27 +79,41 @@ def _store_path(data_dir: str | Path | None = None) -> Path:
     return _data_dir(data_dir) / MCP_STORE_METADATA_FILENAME
 
 
+def _icons_dir(data_dir: str | Path | None = None) -> Path:
+    return _data_dir(data_dir) / MCP_STORE_ICONS_DIRNAME
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return default
+
+
 def _empty_store() -> Dict[str, Any]:
     return {"version": 1, "entries": {}}
 
 
-def _read_store(data_dir: str | Path | None = None) -> Dict[str, Any]:
-    path = _store_path(data_dir)
-    if not path.exists():
-        return _empty_store()
-    try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return _empty_store()
+def _normalize_store(raw: Any) -> Dict[str, Any] | None:
     if not isinstance(raw, dict) or not isinstance(raw.get("entries"), dict):
-        return _empty_store()
+        return None
     return {"version": 1, "entries": raw["entries"]}
 
 
-def _write_store(store: Dict[str, Any], data_dir: str | Path | None = None) -> None:
-    path = _store_path(data_dir)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(store, indent=2, sort_keys=True), encoding="utf-8")
+_STORE = JsonDocumentStore(empty=_empty_store, normalize=_normalize_store)
 
 
 def _require_https_url(url: str, *, code: str = "mcp_metadata_recipe_invalid") -> str:
@@ -112,12 +167,21 @@ def _default_http_json_fetcher(
 ) -> Dict[str, Any]:
     _require_https_url(url, code="mcp_metadata_fetch_failed")
     request = Request(url, headers=headers or {}, method="GET")
-    with urlopen(request, timeout=timeout) as response:
-        raw = response.read()
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            raw = response.read()
+            validators = {
+                "etag": str(response.headers.get("ETag") or ""),
+                "last_modified": str(response.headers.get("Last-Modified") or ""),
+            }
+    except HTTPError as exc:
+        if exc.code == 304:
+            raise McpStoreMetadataNotModified() from exc
+        raise
     parsed = json.loads(raw.decode("utf-8"))
     if not isinstance(parsed, dict):
         raise RuntimeError("metadata response must be a JSON object")
-    return parsed
+    return _JsonResponse(parsed, validators)
 
 
 def _default_icon_fetcher(
@@ -135,7 +199,10 @@ def _default_icon_fetcher(
     return {"content": content, "mime_type": mime_type}
 
 
-def _file_icon_payload(icon_response: Dict[str, Any] | None) -> Dict[str, str]:
+def _file_icon_payload(
+    icon_response: Dict[str, Any] | None,
+    icons_dir: Path,
+) -> Dict[str, str]:
     if not isinstance(icon_response, dict):
         return {}
     mime_type = str(
@@ -161,13 +228,106 @@ def _file_icon_payload(icon_response: Dict[str, Any] | None) -> Dict[str, str]:
             return {}
     else:
         encoded_content = base64.b64encode(raw).decode("ascii")
+    digest = hashlib.sha256(raw).hexdigest()
+    path = icons_dir / f"{digest}.{ICON_EXTENSIONS[mime_type]}"
+    if not path.exists():
+        icons_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+        temp_path.write_bytes(raw)
+        os.replace(temp_path, path)
+    _cache_icon_content(digest, encoded_content)
     return {
         "type": "file",
         "mimeType": mime_type,
-        "content": encoded_content,
+        "sha256": digest,
+        "path": path.name,
     }
 
 
+def _cached_icon_content(digest: str) -> str | None:
+    with _icon_cache_lock:
+        content = _icon_content_cache.get(digest)
+        if content is not None:
+            _icon_content_cache.move_to_end(digest)
+        return content
+
+
+def _cache_icon_content(digest: str, content: str) -> None:
+    """LRU cache of inlined icon content, bounded by total characters."""
+    global _icon_cache_chars
+    if len(content) > ICON_CACHE_MAX_CHARS:
+        return
+    with _icon_cache_lock:
+        previous = _icon_content_cache.pop(digest, None)
+        if previous is not None:
+            _icon_cache_chars -= len(previous)
+        _icon_content_cache[digest] = content
+        _icon_cache_chars += len(content)
+        while _icon_cache_chars > ICON_CACHE_MAX_CHARS:
+            _digest, evicted = _icon_content_cache.popitem(last=False)
+            _icon_cache_chars -= len(evicted)
+
+
+def _icon_for_frontend(icon: Dict[str, Any], data_dir: str | Path | None) -> Dict[str, Any]:
+    """Inline the stored file for a content-addressed icon."""
+    if not icon or icon.get("content") or not icon.get("sha256"):
+        return copy.deepcopy(icon or {})
+    digest = str(icon["sha256"])
+    content = _cached_icon_content(digest)
+    if content is None:
+        try:
+            raw = (_icons_dir(data_dir) / str(icon.get("path") or "")).read_bytes()
+        except OSError:
+            return {}
+        if icon.get("mimeType") == "image/svg+xml":
+            content = raw.decode("utf-8", errors="replace")
+        else:
+            content = base64.b64encode(raw).decode("ascii")
+        _cache_icon_content(digest, content)
+    return {"type": "file", "mimeType": icon.get("mimeType", ""), "content": content}
+
+
+def _icon_file_exists(icon: Dict[str, Any], data_dir: str | Path | None) -> bool:
+    path = str((icon or {}).get("path") or "")
+    return bool(path) and (_icons_dir(data_dir) / path).exists()
+
+
+def _begin_icon_writes() -> None:
+    global _active_reloads
+    with _icon_files_lock:
+        _active_reloads += 1
+
+
+def _end_icon_writes() -> None:
+    global _active_reloads
+    with _icon_files_lock:
+        _active_reloads -= 1
+
+
+def _prune_icon_files(store: Dict[str, Any], data_dir: str | Path | None) -> None:
+    """Delete icon files ``store`` does not reference.
+
+    Called from inside the store update by a reload that is still counted
+    as active; it skips pruning while any other reload may be writing icons
+    it has not stored yet, and the last one to finish prunes instead.
+    """
+    icons_dir = _icons_dir(data_dir)
+    with _icon_files_lock:
+        if _active_reloads > 1 or not icons_dir.exists():
+            return
+        referenced = {
+            str((record.get("icon") or {}).get("path") or "")
+            for record in store["entries"].values()
+            if isinstance(record, dict)
+        }
+        for path in icons_dir.iterdir():
+            if path.name not in referenced and not path.name.endswith(".tmp"):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+
 def _metadata_recipe(entry: Dict[str, Any]) -> Dict[str, Any]:
     recipe = entry.get("metadata") if isinstance(entry.get("metadata"), dict) else {}
     if not recipe:
@@ -238,7 +398,12 @@ def _entries_with_metadata(
     return entries
 
 
-def _frontend_record(record: Dict[str, Any], *, now: float | None = None) -> Dict[str, Any]:
+def _frontend_record(
+    record: Dict[str, Any],
+    *,
+    now: float | None = None,
+    data_dir: str | Path | None = None,
+) -> Dict[str, Any]:
     now_value = time.time() if now is None else now
     expires_at = float(record.get("expires_at") or 0)
     last_error = str(record.get("last_error") or "")
@@ -249,7 +414,7 @@ def _frontend_record(record: Dict[str, Any], *, now: float | None = None) -> Dic
         "entryId": record.get("entry_id", ""),
         "toolkitId": record.get("toolkit_id", ""),
         "metadata": copy.deepcopy(record.get("metadata") or {}),
-        "icon": copy.deepcopy(record.get("icon") or {}),
+        "icon": _icon_for_frontend(record.get("icon") or {}, data_dir),
         "iconPolicy": record.get("icon_policy") or "fallback",
         "lastFetchedAt": float(record.get("last_fetched_at") or 0),
         "expiresAt": expires_at,
@@ -258,8 +423,13 @@ def _frontend_record(record: Dict[str, Any], *, now: float | None = None) -> Dic
     }
 
 
-def _payload_from_records(records: List[Dict[str, Any]], *, now: float) -> Dict[str, Any]:
-    entries = [_frontend_record(record, now=now) for record in records]
+def _payload_from_records(
+    records: List[Dict[str, Any]],
+    *,
+    now: float,
+    data_dir: str | Path | None = None,
+) -> Dict[str, Any]:
+    entries = [_frontend_record(record, now=now, data_dir=data_dir) for record in records]
     by_entry_id = {record["entryId"]: record for record in entries if record.get("entryId")}
     return {
         "entries": entries,
@@ -275,14 +445,60 @@ def list_mcp_store_metadata(
     now_fn: Callable[[], float] | None = None,
 ) -> Dict[str, Any]:
     now = (now_fn or time.time)()
-    store = _read_store(data_dir)
+    store = _STORE.snapshot(_store_path(data_dir))
     valid_entry_ids = {entry["entry_id"] for entry in _all_registry_entries(data_dir=data_dir)}
     records = [
         record
         for record in store["entries"].values()
         if isinstance(record, dict) and record.get("entry_id") in valid_entry_ids
     ]
-    return _payload_from_records(records, now=now)
+    return _payload_from_records(records, now=now, data_dir=data_dir)
+
+
+class _HostLimiter:
+    """Caps concurrent requests per host and spaces out their starts."""
+
+    def __init__(self, concurrency: int, interval: float):
+        self._concurrency = concurrency
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _host(self, url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def __call__(self, url: str, fetch: Callable[[], Any]) -> Any:
+        host = self._host(url)
+        with self._lock:
+            semaphore = self._semaphores.setdefault(
+                host,
+                threading.BoundedSemaphore(self._concurrency),
+            )
+        with semaphore:
+            with self._lock:
+                now = time.monotonic()
+                start = max(now, self._next_start.get(host, 0.0))
+                self._next_start[host] = start + self._interval
+            if start > now:
+                time.sleep(start - now)
+            return fetch()
+
+
+def _conditional_headers(
+    headers: Dict[str, str],
+    previous: Dict[str, Any] | None,
+    url: str,
+) -> Dict[str, str]:
+    conditional = dict(headers)
+    validators = (previous or {}).get("validators") or {}
+    if not previous or previous.get("request_url") != url or not previous.get("metadata"):
+        return conditional
+    if validators.get("etag"):
+        conditional["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        conditional["If-Modified-Since"] = validators["last_modified"]
+    return conditional
 
 
 def _fetch_entry_metadata(
@@ -292,33 +508,62 @@ def _fetch_entry_metadata(
     now: float,
     http_json_fetcher: Callable[[str, Dict[str, str], int], Dict[str, Any]],
     icon_fetcher: Callable[[str, int, int], Dict[str, Any]],
+    limiter: Callable[[str, Callable[[], Any]], Any] | None = None,
+    data_dir: str | Path | None = None,
 ) -> Dict[str, Any]:
     recipe = _metadata_recipe(entry)
     request = recipe["request"]
     ttl_ms = int(recipe.get("cacheTtlMs") or DEFAULT_CACHE_TTL_MS)
+    limit = limiter or (lambda _url, fetch: fetch())
+    url = request["url"]
     try:
-        payload = http_json_fetcher(
-            request["url"],
-            copy.deepcopy(request.get("headers") or {}),
-            HTTP_TIMEOUT_SECONDS,
-        )
+        try:
+            headers = _conditional_headers(
+                copy.deepcopy(request.get("headers") or {}),
+                previous,
+                url,
+            )
+            payload = limit(url, lambda: http_json_fetcher(url, headers, HTTP_TIMEOUT_SECONDS))
+        except McpStoreMetadataNotModified:
+            record = copy.deepcopy(previous or {})
+            record.update(
+                {
+                    "last_fetched_at": now,
+                    "expires_at": now + (ttl_ms / 1000.0),
+                    "last_error": "",
+                    "status": "cached",
+                }
+            )
+            return record
         metadata = _extract_fields(payload, recipe.get("fields") or {})
         icon = {}
+        icon_url = ""
         icon_error = ""
         icon_url_path = str((recipe.get("icon") or {}).get("urlPath") or "").strip()
         if icon_url_path:
-            icon_url = _get_path(payload, icon_url_path)
-            if icon_url:
+            icon_url = str(_get_path(payload, icon_url_path) or "")
+            previous_icon = (previous or {}).get("icon") or {}
+            if icon_url and (previous or {}).get("icon_url") == icon_url and _icon_file_exists(
+                previous_icon,
+                data_dir,
+            ):
+                icon = copy.deepcopy(previous_icon)
+            elif icon_url:
                 try:
+                    https_icon_url = _require_https_url(
+                        icon_url,
+                        code="mcp_metadata_fetch_failed",
+                    )
                     icon = _file_icon_payload(
-                        icon_fetcher(
-                            _require_https_url(
-                                str(icon_url),
-                                code="mcp_metadata_fetch_failed",
+                        limit(
+                            https_icon_url,
+                            lambda: icon_fetcher(
+                                https_icon_url,
+                                HTTP_TIMEOUT_SECONDS,
+                                MAX_ICON_BYTES,
                             ),
-                            HTTP_TIMEOUT_SECONDS,
-                            MAX_ICON_BYTES,
-                        )
+                        ),
+                        _icons_dir(data_dir),
                     )
                 except Exception as exc:
                     icon_error = str(exc)
@@ -327,7 +572,10 @@ def _fetch_entry_metadata(
             "toolkit_id": entry["toolkit_id"],
             "metadata": metadata,
             "icon": icon,
+            "icon_url": icon_url if icon else "",
             "icon_policy": recipe.get("iconPolicy") or "fallback",
+            "request_url": url,
+            "validators": dict(getattr(payload, "validators", {}) or {}),
             "last_fetched_at": now,
             "expires_at": now + (ttl_ms / 1000.0),
             "last_error": icon_error,
@@ -352,31 +600,73 @@ def _fetch_entry_metadata(
         }
 
 
+def _is_fresh(previous: Any, now: float) -> bool:
+    return (
+        isinstance(previous, dict)
+        and previous.get("status") == "cached"
+        and float(previous.get("expires_at") or 0) > now
+    )
+
+
 def reload_mcp_store_metadata(
     *,
     entry_id: str | None = None,
+    force: bool | None = None,
     data_dir: str | Path | None = None,
     now_fn: Callable[[], float] | None = None,
     http_json_fetcher: Callable[[str, Dict[str, str], int], Dict[str, Any]] | None = None,
     icon_fetcher: Callable[[str, int, int], Dict[str, Any]] | None = None,
 ) -> Dict[str, Any]:
+    """Refresh store metadata; unexpired entries are kept unless forced.
+
+    ``force`` defaults to True when reloading a single entry.
+    """
     normalized_entry_id = str(entry_id or "").strip()
     entries = _entries_with_metadata(normalized_entry_id or None, data_dir=data_dir)
+    forced = bool(normalized_entry_id) if force is None else bool(force)
     now = (now_fn or time.time)()
-    store = _read_store(data_dir)
-    records: List[Dict[str, Any]] = []
+    store = _STORE.snapshot(_store_path(data_dir))
     fetch_json = http_json_fetcher or _default_http_json_fetcher
     fetch_icon = icon_fetcher or _default_icon_fetcher
-    for entry in entries:
+    limiter = _HostLimiter(
+        _env_int("UNCHAIN_MCP_METADATA_HOST_CONCURRENCY", DEFAULT_HOST_CONCURRENCY),
+        _env_float("UNCHAIN_MCP_METADATA_HOST_INTERVAL_SECONDS", DEFAULT_HOST_INTERVAL_SECONDS),
+    )
+
+    def _refresh(entry: Dict[str, Any]) -> Dict[str, Any]:
         previous = store["entries"].get(entry["entry_id"])
-        record = _fetch_entry_metadata(
+        if not forced and _is_fresh(previous, now):
+            return previous
+        return _fetch_entry_metadata(
             entry,
             previous=previous if isinstance(previous, dict) else None,
             now=now,
             http_json_fetcher=fetch_json,
             icon_fetcher=fetch_icon,
+            limiter=limiter,
+            data_dir=data_dir,
         )
-        store["entries"][entry["entry_id"]] = record
-        records.append(record)
-    _write_store(store, data_dir)
-    return _payload_from_records(records, now=now)
+
+    _begin_icon_writes()
+    try:
+        if len(entries) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(
+                    len(entries),
+                    _env_int("UNCHAIN_MCP_METADATA_WORKERS", DEFAULT_FETCH_WORKERS),
+                ),
+                thread_name_prefix="mcp-store-metadata",
+            ) as executor:
+                records = list(executor.map(_refresh, entries))
+        else:
+            records = [_refresh(entry) for entry in entries]
+
+        def _store_records(document: Dict[str, Any]) -> None:
+            for entry, record in zip(entries, records):
+                document["entries"][entry["entry_id"]] = record
+            _prune_icon_files(document, data_dir)
+
+        _STORE.update(_store_path(data_dir), _store_records)
+    finally:
+        _end_icon_writes()
+    return _payload_from_records(records, now=now, data_dir=data_dir)
@@ -1,14 +1,19 @@
 from __future__ import annotations
 
 import copy
+import hashlib
 import json
 import os
+import queue
 import re
+import threading
 import time
 from pathlib import Path
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, Iterator, List
 
 import mcp_registry
+from agent_blueprint_cache import invalidate_agent_blueprints
+from mcp_json_store import JsonDocumentStore
 from mcp_registry import oauth_recipe_for_entry
 from mcp_secrets import (
     delete_mcp_secret_values,
@@ -21,6 +26,13 @@ from mcp_oauth import (
     get_valid_mcp_oauth_access_token,
     McpOAuthError,
 )
+from mcp_session_pool import (
+    invalidate_mcp_sessions,
+    is_leased_mcp_session,
+    lease_idle_mcp_session,
+    lease_mcp_session,
+    release_mcp_session,
+)
 
 
 class McpToolkitError(RuntimeError):
@@ -32,6 +44,13 @@ class McpToolkitError(RuntimeError):
 
 MCP_TOOLKITS_FILENAME = "mcp_toolkits.json"
 
+# Reload fans health checks out over a bounded set of worker threads. Each
+# check gets its own deadline; a check that misses it is reported as an
+# error, its toolkit is disconnected (stopping a hung stdio server) and its
+# late result is discarded.
+DEFAULT_RELOAD_WORKERS = 8
+DEFAULT_HEALTH_TIMEOUT_SECONDS = 20.0
+
 INSTALLABLE_MCP_REGISTRY = mcp_registry.INSTALLABLE_MCP_REGISTRY
 
 
@@ -52,23 +71,28 @@ def _empty_store() -> Dict[str, Any]:
     return {"version": 1, "toolkits": []}
 
 
-def _read_store(data_dir: str | Path | None = None) -> Dict[str, Any]:
-    path = _store_path(data_dir)
-    if not path.exists():
-        return _empty_store()
-    try:
-        raw = json.loads(path.read_text(encoding="utf-8"))
-    except Exception:
-        return _empty_store()
+def _normalize_store(raw: Any) -> Dict[str, Any] | None:
     if not isinstance(raw, dict) or not isinstance(raw.get("toolkits"), list):
-        return _empty_store()
+        return None
     return {"version": 1, "toolkits": [r for r in raw["toolkits"] if isinstance(r, dict)]}
 
 
+def _index_store(store: Dict[str, Any]) -> Dict[str, Any]:
+    index: Dict[str, Any] = {}
+    for record in store["toolkits"]:
+        index.setdefault(str(record.get("toolkit_id") or ""), record)
+    return index
+
+
+_STORE = JsonDocumentStore(empty=_empty_store, normalize=_normalize_store, index=_index_store)
+
+
+def _read_store(data_dir: str | Path | None = None) -> Dict[str, Any]:
+    return _STORE.read(_store_path(data_dir))
+
+
 def _write_store(store: Dict[str, Any], data_dir: str | Path | None = None) -> None:
-    path = _store_path(data_dir)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(store, indent=2, sort_keys=True), encoding="utf-8")
+    _STORE.write(_store_path(data_dir), store)
 
 
 def _registry_entry(
@@ -481,17 +505,45 @@ def _tool_to_dict(tool: Any) -> Dict[str, Any]:
         getattr(tool, "requires_confirmation", False)
         or getattr(tool, "requiresConfirmation", False)
     )
-    return {
+    tool_dict = {
         "name": name,
         "title": title,
         "description": description,
         "requiresConfirmation": requires_confirmation,
     }
+    for attr in ("input_schema", "inputSchema"):
+        schema = getattr(tool, attr, None)
+        if isinstance(schema, dict):
+            tool_dict["inputSchema"] = copy.deepcopy(schema)
+            break
+    return tool_dict
+
+
+def _tool_manifest_hash(tools: List[Dict[str, Any]]) -> str:
+    payload = json.dumps(tools, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _reload_workers() -> int:
+    raw = os.environ.get("UNCHAIN_MCP_RELOAD_WORKERS", "").strip()
+    try:
+        return max(1, int(raw)) if raw else DEFAULT_RELOAD_WORKERS
+    except ValueError:
+        return DEFAULT_RELOAD_WORKERS
+
+
+def _health_timeout_seconds() -> float:
+    raw = os.environ.get("UNCHAIN_MCP_HEALTH_TIMEOUT_SECONDS", "").strip()
+    try:
+        return max(0.1, float(raw)) if raw else DEFAULT_HEALTH_TIMEOUT_SECONDS
+    except ValueError:
+        return DEFAULT_HEALTH_TIMEOUT_SECONDS
 
 
 def _discover_tools(
     resolved_config: Dict[str, Any],
     toolkit_factory: Callable[..., Any] | None = None,
+    on_toolkit: Callable[[Any], None] | None = None,
 ) -> List[Dict[str, Any]]:
     factory = toolkit_factory or _default_toolkit_factory()
     transport = str(resolved_config.get("transport") or "stdio")
@@ -514,6 +566,8 @@ def _discover_tools(
             f"Unsupported MCP runtime transport: {transport}",
             400,
         )
+    if on_toolkit is not None:
+        on_toolkit(toolkit)
     try:
         toolkit.connect()
         tools = getattr(toolkit, "tools", {}) or {}
@@ -570,6 +624,9 @@ def _record_to_frontend(
         "toolCount": len(record.get("tools", []) or []),
         "lastCheckedAt": record.get("last_checked_at", 0),
         "lastError": record.get("last_error", ""),
+        "toolsSchemaHash": record.get("tools_schema_hash", ""),
+        "nextCheckAt": record.get("next_check_at", 0),
+        "consecutiveFailures": record.get("consecutive_failures", 0),
         "workspaceRoot": record.get("workspace_root", ""),
         "workspace_root": record.get("workspace_root", ""),
         "requiresWorkspace": workspace_meta["required"],
@@ -624,6 +681,7 @@ def _record_from_entry(
         "workspace_binding": workspace_meta["binding"],
         "workspace_placeholder": workspace_meta["placeholder"],
         "tools": tools,
+        "tools_schema_hash": _tool_manifest_hash(tools),
         "status": status,
         "last_error": last_error,
         "last_checked_at": now,
@@ -647,7 +705,7 @@ def _record_from_entry(
 def list_installed_mcp_toolkits(
     data_dir: str | Path | None = None,
 ) -> List[Dict[str, Any]]:
-    store = _read_store(data_dir)
+    store = _STORE.snapshot(_store_path(data_dir))
     return [_record_to_frontend(record, data_dir) for record in store["toolkits"]]
 
 
@@ -655,22 +713,19 @@ def get_installed_mcp_toolkit(
     toolkit_id: str,
     data_dir: str | Path | None = None,
 ) -> Dict[str, Any] | None:
-    normalized = str(toolkit_id or "").strip()
-    for record in _read_store(data_dir)["toolkits"]:
-        if record.get("toolkit_id") == normalized:
-            return _record_to_frontend(record, data_dir)
-    return None
+    record = _get_installed_record(toolkit_id, data_dir)
+    return _record_to_frontend(record, data_dir) if record is not None else None
 
 
 def _get_installed_record(
     toolkit_id: str,
     data_dir: str | Path | None = None,
 ) -> Dict[str, Any] | None:
+    """The stored record for *toolkit_id*; shared with the store cache."""
     normalized = str(toolkit_id or "").strip()
-    for record in _read_store(data_dir)["toolkits"]:
-        if record.get("toolkit_id") == normalized:
-            return record
-    return None
+    if not normalized:
+        return None
+    return _STORE.lookup(_store_path(data_dir), normalized)
 
 
 def install_mcp_toolkit(
@@ -733,19 +788,23 @@ def delete_mcp_toolkit(
     data_dir: str | Path | None = None,
 ) -> Dict[str, Any]:
     normalized = str(toolkit_id or "").strip()
-    store = _read_store(data_dir)
-    next_records = [
-        record for record in store["toolkits"] if record.get("toolkit_id") != normalized
-    ]
-    if len(next_records) == len(store["toolkits"]):
-        raise McpToolkitError("mcp_toolkit_not_found", "MCP toolkit is not installed", 404)
-    store["toolkits"] = next_records
+
+    def _remove(store: Dict[str, Any]) -> None:
+        next_records = [
+            record for record in store["toolkits"] if record.get("toolkit_id") != normalized
+        ]
+        if len(next_records) == len(store["toolkits"]):
+            raise McpToolkitError("mcp_toolkit_not_found", "MCP toolkit is not installed", 404)
+        store["toolkits"] = next_records
+
+    _STORE.update(_store_path(data_dir), _remove)
     delete_mcp_secret_values(normalized, data_dir=data_dir)
     try:
         delete_mcp_oauth_token(normalized, data_dir=data_dir)
     except Exception:
         pass
-    _write_store(store, data_dir)
+    invalidate_mcp_sessions(normalized)
+    invalidate_agent_blueprints()
     return {"ok": True, "toolkitId": normalized}
 
 
@@ -811,6 +870,8 @@ def configure_mcp_toolkit(
         )
     store["toolkits"] = records
     _write_store(store, data_dir)
+    invalidate_mcp_sessions(normalized)
+    invalidate_agent_blueprints()
     return {"toolkit": _record_to_frontend(updated, data_dir)}
 
 
@@ -821,6 +882,7 @@ def _check_record_health(
     data_dir: str | Path | None = None,
     toolkit_factory: Callable[..., Any] | None = None,
     now_fn: Callable[[], float] | None = None,
+    on_toolkit: Callable[[Any], None] | None = None,
 ) -> Dict[str, Any]:
     now = (now_fn or time.time)()
     try:
@@ -831,7 +893,7 @@ def _check_record_health(
             resolved_workspace,
             data_dir=data_dir,
         )
-        tools = _discover_tools(resolved_config, toolkit_factory)
+        tools = _discover_tools(resolved_config, toolkit_factory, on_toolkit)
         return _record_from_entry(entry, resolved_config, tools, now=now)
     except Exception as exc:
         failed = dict(record)
@@ -841,6 +903,41 @@ def _check_record_health(
         return failed
 
 
+def _check_record_with_pooled_session(
+    record: Dict[str, Any],
+    *,
+    now_fn: Callable[[], float] | None = None,
+) -> Dict[str, Any] | None:
+    """Refresh *record* from an idle pooled session instead of spawning.
+
+    Returns ``None`` when no live session is pooled for the toolkit.
+    """
+    toolkit = lease_idle_mcp_session(str(record.get("toolkit_id") or ""))
+    if toolkit is None:
+        return None
+    try:
+        tools = [
+            _tool_to_dict(tool)
+            for tool in (getattr(toolkit, "tools", {}) or {}).values()
+            if str(getattr(tool, "name", "") or "").strip()
+        ]
+    except Exception:
+        release_mcp_session(toolkit, discard=True)
+        return None
+    release_mcp_session(toolkit)
+    checked = dict(record)
+    checked.update(
+        {
+            "tools": tools,
+            "tools_schema_hash": _tool_manifest_hash(tools),
+            "status": "available",
+            "last_error": "",
+            "last_checked_at": (now_fn or time.time)(),
+        }
+    )
+    return checked
+
+
 def check_mcp_toolkit_health(
     toolkit_id: str,
     *,
@@ -871,28 +968,181 @@ def check_mcp_toolkit_health(
     return {"toolkit": _record_to_frontend(updated, data_dir)}
 
 
-def reload_mcp_toolkits(
+def _disconnect_in_background(toolkit: Any) -> None:
+    disconnect = getattr(toolkit, "disconnect", None)
+    if not callable(disconnect):
+        return
+
+    def _run() -> None:
+        try:
+            disconnect()
+        except Exception:
+            pass
+
+    threading.Thread(target=_run, name="mcp-health-cancel", daemon=True).start()
+
+
+def _timed_out_record(record: Dict[str, Any], timeout: float, now: float) -> Dict[str, Any]:
+    failed = dict(record)
+    failed["status"] = "error"
+    failed["last_error"] = f"Health check timed out after {timeout:g}s"
+    failed["last_checked_at"] = now
+    return failed
+
+
+def _iter_record_health(
+    records: List[Dict[str, Any]],
     *,
     workspace_root: str = "",
     data_dir: str | Path | None = None,
     toolkit_factory: Callable[..., Any] | None = None,
     now_fn: Callable[[], float] | None = None,
-) -> Dict[str, Any]:
+) -> Iterator[tuple[int, Dict[str, Any]]]:
+    """Yield ``(index, checked record)`` for every record as its check ends."""
+    workers = _reload_workers()
+    timeout = _health_timeout_seconds()
+    results: "queue.Queue[tuple[int, Dict[str, Any]]]" = queue.Queue()
+    toolkits: Dict[int, Any] = {}
+    deadlines: Dict[int, float] = {}
+    waiting = list(range(len(records)))
+    waiting.reverse()
+
+    def _run(index: int) -> None:
+        def _track(toolkit: Any) -> None:
+            toolkits[index] = toolkit
+
+        results.put((
+            index,
+            _check_record_health(
+                records[index],
+                workspace_root=workspace_root,
+                data_dir=data_dir,
+                toolkit_factory=toolkit_factory,
+                now_fn=now_fn,
+                on_toolkit=_track,
+            ),
+        ))
+
+    while waiting or deadlines:
+        while waiting and len(deadlines) < workers:
+            index = waiting.pop()
+            deadlines[index] = time.monotonic() + timeout
+            threading.Thread(
+                target=_run,
+                args=(index,),
+                name="mcp-health-check",
+                daemon=True,
+            ).start()
+        wait = max(0.0, min(deadlines.values()) - time.monotonic())
+        try:
+            index, checked = results.get(timeout=wait)
+        except queue.Empty:
+            now = time.monotonic()
+            for index in [i for i, deadline in deadlines.items() if deadline <= now]:
+                del deadlines[index]
+                toolkit = toolkits.pop(index, None)
+                if toolkit is not None:
+                    _disconnect_in_background(toolkit)
+                yield index, _timed_out_record(records[index], timeout, (now_fn or time.time)())
+            continue
+        if deadlines.pop(index, None) is None:
+            continue  # already reported as timed out
+        toolkits.pop(index, None)
+        yield index, checked
+
+
+def _merge_checked_records(
+    checked: Dict[str, Dict[str, Any]],
+    data_dir: str | Path | None = None,
+    *,
+    checked_since: Dict[str, Any] | None = None,
+) -> List[Dict[str, Any]]:
+    """Write the checked records in one store update; returns the stored list.
+
+    The store is re-read so toolkits installed or removed while the checks
+    ran are kept as they are now. With ``checked_since`` (toolkit id ->
+    ``last_checked_at`` seen before checking), a result is also dropped when
+    the stored record has been rewritten (configured, reinstalled) in the
+    meantime; without it, results overwrite whatever is stored.
+    """
+    def _merge(store: Dict[str, Any]) -> List[Dict[str, Any]]:
+        records = []
+        for record in store["toolkits"]:
+            toolkit_id = str(record.get("toolkit_id") or "")
+            result = checked.get(toolkit_id)
+            if result is not None and checked_since is not None:
+                if record.get("last_checked_at") != checked_since.get(toolkit_id):
+                    result = None
+            records.append(result if result is not None else record)
+        store["toolkits"] = records
+        return records
+
+    return _STORE.update(_store_path(data_dir), _merge)
+
+
+def iter_reload_mcp_toolkits(
+    *,
+    workspace_root: str = "",
+    data_dir: str | Path | None = None,
+    toolkit_factory: Callable[..., Any] | None = None,
+    now_fn: Callable[[], float] | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Reload every installed toolkit, yielding progress as each check ends.
+
+    Yields ``{"type": "toolkit", ...}`` per toolkit in completion order and a
+    final ``{"type": "done", "toolkits": [...], "count": n}`` once the store
+    has been written.
+    """
     store = _read_store(data_dir)
-    updated = [
-        _check_record_health(
-            record,
+    records = store["toolkits"]
+    checked: Dict[str, Dict[str, Any]] = {}
+    for completed, (index, record) in enumerate(
+        _iter_record_health(
+            records,
             workspace_root=workspace_root,
             data_dir=data_dir,
             toolkit_factory=toolkit_factory,
             now_fn=now_fn,
-        )
-        for record in store["toolkits"]
-    ]
-    store["toolkits"] = updated
-    _write_store(store, data_dir)
+        ),
+        start=1,
+    ):
+        checked[str(records[index].get("toolkit_id") or "")] = record
+        yield {
+            "type": "toolkit",
+            "index": index,
+            "completed": completed,
+            "total": len(records),
+            "toolkit": _record_to_frontend(record, data_dir),
+        }
+    updated = _merge_checked_records(
+        checked,
+        data_dir,
+        checked_since={
+            str(record.get("toolkit_id") or ""): record.get("last_checked_at")
+            for record in records
+        },
+    )
     toolkits = [_record_to_frontend(record, data_dir) for record in updated]
-    return {"toolkits": toolkits, "count": len(toolkits)}
+    yield {"type": "done", "toolkits": toolkits, "count": len(toolkits)}
+
+
+def reload_mcp_toolkits(
+    *,
+    workspace_root: str = "",
+    data_dir: str | Path | None = None,
+    toolkit_factory: Callable[..., Any] | None = None,
+    now_fn: Callable[[], float] | None = None,
+) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"toolkits": [], "count": 0}
+    for event in iter_reload_mcp_toolkits(
+        workspace_root=workspace_root,
+        data_dir=data_dir,
+        toolkit_factory=toolkit_factory,
+        now_fn=now_fn,
+    ):
+        if event["type"] == "done":
+            result = {"toolkits": event["toolkits"], "count": event["count"]}
+    return result
 
 
 def build_mcp_runtime_toolkit(
@@ -916,12 +1166,12 @@ def build_mcp_runtime_toolkit(
             )
     transport = str(record.get("transport") or "stdio")
     if transport == "stdio":
-        toolkit = factory(
-            command=str(record.get("command") or ""),
-            args=list(record.get("args") or []),
-            env=secret_values,
-            transport="stdio",
-        )
+        factory_kwargs = {
+            "command": str(record.get("command") or ""),
+            "args": list(record.get("args") or []),
+            "env": secret_values,
+            "transport": "stdio",
+        }
     elif transport == "streamable_http":
         headers = _headers_from_templates(
             list(record.get("header_templates") or []),
@@ -935,15 +1185,33 @@ def build_mcp_runtime_toolkit(
                     data_dir=data_dir,
                 )
             )
-        toolkit = factory(
-            url=str(record.get("url") or ""),
-            headers=headers,
-            transport="streamable_http",
-        )
+        factory_kwargs = {
+            "url": str(record.get("url") or ""),
+            "headers": headers,
+            "transport": "streamable_http",
+        }
     else:
         raise McpToolkitError(
             "unsupported_mcp_entry",
             f"Unsupported MCP runtime transport: {transport}",
             400,
         )
-    return toolkit.connect()
+
+    session_config = {
+        **factory_kwargs,
+        "data_dir": str(_data_dir(data_dir)),
+        "factory": f"{getattr(factory, '__module__', '')}.{getattr(factory, '__qualname__', repr(factory))}",
+    }
+    return lease_mcp_session(
+        record["toolkit_id"],
+        session_config,
+        lambda: factory(**factory_kwargs).connect(),
+        warm=transport == "stdio",
+    )
+
+
+def release_mcp_runtime_toolkit(toolkit: Any, *, discard: bool = False) -> bool:
+    if not is_leased_mcp_session(toolkit):
+        return False
+    release_mcp_session(toolkit, discard=discard)
+    return True
@@ -0,0 +1,506 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+
+# Background memory commits.
+#
+# The end of a chat turn used to call memory_manager.commit_messages() inline,
+# so stream completion waited on embedding and long-term extraction. Commits
+# are now appended to a durable SQLite queue (<data_dir>/memory/
+# commit_queue.sqlite3) and executed by a small pool of daemon workers.
+#
+# Ordering: a job is only claimable while it is the oldest unfinished job of
+# its session, so commits for one session run strictly in order while
+# different sessions proceed in parallel. A new turn for a session waits
+# (bounded) for that session's queued commits before memory is prepared, so
+# recall never races the previous turn's commit.
+#
+# Durability: jobs are committed to the queue before the stream reports them.
+# On start, jobs left "running" by a crashed process are reset to "pending"
+# and replayed; the worker rebuilds the memory manager from the persisted
+# memory options. API keys are never written to disk: they are held in
+# process per session, and a replayed job that needs one waits until the
+# session's next turn supplies it. Failed attempts are retried with backoff.
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_WAIT_SECONDS = 15.0
+RETENTION_SECONDS = 24 * 3600.0
+PRUNE_INTERVAL_SECONDS = 60.0
+IDLE_POLL_SECONDS = 5.0
+
+_SECRET_OPTION_KEYS = ("openaiApiKey", "openai_api_key")
+_PERSISTED_OPTION_KEYS = ("modelId", "model_id", "ollama_base_url")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commit_jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS commit_jobs_session ON commit_jobs (session_id, status, id);
+CREATE INDEX IF NOT EXISTS commit_jobs_status ON commit_jobs (status, id);
+"""
+
+_UNFINISHED = ("pending", "running")
+
+_queues_lock = threading.Lock()
+_queues: Dict[str, "_CommitQueue"] = {}
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return default
+
+
+def commit_async_enabled() -> bool:
+    raw = os.environ.get("UNCHAIN_MEMORY_COMMIT_ASYNC", "").strip().lower()
+    if not raw:
+        return True
+    return raw in {"1", "true", "yes", "on"}
+
+
+def _worker_count() -> int:
+    return max(1, int(_env_float("UNCHAIN_MEMORY_COMMIT_WORKERS", DEFAULT_WORKERS)))
+
+
+def _max_attempts() -> int:
+    return max(1, int(_env_float("UNCHAIN_MEMORY_COMMIT_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)))
+
+
+def _split_options(options: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    persisted: Dict[str, Any] = {}
+    secrets: Dict[str, str] = {}
+    for key, value in (options or {}).items():
+        if key in _SECRET_OPTION_KEYS:
+            if isinstance(value, str) and value.strip():
+                secrets[key] = value
+        elif key.startswith("memory_") or key in _PERSISTED_OPTION_KEYS:
+            persisted[key] = value
+    return persisted, secrets
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _decode(raw: Any, default: Any) -> Any:
+    if not raw:
+        return default
+    try:
+        return json.loads(raw)
+    except (TypeError, ValueError):
+        return default
+
+
+class _CommitUnavailable(RuntimeError):
+    pass
+
+
+class _CommitQueue:
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._connection = sqlite3.connect(
+            db_path,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        # job id -> live manager handed over by the turn that enqueued it
+        self._live: Dict[int, Any] = {}
+        # session id -> API keys from the session's most recent turn
+        self._secrets: Dict[str, Dict[str, str]] = {}
+        self._threads: List[threading.Thread] = []
+        self._stopping = False
+        self._last_prune = 0.0
+        self._recover()
+
+    # ── producer side ──
+
+    def enqueue(
+        self,
+        *,
+        session_id: str,
+        options: Dict[str, Any],
+        messages: List[Dict[str, Any]],
+        memory_namespace: str = "",
+        model: str = "",
+        manager: Any = None,
+    ) -> Dict[str, Any]:
+        persisted, secrets = _split_options(options)
+        payload = {
+            "options": persisted,
+            "messages": messages,
+            "memory_namespace": memory_namespace or "",
+            "model": model or "",
+            "needs_secrets": sorted(secrets),
+        }
+        encoded = _encode(payload)
+        with self._lock:
+            self.remember_secrets(session_id, secrets)
+            job_id = int(
+                self._connection.execute(
+                    "INSERT INTO commit_jobs (session_id, payload, status, created_at)"
+                    " VALUES (?, ?, 'pending', ?)",
+                    (session_id, encoded, time.time()),
+                ).lastrowid
+            )
+            if manager is not None:
+                self._live[job_id] = manager
+            self._ensure_workers_locked()
+            self._changed.notify_all()
+            return self.job(job_id) or {"job_id": job_id, "status": "pending"}
+
+    def remember_secrets(self, session_id: str, secrets: Dict[str, str]) -> None:
+        if not secrets:
+            return
+        with self._lock:
+            self._secrets[session_id] = dict(secrets)
+            self._changed.notify_all()
+
+    # ── status ──
+
+    def _row_to_job(self, row: Tuple[Any, ...]) -> Dict[str, Any]:
+        job_id, session_id, status, attempts, result, error, created, started, finished, payload = row
+        job: Dict[str, Any] = {
+            "job_id": int(job_id),
+            "session_id": session_id,
+            "status": status,
+            "attempts": int(attempts),
+            "created_at": created,
+            "started_at": started,
+            "finished_at": finished,
+        }
+        if status == "done":
+            job["result"] = _decode(result, {})
+        if error:
+            job["error"] = error
+        if status == "pending" and payload is not None:
+            needs = _decode(payload, {}).get("needs_secrets") or []
+            if needs and session_id not in self._secrets:
+                job["awaiting_credentials"] = True
+        return job
+
+    _JOB_COLUMNS = (
+        "id, session_id, status, attempts, result, error, created_at, started_at, finished_at,"
+        " CASE WHEN status = 'pending' THEN payload END"
+    )
+
+    def job(self, job_id: int) -> Dict[str, Any] | None:
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT {self._JOB_COLUMNS} FROM commit_jobs WHERE id = ?",
+                (int(job_id),),
+            ).fetchone()
+            return self._row_to_job(row) if row is not None else None
+
+    def session_jobs(self, session_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT {self._JOB_COLUMNS} FROM commit_jobs WHERE session_id = ?"
+                " ORDER BY id DESC LIMIT ?",
+                (session_id, max(1, int(limit))),
+            ).fetchall()
+            return [self._row_to_job(row) for row in rows]
+
+    def unfinished(self, session_id: str) -> int:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT COUNT(*) FROM commit_jobs WHERE session_id = ? AND status IN (?, ?)",
+                (session_id, *_UNFINISHED),
+            ).fetchone()
+            return int(row[0]) if row else 0
+
+    def wait_for_session(self, session_id: str, timeout: float) -> bool:
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._lock:
+            while self.unfinished(session_id):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(min(remaining, IDLE_POLL_SECONDS))
+            return True
+
+    # ── worker side ──
+
+    def _recover(self) -> None:
+        with self._lock:
+            self._connection.execute(
+                "UPDATE commit_jobs SET status = 'pending', started_at = NULL"
+                " WHERE status = 'running'"
+            )
+            self._prune_locked(time.time())
+            pending = self._connection.execute(
+                "SELECT COUNT(*) FROM commit_jobs WHERE status = 'pending'"
+            ).fetchone()
+            if pending and int(pending[0]):
+                self._ensure_workers_locked()
+
+    def _prune_locked(self, now: float) -> None:
+        self._last_prune = now
+        self._connection.execute(
+            "DELETE FROM commit_jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+            (now - RETENTION_SECONDS,),
+        )
+
+    def _ensure_workers_locked(self) -> None:
+        if self._stopping:
+            return
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        for _ in range(_worker_count() - len(self._threads)):
+            thread = threading.Thread(
+                target=self._work,
+                name="unchain-memory-commit",
+                daemon=True,
+            )
+            self._threads.append(thread)
+            thread.start()
+
+    def _claim_locked(self) -> Tuple[int, str, Dict[str, Any]] | None:
+        now = time.time()
+        # Only the oldest unfinished job of each session is a candidate, so a
+        # session with a running job contributes nothing.
+        rows = self._connection.execute(
+            "SELECT id, session_id, payload FROM commit_jobs AS j"
+            " WHERE status = 'pending' AND not_before <= ?"
+            " AND id = (SELECT MIN(id) FROM commit_jobs AS p"
+            "           WHERE p.session_id = j.session_id AND p.status IN (?, ?))"
+            " ORDER BY id",
+            (now, *_UNFINISHED),
+        ).fetchall()
+        for job_id, session_id, raw_payload in rows:
+            payload = _decode(raw_payload, {})
+            job_id = int(job_id)
+            if (
+                payload.get("needs_secrets")
+                and job_id not in self._live
+                and session_id not in self._secrets
+            ):
+                continue
+            self._connection.execute(
+                "UPDATE commit_jobs SET status = 'running', attempts = attempts + 1,"
+                " started_at = ? WHERE id = ?",
+                (now, job_id),
+            )
+            return job_id, session_id, payload
+        return None
+
+    def _next_wakeup_locked(self) -> float:
+        row = self._connection.execute(
+            "SELECT MIN(not_before) FROM commit_jobs WHERE status = 'pending' AND not_before > ?",
+            (time.time(),),
+        ).fetchone()
+        if row and row[0] is not None:
+            return max(0.05, min(IDLE_POLL_SECONDS, float(row[0]) - time.time()))
+        return IDLE_POLL_SECONDS
+
+    def _work(self) -> None:
+        while True:
+            with self._lock:
+                claimed = None
+                while not self._stopping:
+                    claimed = self._claim_locked()
+                    if claimed is not None:
+                        break
+                    self._changed.wait(self._next_wakeup_locked())
+                if claimed is None:
+                    return
+                job_id, session_id, payload = claimed
+                manager = self._live.pop(job_id, None)
+                secrets = dict(self._secrets.get(session_id) or {})
+            try:
+                result = self._execute(session_id, payload, manager, secrets)
+            except Exception as exc:
+                self._finish(job_id, error=str(exc) or exc.__class__.__name__)
+            else:
+                self._finish(job_id, result=result)
+
+    def _execute(
+        self,
+        session_id: str,
+        payload: Dict[str, Any],
+        manager: Any,
+        secrets: Dict[str, str],
+    ) -> Dict[str, Any]:
+        if manager is None:
+            import memory_factory
+
+            options = {**(payload.get("options") or {}), **secrets}
+            manager, reason = memory_factory.create_memory_manager_with_diagnostics(
+                options,
+                session_id=session_id,
+            )
+            if manager is None:
+                raise _CommitUnavailable(str(reason or "memory_manager_unavailable"))
+        manager.commit_messages(
+            session_id=session_id,
+            full_conversation=payload.get("messages") or [],
+            memory_namespace=payload.get("memory_namespace") or None,
+            model=payload.get("model") or "",
+        )
+        return copy.deepcopy(getattr(manager, "last_commit_info", {}) or {})
+
+    def _finish(
+        self,
+        job_id: int,
+        *,
+        result: Dict[str, Any] | None = None,
+        error: str = "",
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            if not error:
+                self._connection.execute(
+                    "UPDATE commit_jobs SET status = 'done', result = ?, error = NULL,"
+                    " finished_at = ?, payload = '{}' WHERE id = ?",
+                    (_encode(result or {}), now, job_id),
+                )
+            else:
+                row = self._connection.execute(
+                    "SELECT attempts FROM commit_jobs WHERE id = ?",
+                    (job_id,),
+                ).fetchone()
+                attempts = int(row[0]) if row else _max_attempts()
+                if attempts < _max_attempts():
+                    self._connection.execute(
+                        "UPDATE commit_jobs SET status = 'pending', error = ?,"
+                        " not_before = ? WHERE id = ?",
+                        (error, now + 2.0 ** attempts, job_id),
+                    )
+                else:
+                    self._connection.execute(
+                        "UPDATE commit_jobs SET status = 'failed', error = ?,"
+                        " finished_at = ?, payload = '{}' WHERE id = ?",
+                        (error, now, job_id),
+                    )
+            if now - self._last_prune > PRUNE_INTERVAL_SECONDS:
+                self._prune_locked(now)
+            self._changed.notify_all()
+
+    def close(self) -> None:
+        with self._lock:
+            self._stopping = True
+            self._changed.notify_all()
+            threads = list(self._threads)
+        for thread in threads:
+            thread.join(timeout=5.0)
+        with self._lock:
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+
+
+def _resolve_data_dir(data_dir: str = "") -> str:
+    from memory_paths import _data_dir, _normalize_data_dir
+
+    return _normalize_data_dir(data_dir or _data_dir())
+
+
+def _queue(data_dir: str = "", *, create: bool = True) -> _CommitQueue | None:
+    resolved = _resolve_data_dir(data_dir)
+    if not resolved:
+        return None
+    from memory_paths import _memory_commit_queue_path
+
+    db_path = os.path.join(resolved, "memory", "commit_queue.sqlite3")
+    with _queues_lock:
+        queue = _queues.get(db_path)
+        if queue is None:
+            if not create and not os.path.exists(db_path):
+                return None
+            queue = _CommitQueue(_memory_commit_queue_path(resolved))
+            _queues[db_path] = queue
+        return queue
+
+
+def start_memory_commit_worker(data_dir: str = "") -> bool:
+    """Open the queue and replay commits left over by a previous process."""
+    return _queue(data_dir, create=False) is not None
+
+
+def enqueue_memory_commit(
+    *,
+    session_id: str,
+    options: Dict[str, Any],
+    messages: List[Dict[str, Any]],
+    memory_namespace: str = "",
+    model: str = "",
+    manager: Any = None,
+    data_dir: str = "",
+) -> Dict[str, Any]:
+    queue = _queue(data_dir)
+    if queue is None:
+        raise RuntimeError("missing_data_dir")
+    return queue.enqueue(
+        session_id=session_id,
+        options=options,
+        messages=messages,
+        memory_namespace=memory_namespace,
+        model=model,
+        manager=manager,
+    )
+
+
+def wait_for_session_commits(
+    session_id: str,
+    *,
+    options: Dict[str, Any] | None = None,
+    timeout: float | None = None,
+    data_dir: str = "",
+) -> bool:
+    """Block until *session_id* has no queued commits. False on timeout."""
+    queue = _queue(data_dir, create=False)
+    if queue is None or not session_id:
+        return True
+    _persisted, secrets = _split_options(options or {})
+    queue.remember_secrets(session_id, secrets)
+    if timeout is None:
+        timeout = _env_float("UNCHAIN_MEMORY_COMMIT_WAIT_SECONDS", DEFAULT_WAIT_SECONDS)
+    return queue.wait_for_session(session_id, timeout)
+
+
+def get_memory_commit_job(job_id: int, *, data_dir: str = "") -> Dict[str, Any] | None:
+    queue = _queue(data_dir, create=False)
+    return queue.job(job_id) if queue is not None else None
+
+
+def list_memory_commit_jobs(
+    session_id: str,
+    *,
+    limit: int = 20,
+    data_dir: str = "",
+) -> List[Dict[str, Any]]:
+    queue = _queue(data_dir, create=False)
+    return queue.session_jobs(session_id, limit) if queue is not None else []
+
+
+def close_memory_commit_workers() -> None:
+    with _queues_lock:
+        queues = list(_queues.values())
+        _queues.clear()
+    for queue in queues:
+        queue.close()
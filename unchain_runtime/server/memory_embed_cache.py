@@ -0,0 +1,472 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+# Content-addressed embedding cache shared by session and long-term memory.
+#
+# Vectors are keyed by (embedding signature, sha256(text)). Each signature
+# gets its own directory under <data_dir>/memory/embed_cache holding an
+# append-only float32 matrix (vectors.f32, read through np.memmap) and a
+# parallel file of 32-byte digests (keys.bin). An in-process LRU sits in
+# front of the disk store. When a store exceeds its row budget it is
+# compacted, on a background thread, down to the most recently used rows.
+#
+# Compaction writes the kept rows into a new generation directory
+# (gen-<n>/) and then atomically rewrites meta.json to point at it, so a
+# crash leaves either the old or the new pair of files, never a mix.
+# Generation 0 is the files directly in the signature directory.
+
+DEFAULT_LRU_ENTRIES = 4096
+DEFAULT_MAX_ROWS_PER_SIGNATURE = 200_000
+_COMPACT_KEEP_RATIO = 0.75
+_COMPACT_CHUNK_ROWS = 8192
+_DIGEST_BYTES = 32
+_GENERATION_PREFIX = "gen-"
+_VECTORS_FILENAME = "vectors.f32"
+_KEYS_FILENAME = "keys.bin"
+_META_FILENAME = "meta.json"
+
+_lru: "OrderedDict[tuple[str, str, bytes], list[float]]" = OrderedDict()
+_lru_lock = threading.Lock()
+_stores: dict[tuple[str, str], "_DiskEmbeddingStore"] = {}
+_stores_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_cache_stats: dict[str, int] = {
+    "lru_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "compactions": 0,
+    "compaction_failures": 0,
+    "dims_mismatches": 0,
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        return default
+    return value if value >= 0 else default
+
+
+def _lru_capacity() -> int:
+    return _env_int("UNCHAIN_EMBED_CACHE_LRU_ENTRIES", DEFAULT_LRU_ENTRIES)
+
+
+def _max_rows_per_signature() -> int:
+    return _env_int("UNCHAIN_EMBED_CACHE_MAX_ROWS", DEFAULT_MAX_ROWS_PER_SIGNATURE)
+
+
+def embed_cache_enabled() -> bool:
+    raw = os.environ.get("UNCHAIN_EMBED_CACHE_ENABLED", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.sha256(str(text).encode("utf-8")).digest()
+
+
+def _signature_dirname(signature: str) -> str:
+    return hashlib.sha1(signature.encode("utf-8")).hexdigest()[:16]
+
+
+class _DiskEmbeddingStore:
+    def __init__(self, directory: str, signature: str, dims: int) -> None:
+        self.directory = directory
+        self.signature = signature
+        self.dims = int(dims)
+        self._lock = threading.Lock()
+        self._rows: dict[bytes, int] = {}
+        self._last_used: list[int] = []
+        self._clock = 0
+        self._generation = 0
+        self._mapped = None
+        self._mapped_rows = 0
+        self._compaction: threading.Thread | None = None
+        self._load()
+
+    def _generation_dir(self, generation: int) -> str:
+        if generation <= 0:
+            return self.directory
+        return os.path.join(self.directory, f"{_GENERATION_PREFIX}{generation}")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self._generation_dir(self._generation), _VECTORS_FILENAME)
+
+    @property
+    def _keys_path(self) -> str:
+        return os.path.join(self._generation_dir(self._generation), _KEYS_FILENAME)
+
+    def _write_meta(self, generation: int) -> None:
+        meta = {"signature": self.signature, "dims": self.dims, "generation": generation}
+        path = os.path.join(self.directory, _META_FILENAME)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(meta, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temp_path, path)
+
+    def _reset_files(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._generation = 0
+        for path in (self._vectors_path, self._keys_path):
+            with open(path, "wb"):
+                pass
+        self._write_meta(0)
+        self._remove_stale_generations()
+
+    def _remove_stale_generations(self) -> None:
+        """Best-effort removal of generations left by a finished or torn compaction."""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        current = os.path.basename(self._generation_dir(self._generation))
+        for name in names:
+            if name.startswith(_GENERATION_PREFIX) and name != current:
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+        if self._generation > 0:
+            for name in (_VECTORS_FILENAME, _KEYS_FILENAME):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def _load(self) -> None:
+        meta_path = os.path.join(self.directory, _META_FILENAME)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as handle:
+                meta = json.load(handle)
+        except Exception:
+            meta = {}
+        if (
+            not isinstance(meta, dict)
+            or meta.get("signature") != self.signature
+            or int(meta.get("dims") or 0) != self.dims
+        ):
+            self._reset_files()
+            return
+
+        try:
+            self._generation = max(0, int(meta.get("generation") or 0))
+            with open(self._keys_path, "rb") as handle:
+                raw_keys = handle.read()
+            vector_bytes = os.path.getsize(self._vectors_path)
+        except (OSError, TypeError, ValueError):
+            self._reset_files()
+            return
+        self._remove_stale_generations()
+
+        row_bytes = self.dims * 4
+        row_count = min(len(raw_keys) // _DIGEST_BYTES, vector_bytes // row_bytes)
+        if row_count * _DIGEST_BYTES != len(raw_keys) or row_count * row_bytes != vector_bytes:
+            # A crash between the two appends leaves a torn tail; drop it.
+            with open(self._keys_path, "r+b") as handle:
+                handle.truncate(row_count * _DIGEST_BYTES)
+            with open(self._vectors_path, "r+b") as handle:
+                handle.truncate(row_count * row_bytes)
+        for row in range(row_count):
+            digest = raw_keys[row * _DIGEST_BYTES:(row + 1) * _DIGEST_BYTES]
+            self._rows[digest] = row
+        self._last_used = list(range(row_count))
+        self._clock = row_count
+
+    def _row_count(self) -> int:
+        return len(self._last_used)
+
+    def _matrix(self):
+        import numpy as np
+
+        row_count = self._row_count()
+        if self._mapped is None or self._mapped_rows != row_count:
+            self._mapped = None
+            if row_count:
+                self._mapped = np.memmap(
+                    self._vectors_path,
+                    dtype=np.float32,
+                    mode="r",
+                    shape=(row_count, self.dims),
+                )
+            self._mapped_rows = row_count
+        return self._mapped
+
+    def get_many(self, digests: list[bytes]) -> dict[bytes, list[float]]:
+        with self._lock:
+            rows = {digest: self._rows[digest] for digest in digests if digest in self._rows}
+            if not rows:
+                return {}
+            matrix = self._matrix()
+            found: dict[bytes, list[float]] = {}
+            for digest, row in rows.items():
+                self._clock += 1
+                self._last_used[row] = self._clock
+                found[digest] = matrix[row].tolist()
+            return found
+
+    def put_many(self, items: list[tuple[bytes, list[float]]]) -> None:
+        import numpy as np
+
+        with self._lock:
+            fresh = []
+            mismatched = 0
+            for digest, vector in items:
+                if digest in self._rows:
+                    continue
+                if len(vector) != self.dims:
+                    mismatched += 1
+                    continue
+                fresh.append((digest, vector))
+            if mismatched:
+                # Still returned to the caller, just never persisted.
+                _bump_stat("dims_mismatches", mismatched)
+            if not fresh:
+                return
+            unique: dict[bytes, list[float]] = dict(fresh)
+            matrix = np.asarray(list(unique.values()), dtype=np.float32)
+            row_count = self._row_count()
+            try:
+                # Vectors first, then keys, each synced: a key never lands
+                # before its vector, so rows stay aligned across a crash.
+                _append_synced(self._vectors_path, matrix.tobytes())
+                _append_synced(self._keys_path, b"".join(unique.keys()))
+            except BaseException:
+                # ENOSPC or similar partway through: cut both files back to
+                # the last consistent row so later appends stay aligned.
+                self._truncate_to(row_count)
+                raise
+            for digest in unique:
+                self._clock += 1
+                self._rows[digest] = self._row_count()
+                self._last_used.append(self._clock)
+
+            max_rows = _max_rows_per_signature()
+            if max_rows and self._row_count() > max_rows and self._compaction is None:
+                self._compaction = threading.Thread(
+                    target=self._run_compaction,
+                    args=(int(max_rows * _COMPACT_KEEP_RATIO),),
+                    name="embed-cache-compaction",
+                    daemon=True,
+                )
+                self._compaction.start()
+
+    def _truncate_to(self, row_count: int) -> None:
+        for path, row_bytes in ((self._vectors_path, self.dims * 4), (self._keys_path, _DIGEST_BYTES)):
+            try:
+                with open(path, "r+b") as handle:
+                    handle.truncate(row_count * row_bytes)
+            except OSError:
+                pass
+
+    def join_compaction(self, timeout: float | None = None) -> None:
+        thread = self._compaction
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run_compaction(self, keep_rows: int) -> None:
+        try:
+            self._compact(keep_rows)
+        except Exception:
+            _bump_stat("compaction_failures")
+        finally:
+            with self._lock:
+                self._compaction = None
+
+    def _compact(self, keep_rows: int) -> None:
+        """Rewrite the store into a new generation holding the most recently used rows.
+
+        The bulk copy reads the rows present at the start, which appends
+        never modify, without holding the store lock; rows appended in the
+        meantime are carried over under the lock just before the switch.
+        """
+        import numpy as np
+
+        with self._lock:
+            snapshot_rows = self._row_count()
+            if snapshot_rows <= keep_rows:
+                return
+            last_used = np.asarray(self._last_used, dtype=np.int64)
+            keep = np.sort(np.argsort(-last_used, kind="stable")[: max(0, keep_rows)])
+            source_path = self._vectors_path
+            old_generation = self._generation
+        generation = old_generation + 1
+        target_dir = self._generation_dir(generation)
+        shutil.rmtree(target_dir, ignore_errors=True)
+        os.makedirs(target_dir)
+        target_vectors = os.path.join(target_dir, _VECTORS_FILENAME)
+
+        source = np.memmap(source_path, dtype=np.float32, mode="r", shape=(snapshot_rows, self.dims))
+        try:
+            with open(target_vectors, "wb") as handle:
+                for start in range(0, len(keep), _COMPACT_CHUNK_ROWS):
+                    block = source[keep[start:start + _COMPACT_CHUNK_ROWS]]
+                    handle.write(np.ascontiguousarray(block, dtype=np.float32).tobytes())
+                handle.flush()
+                os.fsync(handle.fileno())
+        finally:
+            # Release the mapping before the old generation is removed.
+            del source
+
+        with self._lock:
+            tail_rows = list(range(snapshot_rows, self._row_count()))
+            if tail_rows:
+                tail = np.ascontiguousarray(self._matrix()[tail_rows], dtype=np.float32)
+                _append_synced(target_vectors, tail.tobytes())
+            digest_by_row = {row: digest for digest, row in self._rows.items()}
+            kept_rows = [int(row) for row in keep] + tail_rows
+            kept_digests = [digest_by_row[row] for row in kept_rows]
+            _append_synced(os.path.join(target_dir, _KEYS_FILENAME), b"".join(kept_digests))
+
+            self._mapped = None
+            self._mapped_rows = 0
+            self._write_meta(generation)
+            self._generation = generation
+            self._last_used = [self._last_used[row] for row in kept_rows]
+            self._rows = {digest: row for row, digest in enumerate(kept_digests)}
+            self._remove_stale_generations()
+        _bump_stat("compactions")
+
+
+def _append_synced(path: str, payload: bytes) -> None:
+    with open(path, "ab") as handle:
+        handle.write(payload)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+
+def _bump_stat(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _cache_stats[name] += amount
+
+
+def _get_store(cache_dir: str, signature: str, dims: int) -> "_DiskEmbeddingStore | None":
+    if not cache_dir or dims <= 0:
+        return None
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return None
+
+    key = (cache_dir, signature)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None or store.dims != dims:
+            directory = os.path.join(cache_dir, _signature_dirname(signature))
+            try:
+                store = _DiskEmbeddingStore(directory, signature, dims)
+            except Exception:
+                return None
+            _stores[key] = store
+        return store
+
+
+def _lru_get(key: tuple[str, str, bytes]) -> list[float] | None:
+    with _lru_lock:
+        vector = _lru.get(key)
+        if vector is not None:
+            _lru.move_to_end(key)
+        return vector
+
+
+def _lru_put(key: tuple[str, str, bytes], vector: list[float]) -> None:
+    capacity = _lru_capacity()
+    if capacity <= 0:
+        return
+    with _lru_lock:
+        _lru[key] = vector
+        _lru.move_to_end(key)
+        while len(_lru) > capacity:
+            _lru.popitem(last=False)
+
+
+def wrap_embed_fn_with_cache(
+    embed_fn: Callable[[list[str]], list[list[float]]],
+    *,
+    signature: str,
+    vector_size: int,
+    cache_dir: str,
+) -> Callable[[list[str]], list[list[float]]]:
+    if not embed_cache_enabled() or not signature:
+        return embed_fn
+
+    def cached_embed(texts: list[str]) -> list[list[float]]:
+        items = [str(text) for text in texts]
+        if not items:
+            return []
+
+        digests = [text_digest(text) for text in items]
+        resolved: dict[bytes, list[float]] = {}
+        for digest in digests:
+            if digest in resolved:
+                continue
+            vector = _lru_get((cache_dir, signature, digest))
+            if vector is not None:
+                resolved[digest] = vector
+                _bump_stat("lru_hits")
+
+        store = _get_store(cache_dir, signature, int(vector_size or 0))
+        pending = [digest for digest in dict.fromkeys(digests) if digest not in resolved]
+        if store is not None and pending:
+            try:
+                from_disk = store.get_many(pending)
+            except Exception:
+                from_disk = {}
+            for digest, vector in from_disk.items():
+                resolved[digest] = vector
+                _lru_put((cache_dir, signature, digest), vector)
+            _bump_stat("disk_hits", len(from_disk))
+
+        missing: dict[bytes, str] = {}
+        for digest, text in zip(digests, items):
+            if digest not in resolved and digest not in missing:
+                missing[digest] = text
+        if missing:
+            _bump_stat("misses", len(missing))
+            vectors = embed_fn(list(missing.values()))
+            if len(vectors) != len(missing):
+                raise RuntimeError(
+                    f"embedding provider returned {len(vectors)} vectors for {len(missing)} texts"
+                )
+            fresh = []
+            for digest, vector in zip(missing.keys(), vectors):
+                normalized = [float(value) for value in vector]
+                resolved[digest] = normalized
+                _lru_put((cache_dir, signature, digest), normalized)
+                fresh.append((digest, normalized))
+            if store is not None:
+                try:
+                    store.put_many(fresh)
+                except Exception:
+                    pass
+
+        return [list(resolved[digest]) for digest in digests]
+
+    return cached_embed
+
+
+def embed_cache_stats() -> dict[str, int]:
+    with _lru_lock:
+        lru_entries = len(_lru)
+    with _stats_lock:
+        stats = dict(_cache_stats)
+    return {**stats, "lru_entries": lru_entries}
+
+
+def clear_embed_cache_memory() -> None:
+    with _lru_lock:
+        _lru.clear()
+    with _stores_lock:
+        stores = list(_stores.values())
+        _stores.clear()
+    for store in stores:
+        store.join_compaction()
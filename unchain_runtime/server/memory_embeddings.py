@@ -2,9 +2,26 @@ from __future__ import annotations
 
 import hashlib
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from types import SimpleNamespace
 from typing import Any, Callable
 
+from memory_embed_cache import wrap_embed_fn_with_cache
+from memory_reindex import RECORD_KEY as REINDEX_RECORD_KEY
+from memory_reindex import begin_session_reindex, reindex_enabled, reindex_record
+from memory_shared_collection import assign_session_vector_layout, delete_session_vectors
+from ollama_client import get_ollama_client, normalize_ollama_base_url
+from ollama_inventory import ollama_reachable
+
+_OLLAMA_EMBED_DEFAULT_BATCH_SIZE = 64
+_OLLAMA_EMBED_DEFAULT_CONCURRENCY = 2
+_OLLAMA_EMBED_TIMEOUT_SECONDS = 120.0
+
+# Base URLs whose Ollama predates the batched /api/embed endpoint.
+_ollama_legacy_embed_hosts: set[str] = set()
+_ollama_legacy_embed_hosts_lock = threading.Lock()
+
 
 def _root():
     import memory_factory as root_module
@@ -41,14 +58,29 @@ def _ollama_base_url(options: dict[str, Any]) -> str:
     return os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
 
 
-def _ollama_reachable(base_url: str) -> bool:
+def _positive_int(value: object, default: int) -> int:
     try:
-        import httpx
+        parsed = int(str(value).strip())
+    except (TypeError, ValueError):
+        return default
+    return parsed if parsed > 0 else default
+
+
+def _ollama_embed_tuning(options: dict[str, Any]) -> dict[str, int]:
+    batch_size = options.get("memory_embedding_batch_size") or os.environ.get(
+        "UNCHAIN_OLLAMA_EMBED_BATCH_SIZE", ""
+    )
+    max_concurrency = options.get("memory_embedding_max_concurrency") or os.environ.get(
+        "UNCHAIN_OLLAMA_EMBED_CONCURRENCY", ""
+    )
+    return {
+        "batch_size": _positive_int(batch_size, _OLLAMA_EMBED_DEFAULT_BATCH_SIZE),
+        "max_concurrency": _positive_int(max_concurrency, _OLLAMA_EMBED_DEFAULT_CONCURRENCY),
+    }
 
-        resp = httpx.get(f"{base_url}/api/tags", timeout=2.0)
-        return resp.status_code == 200
-    except Exception:
-        return False
+
+def _ollama_reachable(base_url: str) -> bool:
+    return ollama_reachable(base_url)
 
 
 def _vector_embedding_signature(config: dict[str, Any], vector_size: int) -> str:
@@ -57,6 +89,35 @@ def _vector_embedding_signature(config: dict[str, Any], vector_size: int) -> str
     return f"{provider}:{model}:{int(vector_size)}"
 
 
+def _embed_config_from_signature(
+    signature: str,
+    options: dict[str, Any],
+) -> dict[str, Any] | None:
+    """Rebuild the embedding config a vector signature was produced with."""
+    provider, _, rest = str(signature or "").partition(":")
+    model, _, size = rest.rpartition(":")
+    try:
+        vector_size = int(size)
+    except ValueError:
+        return None
+    if not model or vector_size <= 0:
+        return None
+    if provider == "openai":
+        api_key = _api_key_from_options(options)
+        if not api_key:
+            return None
+        return {"provider": "openai", "model": model, "api_key": api_key}
+    if provider == "ollama":
+        return {
+            "provider": "ollama",
+            "model": model,
+            "vector_size": vector_size,
+            "base_url": _ollama_base_url(options),
+            **_ollama_embed_tuning(options),
+        }
+    return None
+
+
 def _vector_collection_prefix(tag: str) -> str:
     clean_tag = "".join(
         char if char.isalnum() or char == "_" else "_"
@@ -85,6 +146,10 @@ def _fresh_vector_collection_tag() -> str:
     return _root().uuid.uuid4().hex[:12]
 
 
+def _drop_reindex_collection(client: Any, session_id: str, record: dict[str, Any]) -> None:
+    delete_session_vectors(client, session_id=session_id, tag=str(record.get("to_tag") or ""))
+
+
 def _prepare_vector_collection_tag(
     *,
     store: Any,
@@ -105,22 +170,54 @@ def _prepare_vector_collection_tag(
 
     previous_signature = str(state.get("vector_embedding_signature", "") or "").strip()
     previous_tag = str(state.get("vector_collection_tag", "") or "").strip()
+    pending = reindex_record(state)
     if previous_signature == embedding_signature and previous_tag:
+        if pending is not None:
+            # Switched back before cut-over: drop the half-built collection.
+            state.pop(REINDEX_RECORD_KEY, None)
+            _drop_reindex_collection(client, session_id, pending)
+            try:
+                store.save(session_id, state)
+            except Exception:
+                pass
+        return previous_tag
+
+    if pending is not None and pending.get("to_signature") == embedding_signature:
         return previous_tag
 
     new_tag = root.uuid.uuid4().hex[:12]
+    if (
+        previous_signature
+        and previous_tag
+        and int(state.get("vector_indexed_until") or 0) > 0
+        and reindex_enabled()
+    ):
+        # Keep serving the old collection; a background job rebuilds the
+        # new one (memory_reindex) and cuts over when it has caught up.
+        if pending is not None:
+            _drop_reindex_collection(client, session_id, pending)
+        begin_session_reindex(
+            state,
+            from_tag=previous_tag,
+            from_signature=previous_signature,
+            to_tag=new_tag,
+            to_signature=embedding_signature,
+        )
+        try:
+            store.save(session_id, state)
+        except Exception:
+            pass
+        return previous_tag
+
     state["vector_embedding_signature"] = embedding_signature
     state["vector_collection_tag"] = new_tag
+    assign_session_vector_layout(state)
 
     if previous_signature and previous_signature != embedding_signature:
         existing_messages = root._deepcopy_messages(state.get("messages"))
         state["vector_indexed_until"] = len(existing_messages)
         if previous_tag:
-            old_collection = _session_collection_name(
-                session_id=session_id,
-                collection_prefix=_vector_collection_prefix(previous_tag),
-            )
-            root._delete_collection_best_effort(client, old_collection)
+            delete_session_vectors(client, session_id=session_id, tag=previous_tag)
 
     try:
         store.save(session_id, state)
@@ -146,6 +243,7 @@ def resolve_embedding_config(options: dict[str, Any]) -> dict[str, Any] | None:
                 "model": model,
                 "vector_size": root._EMBEDDING_DEFAULTS["ollama"][1],
                 "base_url": base_url,
+                **_ollama_embed_tuning(options),
             }
         return None
 
@@ -164,6 +262,7 @@ def resolve_embedding_config(options: dict[str, Any]) -> dict[str, Any] | None:
                 "model": root._EMBEDDING_DEFAULTS["ollama"][0],
                 "vector_size": root._EMBEDDING_DEFAULTS["ollama"][1],
                 "base_url": base_url,
+                **_ollama_embed_tuning(options),
             }
 
     api_key = _api_key_from_options(options)
@@ -178,6 +277,7 @@ def resolve_embedding_config(options: dict[str, Any]) -> dict[str, Any] | None:
             "model": root._EMBEDDING_DEFAULTS["ollama"][0],
             "vector_size": root._EMBEDDING_DEFAULTS["ollama"][1],
             "base_url": base_url,
+            **_ollama_embed_tuning(options),
         }
 
     return None
@@ -197,24 +297,92 @@ def _build_embed_runtime(config: dict[str, Any]) -> tuple[Callable[[list[str]],
         )
 
     if provider == "ollama":
-        import httpx
-
-        base_url = config["base_url"]
-        model = config["model"]
-
-        def ollama_embed(texts: list[str]) -> list[list[float]]:
-            vectors: list[list[float]] = []
-            for text in texts:
-                resp = httpx.post(
-                    f"{base_url}/api/embeddings",
-                    json={"model": model, "prompt": text},
-                    timeout=30.0,
-                )
-                resp.raise_for_status()
-                vectors.append(resp.json()["embedding"])
-            return vectors
-
         vector_size = int(config.get("vector_size") or root._EMBEDDING_DEFAULTS["ollama"][1])
-        return ollama_embed, vector_size
+        return _build_ollama_embed_fn(config), vector_size
 
     raise ValueError(f"Unsupported embedding provider: {provider}")
+
+
+def _build_cached_embed_runtime(
+    config: dict[str, Any],
+    data_dir: str,
+) -> tuple[Callable[[list[str]], list[list[float]]], int]:
+    root = _root()
+    embed_fn, vector_size = root._build_embed_runtime(config)
+    if not data_dir:
+        return embed_fn, vector_size
+    cached_embed_fn = wrap_embed_fn_with_cache(
+        embed_fn,
+        signature=_vector_embedding_signature(config, vector_size),
+        vector_size=vector_size,
+        cache_dir=root._embed_cache_dir(data_dir),
+    )
+    return cached_embed_fn, vector_size
+
+
+def _ollama_embed_legacy(client: Any, model: str, texts: list[str]) -> list[list[float]]:
+    vectors: list[list[float]] = []
+    for text in texts:
+        resp = client.post(
+            "/api/embeddings",
+            json={"model": model, "prompt": text},
+            timeout=_OLLAMA_EMBED_TIMEOUT_SECONDS,
+        )
+        resp.raise_for_status()
+        vectors.append(resp.json()["embedding"])
+    return vectors
+
+
+def _ollama_embed_batch(base_url: str, model: str, texts: list[str]) -> list[list[float]]:
+    client = get_ollama_client(base_url)
+    if base_url not in _ollama_legacy_embed_hosts:
+        resp = client.post(
+            "/api/embed",
+            json={"model": model, "input": texts},
+            timeout=_OLLAMA_EMBED_TIMEOUT_SECONDS,
+        )
+        if resp.status_code != 404:
+            resp.raise_for_status()
+            embeddings = resp.json().get("embeddings")
+            if not isinstance(embeddings, list) or len(embeddings) != len(texts):
+                raise RuntimeError(
+                    f"Ollama /api/embed returned {len(embeddings or [])} vectors for {len(texts)} inputs"
+                )
+            return embeddings
+
+    # Ollama < 0.3 has no /api/embed; a missing model also 404s there, so
+    # only pin the host to the legacy endpoint once that endpoint succeeds.
+    vectors = _ollama_embed_legacy(client, model, texts)
+    with _ollama_legacy_embed_hosts_lock:
+        _ollama_legacy_embed_hosts.add(base_url)
+    return vectors
+
+
+def _build_ollama_embed_fn(config: dict[str, Any]) -> Callable[[list[str]], list[list[float]]]:
+    base_url = normalize_ollama_base_url(config.get("base_url"))
+    model = str(config.get("model", "") or "").strip()
+    batch_size = _positive_int(config.get("batch_size"), _OLLAMA_EMBED_DEFAULT_BATCH_SIZE)
+    max_concurrency = _positive_int(
+        config.get("max_concurrency"),
+        _OLLAMA_EMBED_DEFAULT_CONCURRENCY,
+    )
+
+    def embed_batch(batch: list[str]) -> list[list[float]]:
+        return _ollama_embed_batch(base_url, model, batch)
+
+    def ollama_embed(texts: list[str]) -> list[list[float]]:
+        items = [str(text) for text in texts]
+        if not items:
+            return []
+        batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+        if len(batches) == 1 or max_concurrency <= 1:
+            results = [embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(max_concurrency, len(batches)),
+                thread_name_prefix="unchain-ollama-embed",
+            ) as pool:
+                results = list(pool.map(embed_batch, batches))
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    return ollama_embed
@@ -18,10 +18,24 @@ import os
 import re
 import sys
 import threading
+import time
 import uuid
 from types import MethodType, SimpleNamespace
 from typing import Any, Callable
 
+from memory_projection_cache import (
+    LONG_TERM_SCOPE,
+    invalidate_projection_cache,
+    session_scope,
+)
+from memory_reindex import RECORD_KEY as REINDEX_RECORD_KEY
+from memory_reindex import (
+    ReindexingVectorAdapter,
+    ensure_session_reindex,
+    guard_reindex_commits,
+    reindex_record,
+)
+
 _QDRANT_AVAILABLE = importlib.util.find_spec("qdrant_client") is not None
 
 # Default embedding models and vector size hints
@@ -281,15 +295,6 @@ def _ollama_base_url(options: dict[str, Any]) -> str:
     return os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
 
 
-def _ollama_reachable(base_url: str) -> bool:
-    try:
-        import httpx
-        resp = httpx.get(f"{base_url}/api/tags", timeout=2.0)
-        return resp.status_code == 200
-    except Exception:
-        return False
-
-
 def _vector_embedding_signature(config: dict[str, Any], vector_size: int) -> str:
     provider = str(config.get("provider", "") or "").strip().lower()
     model = str(config.get("model", "") or "").strip()
@@ -493,41 +498,6 @@ def resolve_embedding_config(options: dict[str, Any]) -> dict[str, Any] | None:
     return None
 
 
-def _build_embed_runtime(config: dict[str, Any]) -> tuple[Callable[[list[str]], list[list[float]]], int]:
-    provider = config["provider"]
-
-    if provider == "openai":
-        from unchain.memory.qdrant import build_openai_embed_fn
-
-        broth_instance = SimpleNamespace(api_key=str(config.get("api_key", "") or "").strip())
-        return build_openai_embed_fn(
-            model=str(config.get("model", "") or "").strip(),
-            broth_instance=broth_instance,
-        )
-
-    if provider == "ollama":
-        import httpx
-        base_url = config["base_url"]
-        model = config["model"]
-
-        def ollama_embed(texts: list[str]) -> list[list[float]]:
-            vecs: list[list[float]] = []
-            for text in texts:
-                resp = httpx.post(
-                    f"{base_url}/api/embeddings",
-                    json={"model": model, "prompt": text},
-                    timeout=30.0,
-                )
-                resp.raise_for_status()
-                vecs.append(resp.json()["embedding"])
-            return vecs
-
-        vector_size = int(config.get("vector_size") or _EMBEDDING_DEFAULTS["ollama"][1])
-        return ollama_embed, vector_size
-
-    raise ValueError(f"Unsupported embedding provider: {provider}")
-
-
 def _deepcopy_messages(messages: object) -> list[dict[str, Any]]:
     if not isinstance(messages, list):
         return []
@@ -903,6 +873,39 @@ def _filter_supported_constructor_kwargs(cls: Any, values: dict[str, Any]) -> di
     }
 
 
+def _recalled_items_from_hits(
+    hits: list[object],
+    *,
+    min_score: float | None = None,
+) -> list[dict[str, Any]]:
+    recalled: list[dict[str, Any]] = []
+    for hit in hits:
+        payload = _extract_qdrant_payload(hit)
+        score = _extract_qdrant_score(hit)
+        if min_score is not None:
+            if score is None or score < float(min_score):
+                continue
+
+        item: dict[str, Any] = {}
+        messages = payload.get("messages")
+        if isinstance(messages, list):
+            item["messages"] = copy.deepcopy(messages)
+        text = payload.get("text")
+        if isinstance(text, str) and text.strip():
+            item["text"] = text
+        role = payload.get("role")
+        if isinstance(role, str) and role.strip():
+            item["role"] = role.strip().lower()
+        index = payload.get("index")
+        if isinstance(index, int):
+            item["index"] = index
+        if score is not None:
+            item["score"] = score
+        if item:
+            recalled.append(item)
+    return recalled
+
+
 def _patch_qdrant_similarity_search_compat(vector_adapter: Any) -> Any:
     similarity_search = getattr(vector_adapter, "similarity_search", None)
     if not callable(similarity_search):
@@ -971,33 +974,10 @@ def _patch_qdrant_similarity_search_compat(vector_adapter: Any) -> Any:
                 "Qdrant client has neither search nor query_points/query methods"
             )
 
-        hits = _extract_qdrant_hits(search_results)
-        recalled: list[dict[str, Any]] = []
-        for hit in hits:
-            payload = _extract_qdrant_payload(hit)
-            score = _extract_qdrant_score(hit)
-            if min_score is not None:
-                if score is None or score < float(min_score):
-                    continue
-
-            item: dict[str, Any] = {}
-            messages = payload.get("messages")
-            if isinstance(messages, list):
-                item["messages"] = copy.deepcopy(messages)
-            text = payload.get("text")
-            if isinstance(text, str) and text.strip():
-                item["text"] = text
-            role = payload.get("role")
-            if isinstance(role, str) and role.strip():
-                item["role"] = role.strip().lower()
-            index = payload.get("index")
-            if isinstance(index, int):
-                item["index"] = index
-            if score is not None:
-                item["score"] = score
-            if item:
-                recalled.append(item)
-        return recalled
+        return _recalled_items_from_hits(
+            _extract_qdrant_hits(search_results),
+            min_score=min_score,
+        )
 
     setattr(
         vector_adapter,
@@ -1008,6 +988,43 @@ def _patch_qdrant_similarity_search_compat(vector_adapter: Any) -> Any:
     return vector_adapter
 
 
+def _invalidate_projection_caches(*, session_id: str = "", long_term: bool = False) -> None:
+    data_dir = _normalize_data_dir(_data_dir())
+    if not data_dir:
+        return
+    if session_id:
+        invalidate_projection_cache(data_dir, session_scope(session_id))
+    if long_term:
+        invalidate_projection_cache(data_dir, LONG_TERM_SCOPE)
+
+
+_LONG_TERM_INDEXED_COUNT_KEYS = (
+    "long_term_memory_indexed_count",
+    "long_term_fact_indexed_count",
+    "long_term_episode_indexed_count",
+    "long_term_playbook_indexed_count",
+)
+
+
+def _commit_wrote_long_term(manager: Any) -> bool:
+    """Whether the last commit indexed long-term points.
+
+    Extraction only runs every N turns; other commits leave the long-term
+    collections alone. Managers that report no commit info are assumed to
+    have written.
+    """
+    info = getattr(manager, "last_commit_info", None)
+    if not isinstance(info, dict) or not info:
+        return True
+    for key in _LONG_TERM_INDEXED_COUNT_KEYS:
+        try:
+            if int(info.get(key) or 0) > 0:
+                return True
+        except (TypeError, ValueError):
+            continue
+    return False
+
+
 def _patch_memory_commit_with_overlap(manager: Any) -> Any:
     commit_method = getattr(manager, "commit_messages", None)
     if not callable(commit_method):
@@ -1050,7 +1067,12 @@ def _patch_memory_commit_with_overlap(manager: Any) -> Any:
             commit_kwargs["model"] = model
         if "long_term_extractor" in commit_params:
             commit_kwargs["long_term_extractor"] = long_term_extractor
-        return original_commit(**commit_kwargs)
+        result = original_commit(**commit_kwargs)
+        _invalidate_projection_caches(
+            session_id=session_id,
+            long_term=bool(memory_namespace) and _commit_wrote_long_term(self),
+        )
+        return result
 
     setattr(manager, "commit_messages", MethodType(_patched_commit_messages, manager))
     setattr(manager, "_pupu_commit_overlap_patch", True)
@@ -1121,7 +1143,18 @@ def _patch_memory_prepare_with_diagnostics(manager: Any) -> Any:
         if "supports_tools" in prepare_params:
             prepare_kwargs["supports_tools"] = supports_tools
 
-        prepared = original_prepare(**prepare_kwargs)
+        # A speculative recall (memory_recall_prefetch) may already be
+        # searching for this turn; let it land before the real searches run.
+        prefetch = getattr(self, "_pupu_recall_prefetch", None)
+        if prefetch is not None:
+            prefetch.join()
+        prepare_started = time.perf_counter()
+        try:
+            prepared = original_prepare(**prepare_kwargs)
+        finally:
+            if prefetch is not None:
+                prefetch.close()
+        prepare_ms = round((time.perf_counter() - prepare_started) * 1000, 1)
         prepared = _sanitize_dialog_messages(prepared)
 
         try:
@@ -1176,6 +1209,13 @@ def _patch_memory_prepare_with_diagnostics(manager: Any) -> Any:
         info["vector_recall_status"] = vector_recall_status
         if recalled_items:
             info["vector_recall_preview"] = recalled_items[:5]
+        timings: dict[str, float] = {}
+        if prefetch is not None:
+            prefetch_report = prefetch.report()
+            timings.update(prefetch_report["timings"])
+            info["prefetch"] = prefetch_report["prefetch"]
+        timings["prepare_ms"] = prepare_ms
+        info["timings"] = timings
 
         try:
             setattr(self, "_last_prepare_info", info)
@@ -1204,6 +1244,80 @@ def _patch_memory_prepare_with_diagnostics(manager: Any) -> Any:
 # Public: MemoryManager factory
 # ---------------------------------------------------------------------------
 
+def _stored_session_state(store: Any, session_id: str) -> dict[str, Any]:
+    if not session_id:
+        return {}
+    try:
+        state = store.load(session_id)
+    except Exception:
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _pending_session_reindex(
+    state: dict[str, Any],
+    embedding_signature: str,
+) -> dict[str, Any] | None:
+    record = reindex_record(state)
+    if record is None or record.get("to_signature") != embedding_signature:
+        return None
+    return record
+
+
+def _reindexing_vector_adapter(
+    record: dict[str, Any],
+    *,
+    options: dict[str, Any],
+    data_dir: str,
+    store: Any,
+    client: Any,
+    session_id: str,
+    old_collection_tag: str,
+    embed_fn: Callable[[list[str]], list[list[float]]],
+    vector_size: int,
+    layout: str,
+) -> tuple[Any, Any]:
+    """Session adapter for a session whose collection is being re-embedded.
+
+    Recall keeps using the old collection with the embedding model that built
+    it; when that model cannot be rebuilt (e.g. its API key is gone) recall
+    moves to the new collection while it backfills.
+    """
+    new_adapter = session_vector_adapter(
+        client=client,
+        embed_fn=embed_fn,
+        vector_size=vector_size,
+        embedding_signature=str(record.get("to_signature") or ""),
+        tag=str(record.get("to_tag") or ""),
+        layout=layout,
+    )
+    old_adapter = None
+    old_signature = str(record.get("from_signature") or "")
+    old_config = _embed_config_from_signature(old_signature, options)
+    if old_config is not None:
+        try:
+            old_embed_fn, old_vector_size = _build_cached_embed_runtime(old_config, data_dir)
+            old_adapter = session_vector_adapter(
+                client=client,
+                embed_fn=old_embed_fn,
+                vector_size=old_vector_size,
+                embedding_signature=old_signature,
+                tag=old_collection_tag,
+                layout=layout,
+            )
+        except Exception:
+            old_adapter = None
+    job = ensure_session_reindex(
+        data_dir=data_dir,
+        session_id=session_id,
+        store=store,
+        client=client,
+        adapter=new_adapter,
+        record=record,
+    )
+    return ReindexingVectorAdapter(job, old_adapter, new_adapter), job
+
+
 def create_memory_manager_with_diagnostics(
     options: dict[str, Any],
     *,
@@ -1237,17 +1351,13 @@ def create_memory_manager_with_diagnostics(
 
     try:
         from unchain.memory import LongTermMemoryConfig, MemoryConfig, MemoryManager
-        from unchain.memory.qdrant import (
-            JsonFileSessionStore,
-            QdrantLongTermVectorAdapter,
-            QdrantVectorAdapter,
-        )
+        from unchain.memory.qdrant import QdrantLongTermVectorAdapter
 
         qdrant_client = _get_or_create_qdrant_client(data_dir)
-        embed_fn, vector_size = _build_embed_runtime(embed_config)
+        embed_fn, vector_size = _build_cached_embed_runtime(embed_config, data_dir)
         embedding_signature = _vector_embedding_signature(embed_config, vector_size)
 
-        store = JsonFileSessionStore(base_dir=_sessions_dir(data_dir))
+        store = _open_session_store(data_dir)
         collection_tag = _prepare_vector_collection_tag(
             store=store,
             client=qdrant_client,
@@ -1255,13 +1365,31 @@ def create_memory_manager_with_diagnostics(
             embedding_signature=embedding_signature,
         )
 
-        vector_adapter = QdrantVectorAdapter(
+        session_state = _stored_session_state(store, session_id)
+        layout = session_vector_layout(session_state)
+        vector_adapter = session_vector_adapter(
             client=qdrant_client,
             embed_fn=embed_fn,
             vector_size=vector_size,
-            collection_prefix=_vector_collection_prefix(collection_tag),
+            embedding_signature=embedding_signature,
+            tag=collection_tag,
+            layout=layout,
         )
-        vector_adapter = _patch_qdrant_similarity_search_compat(vector_adapter)
+        reindex_job = None
+        reindex = _pending_session_reindex(session_state, embedding_signature)
+        if reindex is not None:
+            vector_adapter, reindex_job = _reindexing_vector_adapter(
+                reindex,
+                options=options,
+                data_dir=data_dir,
+                store=store,
+                client=qdrant_client,
+                session_id=session_id,
+                old_collection_tag=collection_tag,
+                embed_fn=embed_fn,
+                vector_size=vector_size,
+                layout=layout,
+            )
         long_term_enabled = bool(options.get("memory_long_term_enabled"))
         long_term_config = None
         if long_term_enabled:
@@ -1343,6 +1471,15 @@ def create_memory_manager_with_diagnostics(
         )
         manager = _patch_memory_prepare_with_diagnostics(manager)
         manager = _patch_memory_commit_with_overlap(manager)
+        if reindex_job is not None:
+            manager = guard_reindex_commits(manager, reindex_job)
+        manager = guard_layout_commits(
+            manager,
+            client=qdrant_client,
+            store=store,
+            session_id=session_id,
+            layout=layout,
+        )
         return manager, ""
     except Exception as exc:
         return None, f"memory_manager_init_failed: {exc}"
@@ -1368,9 +1505,8 @@ def replace_short_term_session_memory(
         raise RuntimeError("UNCHAIN_DATA_DIR not configured")
 
     from unchain.memory.manager import _collect_complete_turns_for_vector_index
-    from unchain.memory.qdrant import JsonFileSessionStore, QdrantVectorAdapter
 
-    store = JsonFileSessionStore(base_dir=_sessions_dir(data_dir))
+    store = _open_session_store(data_dir)
     raw_options = options if isinstance(options, dict) else {}
     retained_messages = _sanitize_dialog_messages(messages)
 
@@ -1388,11 +1524,12 @@ def replace_short_term_session_memory(
     )
 
     new_tag = _fresh_vector_collection_tag()
-    new_collection_prefix = _vector_collection_prefix(new_tag)
     new_collection_name = _session_collection_name(
         session_id=normalized_session_id,
-        collection_prefix=new_collection_prefix,
+        collection_prefix=_vector_collection_prefix(new_tag),
     )
+    # The rebuilt session starts its vectors afresh on the configured layout.
+    layout = configured_vector_layout()
 
     vector_applied = False
     vector_indexed_count = 0
@@ -1413,7 +1550,7 @@ def replace_short_term_session_memory(
         else:
             try:
                 qdrant_client = _get_or_create_qdrant_client(data_dir)
-                embed_fn, vector_size = _build_embed_runtime(embed_config)
+                embed_fn, vector_size = _build_cached_embed_runtime(embed_config, data_dir)
                 vector_signature = _vector_embedding_signature(
                     embed_config,
                     vector_size,
@@ -1424,11 +1561,13 @@ def replace_short_term_session_memory(
                         start_index=0,
                     )
                 )
-                vector_adapter = QdrantVectorAdapter(
+                vector_adapter = session_vector_adapter(
                     client=qdrant_client,
                     embed_fn=embed_fn,
                     vector_size=vector_size,
-                    collection_prefix=new_collection_prefix,
+                    embedding_signature=vector_signature,
+                    tag=new_tag,
+                    layout=layout,
                 )
                 if texts:
                     vector_adapter.add_texts(
@@ -1442,14 +1581,22 @@ def replace_short_term_session_memory(
             except Exception as exc:
                 vector_fallback_reason = f"vector_rebuild_failed: {exc}"
                 if qdrant_client is not None:
-                    _delete_collection_best_effort(qdrant_client, new_collection_name)
+                    delete_session_vectors(
+                        qdrant_client,
+                        session_id=normalized_session_id,
+                        tag=new_tag,
+                    )
 
     next_state = dict(previous_state)
     next_state["messages"] = retained_messages
     next_state.pop("summary", None)
+    # A rebuilt session supersedes any background re-embedding in progress.
+    abandoned_reindex = reindex_record(previous_state)
+    next_state.pop(REINDEX_RECORD_KEY, None)
     next_state["vector_indexed_until"] = vector_indexed_until
     next_state["vector_collection_tag"] = new_tag
     next_state["vector_embedding_signature"] = vector_signature
+    assign_session_vector_layout(next_state)
     store.save(normalized_session_id, next_state)
 
     if qdrant_client is None and _QDRANT_AVAILABLE:
@@ -1459,10 +1606,18 @@ def replace_short_term_session_memory(
             qdrant_client = None
 
     if qdrant_client is not None and old_collection_name != new_collection_name:
-        cleanup_warning = _delete_collection_best_effort_with_warning(
+        cleanup_warning = delete_session_vectors(
             qdrant_client,
-            old_collection_name,
+            session_id=normalized_session_id,
+            tag=old_tag,
+        )
+    if qdrant_client is not None and abandoned_reindex is not None:
+        delete_session_vectors(
+            qdrant_client,
+            session_id=normalized_session_id,
+            tag=str(abandoned_reindex.get("to_tag") or ""),
         )
+    invalidate_projection_cache(data_dir, session_scope(normalized_session_id))
 
     response = {
         "applied": True,
@@ -1522,15 +1677,15 @@ def delete_short_term_session_memory(
                 warnings.append(f"{collection_name}: {warning}")
             else:
                 deleted_collections.append(collection_name)
+        # Sessions on the shared layout: one delete-by-filter covers every tag.
+        warnings.extend(delete_shared_session_points(client, normalized_session_id))
 
-    session_path = _session_store_path(data_dir, normalized_session_id)
     session_deleted = False
-    if os.path.exists(session_path):
-        try:
-            os.remove(session_path)
-            session_deleted = True
-        except Exception as exc:
-            warnings.append(str(exc))
+    try:
+        session_deleted = _delete_session_state(data_dir, normalized_session_id)
+    except Exception as exc:
+        warnings.append(str(exc))
+    invalidate_projection_cache(data_dir, session_scope(normalized_session_id))
 
     return {
         "session_id": normalized_session_id,
@@ -1581,6 +1736,7 @@ def delete_long_term_memory_namespace(
                 warnings.append(f"{collection_name}: {warning}")
             else:
                 deleted_collections.append(collection_name)
+    invalidate_projection_cache(data_dir, LONG_TERM_SCOPE)
 
     return {
         "namespace": normalized_namespace,
@@ -1595,8 +1751,10 @@ from memory_paths import (  # noqa: E402
     _character_registry_path,
     _characters_dir,
     _data_dir,
+    _embed_cache_dir,
     _long_term_profile_path,
     _long_term_profiles_dir,
+    _memory_commit_queue_path,
     _normalize_data_dir,
     _qdrant_meta_path,
     _qdrant_path,
@@ -1605,10 +1763,14 @@ from memory_paths import (  # noqa: E402
 )
 from memory_storage import (  # noqa: E402
     _atomic_write_json,
+    _delete_session_state,
     _list_long_term_collection_names_for_namespace,
+    _list_session_ids,
     _load_long_term_profile,
     _load_session_state,
+    _open_session_store,
     _safe_long_term_namespace,
+    _session_state_marker,
 )
 from memory_qdrant import (  # noqa: E402
     _delete_collection_best_effort,
@@ -1616,9 +1778,26 @@ from memory_qdrant import (  # noqa: E402
     _get_or_create_qdrant_client,
     _repair_qdrant_local_meta,
 )
+from memory_qdrant_policy import (  # noqa: E402
+    apply_qdrant_policy,
+    migrate_qdrant_collections,
+    qdrant_policy,
+)
+from memory_shared_collection import (  # noqa: E402
+    assign_session_vector_layout,
+    configured_vector_layout,
+    delete_session_vectors,
+    delete_shared_session_points,
+    guard_layout_commits,
+    migrate_sessions_to_shared_layout,
+    session_vector_adapter,
+    session_vector_layout,
+)
 from memory_embeddings import (  # noqa: E402
     _api_key_from_options,
+    _build_cached_embed_runtime,
     _build_embed_runtime,
+    _embed_config_from_signature,
     _fresh_vector_collection_tag,
     _long_term_collection_prefix,
     _normalize_embedding_model_name,
@@ -40,6 +40,14 @@ def _long_term_profiles_dir(data_dir: str) -> str:
     return str(path)
 
 
+def _embed_cache_dir(data_dir: str) -> str:
+    from pathlib import Path
+
+    path = Path(data_dir) / "memory" / "embed_cache"
+    path.mkdir(parents=True, exist_ok=True)
+    return str(path)
+
+
 def _characters_dir(data_dir: str) -> str:
     from pathlib import Path
 
@@ -56,6 +64,14 @@ def _character_avatars_dir(data_dir: str) -> str:
     return str(path)
 
 
+def _memory_commit_queue_path(data_dir: str) -> str:
+    from pathlib import Path
+
+    path = Path(data_dir) / "memory"
+    path.mkdir(parents=True, exist_ok=True)
+    return str(path / "commit_queue.sqlite3")
+
+
 def _character_registry_path(data_dir: str) -> str:
     return os.path.join(_characters_dir(data_dir), "registry.json")
 
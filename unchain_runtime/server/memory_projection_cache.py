@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List
+
+# Cached memory projections (PCA coords, variance, cluster labels).
+#
+# Entries live under <data_dir>/memory/projection_cache/<scope>/, one .npz per
+# collection set, where scope is "session_<id>" or "long_term". Each entry
+# records a cheap version marker: the exact point count of every collection
+# plus a session state token (state file mtime, or the SQLite store's row
+# version), which every commit changes. A marker mismatch is a miss;
+# commit/replace/delete also drop the scope explicitly so same-count
+# rewrites are never served stale.
+
+DEFAULT_MEMORY_ENTRIES = 16
+LONG_TERM_SCOPE = "long_term"
+
+_memory_lock = threading.Lock()
+_memory_entries: "OrderedDict[tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+_cache_stats: Dict[str, int] = {
+    "memory_hits": 0,
+    "disk_hits": 0,
+    "misses": 0,
+    "invalidations": 0,
+}
+
+
+def projection_cache_enabled() -> bool:
+    raw = os.environ.get("UNCHAIN_PROJECTION_CACHE_ENABLED", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def session_scope(session_id: str) -> str:
+    safe_session_id = "".join(
+        c if c.isalnum() or c == "_" else "_"
+        for c in str(session_id or "")
+    )
+    return f"session_{safe_session_id}"
+
+
+def _scope_dir(data_dir: str, scope: str) -> str:
+    return os.path.join(data_dir, "memory", "projection_cache", scope)
+
+
+def _entry_path(data_dir: str, scope: str, cache_key: str) -> str:
+    digest = hashlib.sha1(cache_key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(_scope_dir(data_dir, scope), f"{digest}.npz")
+
+
+def projection_version_marker(
+    client: Any,
+    collection_names: Iterable[str],
+    *,
+    state_paths: Iterable[str] = (),
+    state_tokens: Iterable[str] = (),
+) -> str:
+    """Return a version string for the collections, or "" if unavailable.
+
+    *state_tokens* are opaque strings that change with the session state
+    (e.g. the SQLite session store's row version).
+    """
+    count_points = getattr(client, "count", None)
+    if not callable(count_points):
+        return ""
+    parts: List[str] = []
+    for collection_name in sorted(collection_names):
+        try:
+            result = count_points(collection_name=collection_name, exact=True)
+            parts.append(f"{collection_name}={int(getattr(result, 'count', result))}")
+        except Exception:
+            return ""
+    for path in state_paths:
+        try:
+            parts.append(f"mtime={os.stat(path).st_mtime_ns}")
+        except OSError:
+            parts.append("mtime=0")
+    parts.extend(str(token) for token in state_tokens)
+    return "|".join(parts)
+
+
+def load_cached_projection(
+    data_dir: str,
+    scope: str,
+    cache_key: str,
+    marker: str,
+) -> Dict[str, Any] | None:
+    """Return ``{"ids", "coords", "variance", "labels"}`` when *marker* matches."""
+    if not (projection_cache_enabled() and data_dir and marker):
+        return None
+
+    memory_key = (data_dir, scope, cache_key)
+    with _memory_lock:
+        entry = _memory_entries.get(memory_key)
+        if entry is not None and entry["marker"] == marker:
+            _memory_entries.move_to_end(memory_key)
+            _cache_stats["memory_hits"] += 1
+            return entry
+
+    import numpy as np
+
+    path = _entry_path(data_dir, scope, cache_key)
+    try:
+        with np.load(path, allow_pickle=False) as archive:
+            if str(archive["marker"]) != marker or str(archive["cache_key"]) != cache_key:
+                raise KeyError("stale")
+            entry = {
+                "marker": marker,
+                "ids": archive["ids"].tolist(),
+                "coords": archive["coords"],
+                "variance": archive["variance"].tolist(),
+                "labels": archive["labels"].tolist(),
+            }
+    except (OSError, KeyError, ValueError):
+        with _memory_lock:
+            _cache_stats["misses"] += 1
+        return None
+
+    _remember(memory_key, entry)
+    with _memory_lock:
+        _cache_stats["disk_hits"] += 1
+    return entry
+
+
+def store_cached_projection(
+    data_dir: str,
+    scope: str,
+    cache_key: str,
+    marker: str,
+    *,
+    ids: List[str],
+    coords: Any,
+    variance: List[float],
+    labels: List[int],
+) -> None:
+    if not (projection_cache_enabled() and data_dir and marker):
+        return
+
+    import numpy as np
+
+    entry = {
+        "marker": marker,
+        "ids": [str(item) for item in ids],
+        "coords": np.ascontiguousarray(coords, dtype=np.float64),
+        "variance": [float(item) for item in variance],
+        "labels": [int(item) for item in labels],
+    }
+    path = _entry_path(data_dir, scope, cache_key)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        np.savez(
+            temp_path,
+            marker=np.array(marker),
+            cache_key=np.array(cache_key),
+            ids=np.array(entry["ids"], dtype=str),
+            coords=entry["coords"],
+            variance=np.array(entry["variance"], dtype=np.float64),
+            labels=np.array(entry["labels"], dtype=np.int32),
+        )
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+    _remember((data_dir, scope, cache_key), entry)
+
+
+def _remember(memory_key: tuple[str, str, str], entry: Dict[str, Any]) -> None:
+    with _memory_lock:
+        _memory_entries[memory_key] = entry
+        _memory_entries.move_to_end(memory_key)
+        while len(_memory_entries) > DEFAULT_MEMORY_ENTRIES:
+            _memory_entries.popitem(last=False)
+
+
+def invalidate_projection_cache(data_dir: str, scope: str) -> None:
+    """Drop every cached projection of *scope* (memory and disk)."""
+    if not data_dir or not scope:
+        return
+    with _memory_lock:
+        for key in [key for key in _memory_entries if key[0] == data_dir and key[1] == scope]:
+            _memory_entries.pop(key, None)
+        _cache_stats["invalidations"] += 1
+    shutil.rmtree(_scope_dir(data_dir, scope), ignore_errors=True)
+
+
+def projection_cache_stats() -> Dict[str, int]:
+    with _memory_lock:
+        return {**_cache_stats, "entries": len(_memory_entries)}
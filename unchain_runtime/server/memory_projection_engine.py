@@ -0,0 +1,229 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Streaming PCA and clustering for large memory projections.
+#
+# StreamingProjector fits the leading principal components with a one-pass
+# randomized sketch (Tropp et al., "Practical sketching algorithms for
+# low-rank matrix approximation", 2017): every float32 page A_i contributes
+# Y_i = A_i @ Omega and W += Psi_i @ A_i. Only the n x l range sketch, the
+# l' x d co-range sketch and a few running sums are kept, so memory is
+# O(n*l + l'*d) instead of the dense n x d float64 matrix. Centering is
+# applied to the sketches at the end, which works because they are linear.
+#
+# Cluster labels for large sets come from mini-batch k-means (Sculley 2010)
+# on the 2-D coordinates.
+
+DEFAULT_COMPONENTS = 5
+DEFAULT_OVERSAMPLE = 20
+MINIBATCH_KMEANS_MIN_POINTS = 4096
+
+
+class StreamingProjector:
+    def __init__(
+        self,
+        dims: int,
+        *,
+        components: int = DEFAULT_COMPONENTS,
+        oversample: int = DEFAULT_OVERSAMPLE,
+        seed: int = 42,
+    ) -> None:
+        self.dims = int(dims)
+        self.components = int(components)
+        self._rank = min(self.dims, self.components + oversample)
+        self._corank = min(self.dims, 2 * self._rank + 1)
+        self._seed = seed
+        rng = np.random.default_rng(seed)
+        self._omega = rng.standard_normal((self.dims, self._rank)).astype(np.float32)
+        self._range_pages: List[np.ndarray] = []
+        self._corange = np.zeros((self._corank, self.dims), dtype=np.float64)
+        self._psi_seeds: List[Tuple[int, int]] = []
+        self._column_sum = np.zeros(self.dims, dtype=np.float64)
+        self._square_sum = 0.0
+        self.count = 0
+
+    def _psi(self, page_index: int, rows: int) -> np.ndarray:
+        seed, _ = self._psi_seeds[page_index]
+        return np.random.default_rng(seed).standard_normal((self._corank, rows)).astype(np.float32)
+
+    def partial_fit(self, block: np.ndarray) -> None:
+        """Add a page of float32 rows (``rows x dims``)."""
+        if block.ndim != 2 or block.shape[0] == 0:
+            return
+        if block.shape[1] != self.dims:
+            raise ValueError(f"expected {self.dims} dims, got {block.shape[1]}")
+        block = np.ascontiguousarray(block, dtype=np.float32)
+        page_index = len(self._psi_seeds)
+        self._psi_seeds.append((self._seed + 1 + page_index, block.shape[0]))
+        self._range_pages.append(block @ self._omega)
+        self._corange += self._psi(page_index, block.shape[0]) @ block
+        self._column_sum += block.sum(axis=0, dtype=np.float64)
+        self._square_sum += float(np.einsum("ij,ij->", block, block, dtype=np.float64))
+        self.count += block.shape[0]
+
+    def finish(self) -> Tuple[np.ndarray, List[float]]:
+        """Return ``(coords, variance)`` for every row seen so far.
+
+        ``coords`` is ``count x components`` float64; ``variance`` holds the
+        explained-variance ratio of each component. Safe to call repeatedly
+        (e.g. for progressive snapshots).
+        """
+        n = self.count
+        if n == 0:
+            return np.zeros((0, self.components)), [0.0] * self.components
+
+        mean = self._column_sum / n
+        range_sketch = np.vstack(self._range_pages).astype(np.float64)
+        range_sketch -= (mean @ self._omega.astype(np.float64))[None, :]
+        q, _ = np.linalg.qr(range_sketch)
+
+        psi_q = np.zeros((self._corank, q.shape[1]), dtype=np.float64)
+        psi_ones = np.zeros(self._corank, dtype=np.float64)
+        start = 0
+        for page_index, (_, rows) in enumerate(self._psi_seeds):
+            psi = self._psi(page_index, rows).astype(np.float64)
+            psi_q += psi @ q[start:start + rows]
+            psi_ones += psi.sum(axis=1)
+            start += rows
+        corange = self._corange - psi_ones[:, None] * mean[None, :]
+
+        core, *_ = np.linalg.lstsq(psi_q, corange, rcond=None)
+        u_core, singular_values, _ = np.linalg.svd(core, full_matrices=False)
+        width = min(self.components, len(singular_values))
+        coords = np.zeros((n, self.components), dtype=np.float64)
+        coords[:, :width] = (q @ u_core[:, :width]) * singular_values[:width]
+
+        total_variance = self._square_sum - n * float(mean @ mean)
+        variance = [0.0] * self.components
+        if total_variance > 0:
+            for index in range(width):
+                variance[index] = float(min(1.0, singular_values[index] ** 2 / total_variance))
+        return coords, variance
+
+
+def minibatch_kmeans_2d(
+    coords_2d: Any,
+    k: int,
+    *,
+    batch_size: int = 1024,
+    iterations: int = 100,
+    seed: int = 42,
+) -> List[int]:
+    arr = np.asarray(coords_2d, dtype=np.float64)
+    n = len(arr)
+    k = min(max(1, int(k)), n)
+    if n == 0:
+        return []
+    if k == 1:
+        return [0] * n
+
+    rng = np.random.default_rng(seed)
+    # k-means++ seeding on a sample keeps the init O(sample * k).
+    sample = arr[rng.choice(n, size=min(n, 20 * batch_size), replace=False)]
+    centroids = [sample[int(rng.integers(0, len(sample)))]]
+    for _ in range(k - 1):
+        distances = np.min(
+            ((sample[:, None, :] - np.asarray(centroids)[None]) ** 2).sum(axis=2),
+            axis=1,
+        )
+        total = float(distances.sum())
+        if total <= 0.0:
+            break
+        centroids.append(sample[int(rng.choice(len(sample), p=distances / total))])
+    centroids_arr = np.asarray(centroids, dtype=np.float64)
+    counts = np.zeros(len(centroids_arr), dtype=np.float64)
+
+    for _ in range(iterations):
+        batch = arr[rng.integers(0, n, size=min(batch_size, n))]
+        nearest = ((batch[:, None, :] - centroids_arr[None]) ** 2).sum(axis=2).argmin(axis=1)
+        for index in np.unique(nearest):
+            members = batch[nearest == index]
+            counts[index] += len(members)
+            rate = len(members) / counts[index]
+            centroids_arr[index] += rate * (members.mean(axis=0) - centroids_arr[index])
+
+    labels = np.empty(n, dtype=np.int64)
+    for start in range(0, n, 65536):
+        chunk = arr[start:start + 65536]
+        labels[start:start + len(chunk)] = (
+            ((chunk[:, None, :] - centroids_arr[None]) ** 2).sum(axis=2).argmin(axis=1)
+        )
+    return labels.tolist()
+
+
+# ── background jobs for large projections ──
+
+_jobs_lock = threading.Lock()
+_jobs: Dict[tuple, Dict[str, Any]] = {}
+
+
+def get_projection_job(key: tuple) -> Dict[str, Any] | None:
+    with _jobs_lock:
+        job = _jobs.get(key)
+        return dict(job) if job is not None else None
+
+
+def start_projection_job(
+    key: tuple,
+    run: Callable[[Callable[..., None]], None],
+    *,
+    total: int,
+    group: tuple = (),
+) -> Dict[str, Any]:
+    """Run ``run(report)`` on a daemon thread unless a job for *key* is live.
+
+    ``report(processed=..., snapshot=...)`` updates progress and publishes an
+    intermediate result; the job is marked done when ``run`` returns. Finished
+    jobs of the same *group* (e.g. older collection versions) are dropped.
+    """
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is not None and job["status"] == "computing":
+            return dict(job)
+        if group:
+            for stale_key in [
+                other
+                for other, other_job in _jobs.items()
+                if other_job["group"] == group and other_job["status"] != "computing"
+            ]:
+                _jobs.pop(stale_key, None)
+        job = {
+            "group": group,
+            "status": "computing",
+            "processed": 0,
+            "total": int(total),
+            "snapshot": None,
+            "error": "",
+            "started_at": time.time(),
+        }
+        _jobs[key] = job
+
+    def report(*, processed: int | None = None, snapshot: Any = None) -> None:
+        with _jobs_lock:
+            if processed is not None:
+                job["processed"] = int(processed)
+            if snapshot is not None:
+                job["snapshot"] = snapshot
+
+    def worker() -> None:
+        try:
+            run(report)
+            status, error = "done", ""
+        except Exception as exc:
+            status, error = "failed", str(exc)
+        with _jobs_lock:
+            job["status"] = status
+            job["error"] = error
+
+    threading.Thread(target=worker, name="unchain-projection-job", daemon=True).start()
+    return dict(job)
+
+
+def clear_projection_job(key: tuple) -> None:
+    with _jobs_lock:
+        _jobs.pop(key, None)
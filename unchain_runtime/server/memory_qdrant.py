@@ -74,6 +74,7 @@ def _get_or_create_qdrant_client(data_dir: str) -> "QdrantClient":
 
         _repair_qdrant_local_meta(normalized_data_dir)
         created_client = QdrantClient(path=root._qdrant_path(normalized_data_dir))
+        root.apply_qdrant_policy(created_client)
         root._qdrant_clients[normalized_data_dir] = created_client
         return created_client
 
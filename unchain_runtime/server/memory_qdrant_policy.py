@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from types import MethodType
+from typing import Any, Dict, List, Tuple
+
+# Provisioning policy for the memory collections.
+#
+# Session (chat_*) and long-term (long_term_*) collections are created by the
+# unchain adapters with Qdrant's defaults: float32 vectors held in RAM, a
+# default HNSW graph and no payload indexes. A client connected to a Qdrant
+# server is patched by apply_qdrant_policy so that every create_collection
+# call picks up the active policy for whatever the adapter did not set itself:
+#
+#   on_disk        original vectors live in mmap'd storage, not in RAM
+#   quantization   int8 scalar quantization kept in RAM (quantile 0.99);
+#                  searches oversample on it and rescore with the originals
+#   hnsw           m / ef_construct for the graph, hnsw_ef for searches
+#
+# Payload indexes on role, index and turn_start_index are created right after
+# the collection. Searches that carry no search_params get the policy's
+# hnsw_ef and rescoring settings. Existing collections are brought onto a
+# policy with migrate_qdrant_collections (POST /memory/qdrant/migrate, or
+# `python memory_qdrant_policy.py --data-dir ...` while the app is stopped).
+#
+# The embedded local mode (QdrantClient(path=...)), which is the client
+# _get_or_create_qdrant_client creates today, keeps every vector in memory
+# and searches brute-force: on_disk, quantization, HNSW and payload indexes
+# are all ignored there. apply_qdrant_policy therefore leaves local clients
+# unpatched, and migrate_qdrant_collections reports skipped="local_mode" (the
+# route answers 409) rather than claiming collections were moved. None of
+# this lowers RAM in local mode; it takes effect once memory is pointed at a
+# Qdrant server.
+
+POLICY_ENV = "UNCHAIN_QDRANT_POLICY"
+DEFAULT_POLICY = "compact"
+MEMORY_COLLECTION_PREFIXES = ("chat_", "long_term_")
+PAYLOAD_INDEXES = (
+    ("role", "keyword"),
+    ("index", "integer"),
+    ("turn_start_index", "integer"),
+)
+
+POLICIES: Dict[str, Dict[str, Any]] = {
+    # Qdrant defaults; only the payload indexes are added.
+    "default": {
+        "on_disk": False,
+        "quantization": None,
+        "hnsw_m": None,
+        "hnsw_ef_construct": None,
+        "search_ef": None,
+        "rescore": False,
+        "oversampling": None,
+    },
+    # Originals on disk, full-precision search through the page cache.
+    "on_disk": {
+        "on_disk": True,
+        "quantization": None,
+        "hnsw_m": 16,
+        "hnsw_ef_construct": 100,
+        "search_ef": 64,
+        "rescore": False,
+        "oversampling": None,
+    },
+    # Originals on disk, int8 copies in RAM, rescored top candidates.
+    "compact": {
+        "on_disk": True,
+        "quantization": {"type": "int8", "quantile": 0.99, "always_ram": True},
+        "hnsw_m": 16,
+        "hnsw_ef_construct": 100,
+        "search_ef": 64,
+        "rescore": True,
+        "oversampling": 2.0,
+    },
+}
+
+_POLICY_ATTR = "_unchain_qdrant_policy"
+
+
+def _env_int(name: str, default: int | None) -> int | None:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(1, int(raw))
+    except ValueError:
+        return default
+
+
+def qdrant_policy(name: str | None = None) -> Dict[str, Any]:
+    """Resolve a named policy, applying the UNCHAIN_QDRANT_HNSW_* overrides."""
+    policy_name = str(name or os.environ.get(POLICY_ENV, "") or DEFAULT_POLICY).strip().lower()
+    if policy_name not in POLICIES:
+        raise ValueError(
+            f"Unknown Qdrant policy '{policy_name}' (expected one of: {', '.join(POLICIES)})"
+        )
+    policy = dict(POLICIES[policy_name])
+    policy["name"] = policy_name
+    if policy["hnsw_m"] is not None:
+        policy["hnsw_m"] = _env_int("UNCHAIN_QDRANT_HNSW_M", policy["hnsw_m"])
+        policy["hnsw_ef_construct"] = _env_int(
+            "UNCHAIN_QDRANT_HNSW_EF_CONSTRUCT",
+            policy["hnsw_ef_construct"],
+        )
+        policy["search_ef"] = _env_int("UNCHAIN_QDRANT_SEARCH_EF", policy["search_ef"])
+    return policy
+
+
+def is_memory_collection(collection_name: str) -> bool:
+    return str(collection_name or "").startswith(MEMORY_COLLECTION_PREFIXES)
+
+
+def _is_local_client(client: Any) -> bool:
+    inner = getattr(client, "_client", None)
+    return type(inner).__name__ == "QdrantLocal"
+
+
+def _models():
+    from qdrant_client.http import models
+
+    return models
+
+
+def _with_on_disk(vector_params: Any) -> Any:
+    if isinstance(vector_params, dict):
+        return {name: _with_on_disk(params) for name, params in vector_params.items()}
+    if getattr(vector_params, "on_disk", None) is not None:
+        return vector_params
+    copy_with = getattr(vector_params, "model_copy", None) or getattr(vector_params, "copy", None)
+    if not callable(copy_with):
+        return vector_params
+    return copy_with(update={"on_disk": True})
+
+
+def _quantization_config(policy: Dict[str, Any]) -> Any:
+    settings = policy.get("quantization")
+    if not settings:
+        return None
+    models = _models()
+    return models.ScalarQuantization(
+        scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=settings.get("quantile"),
+            always_ram=settings.get("always_ram"),
+        )
+    )
+
+
+def _hnsw_config(policy: Dict[str, Any]) -> Any:
+    if policy.get("hnsw_m") is None:
+        return None
+    return _models().HnswConfigDiff(
+        m=policy["hnsw_m"],
+        ef_construct=policy["hnsw_ef_construct"],
+    )
+
+
+def collection_kwargs(policy: Dict[str, Any], vectors_config: Any = None) -> Dict[str, Any]:
+    """create_collection keyword arguments that put a collection on ``policy``."""
+    kwargs: Dict[str, Any] = {}
+    if vectors_config is not None:
+        kwargs["vectors_config"] = (
+            _with_on_disk(vectors_config) if policy.get("on_disk") else vectors_config
+        )
+    quantization = _quantization_config(policy)
+    if quantization is not None:
+        kwargs["quantization_config"] = quantization
+    hnsw = _hnsw_config(policy)
+    if hnsw is not None:
+        kwargs["hnsw_config"] = hnsw
+    return kwargs
+
+
+def search_params(policy: Dict[str, Any]) -> Any:
+    if policy.get("search_ef") is None and not policy.get("rescore"):
+        return None
+    models = _models()
+    quantization = None
+    if policy.get("quantization"):
+        quantization = models.QuantizationSearchParams(
+            rescore=bool(policy.get("rescore")),
+            oversampling=policy.get("oversampling"),
+        )
+    return models.SearchParams(hnsw_ef=policy.get("search_ef"), quantization=quantization)
+
+
+def ensure_payload_indexes(
+    client: Any,
+    collection_name: str,
+    fields: Tuple[Tuple[str, str], ...] = PAYLOAD_INDEXES,
+) -> List[str]:
+    """Create payload indexes on ``fields``; returns the fields indexed."""
+    if _is_local_client(client):
+        return []
+    models = _models()
+    schema_types = {
+        "keyword": models.PayloadSchemaType.KEYWORD,
+        "integer": models.PayloadSchemaType.INTEGER,
+    }
+    created = []
+    for field_name, schema in fields:
+        try:
+            client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=schema_types[schema],
+            )
+        except Exception:
+            # Already indexed, or rejected by the server: recall still works,
+            # filtered searches just scan.
+            continue
+        created.append(field_name)
+    return created
+
+
+def apply_qdrant_policy(client: Any, policy: Dict[str, Any] | None = None) -> Any:
+    """Patch ``client`` so memory collections are created and searched on ``policy``.
+
+    Local (embedded) clients are returned unpatched; see the module header.
+    """
+    if client is None or getattr(client, _POLICY_ATTR, None) is not None:
+        return client
+    if _is_local_client(client):
+        return client
+    if policy is None:
+        try:
+            policy = qdrant_policy()
+        except ValueError:
+            # A misspelled UNCHAIN_QDRANT_POLICY must not take memory down.
+            return client
+
+    def _wrap_create(method_name: str) -> None:
+        original = getattr(client, method_name, None)
+        if not callable(original):
+            return
+
+        def _create(self, *args: Any, **kwargs: Any) -> Any:
+            collection_name = kwargs.get("collection_name", args[0] if args else "")
+            if not is_memory_collection(collection_name):
+                return original(*args, **kwargs)
+            for key, value in collection_kwargs(policy, kwargs.get("vectors_config")).items():
+                if key == "vectors_config" or kwargs.get(key) is None:
+                    kwargs[key] = value
+            result = original(*args, **kwargs)
+            ensure_payload_indexes(self, collection_name)
+            return result
+
+        setattr(client, method_name, MethodType(_create, client))
+
+    def _wrap_search(method_name: str) -> None:
+        original = getattr(client, method_name, None)
+        params = search_params(policy)
+        if not callable(original) or params is None:
+            return
+
+        def _search(self, *args: Any, **kwargs: Any) -> Any:
+            collection_name = kwargs.get("collection_name", args[0] if args else "")
+            if kwargs.get("search_params") is None and is_memory_collection(collection_name):
+                kwargs["search_params"] = params
+            return original(*args, **kwargs)
+
+        setattr(client, method_name, MethodType(_search, client))
+
+    try:
+        for method_name in ("create_collection", "recreate_collection"):
+            _wrap_create(method_name)
+        for method_name in ("search", "query_points"):
+            _wrap_search(method_name)
+        setattr(client, _POLICY_ATTR, policy["name"])
+    except Exception:
+        # qdrant_client without the models this policy needs: keep defaults.
+        return client
+    return client
+
+
+def migrate_qdrant_collections(
+    client: Any,
+    policy: Dict[str, Any] | None = None,
+    *,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Move every existing memory collection onto ``policy``.
+
+    Qdrant applies on_disk/quantization/HNSW changes in place through its
+    optimizers; collections keep serving while they are rebuilt.
+    """
+    policy = policy or qdrant_policy()
+    local_mode = _is_local_client(client)
+    response = client.get_collections()
+    names = sorted(
+        str(getattr(item, "name", "") or "")
+        for item in (getattr(response, "collections", None) or [])
+    )
+    results = []
+    for name in names:
+        if not is_memory_collection(name):
+            continue
+        entry: Dict[str, Any] = {"collection": name, "updated": False, "indexes": [], "error": ""}
+        results.append(entry)
+        if dry_run or local_mode:
+            continue
+        try:
+            kwargs = collection_kwargs(policy)
+            if policy.get("on_disk"):
+                kwargs["vectors_config"] = {"": _models().VectorParamsDiff(on_disk=True)}
+            if kwargs:
+                client.update_collection(collection_name=name, **kwargs)
+            entry["updated"] = True
+            entry["indexes"] = ensure_payload_indexes(client, name)
+        except Exception as exc:
+            entry["error"] = str(exc) or exc.__class__.__name__
+    return {
+        "policy": policy["name"],
+        "dry_run": dry_run,
+        "skipped": "local_mode" if local_mode else "",
+        "collections": results,
+        "migrated": sum(1 for entry in results if entry["updated"]),
+        "failed": sum(1 for entry in results if entry["error"]),
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Migrate existing memory collections onto a Qdrant provisioning policy.",
+    )
+    parser.add_argument("--data-dir", default=os.environ.get("UNCHAIN_DATA_DIR", ""))
+    parser.add_argument("--policy", default=None, choices=sorted(POLICIES))
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+    if not args.data_dir:
+        parser.error("--data-dir (or UNCHAIN_DATA_DIR) is required")
+
+    import memory_factory
+
+    client = memory_factory._get_or_create_qdrant_client(args.data_dir)
+    summary = migrate_qdrant_collections(
+        client,
+        qdrant_policy(args.policy),
+        dry_run=args.dry_run,
+    )
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    if summary["skipped"] == "local_mode":
+        sys.stderr.write(
+            "Embedded Qdrant (local mode) ignores on_disk, quantization, HNSW and "
+            "payload index settings; nothing was migrated.\n"
+        )
+        return 1
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,455 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+# Speculative memory recall.
+#
+# prepare_messages() embeds the user query and searches the session and
+# long-term Qdrant collections, but it used to start only after the agent and
+# its toolkits (MCP processes included) were built. A RecallPrefetch is
+# started as soon as the request is parsed: on a shared worker pool it builds
+# the memory manager, embeds the query (warming the embedding cache the
+# adapters read through) and runs one unfiltered top-N search per relevant
+# collection, concurrently, while the agent is being constructed.
+#
+# The manager's adapters are then pointed at a _PrefetchClient. When an
+# adapter searches a collection with the same query vector, the request is
+# answered from the prefetched hits if they provably contain the full answer:
+# hits are score-ordered, so the first `limit` hits that pass the filter and
+# threshold are exact whenever at least `limit` of them pass, the prefetch
+# returned fewer than N hits, or the last hit already scores under the
+# threshold. Filters the client cannot evaluate locally fall through to a
+# real search. prepare_messages() joins the in-flight phases first and
+# reports per-phase timings in the memory_prepare info.
+
+DEFAULT_WORKERS = 4
+DEFAULT_PREFETCH_LIMIT = 32
+DEFAULT_JOIN_SECONDS = 10.0
+
+_pool_lock = threading.Lock()
+_pool: ThreadPoolExecutor | None = None
+
+
+def _env_float(name: str, default: float) -> float:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return default
+
+
+def prefetch_enabled() -> bool:
+    raw = os.environ.get("UNCHAIN_MEMORY_PREFETCH", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def _prefetch_limit() -> int:
+    return max(1, int(_env_float("UNCHAIN_MEMORY_PREFETCH_LIMIT", DEFAULT_PREFETCH_LIMIT)))
+
+
+def _join_seconds() -> float:
+    return _env_float("UNCHAIN_MEMORY_PREFETCH_JOIN_SECONDS", DEFAULT_JOIN_SECONDS)
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=max(1, int(_env_float("UNCHAIN_MEMORY_PREFETCH_WORKERS", DEFAULT_WORKERS))),
+                thread_name_prefix="unchain-memory-prefetch",
+            )
+        return _pool
+
+
+def _vector_key(collection: str, vector: Any) -> Tuple[str, str] | None:
+    try:
+        array = np.asarray(vector, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    if array.ndim != 1 or not array.size:
+        return None
+    return collection, hashlib.sha1(array.tobytes()).hexdigest()
+
+
+# ── local filter evaluation ──
+
+_UNSUPPORTED = object()
+
+
+def _field(value: Any, name: str) -> Any:
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def _payload_value(payload: Dict[str, Any], key: str) -> Any:
+    current: Any = payload
+    for part in str(key or "").split("."):
+        if not isinstance(current, dict):
+            return None
+        current = current.get(part)
+    return current
+
+
+def _condition_matches(condition: Any, payload: Dict[str, Any]) -> Any:
+    key = _field(condition, "key")
+    match = _field(condition, "match")
+    if not isinstance(key, str) or match is None:
+        return _UNSUPPORTED
+    value = _payload_value(payload, key)
+    candidates = value if isinstance(value, list) else [value]
+    expected = _field(match, "value")
+    if expected is not None:
+        return expected in candidates
+    any_of = _field(match, "any")
+    if isinstance(any_of, list):
+        return any(item in candidates for item in any_of)
+    return _UNSUPPORTED
+
+
+def _filter_predicate(query_filter: Any) -> Callable[[Dict[str, Any]], bool] | None:
+    """Local predicate for must/must_not match filters, or None if unsupported."""
+    if query_filter is None:
+        return lambda _payload: True
+    should = _field(query_filter, "should")
+    if should:
+        return None
+    must = list(_field(query_filter, "must") or [])
+    must_not = list(_field(query_filter, "must_not") or [])
+    probe: Dict[str, Any] = {}
+    for condition in [*must, *must_not]:
+        if _condition_matches(condition, probe) is _UNSUPPORTED:
+            return None
+
+    def predicate(payload: Dict[str, Any]) -> bool:
+        return all(_condition_matches(c, payload) is True for c in must) and not any(
+            _condition_matches(c, payload) is True for c in must_not
+        )
+
+    return predicate
+
+
+def _hit_payload(hit: Any) -> Dict[str, Any]:
+    payload = _field(hit, "payload")
+    return payload if isinstance(payload, dict) else {}
+
+
+def _hit_score(hit: Any) -> float | None:
+    score = _field(hit, "score")
+    return float(score) if isinstance(score, (int, float)) else None
+
+
+# ── client proxy ──
+
+_SEARCH_KWARGS = {
+    "collection_name",
+    "query",
+    "query_vector",
+    "limit",
+    "query_filter",
+    "score_threshold",
+    "with_payload",
+    "with_vectors",
+}
+
+
+class _PrefetchClient:
+    """Qdrant client proxy that answers matching searches from prefetched hits."""
+
+    def __init__(self, client: Any, prefetch: "RecallPrefetch") -> None:
+        self._pupu_client = client
+        self._pupu_prefetch = prefetch
+
+    def __getattr__(self, name: str) -> Any:
+        target = getattr(self._pupu_client, name)
+        if name not in {"search", "query_points"} or not callable(target):
+            return target
+
+        def intercepted(*args: Any, **kwargs: Any) -> Any:
+            served = self._pupu_prefetch._serve(name, args, kwargs)
+            if served is not None:
+                return served
+            return target(*args, **kwargs)
+
+        return intercepted
+
+
+class RecallPrefetch:
+    def __init__(
+        self,
+        *,
+        session_id: str,
+        query: str,
+        memory_namespace: str,
+        build_manager: Callable[[], Tuple[Dict[str, Any], Any]],
+    ) -> None:
+        self.session_id = session_id
+        self.query = query
+        self.memory_namespace = memory_namespace
+        self._lock = threading.Lock()
+        self._timings: Dict[str, float] = {}
+        self._stats = {"hits": 0, "misses": 0}
+        # (collection, vector digest) -> (hits, requested limit, response, filter)
+        self._memo: Dict[Tuple[str, str], Tuple[List[Any], int, Any, Any]] = {}
+        self._searches: List[Future] = []
+        self._closed = False
+        self._manager_future = _executor().submit(self._build, build_manager)
+
+    # ── phases ──
+
+    def _timed(self, phase: str, started: float) -> None:
+        with self._lock:
+            self._timings[f"{phase}_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    def _build(self, build_manager: Callable[[], Tuple[Dict[str, Any], Any]]) -> Tuple[Dict[str, Any], Any]:
+        started = time.perf_counter()
+        memory_runtime, manager = build_manager()
+        self._timed("manager", started)
+        if manager is not None and self.query:
+            self._attach(manager)
+            with self._lock:
+                if not self._closed:
+                    self._searches.append(_executor().submit(self._speculate, manager))
+        return memory_runtime, manager
+
+    def _adapters(self, manager: Any) -> Tuple[Any, Any]:
+        config = getattr(manager, "config", None)
+        short_term = getattr(config, "vector_adapter", None)
+        long_term = getattr(getattr(config, "long_term", None), "vector_adapter", None)
+        return short_term, long_term
+
+    def _attach(self, manager: Any) -> None:
+        for adapter in self._adapters(manager):
+            client = getattr(adapter, "_client", None)
+            if client is not None and not isinstance(client, _PrefetchClient):
+                try:
+                    adapter._client = _PrefetchClient(client, self)
+                except Exception:
+                    pass
+        try:
+            setattr(manager, "_pupu_recall_prefetch", self)
+        except Exception:
+            pass
+
+    def _speculate(self, manager: Any) -> None:
+        short_term, long_term = self._adapters(manager)
+        adapter = short_term if short_term is not None else long_term
+        embed_fn = getattr(adapter, "_embed_fn", None)
+        client = getattr(adapter, "_client", None)
+        if not callable(embed_fn) or client is None:
+            return
+        client = getattr(client, "_pupu_client", client)
+
+        started = time.perf_counter()
+        vector = embed_fn([self.query])[0]
+        self._timed("embed", started)
+
+        searches: List[Tuple[str, str, Any]] = []
+        collection_name = getattr(short_term, "_collection_name", None)
+        if callable(collection_name):
+            # Adapters over a shared collection scope every search to the
+            # session; speculate with the same filter.
+            session_filter = getattr(short_term, "_session_filter", None)
+            try:
+                searches.append((
+                    "short_term_search",
+                    str(collection_name(self.session_id)),
+                    session_filter(self.session_id) if callable(session_filter) else None,
+                ))
+            except Exception:
+                pass
+        if long_term is not None and self.memory_namespace:
+            import memory_factory
+
+            for name in memory_factory._list_long_term_collection_names_for_namespace(
+                client,
+                self.memory_namespace,
+            ):
+                searches.append(("long_term_search", name, None))
+
+        pool = _executor()
+        with self._lock:
+            if self._closed:
+                return
+            self._searches.extend(
+                pool.submit(self._search, phase, client, collection, vector, query_filter)
+                for phase, collection, query_filter in searches
+            )
+
+    def _search(
+        self,
+        phase: str,
+        client: Any,
+        collection: str,
+        vector: Any,
+        query_filter: Any = None,
+    ) -> None:
+        started = time.perf_counter()
+        limit = _prefetch_limit()
+        scoped = {"query_filter": query_filter} if query_filter is not None else {}
+        try:
+            query_points = getattr(client, "query_points", None)
+            if callable(query_points):
+                response = query_points(
+                    collection_name=collection,
+                    query=vector,
+                    limit=limit,
+                    with_payload=True,
+                    **scoped,
+                )
+                hits = list(_field(response, "points") or [])
+            else:
+                response = None
+                hits = list(
+                    client.search(
+                        collection_name=collection,
+                        query_vector=vector,
+                        limit=limit,
+                        with_payload=True,
+                        **scoped,
+                    )
+                )
+        except Exception:
+            return
+        finally:
+            # Concurrent searches of one phase report the slowest one.
+            elapsed = round((time.perf_counter() - started) * 1000, 1)
+            with self._lock:
+                key = f"{phase}_ms"
+                self._timings[key] = max(self._timings.get(key, 0.0), elapsed)
+        memo_key = _vector_key(collection, vector)
+        if memo_key is not None:
+            with self._lock:
+                if not self._closed:
+                    self._memo[memo_key] = (hits, limit, response, query_filter)
+
+    # ── consumer side ──
+
+    def memory_runtime(self) -> Tuple[Dict[str, Any], Any]:
+        return self._manager_future.result()
+
+    def join(self, timeout: float | None = None) -> None:
+        """Wait for the speculative phases already in flight."""
+        started = time.perf_counter()
+        deadline = started + (_join_seconds() if timeout is None else timeout)
+        try:
+            self._manager_future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except Exception:
+            pass
+        index = 0
+        while True:
+            with self._lock:
+                if index >= len(self._searches):
+                    break
+                future = self._searches[index]
+            index += 1
+            try:
+                future.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except Exception:
+                pass
+        self._timed("join_wait", started)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._memo.clear()
+
+    def cancel(self) -> None:
+        """Abandon the prefetch when the turn fails before recall.
+
+        Work that has not started is dropped and nothing further is
+        scheduled or memoised; a manager build already running finishes on
+        the pool and is discarded.
+        """
+        self.close()
+        with self._lock:
+            futures = [self._manager_future, *self._searches]
+        for future in futures:
+            future.cancel()
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"timings": dict(self._timings), "prefetch": dict(self._stats)}
+
+    def _serve(self, method: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Any:
+        if args or set(kwargs) - _SEARCH_KWARGS or kwargs.get("with_vectors"):
+            return None
+        if kwargs.get("with_payload") is False:
+            return None
+        vector = kwargs.get("query") if method == "query_points" else kwargs.get("query_vector")
+        if vector is None:
+            vector = kwargs.get("query_vector")
+        memo_key = _vector_key(str(kwargs.get("collection_name") or ""), vector)
+        predicate = _filter_predicate(kwargs.get("query_filter"))
+        with self._lock:
+            entry = self._memo.get(memo_key) if memo_key is not None and not self._closed else None
+        # Hits fetched under a scope filter only answer that same scope.
+        if entry is not None and entry[3] is not None and kwargs.get("query_filter") != entry[3]:
+            predicate = None
+        if entry is None or predicate is None:
+            if entry is not None:
+                self._count("misses")
+            return None
+
+        hits, prefetched_limit, response, _scope = entry
+        limit = int(kwargs.get("limit") or 10)
+        threshold = kwargs.get("score_threshold")
+        selected: List[Any] = []
+        below_threshold = False
+        for hit in hits:
+            score = _hit_score(hit)
+            if threshold is not None and (score is None or score < float(threshold)):
+                below_threshold = True
+                break
+            if predicate(_hit_payload(hit)):
+                selected.append(hit)
+                if len(selected) >= limit:
+                    break
+        complete = len(selected) >= limit or below_threshold or len(hits) < prefetched_limit
+        if not complete:
+            self._count("misses")
+            return None
+        self._count("hits")
+        if method == "search":
+            return selected
+        model_copy = getattr(response, "model_copy", None)
+        if callable(model_copy):
+            return model_copy(update={"points": selected})
+        return SimpleNamespace(points=selected)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] += 1
+
+
+def start_recall_prefetch(
+    *,
+    options: Dict[str, Any] | None,
+    session_id: str,
+    messages: List[Dict[str, Any]],
+    build_manager: Callable[[], Tuple[Dict[str, Any], Any]],
+) -> RecallPrefetch | None:
+    """Start building memory and recalling for this turn, or None if not applicable."""
+    if not (isinstance(options, dict) and options.get("memory_enabled") and session_id):
+        return None
+    if not prefetch_enabled():
+        return None
+    import memory_factory
+
+    return RecallPrefetch(
+        session_id=session_id,
+        query=memory_factory._latest_user_query_for_log(messages),
+        memory_namespace=str(options.get("memory_namespace") or "").strip(),
+        build_manager=build_manager,
+    )
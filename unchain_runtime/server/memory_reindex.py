@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from types import MethodType
+from typing import Any, Dict, Tuple
+
+# Background re-embedding of a session's short-term vector collection.
+#
+# When the embedding signature changes, the session used to get a fresh,
+# empty collection and every turn indexed so far silently dropped out of
+# recall. Instead a "vector_reindex" record is written into session state:
+#
+#   from_tag / from_signature   the collection still serving recall
+#   to_tag / to_signature       the collection being rebuilt
+#   target_until                vector_indexed_until when the change was seen
+#   checkpoint                  messages[:checkpoint] are re-embedded
+#
+# A job walks messages[checkpoint:target_until] with
+# _collect_complete_turns_for_vector_index, embeds them in batches into the
+# new collection and checkpoints into the record after every batch, so a
+# restarted process resumes where it stopped. Until cut-over, recall is
+# served from the old collection (queried with the old embedding model) and
+# turns committed meanwhile are written to both collections, so the backfill
+# never has to chase a moving target. Cut-over swaps the tag and signature in
+# session state and drops the old collection. Checkpoint saves and cut-over
+# hold the job's commit lock, which commits of reindexing sessions also
+# take, so neither clobbers the other's session-state write.
+
+DEFAULT_BATCH_MESSAGES = 64
+RECORD_KEY = "vector_reindex"
+
+_jobs_lock = threading.Lock()
+_jobs: Dict[Tuple[str, str], "SessionReindexJob"] = {}
+
+
+def reindex_enabled() -> bool:
+    raw = os.environ.get("UNCHAIN_MEMORY_REINDEX", "").strip().lower()
+    return raw not in {"0", "false", "no", "off"}
+
+
+def _batch_messages() -> int:
+    raw = os.environ.get("UNCHAIN_MEMORY_REINDEX_BATCH_MESSAGES", "").strip()
+    try:
+        return max(2, int(raw)) if raw else DEFAULT_BATCH_MESSAGES
+    except ValueError:
+        return DEFAULT_BATCH_MESSAGES
+
+
+def reindex_record(state: Any) -> Dict[str, Any] | None:
+    record = state.get(RECORD_KEY) if isinstance(state, dict) else None
+    if not isinstance(record, dict) or not record.get("to_tag"):
+        return None
+    return record
+
+
+def begin_session_reindex(
+    state: Dict[str, Any],
+    *,
+    from_tag: str,
+    from_signature: str,
+    to_tag: str,
+    to_signature: str,
+) -> Dict[str, Any]:
+    now = time.time()
+    record = {
+        "from_tag": from_tag,
+        "from_signature": from_signature,
+        "to_tag": to_tag,
+        "to_signature": to_signature,
+        "target_until": max(0, int(state.get("vector_indexed_until") or 0)),
+        "checkpoint": 0,
+        "indexed_count": 0,
+        "started_at": now,
+        "updated_at": now,
+    }
+    state[RECORD_KEY] = record
+    return record
+
+
+class SessionReindexJob:
+    def __init__(
+        self,
+        *,
+        data_dir: str,
+        session_id: str,
+        store: Any,
+        client: Any,
+        adapter: Any,
+        record: Dict[str, Any],
+    ) -> None:
+        self.data_dir = data_dir
+        self.session_id = session_id
+        self.to_tag = str(record.get("to_tag") or "")
+        self.from_tag = str(record.get("from_tag") or "")
+        self.target = max(0, int(record.get("target_until") or 0))
+        self.checkpoint = min(self.target, max(0, int(record.get("checkpoint") or 0)))
+        self.indexed_count = max(0, int(record.get("indexed_count") or 0))
+        self.status = "running"
+        self.error = ""
+        self.commit_lock = threading.RLock()
+        self._store = store
+        self._client = client
+        self._adapter = adapter
+        self._thread = threading.Thread(
+            target=self._run,
+            name="unchain-memory-reindex",
+            daemon=True,
+        )
+
+    @property
+    def cut_over(self) -> bool:
+        return self.status == "done"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def join(self, timeout: float | None = None) -> None:
+        self._thread.join(timeout)
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "checkpoint": self.checkpoint,
+            "target": self.target,
+            "indexed_count": self.indexed_count,
+            "percent": round(100.0 * self.checkpoint / self.target, 1) if self.target else 100.0,
+            "error": self.error,
+        }
+
+    # ── job ──
+
+    def _load_state(self) -> Dict[str, Any]:
+        state = self._store.load(self.session_id)
+        return state if isinstance(state, dict) else {}
+
+    def _owns(self, state: Dict[str, Any]) -> Dict[str, Any] | None:
+        record = reindex_record(state)
+        if record is None or record.get("to_tag") != self.to_tag:
+            return None
+        return record
+
+    def _run(self) -> None:
+        try:
+            from unchain.memory.manager import _collect_complete_turns_for_vector_index
+
+            batch = _batch_messages()
+            while self.checkpoint < self.target:
+                state = self._load_state()
+                if self._owns(state) is None:
+                    self.status = "cancelled"
+                    return
+                messages = state.get("messages")
+                messages = messages if isinstance(messages, list) else []
+                target = min(self.target, len(messages))
+                end = min(target, self.checkpoint + batch)
+                texts, metadatas, next_until, _turns = _collect_complete_turns_for_vector_index(
+                    messages[:end],
+                    start_index=self.checkpoint,
+                )
+                if next_until <= self.checkpoint and end < target:
+                    # one turn longer than a batch
+                    texts, metadatas, next_until, _turns = _collect_complete_turns_for_vector_index(
+                        messages[:target],
+                        start_index=self.checkpoint,
+                    )
+                if next_until <= self.checkpoint:
+                    # only an incomplete tail is left; nothing indexable remains
+                    next_until = self.target
+                if texts:
+                    self._adapter.add_texts(
+                        session_id=self.session_id,
+                        texts=texts,
+                        metadatas=metadatas,
+                    )
+                self.indexed_count += len(texts)
+                self.checkpoint = min(self.target, int(next_until))
+                if not self._save_checkpoint():
+                    self.status = "cancelled"
+                    return
+            self._cut_over()
+        except Exception as exc:
+            self.error = str(exc) or exc.__class__.__name__
+            self.status = "failed"
+
+    def _save_checkpoint(self) -> bool:
+        with self.commit_lock:
+            state = self._load_state()
+            record = self._owns(state)
+            if record is None:
+                return False
+            record["checkpoint"] = self.checkpoint
+            record["indexed_count"] = self.indexed_count
+            record["updated_at"] = time.time()
+            self._store.save(self.session_id, state)
+            return True
+
+    def _cut_over(self) -> None:
+        import memory_factory
+
+        with self.commit_lock:
+            state = self._load_state()
+            record = self._owns(state)
+            if record is None:
+                self.status = "cancelled"
+                return
+            state["vector_collection_tag"] = self.to_tag
+            state["vector_embedding_signature"] = str(record.get("to_signature") or "")
+            state.pop(RECORD_KEY, None)
+            self._store.save(self.session_id, state)
+            self.status = "done"
+        if self.from_tag:
+            memory_factory.delete_session_vectors(
+                self._client,
+                session_id=self.session_id,
+                tag=self.from_tag,
+            )
+        memory_factory.invalidate_projection_cache(
+            self.data_dir,
+            memory_factory.session_scope(self.session_id),
+        )
+
+
+def ensure_session_reindex(
+    *,
+    data_dir: str,
+    session_id: str,
+    store: Any,
+    client: Any,
+    adapter: Any,
+    record: Dict[str, Any],
+) -> SessionReindexJob:
+    """Return the live job for this record, starting or resuming one if needed."""
+    key = (data_dir, session_id)
+    with _jobs_lock:
+        job = _jobs.get(key)
+        if job is not None and job.to_tag == record.get("to_tag") and job.status in {"running", "done"}:
+            return job
+        job = SessionReindexJob(
+            data_dir=data_dir,
+            session_id=session_id,
+            store=store,
+            client=client,
+            adapter=adapter,
+            record=record,
+        )
+        _jobs[key] = job
+    job.start()
+    return job
+
+
+def session_reindex_progress(data_dir: str, session_id: str, state: Any) -> Dict[str, Any]:
+    record = reindex_record(state)
+    with _jobs_lock:
+        job = _jobs.get((data_dir, session_id))
+    if job is not None and (record is None or job.to_tag == record.get("to_tag")):
+        if record is not None or job.status == "done":
+            return {"session_id": session_id, **job.progress()}
+    if record is None:
+        return {"session_id": session_id, "status": "idle"}
+    target = max(0, int(record.get("target_until") or 0))
+    checkpoint = max(0, int(record.get("checkpoint") or 0))
+    # Recorded but not running in this process (e.g. after a restart): it
+    # resumes when the session's memory is next opened.
+    return {
+        "session_id": session_id,
+        "status": "paused",
+        "checkpoint": checkpoint,
+        "target": target,
+        "indexed_count": max(0, int(record.get("indexed_count") or 0)),
+        "percent": round(100.0 * checkpoint / target, 1) if target else 100.0,
+        "error": "",
+    }
+
+
+class ReindexingVectorAdapter:
+    """Serves the old collection until the job cuts over; writes go to both."""
+
+    def __init__(self, job: SessionReindexJob, old_adapter: Any, new_adapter: Any) -> None:
+        self._job = job
+        self._old = old_adapter
+        self._new = new_adapter
+
+    def _serving(self) -> Any:
+        if self._old is None or self._job.cut_over:
+            return self._new
+        return self._old
+
+    def similarity_search(self, **kwargs: Any) -> Any:
+        return self._serving().similarity_search(**kwargs)
+
+    def add_texts(self, **kwargs: Any) -> Any:
+        result = self._new.add_texts(**kwargs)
+        if self._old is not None and not self._job.cut_over:
+            self._old.add_texts(**kwargs)
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._serving(), name)
+
+
+def guard_reindex_commits(manager: Any, job: SessionReindexJob) -> Any:
+    """Run the manager's commits under the job's commit lock."""
+    commit = getattr(manager, "commit_messages", None)
+    if not callable(commit):
+        return manager
+
+    def _guarded_commit_messages(self, *args: Any, **kwargs: Any) -> Any:
+        with job.commit_lock:
+            return commit(*args, **kwargs)
+
+    setattr(manager, "commit_messages", MethodType(_guarded_commit_messages, manager))
+    return manager
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import json
+import marshal
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Tuple
+
+# SQLite-backed short-term session store (drop-in for JsonFileSessionStore).
+#
+# One WAL-mode database per sessions dir. Messages are append-only rows in
+# session_messages (session_id, idx, body); everything else in the state dict
+# lives as one JSON blob in session_meta along with a version counter. An
+# in-process cache keeps each session's decoded messages as a marshal blob:
+# load() unmarshals a private copy after a one-row version check, and save()
+# compares the incoming messages with it and only encodes, deletes and
+# inserts from the first changed index, so a turn that appends two messages
+# writes two rows instead of rewriting the whole history.
+#
+# Sessions missing from the database are imported lazily from the legacy
+# JSON store (the file is then renamed to *.migrated).
+
+DB_FILENAME = "sessions.sqlite3"
+MIGRATED_SUFFIX = ".migrated"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS session_meta (
+    session_id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    message_count INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS session_messages (
+    session_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (session_id, idx)
+) WITHOUT ROWID;
+"""
+
+_connections_lock = threading.Lock()
+_connections: Dict[str, Tuple[sqlite3.Connection, threading.RLock]] = {}
+
+# (db_path, session_id) -> (version, meta state json, marshalled messages)
+_cache_lock = threading.Lock()
+_row_cache: "OrderedDict[Tuple[str, str], Tuple[int, str, bytes]]" = OrderedDict()
+DEFAULT_CACHED_SESSIONS = 32
+
+
+def _remember(db_path: str, session_id: str, entry: Tuple[int, str, bytes]) -> None:
+    with _cache_lock:
+        _row_cache[(db_path, session_id)] = entry
+        _row_cache.move_to_end((db_path, session_id))
+        while len(_row_cache) > DEFAULT_CACHED_SESSIONS:
+            _row_cache.popitem(last=False)
+
+
+def session_store_backend() -> str:
+    raw = os.environ.get("UNCHAIN_SESSION_STORE", "").strip().lower()
+    return "sqlite" if raw == "sqlite" else "json"
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _connection(db_path: str) -> Tuple[sqlite3.Connection, threading.RLock]:
+    with _connections_lock:
+        entry = _connections.get(db_path)
+        if entry is None:
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+            connection = sqlite3.connect(
+                db_path,
+                check_same_thread=False,
+                isolation_level=None,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(_SCHEMA)
+            entry = (connection, threading.RLock())
+            _connections[db_path] = entry
+        return entry
+
+
+def close_session_stores() -> None:
+    with _connections_lock:
+        for connection, _lock in _connections.values():
+            try:
+                connection.close()
+            except sqlite3.Error:
+                pass
+        _connections.clear()
+    with _cache_lock:
+        _row_cache.clear()
+
+
+class SqliteSessionStore:
+    def __init__(
+        self,
+        base_dir: str,
+        *,
+        legacy_loader: Callable[[str], Tuple[Dict[str, Any], str]] | None = None,
+    ) -> None:
+        self.base_dir = str(base_dir)
+        self.db_path = os.path.join(self.base_dir, DB_FILENAME)
+        self._legacy_loader = legacy_loader
+
+    def _path(self, session_id: str) -> str:
+        return self.db_path
+
+    # ── reads ──
+
+    def _cached_entry(
+        self,
+        connection: sqlite3.Connection,
+        session_id: str,
+    ) -> Tuple[int, str, bytes] | None:
+        meta = connection.execute(
+            "SELECT version, state FROM session_meta WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if meta is None:
+            return None
+        version, state_json = int(meta[0]), str(meta[1])
+        with _cache_lock:
+            cached = _row_cache.get((self.db_path, session_id))
+        if cached is not None and cached[0] == version:
+            return cached
+        rows = [
+            str(row[0])
+            for row in connection.execute(
+                "SELECT body FROM session_messages WHERE session_id = ? ORDER BY idx",
+                (session_id,),
+            )
+        ]
+        entry = (version, state_json, marshal.dumps(json.loads(f"[{','.join(rows)}]")))
+        _remember(self.db_path, session_id, entry)
+        return entry
+
+    def load(self, session_id: str) -> Dict[str, Any]:
+        session_id = str(session_id or "")
+        connection, lock = _connection(self.db_path)
+        with lock:
+            entry = self._cached_entry(connection, session_id)
+        if entry is None:
+            if self._migrate(session_id):
+                return self.load(session_id)
+            return {}
+        _version, state_json, messages_blob = entry
+        state = json.loads(state_json)
+        if not isinstance(state, dict):
+            state = {}
+        # marshal round trip: a private copy, several times faster than JSON
+        state["messages"] = marshal.loads(messages_blob)
+        return state
+
+    def version(self, session_id: str) -> int:
+        connection, lock = _connection(self.db_path)
+        with lock:
+            row = connection.execute(
+                "SELECT version FROM session_meta WHERE session_id = ?",
+                (str(session_id or ""),),
+            ).fetchone()
+        return int(row[0]) if row is not None else 0
+
+    def session_ids(self) -> List[str]:
+        connection, lock = _connection(self.db_path)
+        with lock:
+            rows = connection.execute(
+                "SELECT session_id FROM session_meta ORDER BY session_id"
+            ).fetchall()
+        return [str(row[0]) for row in rows]
+
+    # ── writes ──
+
+    def save(self, session_id: str, state: Dict[str, Any]) -> None:
+        session_id = str(session_id or "")
+        state = state if isinstance(state, dict) else {}
+        messages = state.get("messages")
+        messages = messages if isinstance(messages, list) else []
+        state_json = _encode({key: value for key, value in state.items() if key != "messages"})
+
+        connection, lock = _connection(self.db_path)
+        with lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                entry = self._cached_entry(connection, session_id)
+                stored = marshal.loads(entry[2]) if entry is not None else []
+                version = (entry[0] if entry is not None else 0) + 1
+                first_changed = 0
+                shared = min(len(stored), len(messages))
+                while first_changed < shared and stored[first_changed] == messages[first_changed]:
+                    first_changed += 1
+
+                tail = [_encode(message) for message in messages[first_changed:]]
+                if first_changed < len(stored):
+                    connection.execute(
+                        "DELETE FROM session_messages WHERE session_id = ? AND idx >= ?",
+                        (session_id, first_changed),
+                    )
+                if tail:
+                    connection.executemany(
+                        "INSERT INTO session_messages (session_id, idx, body) VALUES (?, ?, ?)",
+                        [
+                            (session_id, first_changed + offset, body)
+                            for offset, body in enumerate(tail)
+                        ],
+                    )
+                connection.execute(
+                    "INSERT INTO session_meta (session_id, state, message_count, version, updated_at)"
+                    " VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT(session_id) DO UPDATE SET state = excluded.state,"
+                    " message_count = excluded.message_count, version = excluded.version,"
+                    " updated_at = excluded.updated_at",
+                    (session_id, state_json, len(messages), version, time.time()),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                with _cache_lock:
+                    _row_cache.pop((self.db_path, session_id), None)
+                raise
+            # Cache what load() would decode from the rows: the unchanged
+            # prefix plus the JSON-normalised tail.
+            stored[first_changed:] = json.loads(f"[{','.join(tail)}]")
+            _remember(self.db_path, session_id, (version, state_json, marshal.dumps(stored)))
+
+    def delete(self, session_id: str) -> bool:
+        session_id = str(session_id or "")
+        connection, lock = _connection(self.db_path)
+        with lock:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.execute(
+                    "DELETE FROM session_messages WHERE session_id = ?",
+                    (session_id,),
+                )
+                deleted = connection.execute(
+                    "DELETE FROM session_meta WHERE session_id = ?",
+                    (session_id,),
+                ).rowcount
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            with _cache_lock:
+                _row_cache.pop((self.db_path, session_id), None)
+        return bool(deleted)
+
+    # ── migration ──
+
+    def _migrate(self, session_id: str) -> bool:
+        """Import *session_id* from the legacy JSON store, if it has one."""
+        if self._legacy_loader is None or not session_id:
+            return False
+        try:
+            state, path = self._legacy_loader(session_id)
+        except Exception:
+            return False
+        if not isinstance(state, dict) or not state or not path:
+            return False
+        self.save(session_id, state)
+        try:
+            os.replace(path, f"{path}{MIGRATED_SUFFIX}")
+        except OSError:
+            pass
+        return True
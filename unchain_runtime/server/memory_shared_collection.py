@@ -0,0 +1,572 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import uuid
+from types import MethodType
+from typing import Any, Callable, Dict, List
+
+# Optional shared layout for short-term session vectors.
+#
+# The default layout gives every session (and every collection tag) its own
+# collection, chat_<tag>_<session>. With thousands of threads the Qdrant
+# store carries thousands of tiny collections, each with its own segments
+# and HNSW graph, and every get_collections() call walks all of them. With
+# UNCHAIN_MEMORY_VECTOR_LAYOUT=shared, sessions that start fresh vectors go
+# into one collection per embedding signature instead:
+#
+#   chat_shared_<sha1(signature)[:12]>    payload: session_id, tag, ...
+#
+# session_id and tag are payload-indexed; searches filter on both, and
+# deleting a session is one delete-by-filter. The layout is recorded per
+# session ("vector_layout" in session state), so a session never silently
+# loses recall when the setting changes: existing per-session sessions stay
+# where they are until migrate_sessions_to_shared_layout copies their
+# points (vectors included, no re-embedding) into the shared collection.
+# Deletions go through delete_session_vectors, which removes a session's
+# vectors from wherever they live.
+#
+# Commits and the migration's layout flip run under a per-session lock
+# (session_layout_lock, wired into managers by guard_layout_commits): a
+# commit that loaded the state before the flip cannot save it afterwards
+# and put the session back on per_session once its collection is gone.
+
+LAYOUT_ENV = "UNCHAIN_MEMORY_VECTOR_LAYOUT"
+LAYOUT_KEY = "vector_layout"
+PER_SESSION_LAYOUT = "per_session"
+SHARED_LAYOUT = "shared"
+SHARED_COLLECTION_PREFIX = "chat_shared"
+SHARED_PAYLOAD_INDEXES = (("session_id", "keyword"), ("tag", "keyword"))
+MIGRATE_PAGE_SIZE = 256
+
+_POINT_NAMESPACE = uuid.UUID("3b0f6d52-8a55-4c8e-9d7e-5f3a1c2b9e41")
+
+_layout_locks_guard = threading.Lock()
+_layout_locks: Dict[str, threading.RLock] = {}
+
+
+def configured_vector_layout() -> str:
+    raw = os.environ.get(LAYOUT_ENV, "").strip().lower()
+    return SHARED_LAYOUT if raw == SHARED_LAYOUT else PER_SESSION_LAYOUT
+
+
+def session_vector_layout(state: Any) -> str:
+    layout = state.get(LAYOUT_KEY) if isinstance(state, dict) else None
+    return SHARED_LAYOUT if layout == SHARED_LAYOUT else PER_SESSION_LAYOUT
+
+
+def assign_session_vector_layout(state: Dict[str, Any]) -> None:
+    """Put a session that is starting its vectors afresh on the configured layout."""
+    if configured_vector_layout() == SHARED_LAYOUT:
+        state[LAYOUT_KEY] = SHARED_LAYOUT
+    else:
+        state.pop(LAYOUT_KEY, None)
+
+
+def session_layout_lock(session_id: str) -> threading.RLock:
+    with _layout_locks_guard:
+        lock = _layout_locks.get(session_id)
+        if lock is None:
+            lock = _layout_locks[session_id] = threading.RLock()
+        return lock
+
+
+def shared_collection_name(embedding_signature: str) -> str:
+    digest = hashlib.sha1(str(embedding_signature or "").encode("utf-8")).hexdigest()[:12]
+    return f"{SHARED_COLLECTION_PREFIX}_{digest}"
+
+
+def is_shared_collection(collection_name: str) -> bool:
+    return str(collection_name or "").startswith(f"{SHARED_COLLECTION_PREFIX}_")
+
+
+def _models():
+    from qdrant_client.http import models
+
+    return models
+
+
+def session_filter(session_id: str, tag: str | None = None) -> Any:
+    models = _models()
+    conditions = [
+        models.FieldCondition(key="session_id", match=models.MatchValue(value=session_id)),
+    ]
+    if tag is not None:
+        conditions.append(models.FieldCondition(key="tag", match=models.MatchValue(value=tag)))
+    return models.Filter(must=conditions)
+
+
+def _point_id(session_id: str, tag: str, key: str) -> str:
+    return str(uuid.uuid5(_POINT_NAMESPACE, f"{session_id}\x00{tag}\x00{key}"))
+
+
+def _ensure_shared_collection(client: Any, collection_name: str, vector_size: int) -> None:
+    exists = getattr(client, "collection_exists", None)
+    if callable(exists):
+        if exists(collection_name=collection_name):
+            return
+    else:
+        try:
+            client.get_collection(collection_name=collection_name)
+            return
+        except Exception:
+            pass
+    models = _models()
+    try:
+        client.create_collection(
+            collection_name=collection_name,
+            vectors_config=models.VectorParams(size=vector_size, distance=models.Distance.COSINE),
+        )
+    except Exception:
+        # Created concurrently by another session.
+        if callable(exists) and exists(collection_name=collection_name):
+            return
+        raise
+    import memory_qdrant_policy
+
+    memory_qdrant_policy.ensure_payload_indexes(client, collection_name, SHARED_PAYLOAD_INDEXES)
+
+
+class SharedSessionVectorAdapter:
+    """Session vector adapter over the shared collection of one embedding signature.
+
+    Mirrors the QdrantVectorAdapter surface the memory manager and the recall
+    prefetch use (add_texts, similarity_search, _client, _embed_fn,
+    _collection_name).
+    """
+
+    def __init__(
+        self,
+        *,
+        client: Any,
+        embed_fn: Callable[[List[str]], List[List[float]]],
+        vector_size: int,
+        embedding_signature: str,
+        tag: str,
+    ) -> None:
+        self._client = client
+        self._embed_fn = embed_fn
+        self._vector_size = int(vector_size)
+        self.collection_name = shared_collection_name(embedding_signature)
+        self.tag = str(tag or "")
+        self._ensured = False
+
+    def _collection_name(self, session_id: str) -> str:
+        return self.collection_name
+
+    def _session_filter(self, session_id: str) -> Any:
+        return session_filter(session_id, self.tag)
+
+    def _ensure_collection(self, collection_name: str | None = None) -> None:
+        if not self._ensured:
+            _ensure_shared_collection(self._client, self.collection_name, self._vector_size)
+            self._ensured = True
+
+    def add_texts(
+        self,
+        *,
+        session_id: str,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]] | None = None,
+    ) -> None:
+        if not texts:
+            return
+        self._ensure_collection()
+        models = _models()
+        vectors = self._embed_fn(list(texts))
+        metadatas = metadatas or [{} for _ in texts]
+        points = []
+        for text, vector, metadata in zip(texts, vectors, metadatas):
+            payload = {**(metadata or {}), "text": text, "session_id": session_id, "tag": self.tag}
+            key = str(payload.get("turn_start_index", hashlib.sha1(text.encode("utf-8")).hexdigest()))
+            points.append(
+                models.PointStruct(
+                    id=_point_id(session_id, self.tag, key),
+                    vector=list(vector),
+                    payload=payload,
+                )
+            )
+        self._client.upsert(collection_name=self.collection_name, points=points, wait=True)
+
+    def similarity_search(
+        self,
+        *,
+        session_id: str,
+        query: str,
+        k: int,
+        min_score: float | None = None,
+    ) -> List[Dict[str, Any]]:
+        import memory_factory
+
+        self._ensure_collection()
+        query_vec = self._embed_fn([query])[0]
+        query_filter = self._session_filter(session_id)
+        query_points = getattr(self._client, "query_points", None)
+        if callable(query_points):
+            results: Any = query_points(
+                collection_name=self.collection_name,
+                query=query_vec,
+                query_filter=query_filter,
+                limit=k,
+                with_payload=True,
+            )
+        else:
+            results = self._client.search(
+                collection_name=self.collection_name,
+                query_vector=query_vec,
+                query_filter=query_filter,
+                limit=k,
+                with_payload=True,
+            )
+        return memory_factory._recalled_items_from_hits(
+            memory_factory._extract_qdrant_hits(results),
+            min_score=min_score,
+        )
+
+
+def session_vector_adapter(
+    *,
+    client: Any,
+    embed_fn: Callable[[List[str]], List[List[float]]],
+    vector_size: int,
+    embedding_signature: str,
+    tag: str,
+    layout: str,
+) -> Any:
+    """Short-term vector adapter for a session's tag on its layout."""
+    if layout == SHARED_LAYOUT:
+        return SharedSessionVectorAdapter(
+            client=client,
+            embed_fn=embed_fn,
+            vector_size=vector_size,
+            embedding_signature=embedding_signature,
+            tag=tag,
+        )
+    import memory_factory
+    from unchain.memory.qdrant import QdrantVectorAdapter
+
+    return memory_factory._patch_qdrant_similarity_search_compat(
+        QdrantVectorAdapter(
+            client=client,
+            embed_fn=embed_fn,
+            vector_size=vector_size,
+            collection_prefix=memory_factory._vector_collection_prefix(tag),
+        )
+    )
+
+
+def _shared_collection_names(client: Any) -> List[str]:
+    get_collections = getattr(client, "get_collections", None)
+    if not callable(get_collections):
+        return []
+    try:
+        collections = getattr(get_collections(), "collections", None) or []
+    except Exception:
+        return []
+    return sorted(
+        name
+        for name in (getattr(item, "name", "") for item in collections)
+        if isinstance(name, str) and is_shared_collection(name)
+    )
+
+
+def delete_shared_session_points(client: Any, session_id: str, tag: str | None = None) -> List[str]:
+    """Delete a session's points (of one tag, or all) from every shared collection.
+
+    Returns warnings for collections that could not be cleaned.
+    """
+    warnings: List[str] = []
+    names = _shared_collection_names(client)
+    if not names or not session_id:
+        return warnings
+    selector = _models().FilterSelector(filter=session_filter(session_id, tag))
+    for name in names:
+        try:
+            client.delete(collection_name=name, points_selector=selector, wait=True)
+        except Exception as exc:
+            warnings.append(f"{name}: {exc}")
+    return warnings
+
+
+def delete_session_vectors(client: Any, *, session_id: str, tag: str) -> str:
+    """Drop a session tag's vectors from either layout; returns a warning or ""."""
+    import memory_factory
+
+    warning = memory_factory._delete_collection_best_effort_with_warning(
+        client,
+        memory_factory._session_collection_name(
+            session_id=session_id,
+            collection_prefix=memory_factory._vector_collection_prefix(tag),
+        ),
+    )
+    shared_warnings = delete_shared_session_points(client, session_id, tag)
+    return "; ".join(part for part in [warning, *shared_warnings] if part)
+
+
+class SessionScopedClient:
+    """Client view where a shared collection only holds one session's points.
+
+    Lets the projection code scroll and count a session inside the shared
+    collection as if it were a collection of its own.
+    """
+
+    def __init__(self, client: Any, collection_name: str, scope_filter: Any) -> None:
+        self._pupu_client = client
+        self._scoped_collection = collection_name
+        self._scope_filter = scope_filter
+
+    def scroll(self, **kwargs: Any) -> Any:
+        if kwargs.get("collection_name") == self._scoped_collection:
+            kwargs["scroll_filter"] = self._scope_filter
+        return self._pupu_client.scroll(**kwargs)
+
+    def count(self, **kwargs: Any) -> Any:
+        if kwargs.get("collection_name") == self._scoped_collection:
+            kwargs["count_filter"] = self._scope_filter
+        return self._pupu_client.count(**kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pupu_client, name)
+
+
+# ── migration from the per-session layout ──
+
+
+def _vector_size_from_signature(signature: str) -> int:
+    try:
+        return int(str(signature or "").rsplit(":", 1)[1])
+    except (IndexError, ValueError):
+        return 0
+
+
+def _copy_session_points(
+    client: Any,
+    *,
+    source: str,
+    target: str,
+    session_id: str,
+    tag: str,
+) -> int:
+    models = _models()
+    copied = 0
+    offset = None
+    while True:
+        kwargs: Dict[str, Any] = {
+            "collection_name": source,
+            "limit": MIGRATE_PAGE_SIZE,
+            "with_payload": True,
+            "with_vectors": True,
+        }
+        if offset is not None:
+            kwargs["offset"] = offset
+        records, offset = client.scroll(**kwargs)
+        if not records:
+            break
+        points = []
+        for record in records:
+            payload = dict(getattr(record, "payload", None) or {})
+            payload["session_id"] = session_id
+            payload["tag"] = tag
+            vector = getattr(record, "vector", None)
+            if isinstance(vector, dict):
+                vector = vector.get("") or next(iter(vector.values()), None)
+            if vector is None:
+                continue
+            points.append(
+                models.PointStruct(
+                    id=_point_id(session_id, tag, str(getattr(record, "id", ""))),
+                    vector=list(vector),
+                    payload=payload,
+                )
+            )
+        if points:
+            client.upsert(collection_name=target, points=points, wait=True)
+            copied += len(points)
+        if offset is None:
+            break
+    return copied
+
+
+def _migrate_session(client: Any, store: Any, session_id: str, *, dry_run: bool) -> Dict[str, Any]:
+    import memory_factory
+
+    entry: Dict[str, Any] = {"session_id": session_id, "status": "", "points": 0}
+    state = store.load(session_id)
+    if not isinstance(state, dict) or not state:
+        entry["status"] = "missing"
+        return entry
+    if session_vector_layout(state) == SHARED_LAYOUT:
+        entry["status"] = "already_shared"
+        return entry
+    if memory_factory.reindex_record(state) is not None:
+        # Cut-over rewrites the tag; migrate once the re-embedding is done.
+        entry["status"] = "reindex_pending"
+        return entry
+    signature = str(state.get("vector_embedding_signature") or "")
+    tag = str(state.get("vector_collection_tag") or "")
+    vector_size = _vector_size_from_signature(signature)
+    if not tag or vector_size <= 0:
+        entry["status"] = "no_vectors"
+        return entry
+    if dry_run:
+        entry["status"] = "would_migrate"
+        return entry
+
+    source = memory_factory._session_collection_name(
+        session_id=session_id,
+        collection_prefix=memory_factory._vector_collection_prefix(tag),
+    )
+    target = shared_collection_name(signature)
+    _ensure_shared_collection(client, target, vector_size)
+    for _attempt in range(3):
+        indexed_until = state.get("vector_indexed_until")
+        try:
+            entry["points"] = _copy_session_points(
+                client,
+                source=source,
+                target=target,
+                session_id=session_id,
+                tag=tag,
+            )
+        except Exception as exc:
+            if "not found" not in str(exc).lower():
+                raise
+            entry["points"] = 0
+        with session_layout_lock(session_id):
+            latest = store.load(session_id)
+            if (
+                latest.get("vector_collection_tag") == tag
+                and latest.get("vector_indexed_until") == indexed_until
+                and memory_factory.reindex_record(latest) is None
+            ):
+                # Nothing was committed while copying, and commits wait on
+                # the lock until the flip is saved. Point ids are derived
+                # from the source ids, so a retry only overwrites.
+                latest[LAYOUT_KEY] = SHARED_LAYOUT
+                store.save(session_id, latest)
+                memory_factory._delete_collection_best_effort(client, source)
+                entry["status"] = "migrated"
+                return entry
+        state = latest
+        if state.get("vector_collection_tag") != tag or memory_factory.reindex_record(state) is not None:
+            delete_shared_session_points(client, session_id, tag)
+            entry["status"] = "changed_during_migration"
+            return entry
+    entry["status"] = "busy"
+    return entry
+
+
+def guard_layout_commits(
+    manager: Any,
+    *,
+    client: Any,
+    store: Any,
+    session_id: str,
+    layout: str,
+) -> Any:
+    """Run the manager's commits under the session's layout lock.
+
+    A manager built before the session was migrated still writes through a
+    per-session adapter; after such a commit the new points are folded into
+    the shared collection so recall does not miss them.
+    """
+    commit = getattr(manager, "commit_messages", None)
+    if not callable(commit) or not session_id:
+        return manager
+
+    def _guarded_commit_messages(self: Any, *args: Any, **kwargs: Any) -> Any:
+        import memory_factory
+
+        with session_layout_lock(session_id):
+            result = commit(*args, **kwargs)
+            if layout == SHARED_LAYOUT:
+                return result
+            state = store.load(session_id)
+            if session_vector_layout(state) != SHARED_LAYOUT:
+                return result
+            signature = str(state.get("vector_embedding_signature") or "")
+            tag = str(state.get("vector_collection_tag") or "")
+            source = memory_factory._session_collection_name(
+                session_id=session_id,
+                collection_prefix=memory_factory._vector_collection_prefix(tag),
+            )
+            target = shared_collection_name(signature)
+            try:
+                _ensure_shared_collection(client, target, _vector_size_from_signature(signature))
+                _copy_session_points(
+                    client,
+                    source=source,
+                    target=target,
+                    session_id=session_id,
+                    tag=tag,
+                )
+            except Exception as exc:
+                if "not found" not in str(exc).lower():
+                    raise
+                return result
+            memory_factory._delete_collection_best_effort(client, source)
+            return result
+
+    setattr(manager, "commit_messages", MethodType(_guarded_commit_messages, manager))
+    return manager
+
+
+def migrate_sessions_to_shared_layout(
+    data_dir: str,
+    *,
+    session_ids: List[str] | None = None,
+    dry_run: bool = False,
+) -> Dict[str, Any]:
+    """Copy per-session collections into the shared layout and drop them."""
+    import memory_factory
+
+    client = memory_factory._get_or_create_qdrant_client(data_dir)
+    store = memory_factory._open_session_store(data_dir)
+    ids = session_ids if session_ids is not None else memory_factory._list_session_ids(data_dir)
+    results = []
+    for session_id in ids:
+        try:
+            entry = _migrate_session(client, store, session_id, dry_run=dry_run)
+        except Exception as exc:
+            entry = {"session_id": session_id, "status": "failed", "points": 0, "error": str(exc)}
+        if entry["status"] == "migrated":
+            memory_factory.invalidate_projection_cache(
+                data_dir,
+                memory_factory.session_scope(session_id),
+            )
+        results.append(entry)
+    return {
+        "dry_run": dry_run,
+        "sessions": results,
+        "migrated": sum(1 for entry in results if entry["status"] == "migrated"),
+        "failed": sum(1 for entry in results if entry["status"] == "failed"),
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Move per-session memory collections into the shared collection layout.",
+    )
+    parser.add_argument("--data-dir", default=os.environ.get("UNCHAIN_DATA_DIR", ""))
+    parser.add_argument("--session", action="append", dest="session_ids")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+    if not args.data_dir:
+        parser.error("--data-dir (or UNCHAIN_DATA_DIR) is required")
+
+    summary = migrate_sessions_to_shared_layout(
+        args.data_dir,
+        session_ids=args.session_ids,
+        dry_run=args.dry_run,
+    )
+    json.dump(summary, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,6 +5,8 @@ import os
 import re
 from typing import Any
 
+from memory_session_store import SqliteSessionStore, session_store_backend
+
 
 def _root():
     import memory_factory as root_module
@@ -12,11 +14,76 @@ def _root():
     return root_module
 
 
-def _load_session_state(data_dir: str, session_id: str) -> dict[str, Any]:
+def _load_legacy_session_file(data_dir: str, session_id: str) -> tuple[dict[str, Any], str]:
+    path = _root()._session_store_path(data_dir, session_id)
+    if not os.path.isfile(path):
+        return {}, ""
+    with open(path, "r", encoding="utf-8") as handle:
+        state = json.load(handle)
+    return (state if isinstance(state, dict) else {}), path
+
+
+def _open_session_store(data_dir: str) -> Any:
+    """Session store for *data_dir*: SQLite when UNCHAIN_SESSION_STORE=sqlite,
+    otherwise unchain's JsonFileSessionStore."""
     root = _root()
+    if session_store_backend() == "sqlite":
+        return SqliteSessionStore(
+            root._sessions_dir(data_dir),
+            legacy_loader=lambda session_id: _load_legacy_session_file(data_dir, session_id),
+        )
     from unchain.memory.qdrant import JsonFileSessionStore
 
-    store = JsonFileSessionStore(base_dir=root._sessions_dir(data_dir))
+    return JsonFileSessionStore(base_dir=root._sessions_dir(data_dir))
+
+
+def _session_state_marker(data_dir: str, session_id: str) -> str:
+    """Cheap token that changes whenever the session state is saved."""
+    store = _open_session_store(data_dir)
+    if isinstance(store, SqliteSessionStore):
+        return f"v={store.version(session_id)}"
+    try:
+        return f"mtime={os.stat(_root()._session_store_path(data_dir, session_id)).st_mtime_ns}"
+    except OSError:
+        return "mtime=0"
+
+
+def _delete_session_state(data_dir: str, session_id: str) -> bool:
+    """Remove the stored state of *session_id* (database row and/or JSON file)."""
+    deleted = False
+    store = _open_session_store(data_dir)
+    if isinstance(store, SqliteSessionStore):
+        deleted = store.delete(session_id)
+    session_path = _root()._session_store_path(data_dir, session_id)
+    if os.path.exists(session_path):
+        os.remove(session_path)
+        deleted = True
+    return deleted
+
+
+def _list_session_ids(data_dir: str) -> list[str]:
+    """Ids of every stored session: database rows plus not yet migrated JSON files."""
+    root = _root()
+    session_ids: set[str] = set()
+    store = _open_session_store(data_dir)
+    if isinstance(store, SqliteSessionStore):
+        session_ids.update(store.session_ids())
+    sessions_dir = root._sessions_dir(data_dir)
+    for name in os.listdir(sessions_dir):
+        if not name.endswith(".json"):
+            continue
+        session_id = name[: -len(".json")]
+        try:
+            if os.path.basename(root._session_store_path(data_dir, session_id)) != name:
+                continue
+        except Exception:
+            pass
+        session_ids.add(session_id)
+    return sorted(session_ids)
+
+
+def _load_session_state(data_dir: str, session_id: str) -> dict[str, Any]:
+    store = _open_session_store(data_dir)
     try:
         state = store.load(str(session_id or ""))
     except Exception:
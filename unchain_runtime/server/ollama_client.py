@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any, Dict
+
+# One keep-alive httpx.Client per Ollama base URL, shared by every caller in
+# the process. httpx.Client is thread-safe for concurrent requests.
+
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+DEFAULT_MAX_CONNECTIONS = 8
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+def default_ollama_base_url() -> str:
+    return os.environ.get("OLLAMA_HOST", DEFAULT_OLLAMA_HOST).rstrip("/")
+
+
+def normalize_ollama_base_url(base_url: str | None) -> str:
+    cleaned = str(base_url or "").strip().rstrip("/")
+    return cleaned or default_ollama_base_url()
+
+
+def get_ollama_client(base_url: str | None = None) -> Any:
+    normalized = normalize_ollama_base_url(base_url)
+    client = _clients.get(normalized)
+    if client is not None:
+        return client
+
+    with _clients_lock:
+        client = _clients.get(normalized)
+        if client is not None:
+            return client
+
+        import httpx
+
+        client = httpx.Client(
+            base_url=normalized,
+            timeout=httpx.Timeout(30.0, connect=2.0),
+            limits=httpx.Limits(
+                max_connections=DEFAULT_MAX_CONNECTIONS,
+                max_keepalive_connections=DEFAULT_MAX_CONNECTIONS,
+            ),
+        )
+        _clients[normalized] = client
+        return client
+
+
+def close_ollama_clients() -> None:
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from ollama_client import get_ollama_client, normalize_ollama_base_url
+
+# Cached view of each Ollama host's /api/tags, shared by the model catalog
+# and embedding auto-detection. Reads never wait on the network once a host
+# has been seen: stale entries are served as-is while a background thread
+# refreshes them. Only the very first lookup for a host fetches inline, with
+# a short timeout.
+
+DEFAULT_TTL_SECONDS = 30.0
+DEFAULT_FETCH_TIMEOUT_SECONDS = 3.0
+COLD_FETCH_TIMEOUT_SECONDS = 1.0
+
+_inventory_lock = threading.Lock()
+_inventory: Dict[str, Dict[str, Any]] = {}
+_refresh_wakeup = threading.Event()
+_refresher_thread: threading.Thread | None = None
+
+
+def _ttl_seconds() -> float:
+    raw = os.environ.get("UNCHAIN_OLLAMA_INVENTORY_TTL", "").strip()
+    if not raw:
+        return DEFAULT_TTL_SECONDS
+    try:
+        return max(1.0, float(raw))
+    except ValueError:
+        return DEFAULT_TTL_SECONDS
+
+
+def _fetch_tags(base_url: str, timeout: float) -> Dict[str, Any]:
+    try:
+        response = get_ollama_client(base_url).get("/api/tags", timeout=timeout)
+        response.raise_for_status()
+        data = response.json()
+    except Exception as exc:
+        return {"reachable": False, "models": [], "error": str(exc)}
+    models = data.get("models") if isinstance(data, dict) else None
+    return {
+        "reachable": True,
+        "models": [entry for entry in models or [] if isinstance(entry, dict)],
+        "error": "",
+    }
+
+
+def _store_result(base_url: str, result: Dict[str, Any], now: float) -> Dict[str, Any]:
+    with _inventory_lock:
+        entry = _inventory.setdefault(base_url, {})
+        entry.update(result)
+        entry["fetched_at"] = now
+        entry["refreshing"] = False
+        return dict(entry)
+
+
+def refresh_ollama_inventory(
+    base_url: str | None = None,
+    *,
+    timeout: float = DEFAULT_FETCH_TIMEOUT_SECONDS,
+    now_fn: Callable[[], float] | None = None,
+) -> Dict[str, Any]:
+    """Fetch /api/tags now and update the cached entry."""
+    normalized = normalize_ollama_base_url(base_url)
+    result = _fetch_tags(normalized, timeout)
+    return _store_result(normalized, result, (now_fn or time.time)())
+
+
+def _refresh_loop() -> None:
+    while True:
+        _refresh_wakeup.wait(timeout=_ttl_seconds() / 2)
+        _refresh_wakeup.clear()
+        now = time.time()
+        ttl = _ttl_seconds()
+        with _inventory_lock:
+            due = [
+                base_url
+                for base_url, entry in _inventory.items()
+                if entry.get("refreshing") or now - entry.get("fetched_at", 0.0) >= ttl
+            ]
+            for base_url in due:
+                _inventory[base_url]["refreshing"] = True
+        for base_url in due:
+            refresh_ollama_inventory(base_url)
+
+
+def start_ollama_inventory_refresher(base_url: str | None = None) -> None:
+    """Start the background refresher and schedule a fetch for *base_url*."""
+    global _refresher_thread
+    normalized = normalize_ollama_base_url(base_url)
+    with _inventory_lock:
+        _inventory.setdefault(normalized, {"reachable": False, "models": [], "fetched_at": 0.0})
+        if _refresher_thread is None or not _refresher_thread.is_alive():
+            _refresher_thread = threading.Thread(
+                target=_refresh_loop,
+                name="unchain-ollama-inventory",
+                daemon=True,
+            )
+            _refresher_thread.start()
+    _refresh_wakeup.set()
+
+
+def get_ollama_inventory(
+    base_url: str | None = None,
+    *,
+    now_fn: Callable[[], float] | None = None,
+) -> Dict[str, Any]:
+    """Return ``{"reachable", "models", "fetched_at", "stale"}`` for a host.
+
+    Served from cache; a stale entry triggers a background refresh instead of
+    blocking the caller.
+    """
+    normalized = normalize_ollama_base_url(base_url)
+    now = (now_fn or time.time)()
+    with _inventory_lock:
+        entry = _inventory.get(normalized)
+        cold = entry is None or (entry.get("fetched_at", 0.0) <= 0 and not entry.get("refreshing"))
+        if cold:
+            entry = _inventory.setdefault(normalized, {"reachable": False, "models": []})
+            entry["refreshing"] = True
+            entry["fetched_at"] = 0.0
+        snapshot = dict(entry)
+
+    if cold:
+        snapshot = _store_result(
+            normalized,
+            _fetch_tags(normalized, COLD_FETCH_TIMEOUT_SECONDS),
+            now,
+        )
+        start_ollama_inventory_refresher(normalized)
+    elif now - snapshot.get("fetched_at", 0.0) >= _ttl_seconds():
+        with _inventory_lock:
+            _inventory[normalized]["refreshing"] = True
+        start_ollama_inventory_refresher(normalized)
+
+    return {
+        "reachable": bool(snapshot.get("reachable")),
+        "models": list(snapshot.get("models") or []),
+        "fetched_at": snapshot.get("fetched_at", 0.0),
+        "stale": now - snapshot.get("fetched_at", 0.0) >= _ttl_seconds(),
+    }
+
+
+def ollama_reachable(base_url: str | None = None) -> bool:
+    return get_ollama_inventory(base_url)["reachable"]
+
+
+def clear_ollama_inventory() -> None:
+    with _inventory_lock:
+        _inventory.clear()
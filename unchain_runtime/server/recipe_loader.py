@@ -7,14 +7,21 @@ from __future__ import annotations
 
 import json
 import logging
+import threading
 from pathlib import Path
 from typing import Any
 
+from agent_blueprint_cache import invalidate_agent_blueprints
 from recipe import Recipe, RecipeValidationError, is_valid_recipe_name, parse_recipe_json
 
 _logger = logging.getLogger(__name__)
 _RECIPE_SUFFIX = ".recipe"
 
+# Parsed recipes keyed by path; reused while (mtime_ns, size) is unchanged.
+# Recipe is frozen, so callers share the same instance.
+_recipe_cache: dict[str, tuple[int, int, Recipe]] = {}
+_recipe_cache_lock = threading.Lock()
+
 
 def recipes_dir() -> Path:
     return Path.home() / ".pupu" / "agent_recipes"
@@ -35,6 +42,27 @@ def _read_recipe_file(path: Path) -> Recipe | None:
         return None
 
 
+def _read_recipe_file_cached(path: Path) -> Recipe | None:
+    key = str(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        with _recipe_cache_lock:
+            _recipe_cache.pop(key, None)
+        return None
+    with _recipe_cache_lock:
+        cached = _recipe_cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+    recipe = _read_recipe_file(path)
+    with _recipe_cache_lock:
+        if recipe is None:
+            _recipe_cache.pop(key, None)
+        else:
+            _recipe_cache[key] = (stat.st_mtime_ns, stat.st_size, recipe)
+    return recipe
+
+
 def list_recipes() -> list[dict[str, Any]]:
     root = recipes_dir()
     if not root.is_dir():
@@ -43,7 +71,7 @@ def list_recipes() -> list[dict[str, Any]]:
     for entry in sorted(root.iterdir()):
         if not entry.is_file() or entry.suffix != _RECIPE_SUFFIX:
             continue
-        recipe = _read_recipe_file(entry)
+        recipe = _read_recipe_file_cached(entry)
         if recipe is None:
             continue
         result.append({
@@ -60,7 +88,7 @@ def load_recipe(name: str) -> Recipe | None:
     if not is_valid_recipe_name(name):
         return None
     path = recipes_dir() / f"{name}{_RECIPE_SUFFIX}"
-    return _read_recipe_file(path)
+    return _read_recipe_file_cached(path)
 
 
 def save_recipe(data: dict) -> None:
@@ -76,6 +104,7 @@ def save_recipe(data: dict) -> None:
     tmp = target.with_suffix(target.suffix + ".tmp")
     tmp.write_text(payload, encoding="utf-8")
     tmp.replace(target)
+    invalidate_agent_blueprints(recipe_name=recipe.name)
 
 
 def delete_recipe(name: str) -> None:
@@ -88,6 +117,7 @@ def delete_recipe(name: str) -> None:
         target.unlink()
     except FileNotFoundError:
         pass
+    invalidate_agent_blueprints(recipe_name=name)
 
 
 def list_subagent_refs() -> list[dict[str, str]]:
@@ -1,5 +1,6 @@
 from flask import Response, current_app, jsonify, request
 
+from json_codec import json_response
 from route_blueprint import api_blueprint
 
 
@@ -64,6 +65,15 @@ def models_catalog() -> Response:
     )
 
 
+@api_blueprint.post("/models/catalog/reload")
+def reload_models_catalog() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Invalid auth token", 401)
+
+    return jsonify(root.reload_capability_catalog())
+
+
 @api_blueprint.get("/toolkits/catalog")
 def toolkits_catalog() -> Response:
     root = _root()
@@ -79,7 +89,7 @@ def toolkits_catalog_v2() -> Response:
     if not root._is_authorized():
         return root._json_error("unauthorized", "Invalid auth token", 401)
 
-    return jsonify(root.get_toolkit_catalog_v2())
+    return json_response(root.get_toolkit_catalog_v2())
 
 
 @api_blueprint.get("/toolkits/<toolkit_id>/metadata")
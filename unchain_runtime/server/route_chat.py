@@ -1,11 +1,19 @@
-import json
 import threading
 import time
 from typing import Any, Dict, Iterable, List
 
 from flask import Response, jsonify, request, stream_with_context
 
+from chat_run_registry import (
+    cancel_chat_run,
+    get_chat_run,
+    iter_chat_run_frames,
+    resumable_by_default,
+    start_chat_run,
+)
+from json_codec import sse_event_text
 from route_blueprint import api_blueprint
+from stream_coalescing import WaitForEvents
 
 try:
     from unchain.events import RuntimeEventBridge
@@ -17,6 +25,9 @@ try:
 except ImportError:  # pragma: no cover - runtime source path should be configured by unchain_adapter
     RuntimeEventBridgeV4 = None  # type: ignore
 
+# Set by asgi_server on the WSGI environ of bridged requests.
+CLIENT_DISCONNECT_ENVIRON_KEY = "unchain.client_disconnected"
+
 _ATTACHMENT_MODALITY_ALIAS_MAP = {
     "file": "pdf",
 }
@@ -29,12 +40,58 @@ def _root():
 
 
 def _sse_event(event_name: str, payload: Dict) -> str:
-    return (
-        f"event: {event_name}\n"
-        f"data: {json.dumps(payload, ensure_ascii=False, default=str)}\n\n"
+    return sse_event_text(event_name, payload)
+
+
+def _stream_cancel_event() -> threading.Event:
+    """Cancel event for a streaming run started by the current request.
+
+    The ASGI bridge puts one in the WSGI environ and sets it when the client
+    disconnects, which also covers a generator blocked inside ``next()``.
+    """
+    event = request.environ.get(CLIENT_DISCONNECT_ENVIRON_KEY)
+    return event if isinstance(event, threading.Event) else threading.Event()
+
+
+def _sse_response(body: Iterable[str]) -> Response:
+    return Response(
+        body,
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
     )
 
 
+def _with_event_ids(frames: Iterable[str]) -> Iterable[tuple[int, str]]:
+    """Number v2 frames (each frame bumps ``seq`` by one) and tag them with
+    an SSE ``id:`` line so browsers send it back as Last-Event-ID."""
+    for seq, text in enumerate(frames, start=1):
+        yield seq, f"id: {seq}\n{text}"
+
+
+def _coerce_resumable(raw_value: object, options: Dict) -> bool:
+    if raw_value is None:
+        raw_value = options.get("resumable")
+    if raw_value is None:
+        return resumable_by_default()
+    if isinstance(raw_value, str):
+        return raw_value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(raw_value)
+
+
+def _apply_stream_coalescing(payload: Dict, options: Dict) -> Dict:
+    """Fold top-level ``coalesce_ms``/``max_batch_bytes`` into the run options."""
+    overrides = {
+        key: payload[key]
+        for key in ("coalesce_ms", "max_batch_bytes")
+        if key in payload and key not in options
+    }
+    return {**options, **overrides} if overrides else options
+
+
 def _sanitize_trace_level(raw_trace_level: object) -> str:
     if not isinstance(raw_trace_level, str):
         return "minimal"
@@ -379,17 +436,16 @@ def chat_stream() -> Response:
     )
 
 
-@api_blueprint.post("/chat/stream/v2")
-def chat_stream_v2() -> Response:
-    root = _root()
+def _prepare_chat_stream_v2(root) -> tuple[Dict[str, Any] | None, Any]:
+    """Validate a /chat/stream/v2 request. Returns ``(stream_request, error)``."""
     if not root._is_authorized():
-        return root._json_error("unauthorized", "Invalid auth token", 401)
+        return None, root._json_error("unauthorized", "Invalid auth token", 401)
 
     payload = request.get_json(silent=True) or {}
     message = str(payload.get("message", "")).strip()
     attachments = _sanitize_attachments(payload.get("attachments"))
     if not message and not attachments:
-        return root._json_error(
+        return None, root._json_error(
             "invalid_request",
             "message or attachments is required",
             400,
@@ -402,154 +458,245 @@ def chat_stream_v2() -> Response:
 
     history = _sanitize_history(payload.get("history"))
     options = payload.get("options", {}) if isinstance(payload.get("options"), dict) else {}
+    options = _apply_stream_coalescing(payload, options)
     trace_level = _sanitize_trace_level(
         payload.get("trace_level")
         or options.get("trace_level")
         or "minimal"
     )
-
-    def stream_events() -> Iterable[str]:
-        seq = 0
-        started_at = int(time.time() * 1000)
-        last_iteration = 0
-        final_bundle: Dict[str, object] | None = None
+    return {
+        "message": message,
+        "attachments": attachments,
+        "history": history,
+        "options": options,
+        "thread_id": thread_id,
+        "trace_level": trace_level,
+        "resumable": _coerce_resumable(payload.get("resumable"), options),
+    }, None
+
+
+def _iter_chat_stream_v2_frames(
+    root,
+    stream_request: Dict[str, Any],
+    confirmation_cancel_event: threading.Event | None = None,
+    *,
+    cooperative: bool = False,
+) -> Iterable[Any]:
+    """Yield the SSE frames of one /chat/stream/v2 run.
+
+    With ``cooperative=True`` the runtime never blocks on its event queue and
+    ``WaitForEvents`` markers are passed through for an asyncio driver.
+    """
+    message = stream_request["message"]
+    attachments = stream_request["attachments"]
+    history = stream_request["history"]
+    options = stream_request["options"]
+    thread_id = stream_request["thread_id"]
+    trace_level = stream_request["trace_level"]
+    cooperative_kwargs = {"cooperative": True} if cooperative else {}
+    seq = 0
+    started_at = int(time.time() * 1000)
+    last_iteration = 0
+    final_bundle: Dict[str, object] | None = None
+    if confirmation_cancel_event is None:
         confirmation_cancel_event = threading.Event()
 
-        def cancel_pending_confirmations() -> None:
-            confirmation_cancel_event.set()
-            root.cancel_tool_confirmations(confirmation_cancel_event)
+    def cancel_pending_confirmations() -> None:
+        confirmation_cancel_event.set()
+        root.cancel_tool_confirmations(confirmation_cancel_event)
+
+    try:
+        seq += 1
+        yield _sse_event(
+            "frame",
+            _build_trace_frame(
+                seq=seq,
+                event_type="stream_started",
+                payload={
+                    "model": root.get_model_name(options),
+                    "started_at": started_at,
+                    "trace_level": trace_level,
+                    "thread_id": thread_id,
+                },
+                iteration=0,
+                timestamp_ms=started_at,
+            ),
+        )
+
+        for raw_event in root.stream_chat_events(
+            message=message,
+            history=history,
+            attachments=attachments,
+            options=options,
+            session_id=thread_id,
+            cancel_event=confirmation_cancel_event,
+            **cooperative_kwargs,
+        ):
+            if isinstance(raw_event, WaitForEvents):
+                yield raw_event
+                continue
+            event_type = str(raw_event.get("type", "event")).strip() or "event"
+
+            if event_type == "stream_summary":
+                bundle = raw_event.get("bundle")
+                if isinstance(bundle, dict) and bundle:
+                    final_bundle = bundle
+                continue
+
+            payload_data = {
+                key: value
+                for key, value in raw_event.items()
+                if key not in {"type", "run_id", "iteration", "timestamp"}
+            }
+            # Skip sanitization for frames that carry structured data needed by the UI:
+            # - tool_call: interact_config.options for selections, confirmation metadata
+            # - tool_result: subagent agent_name/status for branch matching
+            # - subagent_*: lifecycle metadata (child_run_id, status, subagent_id)
+            # - continuation_request: confirmation_id for the continue/stop flow
+            _UNSANITIZED_EVENT_TYPES = (
+                "final_message", "token_delta", "request_messages",
+                "tool_call", "tool_result", "continuation_request",
+                "workflow_step_final", "workflow_step_delta",
+                "subagent_spawned", "subagent_started", "subagent_completed",
+                "subagent_failed", "subagent_handoff", "subagent_batch_started",
+                "subagent_batch_joined", "subagent_clarification_requested",
+            )
+            if event_type in _UNSANITIZED_EVENT_TYPES:
+                sanitized_payload = payload_data
+            else:
+                sanitized_payload = _sanitize_trace_value(payload_data, trace_level)
+
+            run_id = raw_event.get("run_id")
+            normalized_run_id = run_id if isinstance(run_id, str) else ""
+            iteration = raw_event.get("iteration")
+            normalized_iteration = (
+                iteration if isinstance(iteration, int) else last_iteration
+            )
+            last_iteration = normalized_iteration
+            raw_ts = raw_event.get("timestamp")
+            if isinstance(raw_ts, (int, float)):
+                event_ts_ms = int(float(raw_ts) * 1000)
+            else:
+                event_ts_ms = int(time.time() * 1000)
 
-        try:
             seq += 1
             yield _sse_event(
                 "frame",
                 _build_trace_frame(
                     seq=seq,
-                    event_type="stream_started",
-                    payload={
-                        "model": root.get_model_name(options),
-                        "started_at": started_at,
-                        "trace_level": trace_level,
-                        "thread_id": thread_id,
-                    },
-                    iteration=0,
-                    timestamp_ms=started_at,
+                    event_type=event_type,
+                    payload=sanitized_payload,
+                    run_id=normalized_run_id,
+                    iteration=normalized_iteration,
+                    timestamp_ms=event_ts_ms,
                 ),
             )
 
-            for raw_event in root.stream_chat_events(
-                message=message,
-                history=history,
-                attachments=attachments,
-                options=options,
-                session_id=thread_id,
-                cancel_event=confirmation_cancel_event,
-            ):
-                event_type = str(raw_event.get("type", "event")).strip() or "event"
-
-                if event_type == "stream_summary":
-                    bundle = raw_event.get("bundle")
-                    if isinstance(bundle, dict) and bundle:
-                        final_bundle = bundle
-                    continue
+        seq += 1
+        finished_at = int(time.time() * 1000)
+        done_payload: Dict[str, object] = {"finished_at": finished_at}
+        if isinstance(final_bundle, dict) and final_bundle:
+            done_payload["bundle"] = final_bundle
+        yield _sse_event(
+            "frame",
+            _build_trace_frame(
+                seq=seq,
+                event_type="done",
+                payload=done_payload,
+                iteration=last_iteration,
+                timestamp_ms=finished_at,
+            ),
+        )
+    except GeneratorExit:  # pragma: no cover
+        cancel_pending_confirmations()
+        return
+    except Exception as stream_error:
+        cancel_pending_confirmations()
+        code, normalized_message = _normalize_stream_error(stream_error)
+        seq += 1
+        error_ts = int(time.time() * 1000)
+        yield _sse_event(
+            "frame",
+            _build_trace_frame(
+                seq=seq,
+                event_type="error",
+                payload={
+                    "code": code,
+                    "message": normalized_message,
+                },
+                iteration=last_iteration,
+                timestamp_ms=error_ts,
+            ),
+        )
+    finally:
+        cancel_pending_confirmations()
 
-                payload_data = {
-                    key: value
-                    for key, value in raw_event.items()
-                    if key not in {"type", "run_id", "iteration", "timestamp"}
-                }
-                # Skip sanitization for frames that carry structured data needed by the UI:
-                # - tool_call: interact_config.options for selections, confirmation metadata
-                # - tool_result: subagent agent_name/status for branch matching
-                # - subagent_*: lifecycle metadata (child_run_id, status, subagent_id)
-                # - continuation_request: confirmation_id for the continue/stop flow
-                _UNSANITIZED_EVENT_TYPES = (
-                    "final_message", "token_delta", "request_messages",
-                    "tool_call", "tool_result", "continuation_request",
-                    "workflow_step_final", "workflow_step_delta",
-                    "subagent_spawned", "subagent_started", "subagent_completed",
-                    "subagent_failed", "subagent_handoff", "subagent_batch_started",
-                    "subagent_batch_joined", "subagent_clarification_requested",
-                )
-                if event_type in _UNSANITIZED_EVENT_TYPES:
-                    sanitized_payload = payload_data
-                else:
-                    sanitized_payload = _sanitize_trace_value(payload_data, trace_level)
-
-                run_id = raw_event.get("run_id")
-                normalized_run_id = run_id if isinstance(run_id, str) else ""
-                iteration = raw_event.get("iteration")
-                normalized_iteration = (
-                    iteration if isinstance(iteration, int) else last_iteration
-                )
-                last_iteration = normalized_iteration
-                raw_ts = raw_event.get("timestamp")
-                if isinstance(raw_ts, (int, float)):
-                    event_ts_ms = int(float(raw_ts) * 1000)
-                else:
-                    event_ts_ms = int(time.time() * 1000)
-
-                seq += 1
-                yield _sse_event(
-                    "frame",
-                    _build_trace_frame(
-                        seq=seq,
-                        event_type=event_type,
-                        payload=sanitized_payload,
-                        run_id=normalized_run_id,
-                        iteration=normalized_iteration,
-                        timestamp_ms=event_ts_ms,
-                    ),
-                )
 
-            seq += 1
-            finished_at = int(time.time() * 1000)
-            done_payload: Dict[str, object] = {"finished_at": finished_at}
-            if isinstance(final_bundle, dict) and final_bundle:
-                done_payload["bundle"] = final_bundle
-            yield _sse_event(
-                "frame",
-                _build_trace_frame(
-                    seq=seq,
-                    event_type="done",
-                    payload=done_payload,
-                    iteration=last_iteration,
-                    timestamp_ms=finished_at,
-                ),
-            )
-        except GeneratorExit:  # pragma: no cover
-            cancel_pending_confirmations()
-            return
-        except Exception as stream_error:
-            cancel_pending_confirmations()
-            code, normalized_message = _normalize_stream_error(stream_error)
-            seq += 1
-            error_ts = int(time.time() * 1000)
-            yield _sse_event(
-                "frame",
-                _build_trace_frame(
-                    seq=seq,
-                    event_type="error",
-                    payload={
-                        "code": code,
-                        "message": normalized_message,
-                    },
-                    iteration=last_iteration,
-                    timestamp_ms=error_ts,
-                ),
+@api_blueprint.post("/chat/stream/v2")
+def chat_stream_v2() -> Response:
+    root = _root()
+    stream_request, error = _prepare_chat_stream_v2(root)
+    if error is not None:
+        return error
+
+    if not stream_request["resumable"]:
+        return _sse_response(
+            stream_with_context(
+                _iter_chat_stream_v2_frames(root, stream_request, _stream_cancel_event())
             )
-        finally:
-            cancel_pending_confirmations()
+        )
 
-    return Response(
-        stream_with_context(stream_events()),
-        mimetype="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        },
+    run_cancel_event = threading.Event()
+
+    def cancel_run() -> None:
+        run_cancel_event.set()
+        root.cancel_tool_confirmations(run_cancel_event)
+
+    run = start_chat_run(
+        stream_request["thread_id"],
+        lambda _run: _with_event_ids(
+            _iter_chat_stream_v2_frames(root, stream_request, run_cancel_event)
+        ),
+        resumable=True,
+        on_cancel=cancel_run,
     )
+    return _sse_response(iter_chat_run_frames(run))
+
+
+@api_blueprint.get("/chat/stream/v2/resume")
+def chat_stream_v2_resume() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Invalid auth token", 401)
+
+    thread_id = str(request.args.get("thread_id") or request.args.get("threadId") or "").strip()
+    if not thread_id:
+        return root._json_error("invalid_request", "thread_id is required", 400)
+    run = get_chat_run(thread_id)
+    if run is None:
+        return root._json_error("not_found", "No resumable run for this thread", 404)
+
+    raw_seq = request.headers.get("Last-Event-ID") or request.args.get("seq") or "0"
+    try:
+        after_seq = max(0, int(str(raw_seq).strip()))
+    except ValueError:
+        return root._json_error("invalid_request", "seq must be an integer", 400)
+
+    return _sse_response(iter_chat_run_frames(run, after_seq=after_seq))
+
+
+@api_blueprint.post("/chat/stream/v2/cancel")
+def chat_stream_v2_cancel() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Invalid auth token", 401)
+
+    payload = request.get_json(silent=True) or {}
+    incoming_thread_id = payload.get("threadId") or payload.get("thread_id")
+    thread_id = str(incoming_thread_id).strip() if incoming_thread_id else ""
+    if not thread_id:
+        return root._json_error("invalid_request", "thread_id is required", 400)
+    return jsonify({"cancelled": cancel_chat_run(thread_id), "thread_id": thread_id})
 
 
 @api_blueprint.post("/chat/stream/v3")
@@ -581,15 +728,17 @@ def chat_stream_v3() -> Response:
 
     history = _sanitize_history(payload.get("history"))
     options = payload.get("options", {}) if isinstance(payload.get("options"), dict) else {}
+    options = _apply_stream_coalescing(payload, options)
     trace_level = _sanitize_trace_level(
         payload.get("trace_level")
         or options.get("trace_level")
         or "minimal"
     )
 
+    confirmation_cancel_event = _stream_cancel_event()
+
     def stream_events() -> Iterable[str]:
         started_at = int(time.time() * 1000)
-        confirmation_cancel_event = threading.Event()
         bridge = RuntimeEventBridge(
             session_id=thread_id,
             root_agent_id="developer",
@@ -704,9 +853,10 @@ def chat_stream_v4() -> Response:
         or "minimal"
     )
 
+    confirmation_cancel_event = _stream_cancel_event()
+
     def stream_events() -> Iterable[str]:
         started_at = int(time.time() * 1000)
-        confirmation_cancel_event = threading.Event()
         bridge = RuntimeEventBridgeV4(
             session_id=thread_id,
             root_agent_id="developer",
@@ -1,7 +1,8 @@
 from html import escape
 
-from flask import Response, jsonify, request
+from flask import Response, jsonify, request, stream_with_context
 
+from json_codec import json_response, sse_event_text
 from route_blueprint import api_blueprint
 
 
@@ -88,6 +89,37 @@ def reload_mcp_toolkits_route() -> Response:
         return _mcp_error_response(root, exc)
 
 
+@api_blueprint.post("/mcp/toolkits/reload/stream")
+def reload_mcp_toolkits_stream_route() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Invalid auth token", 401)
+
+    payload = request.get_json(silent=True) or {}
+    workspace_root = str(
+        payload.get("workspaceRoot") or payload.get("workspace_root") or ""
+    ).strip()
+
+    def _events():
+        try:
+            for event in root.iter_reload_mcp_toolkits(workspace_root=workspace_root):
+                yield sse_event_text(event.pop("type"), event)
+        except Exception as exc:
+            yield sse_event_text(
+                "error",
+                {
+                    "code": getattr(exc, "code", "mcp_request_failed"),
+                    "message": str(exc) or "MCP reload failed",
+                },
+            )
+
+    return Response(
+        stream_with_context(_events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @api_blueprint.post("/mcp/toolkits/<toolkit_id>/health")
 def check_mcp_toolkit_health_route(toolkit_id: str) -> Response:
     root = _root()
@@ -265,7 +297,7 @@ def list_mcp_store_metadata_route() -> Response:
         return root._json_error("unauthorized", "Invalid auth token", 401)
 
     try:
-        return jsonify(root.list_mcp_store_metadata())
+        return json_response(root.list_mcp_store_metadata())
     except Exception as exc:
         return _mcp_error_response(root, exc)
 
@@ -278,8 +310,11 @@ def reload_mcp_store_metadata_route() -> Response:
 
     payload = request.get_json(silent=True) or {}
     entry_id = str(payload.get("entry_id") or payload.get("entryId") or "").strip()
+    options = {"entry_id": entry_id}
+    if "force" in payload:
+        options["force"] = bool(payload.get("force"))
     try:
-        return jsonify(root.reload_mcp_store_metadata(entry_id=entry_id))
+        return json_response(root.reload_mcp_store_metadata(**options))
     except Exception as exc:
         return _mcp_error_response(root, exc)
 
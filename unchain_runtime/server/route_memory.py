@@ -71,3 +71,148 @@ def export_memory_session() -> Response:
         messages = []
 
     return jsonify({"session_id": session_id, "messages": messages})
+
+
+@api_blueprint.get("/memory/session/reindex")
+def memory_session_reindex_progress() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Invalid auth token", 401)
+
+    session_id = str(request.args.get("session_id", "")).strip()
+    if not session_id:
+        return root._json_error("invalid_request", "session_id is required", 400)
+
+    import memory_factory
+    import memory_reindex
+
+    data_dir = memory_factory._normalize_data_dir(memory_factory._data_dir())
+    if not data_dir:
+        return jsonify({"session_id": session_id, "status": "idle"})
+
+    state = memory_factory._load_session_state(data_dir, session_id)
+    progress = memory_reindex.session_reindex_progress(data_dir, session_id, state)
+    if progress["status"] != "idle":
+        record = memory_reindex.reindex_record(state) or {}
+        progress["from_signature"] = record.get("from_signature", "")
+        progress["to_signature"] = record.get(
+            "to_signature",
+            state.get("vector_embedding_signature", ""),
+        )
+    return jsonify(progress)
+
+
+@api_blueprint.get("/memory/commit/status")
+def memory_commit_status() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Invalid auth token", 401)
+
+    job_id_raw = str(request.args.get("job_id", "")).strip()
+    session_id = str(request.args.get("session_id", "")).strip()
+    if not job_id_raw and not session_id:
+        return root._json_error("invalid_request", "job_id or session_id is required", 400)
+
+    import memory_commit_worker
+
+    if job_id_raw:
+        try:
+            job_id = int(job_id_raw)
+        except ValueError:
+            return root._json_error("invalid_request", "job_id must be an integer", 400)
+        job = memory_commit_worker.get_memory_commit_job(job_id)
+        if job is None:
+            return root._json_error("not_found", "Unknown memory commit job", 404)
+        return jsonify({"job": job})
+
+    try:
+        limit = max(1, min(int(request.args.get("limit", 20)), 200))
+    except (TypeError, ValueError):
+        limit = 20
+    jobs = memory_commit_worker.list_memory_commit_jobs(session_id, limit=limit)
+    pending = sum(1 for job in jobs if job.get("status") in {"pending", "running"})
+    return jsonify({"session_id": session_id, "jobs": jobs, "pending": pending})
+
+
+@api_blueprint.post("/memory/qdrant/migrate")
+def migrate_memory_qdrant_collections() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Invalid auth token", 401)
+
+    payload = request.get_json(silent=True) or {}
+    import memory_factory
+
+    try:
+        policy = memory_factory.qdrant_policy(payload.get("policy"))
+    except ValueError as exc:
+        return root._json_error("invalid_request", str(exc), 400)
+
+    data_dir = memory_factory._normalize_data_dir(memory_factory._data_dir())
+    if not data_dir:
+        return root._json_error("invalid_request", "Memory data directory is not configured", 400)
+
+    try:
+        client = memory_factory._get_or_create_qdrant_client(data_dir)
+        summary = memory_factory.migrate_qdrant_collections(
+            client,
+            policy,
+            dry_run=bool(payload.get("dry_run")),
+        )
+    except Exception as exc:
+        return jsonify(
+            {
+                "error": {
+                    "code": "qdrant_migrate_failed",
+                    "message": str(exc),
+                }
+            }
+        ), 500
+    if summary.get("skipped") == "local_mode":
+        return root._json_error(
+            "qdrant_migrate_local_mode",
+            "The embedded Qdrant store ignores on_disk, quantization, HNSW and "
+            "payload index settings; nothing was migrated",
+            409,
+        )
+    return jsonify(summary)
+
+
+@api_blueprint.post("/memory/session/layout/migrate")
+def migrate_memory_session_layout() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Invalid auth token", 401)
+
+    payload = request.get_json(silent=True) or {}
+    raw_session_ids = payload.get("session_ids")
+    if raw_session_ids is not None and not isinstance(raw_session_ids, list):
+        return root._json_error("invalid_request", "session_ids must be an array", 400)
+    session_ids = (
+        [str(item).strip() for item in raw_session_ids if str(item).strip()]
+        if raw_session_ids is not None
+        else None
+    )
+
+    import memory_factory
+
+    data_dir = memory_factory._normalize_data_dir(memory_factory._data_dir())
+    if not data_dir:
+        return root._json_error("invalid_request", "Memory data directory is not configured", 400)
+
+    try:
+        summary = memory_factory.migrate_sessions_to_shared_layout(
+            data_dir,
+            session_ids=session_ids,
+            dry_run=bool(payload.get("dry_run")),
+        )
+    except Exception as exc:
+        return jsonify(
+            {
+                "error": {
+                    "code": "memory_layout_migrate_failed",
+                    "message": str(exc),
+                }
+            }
+        ), 500
+    return jsonify(summary)
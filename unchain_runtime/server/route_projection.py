@@ -1,14 +1,59 @@
+import hashlib
 import json
 import math
+import os
+import types
+import uuid
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, NamedTuple
 
 from flask import Response, jsonify, request
 
+from json_codec import json_response
+from memory_projection_cache import (
+    LONG_TERM_SCOPE,
+    invalidate_projection_cache,
+    load_cached_projection,
+    projection_version_marker,
+    session_scope,
+    store_cached_projection,
+)
+from memory_projection_engine import (
+    MINIBATCH_KMEANS_MIN_POINTS,
+    StreamingProjector,
+    get_projection_job,
+    minibatch_kmeans_2d,
+    start_projection_job,
+)
+from memory_shared_collection import (
+    SHARED_LAYOUT,
+    SessionScopedClient,
+    session_filter,
+    session_vector_layout,
+    shared_collection_name,
+)
 from route_blueprint import api_blueprint
 
+# Collections up to this size are projected synchronously with an exact SVD;
+# larger long-term sets are streamed through StreamingProjector on a
+# background job and served progressively, through the v2 route only: v1
+# returns full point payloads and stays capped at this size.
 _MEMORY_PROJECTION_MAX_POINTS = 10000
 _MEMORY_PROJECTION_PAGE_SIZE = 512
+_LONG_TERM_PROJECTION_MAX_POINTS_DEFAULT = 500000
+_PROJECTION_SNAPSHOT_POINTS = 20000
+_PROJECTION_V2_PAGE_SIZE = 5000
+_PROJECTION_V2_MAX_PAGE_SIZE = 50000
+_PROJECTION_TEXT_BATCH_MAX = 200
+
+
+def _long_term_projection_max_points() -> int:
+    raw = os.environ.get("UNCHAIN_PROJECTION_LONG_TERM_MAX_POINTS", "").strip()
+    try:
+        value = int(raw)
+    except ValueError:
+        return _LONG_TERM_PROJECTION_MAX_POINTS_DEFAULT
+    return max(_MEMORY_PROJECTION_MAX_POINTS, value)
 
 
 def _root():
@@ -135,11 +180,41 @@ def _projection_session_collection_name(
     return f"{collection_prefix}_{safe_session_id}"
 
 
-def _normalize_projection_vector(
-    raw_vector: object,
-    *,
-    expected_dims: int = 0,
-) -> List[float] | None:
+class _ProjectedPoint(NamedTuple):
+    id: Any
+    payload: Any
+    key: str
+
+
+def _projection_point_key(collection_name: str, point_id: Any) -> str:
+    """Projection id of a point: ``<collection>:<point id>``.
+
+    Point ids are only unique within a collection (several ``long_term_*``
+    collections can each hold integer id 1), so cached fits and v2 ids carry
+    the collection. Collection names never contain ``:``.
+    """
+    return f"{collection_name}:{point_id}"
+
+
+def _parse_projection_point_key(key: str) -> tuple[str, int | str] | None:
+    """Split a projection id into ``(collection, qdrant id)``.
+
+    Returns ``None`` unless the id part is an unsigned integer or a canonical
+    UUID, the only point ids Qdrant accepts.
+    """
+    collection_name, sep, raw_id = key.partition(":")
+    if not sep or not collection_name or not raw_id:
+        return None
+    if raw_id.isascii() and raw_id.isdigit():
+        return collection_name, int(raw_id)
+    try:
+        canonical = str(uuid.UUID(raw_id))
+    except ValueError:
+        return None
+    return (collection_name, canonical) if canonical == raw_id else None
+
+
+def _raw_projection_vector(raw_vector: object) -> List[Any] | None:
     vector_candidate: Any = raw_vector
     if isinstance(raw_vector, dict):
         vector_candidate = next(
@@ -153,19 +228,70 @@ def _normalize_projection_vector(
 
     if not isinstance(vector_candidate, (list, tuple)) or not vector_candidate:
         return None
-
-    try:
-        vector = [float(item) for item in vector_candidate]
-    except Exception:
-        return None
-
-    if not vector or any(not math.isfinite(item) for item in vector):
-        return None
-
-    if expected_dims > 0 and len(vector) != expected_dims:
-        return None
-
-    return vector
+    return vector_candidate
+
+
+class _VectorRows:
+    """Float32 vector matrix filled in place as scroll pages arrive.
+
+    Rows are copied straight from the client's vector lists into a
+    preallocated buffer (grown by doubling when *capacity* was too small), so
+    no per-element Python floats are created and scrolled point objects can
+    be released page by page. Only ``(id, payload)`` is kept per row; payload
+    text is extracted later, for returned points only.
+    """
+
+    def __init__(self, capacity: int = 0, dims: int = 0) -> None:
+        self._capacity = max(1, int(capacity))
+        self.dims = int(dims)
+        self._buffer: Any = None
+        self.count = 0
+        self.points: List[_ProjectedPoint] = []
+
+    def add(self, page_points: List[Any], collection_name: str = "") -> None:
+        import numpy as np
+
+        for point in page_points:
+            raw_vector = _raw_projection_vector(getattr(point, "vector", None))
+            if raw_vector is None:
+                continue
+            if self.dims <= 0:
+                self.dims = len(raw_vector)
+            if len(raw_vector) != self.dims:
+                continue
+            if self._buffer is None:
+                self._buffer = np.empty((self._capacity, self.dims), dtype=np.float32)
+            elif self.count == len(self._buffer):
+                grown = np.empty((2 * len(self._buffer), self.dims), dtype=np.float32)
+                grown[:self.count] = self._buffer
+                self._buffer = grown
+            try:
+                self._buffer[self.count] = raw_vector
+            except (TypeError, ValueError):
+                continue
+            self.points.append(
+                _ProjectedPoint(
+                    point.id,
+                    point.payload,
+                    _projection_point_key(collection_name, point.id),
+                )
+            )
+            self.count += 1
+
+    def matrix(self):
+        """Return ``(rows, points)`` with non-finite rows masked out."""
+        import numpy as np
+
+        if self._buffer is None or self.count == 0:
+            return None, []
+        rows = self._buffer[:self.count]
+        finite = np.isfinite(rows).all(axis=1)
+        if finite.all():
+            return rows, self.points
+        return (
+            rows[finite],
+            [point for point, keep in zip(self.points, finite) if keep],
+        )
 
 
 def _is_projection_collection_missing_error(error: Exception) -> bool:
@@ -179,17 +305,23 @@ def _is_projection_collection_missing_error(error: Exception) -> bool:
     )
 
 
-def _scroll_projection_points(client: Any, collection_name: str) -> List[Any]:
-    all_points: List[Any] = []
+def _iter_projection_pages(
+    client: Any,
+    collection_name: str,
+    *,
+    with_vectors: bool = True,
+    max_points: int = _MEMORY_PROJECTION_MAX_POINTS,
+):
+    """Yield scroll pages of *collection_name* until *max_points* are read."""
+    scrolled = 0
     next_offset: Any = None
 
-    while len(all_points) < _MEMORY_PROJECTION_MAX_POINTS:
-        remaining = _MEMORY_PROJECTION_MAX_POINTS - len(all_points)
-        limit = min(_MEMORY_PROJECTION_PAGE_SIZE, remaining)
+    while scrolled < max_points:
+        limit = min(_MEMORY_PROJECTION_PAGE_SIZE, max_points - scrolled)
         request_kwargs: Dict[str, Any] = {
             "collection_name": collection_name,
             "with_payload": True,
-            "with_vectors": True,
+            "with_vectors": with_vectors,
             "limit": limit,
         }
         if next_offset is not None:
@@ -202,19 +334,19 @@ def _scroll_projection_points(client: Any, collection_name: str) -> List[Any]:
                 break
             request_kwargs.pop("offset", None)
             page_points, new_offset = client.scroll(**request_kwargs)
-            all_points.extend(page_points or [])
+            if page_points:
+                yield list(page_points)
             break
 
         if not page_points:
             break
 
-        all_points.extend(page_points)
+        scrolled += len(page_points)
+        yield list(page_points)
         if new_offset is None:
             break
         next_offset = new_offset
 
-    return all_points
-
 
 def _kmeans_2d_numpy(coords_2d: "Any") -> List[int]:
     import numpy as np
@@ -227,6 +359,8 @@ def _kmeans_2d_numpy(coords_2d: "Any") -> List[int]:
     k = min(k, n)
     if k == 1:
         return [0] * n
+    if n > MINIBATCH_KMEANS_MIN_POINTS:
+        return minibatch_kmeans_2d(arr, k)
 
     rng = np.random.default_rng(42)
     centroid_indices: List[int] = [int(rng.integers(0, n))]
@@ -281,8 +415,56 @@ def _normalize_cluster_labels(raw_labels: object, point_count: int) -> List[int]
     return normalized[:point_count]
 
 
-def _compute_projection_points(vector_points: List[Any], coords: Any) -> List[Dict[str, object]]:
+def _padded_component_rows(coords: Any, point_count: int) -> List[List[float]]:
+    import numpy as np
+
+    padded = np.zeros((point_count, 5), dtype=np.float64)
+    coords_array = np.asarray(coords, dtype=np.float64)
+    if coords_array.ndim >= 2:
+        width = min(5, coords_array.shape[1])
+        padded[:, :width] = coords_array[:point_count, :width]
+    return padded.tolist()
+
+
+def _projection_cluster_labels(coords: Any, point_count: int) -> List[int]:
     root = _root()
+    try:
+        return _normalize_cluster_labels(
+            root._kmeans_2d_numpy(coords[:point_count, :2]),
+            point_count,
+        )
+    except Exception:
+        return [0] * point_count
+
+
+def _projection_text_fields(payload: object) -> Dict[str, object]:
+    payload = payload if isinstance(payload, dict) else {}
+    full_text = _extract_projection_text(payload)
+    label = ""
+    for line in full_text.splitlines():
+        stripped = line.strip()
+        if stripped:
+            for prefix in ("user:", "assistant:", "user :", "assistant :"):
+                if stripped.lower().startswith(prefix):
+                    stripped = stripped[len(prefix):].strip()
+                    break
+            label = stripped[:52] + ("..." if len(stripped) > 52 else "")
+            break
+
+    return {
+        "text": full_text,
+        "label": label,
+        "content": full_text[:300] + ("..." if len(full_text) > 300 else ""),
+        "turn_start_index": payload.get("turn_start_index"),
+        "turn_end_index": payload.get("turn_end_index"),
+    }
+
+
+def _compute_projection_points(
+    vector_points: List[Any],
+    coords: Any,
+    cluster_labels: List[int] | None = None,
+) -> List[Dict[str, object]]:
     coords_shape = getattr(coords, "shape", ())
     point_count = min(
         len(vector_points),
@@ -291,34 +473,17 @@ def _compute_projection_points(vector_points: List[Any], coords: Any) -> List[Di
     if point_count <= 0:
         return []
 
-    try:
-        cluster_labels = _normalize_cluster_labels(
-            root._kmeans_2d_numpy(coords[:point_count, :2]),
-            point_count,
-        )
-    except Exception:
-        cluster_labels = [0] * point_count
+    if cluster_labels is None:
+        cluster_labels = _projection_cluster_labels(coords, point_count)
+    else:
+        cluster_labels = _normalize_cluster_labels(cluster_labels, point_count)
+
+    # One bulk conversion instead of five numpy scalar reads per point.
+    pc_rows = _padded_component_rows(coords, point_count)
 
     points: List[Dict[str, object]] = []
     for index, point in enumerate(vector_points[:point_count]):
-        payload = point.payload if isinstance(point.payload, dict) else {}
-        full_text = _extract_projection_text(payload)
-        label = ""
-        for line in full_text.splitlines():
-            stripped = line.strip()
-            if stripped:
-                for prefix in ("user:", "assistant:", "user :", "assistant :"):
-                    if stripped.lower().startswith(prefix):
-                        stripped = stripped[len(prefix):].strip()
-                        break
-                label = stripped[:52] + ("..." if len(stripped) > 52 else "")
-                break
-
-        content = full_text[:300] + ("..." if len(full_text) > 300 else "")
-        pc_vals = [
-            float(coords[index, j]) if len(coords_shape) >= 2 and j < coords_shape[1] else 0.0
-            for j in range(5)
-        ]
+        pc_vals = pc_rows[index]
         points.append(
             {
                 "id": str(point.id),
@@ -330,32 +495,46 @@ def _compute_projection_points(vector_points: List[Any], coords: Any) -> List[Di
                 "pc4": pc_vals[3],
                 "pc5": pc_vals[4],
                 "group": f"Cluster {cluster_labels[index] + 1}",
-                "text": full_text,
-                "label": label,
-                "content": content,
-                "turn_start_index": payload.get("turn_start_index"),
-                "turn_end_index": payload.get("turn_end_index"),
+                **_projection_text_fields(point.payload),
             }
         )
 
     return points
 
 
-def _project_vectors(vector_rows: List[List[float]]):
+def _project_vectors(vector_rows: Any):
+    """Exact PCA of *vector_rows*; float32 ndarrays are centered in place.
+
+    With more rows than dimensions the components come from the d x d
+    covariance (``eigh``), which avoids the n x d ``U`` and LAPACK workspace
+    of a thin SVD.
+    """
     import numpy as np
 
-    if not vector_rows:
+    if vector_rows is None or len(vector_rows) == 0:
         return None, None
 
-    vectors = np.array(vector_rows, dtype=np.float64)
-    try:
+    if isinstance(vector_rows, np.ndarray) and vector_rows.dtype == np.float32:
+        centered = vector_rows
+        centered -= centered.mean(axis=0, dtype=np.float64).astype(np.float32)
+    else:
+        vectors = np.array(vector_rows, dtype=np.float64)
         centered = vectors - vectors.mean(axis=0)
-        _, singular_values, vt = np.linalg.svd(centered, full_matrices=False)
+    try:
+        if centered.shape[0] > centered.shape[1]:
+            covariance = (centered.T @ centered).astype(np.float64)
+            eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+            order = np.argsort(eigenvalues)[::-1]
+            singular_values = np.sqrt(np.clip(eigenvalues[order], 0.0, None))
+            components = eigenvectors[:, order[:5]].T
+        else:
+            _, singular_values, components = np.linalg.svd(centered, full_matrices=False)
     except Exception:
         return None, None
 
     num_components = min(5, len(singular_values))
-    coords = centered @ vt[:num_components].T
+    coords = (centered @ components[:num_components].T.astype(centered.dtype)).astype(np.float64)
+    singular_values = singular_values.astype(np.float64)
     total_variance = float((singular_values ** 2).sum())
     variance = (
         [
@@ -370,37 +549,472 @@ def _project_vectors(vector_rows: List[List[float]]):
     return coords, variance
 
 
-def _build_vector_payload(scroll_result: List[Any]) -> Dict[str, object]:
-    vector_rows: List[List[float]] = []
-    vector_points: List[Any] = []
-    expected_dims = 0
-
-    for point in scroll_result:
-        vector = _normalize_projection_vector(
-            getattr(point, "vector", None),
-            expected_dims=expected_dims,
-        )
-        if vector is None:
-            continue
+def _fit_vector_rows(vector_rows: _VectorRows) -> Dict[str, Any] | None:
+    rows, vector_points = vector_rows.matrix()
+    if rows is None or not vector_points:
+        return None
+
+    coords, variance = _project_vectors(rows)
+    if coords is None or variance is None:
+        return None
+
+    point_count = min(len(vector_points), int(coords.shape[0]))
+    if point_count <= 0:
+        return None
+    return {
+        "points": vector_points[:point_count],
+        "coords": coords[:point_count],
+        "variance": variance,
+        "labels": _projection_cluster_labels(coords, point_count),
+    }
 
-        if expected_dims <= 0:
-            expected_dims = len(vector)
 
-        vector_rows.append(vector)
-        vector_points.append(point)
+def _fit_projection(scroll_result: List[Any]) -> Dict[str, Any] | None:
+    """Project scrolled points. Returns points, coords, variance and labels."""
+    vector_rows = _VectorRows(len(scroll_result))
+    vector_rows.add(scroll_result)
+    return _fit_vector_rows(vector_rows)
 
-    if not vector_rows:
-        return _empty_projection_payload()
 
-    coords, variance = _project_vectors(vector_rows)
-    if coords is None or variance is None:
+def _build_vector_payload(scroll_result: List[Any]) -> Dict[str, object]:
+    fitted = _fit_projection(scroll_result)
+    if fitted is None:
         return _empty_projection_payload()
 
-    points = _compute_projection_points(vector_points, coords)
+    points = _compute_projection_points(fitted["points"], fitted["coords"], fitted["labels"])
     if not points:
         return _empty_projection_payload()
 
-    return {"points": points, "variance": variance}
+    return {"points": points, "variance": fitted["variance"]}
+
+
+def _projection_payload_points(
+    client: Any,
+    collection_names: List[str],
+    *,
+    max_points: int,
+) -> Dict[str, Any]:
+    payload_points: Dict[str, Any] = {}
+    for collection_name in collection_names:
+        for page_points in _iter_projection_pages(
+            client,
+            collection_name,
+            with_vectors=False,
+            max_points=max_points,
+        ):
+            for point in page_points:
+                payload_points[_projection_point_key(collection_name, point.id)] = point
+    return payload_points
+
+
+def _collection_point_total(client: Any, collection_names: List[str]) -> int | None:
+    count_points = getattr(client, "count", None)
+    if not callable(count_points):
+        return None
+    total = 0
+    for collection_name in collection_names:
+        try:
+            result = count_points(collection_name=collection_name, exact=True)
+            total += int(getattr(result, "count", result))
+        except Exception:
+            return None
+    return total
+
+
+def _stream_projection(
+    client: Any,
+    collection_names: List[str],
+    *,
+    max_points: int,
+    report: Any,
+) -> Dict[str, Any] | None:
+    """Fit a projection page by page; publishes snapshots through *report*."""
+    root = _root()
+    projector: StreamingProjector | None = None
+    ids: List[str] = []
+    scrolled = 0
+    next_snapshot = _PROJECTION_SNAPSHOT_POINTS
+
+    def snapshot() -> Dict[str, Any]:
+        coords, variance = projector.finish()
+        return {
+            "ids": list(ids),
+            "coords": coords,
+            "variance": variance,
+            "labels": _normalize_cluster_labels(
+                root._kmeans_2d_numpy(coords[:, :2]),
+                len(ids),
+            ),
+        }
+
+    for collection_name in collection_names:
+        for page_points in _iter_projection_pages(
+            client,
+            collection_name,
+            with_vectors=True,
+            max_points=max_points - scrolled,
+        ):
+            scrolled += len(page_points)
+            page_rows = _VectorRows(
+                len(page_points),
+                projector.dims if projector is not None else 0,
+            )
+            page_rows.add(page_points, collection_name)
+            block, kept = page_rows.matrix()
+            if block is not None:
+                if projector is None:
+                    projector = StreamingProjector(block.shape[1])
+                projector.partial_fit(block)
+                ids.extend(point.key for point in kept)
+            report(processed=scrolled)
+            if projector is not None and projector.count >= next_snapshot:
+                report(snapshot=snapshot())
+                next_snapshot *= 2
+        if scrolled >= max_points:
+            break
+
+    if projector is None:
+        return None
+    return snapshot()
+
+
+def _preview_projection_payload(job: Dict[str, Any]) -> Dict[str, object]:
+    snapshot = job.get("snapshot") or {}
+    ids = snapshot.get("ids") or []
+    points: List[Dict[str, object]] = []
+    if ids:
+        points = _compute_projection_points(
+            [types.SimpleNamespace(id=point_id, payload={}) for point_id in ids],
+            snapshot["coords"],
+            snapshot["labels"],
+        )
+    return {
+        "points": points,
+        "variance": snapshot.get("variance") or [0.0, 0.0],
+        "status": "computing",
+        "progress": {"processed": job["processed"], "total": job["total"]},
+    }
+
+
+def _ensure_projection_job(
+    client: Any,
+    collection_names: List[str],
+    *,
+    data_dir: str,
+    scope: str,
+    cache_key: str,
+    marker: str,
+    total: int,
+    max_points: int,
+) -> Dict[str, Any]:
+    job_key = (data_dir, scope, cache_key, marker)
+    job = get_projection_job(job_key)
+    if job is not None and job["status"] != "failed":
+        return job
+
+    def run(report) -> None:
+        fitted = _stream_projection(
+            client,
+            collection_names,
+            max_points=max_points,
+            report=report,
+        )
+        if fitted is None:
+            return
+        store_cached_projection(data_dir, scope, cache_key, marker, **fitted)
+        report(snapshot={**fitted, "complete": True})
+
+    return start_projection_job(
+        job_key,
+        run,
+        total=min(total, max_points),
+        group=(data_dir, scope, cache_key),
+    )
+
+
+def _resolve_projection(
+    client: Any,
+    collection_names: List[str],
+    *,
+    data_dir: str,
+    scope: str,
+    state_tokens: List[str] | None = None,
+    max_points: int | None = None,
+) -> Dict[str, Any]:
+    """Return ``{"marker", "fitted", "job"}`` for the collections.
+
+    ``fitted`` holds ids, coords, variance and labels (plus ``points`` with
+    payloads when it was just computed synchronously) and is ``None`` while
+    a background job is still running or when nothing could be projected.
+    Sets larger than ``_MEMORY_PROJECTION_MAX_POINTS`` (only reachable when
+    *max_points* allows it) are fitted on a background job.
+    """
+    if max_points is None:
+        max_points = _MEMORY_PROJECTION_MAX_POINTS
+    marker = projection_version_marker(
+        client,
+        collection_names,
+        state_tokens=state_tokens or [],
+    )
+    cache_key = "|".join(sorted(collection_names))
+    if max_points > _MEMORY_PROJECTION_MAX_POINTS:
+        # The capped v1 fit and the full streamed fit are different results.
+        cache_key = f"{cache_key}@{max_points}"
+
+    cached = load_cached_projection(data_dir, scope, cache_key, marker)
+    if cached is not None:
+        return {"marker": marker, "fitted": cached, "job": None}
+
+    total = _collection_point_total(client, collection_names)
+    if (
+        max_points > _MEMORY_PROJECTION_MAX_POINTS
+        and total is not None
+        and total > _MEMORY_PROJECTION_MAX_POINTS
+    ):
+        job = _ensure_projection_job(
+            client,
+            collection_names,
+            data_dir=data_dir,
+            scope=scope,
+            cache_key=cache_key,
+            marker=marker,
+            total=total,
+            max_points=max_points,
+        )
+        fitted = job.get("snapshot") if job["status"] == "done" else None
+        return {"marker": marker, "fitted": fitted, "job": job}
+
+    vector_rows = _VectorRows(
+        min(total, _MEMORY_PROJECTION_MAX_POINTS)
+        if total
+        else _MEMORY_PROJECTION_PAGE_SIZE
+    )
+    scrolled = 0
+    for collection_name in collection_names:
+        for page_points in _iter_projection_pages(
+            client,
+            collection_name,
+            max_points=_MEMORY_PROJECTION_MAX_POINTS - scrolled,
+        ):
+            scrolled += len(page_points)
+            vector_rows.add(page_points, collection_name)
+        if scrolled >= _MEMORY_PROJECTION_MAX_POINTS:
+            break
+    fitted = _fit_vector_rows(vector_rows)
+    if fitted is None:
+        return {"marker": marker, "fitted": None, "job": None}
+
+    fitted["ids"] = [point.key for point in fitted["points"]]
+    store_cached_projection(
+        data_dir,
+        scope,
+        cache_key,
+        marker,
+        ids=fitted["ids"],
+        coords=fitted["coords"],
+        variance=fitted["variance"],
+        labels=fitted["labels"],
+    )
+    return {"marker": marker, "fitted": fitted, "job": None}
+
+
+def _cached_vector_payload(
+    client: Any,
+    collection_names: List[str],
+    *,
+    data_dir: str,
+    scope: str,
+    state_tokens: List[str] | None = None,
+    max_points: int | None = None,
+) -> Dict[str, object]:
+    """Build the projection payload, reusing cached coords/labels when the
+    collections have not changed since they were computed.
+
+    While a background fit is running the payload carries
+    ``status: "computing"``, progress and a preview of the points streamed
+    so far.
+    """
+    if max_points is None:
+        max_points = _MEMORY_PROJECTION_MAX_POINTS
+    for attempt in range(2):
+        resolved = _resolve_projection(
+            client,
+            collection_names,
+            data_dir=data_dir,
+            scope=scope,
+            state_tokens=state_tokens,
+            max_points=max_points,
+        )
+        job = resolved["job"]
+        if job is not None and job["status"] != "done":
+            return _preview_projection_payload(job)
+
+        fitted = resolved["fitted"]
+        if fitted is None:
+            return _empty_projection_payload()
+
+        vector_points = fitted.get("points")
+        if vector_points is None:
+            payload_points = _projection_payload_points(
+                client,
+                collection_names,
+                max_points=max_points,
+            )
+            vector_points = [payload_points.get(point_id) for point_id in fitted["ids"]]
+            if not all(vector_points):
+                # Same counts but different points: drop the stale entry
+                # and fit again once.
+                if attempt == 0 and job is None:
+                    invalidate_projection_cache(data_dir, scope)
+                    continue
+                return _empty_projection_payload()
+
+        points = _compute_projection_points(vector_points, fitted["coords"], fitted["labels"])
+        if not points:
+            return _empty_projection_payload()
+        return {"points": points, "variance": fitted["variance"]}
+    return _empty_projection_payload()
+
+
+# ── v2: columnar projection, filtered pages, lazy text ──
+
+
+def _parse_projection_float(value: str | None) -> float | None:
+    if value is None or not value.strip():
+        return None
+    parsed = float(value)
+    if not math.isfinite(parsed):
+        raise ValueError("bounds must be finite")
+    return parsed
+
+
+def _projection_columns(
+    fitted: Dict[str, Any],
+    *,
+    bbox: tuple,
+    clusters: List[int],
+    offset: int,
+    limit: int,
+) -> Dict[str, object]:
+    """Filter *fitted* by bbox/clusters and return one columnar page."""
+    import numpy as np
+
+    ids = fitted.get("ids") or []
+    coords = np.asarray(fitted["coords"], dtype=np.float64)
+    labels = np.asarray(_normalize_cluster_labels(fitted["labels"], len(ids)), dtype=np.int64)
+    if len(ids) == 0 or coords.ndim < 2:
+        return {"ids": [], "x": [], "y": [], "cluster": [], "matched": 0, "next_cursor": None}
+
+    x = coords[: len(ids), 0]
+    y = coords[: len(ids), 1] if coords.shape[1] > 1 else np.zeros(len(ids))
+    mask = np.ones(len(ids), dtype=bool)
+    x_min, x_max, y_min, y_max = bbox
+    if x_min is not None:
+        mask &= x >= x_min
+    if x_max is not None:
+        mask &= x <= x_max
+    if y_min is not None:
+        mask &= y >= y_min
+    if y_max is not None:
+        mask &= y <= y_max
+    if clusters:
+        mask &= np.isin(labels, clusters)
+
+    matched = np.flatnonzero(mask)
+    selected = matched[offset:offset + limit]
+    next_offset = offset + len(selected)
+    return {
+        "ids": [ids[index] for index in selected.tolist()],
+        "x": np.round(x[selected], 5).tolist(),
+        "y": np.round(y[selected], 5).tolist(),
+        "cluster": labels[selected].tolist(),
+        "matched": int(len(matched)),
+        "next_cursor": next_offset if next_offset < len(matched) else None,
+    }
+
+
+def _projection_version(marker: str) -> str:
+    return hashlib.sha1(marker.encode("utf-8")).hexdigest()[:12]
+
+
+def _long_term_collection_names(client: Any) -> List[str]:
+    all_collections = getattr(client.get_collections(), "collections", [])
+    return [
+        collection.name
+        for collection in all_collections
+        if isinstance(getattr(collection, "name", None), str)
+        and collection.name.startswith("long_term")
+    ]
+
+
+def _list_long_term_profiles(data_dir: str) -> Dict[str, object]:
+    profiles_dir = Path(data_dir) / "memory" / "long_term_profiles"
+    profiles: List[Dict[str, object]] = []
+    total_bytes = 0
+    if data_dir and profiles_dir.exists():
+        for path in sorted(profiles_dir.glob("*.json")):
+            try:
+                stat = path.stat()
+                document = json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                continue
+            total_bytes += stat.st_size
+            profiles.append(
+                {
+                    "storage_key": path.stem,
+                    "bytes": stat.st_size,
+                    "updated_at": stat.st_mtime,
+                    "preview": _profile_preview(document),
+                }
+            )
+    return {
+        "profiles": profiles,
+        "profile_count": len(profiles),
+        "profile_total_bytes": total_bytes,
+    }
+
+
+def _retrieve_projection_points(
+    client: Any,
+    collection_names: List[str],
+    point_keys: List[str],
+) -> Dict[str, Any]:
+    """Fetch payloads for v2 projection ids; malformed or unknown ids are skipped."""
+    wanted: Dict[str, Dict[Any, str]] = {name: {} for name in collection_names}
+    for key in point_keys:
+        parsed = _parse_projection_point_key(key)
+        if parsed is not None and parsed[0] in wanted:
+            wanted[parsed[0]][parsed[1]] = key
+
+    found: Dict[str, Any] = {}
+    retrieve = getattr(client, "retrieve", None)
+    for collection_name, ids in wanted.items():
+        if not ids:
+            continue
+        if callable(retrieve):
+            records = retrieve(
+                collection_name=collection_name,
+                ids=list(ids),
+                with_payload=True,
+                with_vectors=False,
+            )
+        else:
+            records = [
+                point
+                for page_points in _iter_projection_pages(
+                    client,
+                    collection_name,
+                    with_vectors=False,
+                    max_points=_long_term_projection_max_points(),
+                )
+                for point in page_points
+                if point.id in ids
+            ]
+        for record in records or []:
+            key = ids.get(record.id)
+            if key is not None:
+                found[key] = record
+    return found
 
 
 @api_blueprint.get("/memory/projection")
@@ -443,13 +1057,34 @@ def memory_projection() -> Response:
             collection_prefix=vector_collection_prefix(tag),
         )
         client = memory_factory._get_or_create_qdrant_client(data_dir)
-        scroll_result = _scroll_projection_points(client, collection_name)
-        if not scroll_result:
-            return jsonify(_empty_projection_payload())
-        return jsonify(_build_vector_payload(scroll_result))
+        if session_vector_layout(state) == SHARED_LAYOUT:
+            collection_name = shared_collection_name(
+                str(state.get("vector_embedding_signature") or "")
+            )
+            client = SessionScopedClient(
+                client,
+                collection_name,
+                session_filter(session_id, tag),
+            )
+        state_tokens: List[str] = []
+        session_state_marker = getattr(memory_factory, "_session_state_marker", None)
+        if callable(session_state_marker):
+            try:
+                state_tokens.append(session_state_marker(data_dir, session_id))
+            except Exception:
+                state_tokens = []
+        return json_response(
+            _cached_vector_payload(
+                client,
+                [collection_name],
+                data_dir=data_dir,
+                scope=session_scope(session_id),
+                state_tokens=state_tokens,
+            )
+        )
     except Exception as exc:
         if _is_projection_collection_missing_error(exc):
-            return jsonify(_empty_projection_payload())
+            return json_response(_empty_projection_payload())
         return jsonify({"error": str(exc)}), 500
 
 
@@ -468,29 +1103,193 @@ def long_term_memory_projection() -> Response:
 
         client = memory_factory._get_or_create_qdrant_client(data_dir)
         profile_payload = _load_long_term_profiles_payload(data_dir)
-        all_collections = getattr(client.get_collections(), "collections", [])
-        long_term_names = [
-            collection.name
-            for collection in all_collections
-            if isinstance(getattr(collection, "name", None), str)
-            and collection.name.startswith("long_term")
-        ]
+        long_term_names = _long_term_collection_names(client)
 
         if not long_term_names:
             payload = _empty_projection_payload()
             payload.update(profile_payload)
-            return jsonify(payload)
-
-        all_scroll: List[Any] = []
-        for collection_name in long_term_names:
-            all_scroll.extend(_scroll_projection_points(client, collection_name))
+            return json_response(payload)
 
-        payload = _build_vector_payload(all_scroll)
+        payload = _cached_vector_payload(
+            client,
+            long_term_names,
+            data_dir=data_dir,
+            scope=LONG_TERM_SCOPE,
+        )
         payload.update(profile_payload)
-        return jsonify(payload)
+        return json_response(payload)
     except Exception as exc:
         if _is_projection_collection_missing_error(exc):
             payload = _empty_projection_payload()
             payload.update(_load_long_term_profiles_payload(""))
-            return jsonify(payload)
+            return json_response(payload)
+        return jsonify({"error": str(exc)}), 500
+
+
+@api_blueprint.get("/memory/long-term/projection/v2")
+def long_term_memory_projection_v2() -> Response:
+    """Columnar long-term projection: ids/x/y/cluster, filtered and paged.
+
+    Query: ``x_min``/``x_max``/``y_min``/``y_max``, ``cluster`` (comma list
+    of 0-based labels), ``limit`` and the ``cursor`` of the previous page.
+    Ids are ``<collection>:<point id>``. Text is fetched separately through ``/memory/long-term/projection/v2/text``
+    and profile documents through ``/memory/long-term/profiles/<key>``.
+    """
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Unauthorized", 401)
+
+    try:
+        bbox = tuple(
+            _parse_projection_float(request.args.get(name))
+            for name in ("x_min", "x_max", "y_min", "y_max")
+        )
+        clusters = [
+            int(item)
+            for item in request.args.get("cluster", "").split(",")
+            if item.strip()
+        ]
+        limit = int(request.args.get("limit") or _PROJECTION_V2_PAGE_SIZE)
+    except ValueError:
+        return root._json_error("invalid_request", "Invalid projection filter", 400)
+    limit = max(1, min(limit, _PROJECTION_V2_MAX_PAGE_SIZE))
+
+    cursor = request.args.get("cursor", "").strip()
+    cursor_version, offset = "", 0
+    if cursor:
+        cursor_version, _, raw_offset = cursor.partition(":")
+        try:
+            offset = max(0, int(raw_offset))
+        except ValueError:
+            return root._json_error("invalid_request", "Invalid cursor", 400)
+
+    try:
+        import memory_factory
+
+        data_dir = memory_factory._normalize_data_dir(memory_factory._data_dir())
+        if not data_dir:
+            return jsonify({"error": "UNCHAIN_DATA_DIR not configured"}), 503
+
+        client = memory_factory._get_or_create_qdrant_client(data_dir)
+        long_term_names = _long_term_collection_names(client)
+        resolved: Dict[str, Any] = {"marker": "", "fitted": None, "job": None}
+        if long_term_names:
+            resolved = _resolve_projection(
+                client,
+                long_term_names,
+                data_dir=data_dir,
+                scope=LONG_TERM_SCOPE,
+                max_points=_long_term_projection_max_points(),
+            )
+    except Exception as exc:
+        if not _is_projection_collection_missing_error(exc):
+            return jsonify({"error": str(exc)}), 500
+        data_dir = ""
+        resolved = {"marker": "", "fitted": None, "job": None}
+
+    version = _projection_version(resolved["marker"])
+    if cursor and cursor_version != version:
+        return root._json_error(
+            "projection_changed",
+            "The projection changed since this cursor was issued",
+            409,
+        )
+
+    job = resolved["job"]
+    fitted = resolved["fitted"]
+    if fitted is None and job is not None:
+        fitted = job.get("snapshot")
+    if fitted is None:
+        fitted = {"ids": [], "coords": [], "variance": [0.0, 0.0], "labels": []}
+
+    page = _projection_columns(
+        fitted,
+        bbox=bbox,
+        clusters=clusters,
+        offset=offset,
+        limit=limit,
+    )
+    next_cursor = page.pop("next_cursor")
+    payload: Dict[str, object] = {
+        **page,
+        "total": len(fitted.get("ids") or []),
+        "variance": fitted["variance"],
+        "version": version,
+        "cursor": f"{version}:{next_cursor}" if next_cursor is not None else None,
+    }
+    if job is not None and job["status"] != "done":
+        payload["status"] = "computing"
+        payload["progress"] = {"processed": job["processed"], "total": job["total"]}
+    if not cursor:
+        payload.update(_list_long_term_profiles(data_dir))
+    return json_response(payload)
+
+
+@api_blueprint.post("/memory/long-term/projection/v2/text")
+def long_term_memory_projection_text() -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Unauthorized", 401)
+
+    body = request.get_json(silent=True) or {}
+    raw_ids = body.get("ids")
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return root._json_error("invalid_request", "ids must be a non-empty array", 400)
+    if len(raw_ids) > _PROJECTION_TEXT_BATCH_MAX:
+        return root._json_error(
+            "invalid_request",
+            f"At most {_PROJECTION_TEXT_BATCH_MAX} ids per request",
+            400,
+        )
+    point_ids = list(dict.fromkeys(str(item) for item in raw_ids))
+
+    try:
+        import memory_factory
+
+        data_dir = memory_factory._normalize_data_dir(memory_factory._data_dir())
+        if not data_dir:
+            return jsonify({"error": "UNCHAIN_DATA_DIR not configured"}), 503
+
+        client = memory_factory._get_or_create_qdrant_client(data_dir)
+        found = _retrieve_projection_points(
+            client,
+            _long_term_collection_names(client),
+            point_ids,
+        )
+    except Exception as exc:
+        if not _is_projection_collection_missing_error(exc):
+            return jsonify({"error": str(exc)}), 500
+        found = {}
+
+    return json_response(
+        {
+            "points": [
+                {"id": point_id, **_projection_text_fields(found[point_id].payload)}
+                for point_id in point_ids
+                if point_id in found
+            ],
+            "missing": [point_id for point_id in point_ids if point_id not in found],
+        }
+    )
+
+
+@api_blueprint.get("/memory/long-term/profiles/<storage_key>")
+def long_term_memory_profile(storage_key: str) -> Response:
+    root = _root()
+    if not root._is_authorized():
+        return root._json_error("unauthorized", "Unauthorized", 401)
+
+    if Path(storage_key).name != storage_key or storage_key.startswith("."):
+        return root._json_error("invalid_request", "Invalid profile key", 400)
+
+    import memory_factory
+
+    data_dir = memory_factory._normalize_data_dir(memory_factory._data_dir())
+    path = Path(data_dir or "") / "memory" / "long_term_profiles" / f"{storage_key}.json"
+    if not data_dir or not path.is_file():
+        return root._json_error("not_found", "Profile not found", 404)
+    try:
+        document = json.loads(path.read_text(encoding="utf-8"))
+    except Exception as exc:
         return jsonify({"error": str(exc)}), 500
+    return json_response({"storage_key": storage_key, "document": document})
@@ -14,6 +14,7 @@ from unchain_adapter import (
     get_toolkit_catalog,
     get_toolkit_catalog_v2,
     get_toolkit_metadata,
+    reload_capability_catalog,
     stream_chat,
     stream_chat_events,
     submit_tool_confirmation,
@@ -23,6 +24,7 @@ from mcp_toolkits import (
     configure_mcp_toolkit,
     delete_mcp_toolkit,
     install_mcp_toolkit,
+    iter_reload_mcp_toolkits,
     list_installed_mcp_toolkits,
     reload_mcp_toolkits,
 )
@@ -77,6 +79,7 @@ __all__ = [
     "get_toolkit_catalog",
     "get_toolkit_catalog_v2",
     "get_toolkit_metadata",
+    "reload_capability_catalog",
     "check_mcp_toolkit_health",
     "configure_mcp_toolkit",
     "configure_mcp_oauth_app",
@@ -86,6 +89,7 @@ __all__ = [
     "get_mcp_oauth_status",
     "handle_mcp_oauth_callback",
     "install_mcp_toolkit",
+    "iter_reload_mcp_toolkits",
     "list_mcp_oauth_apps",
     "list_installed_mcp_toolkits",
     "list_mcp_store_entries",
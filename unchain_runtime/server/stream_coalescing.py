@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator
+
+# Opt-in merging of consecutive text deltas before they become SSE frames.
+#
+# The agent runner pushes one event per model token into a queue. With
+# coalescing enabled, the consumer holds the first delta for up to
+# ``coalesce_ms`` and folds every directly following delta of the same
+# stream into it, so one frame (one json.dumps, one seq, one socket write)
+# carries many tokens. Any other event flushes the pending delta first, so
+# ordering is unchanged.
+
+COALESCIBLE_EVENT_TYPES = frozenset({"token_delta", "workflow_step_delta"})
+DEFAULT_MAX_BATCH_BYTES = 16 * 1024
+MAX_COALESCE_MS = 1000.0
+
+# Keys that identify which stream a delta belongs to. Deltas only merge
+# when all of them match.
+_DELTA_IDENTITY_KEYS = (
+    "type",
+    "run_id",
+    "iteration",
+    "workflow_node_id",
+    "workflow_step_index",
+    "agent_name",
+    "subagent_id",
+    "child_run_id",
+)
+
+
+class EventChannel(queue.Queue):
+    """Runner event queue that can wake an asyncio consumer on ``put``."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._waker: Callable[[], None] | None = None
+        self._waker_lock = threading.Lock()
+
+    def set_waker(self, waker: Callable[[], None] | None) -> None:
+        with self._waker_lock:
+            self._waker = waker
+
+    def put(self, item: object, block: bool = True, timeout: float | None = None) -> None:
+        super().put(item, block, timeout)
+        with self._waker_lock:
+            waker = self._waker
+        if waker is not None:
+            waker()
+
+
+@dataclass(frozen=True)
+class WaitForEvents:
+    """Yielded by a cooperative drain instead of blocking.
+
+    The consumer should wait until *channel* receives an item or *timeout*
+    seconds pass (``None``: no limit), then resume the generator. A marker
+    without a channel is a plain timer.
+    """
+
+    channel: EventChannel | None
+    timeout: float | None = None
+
+
+def _coerce_number(value: object) -> float:
+    if isinstance(value, bool):
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def resolve_coalescing_options(options: Dict[str, object] | None) -> tuple[float, int]:
+    """Return ``(coalesce_ms, max_batch_bytes)``; ``coalesce_ms == 0`` is off."""
+    source = options if isinstance(options, dict) else {}
+    coalesce_ms = min(
+        max(0.0, _coerce_number(source.get("coalesce_ms"))),
+        MAX_COALESCE_MS,
+    )
+    max_batch_bytes = int(_coerce_number(source.get("max_batch_bytes")))
+    if max_batch_bytes <= 0:
+        max_batch_bytes = DEFAULT_MAX_BATCH_BYTES
+    return coalesce_ms, max_batch_bytes
+
+
+def _is_coalescible(item: object) -> bool:
+    return (
+        isinstance(item, dict)
+        and item.get("type") in COALESCIBLE_EVENT_TYPES
+        and isinstance(item.get("delta"), str)
+    )
+
+
+def _same_delta_stream(left: Dict[str, Any], right: Dict[str, Any]) -> bool:
+    return all(left.get(key) == right.get(key) for key in _DELTA_IDENTITY_KEYS)
+
+
+def merge_delta_events(pending: Dict[str, Any], event: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold *event* into *pending*. The merged event keeps the first timestamp
+    and every other field (e.g. ``accumulated_text``) from the newest event."""
+    merged = dict(event)
+    merged["delta"] = f"{pending['delta']}{event['delta']}"
+    if "timestamp" in pending:
+        merged["timestamp"] = pending["timestamp"]
+    return merged
+
+
+def drain_event_queue(
+    event_queue: "queue.Queue[object]",
+    done_marker: object,
+    *,
+    coalesce_ms: float = 0.0,
+    max_batch_bytes: int = DEFAULT_MAX_BATCH_BYTES,
+    clock: Callable[[], float] = time.monotonic,
+    sleep: Callable[[float], None] = time.sleep,
+    cooperative: bool = False,
+) -> Iterator[object]:
+    """Yield items from *event_queue* until *done_marker* (not yielded).
+
+    With ``coalesce_ms > 0`` consecutive deltas of the same stream arriving
+    within the window of the first one are merged, up to ``max_batch_bytes``
+    of delta text per frame. Other events arriving inside the window are
+    held back by at most ``coalesce_ms``.
+
+    With ``cooperative=True`` (requires an ``EventChannel``) the generator
+    never blocks; it yields ``WaitForEvents`` markers where it would wait.
+    """
+    window = max(0.0, float(coalesce_ms)) / 1000.0
+    carry: object = None
+    has_carry = False
+
+    while True:
+        if has_carry:
+            item, carry, has_carry = carry, None, False
+        elif cooperative:
+            try:
+                item = event_queue.get_nowait()
+            except queue.Empty:
+                yield WaitForEvents(event_queue)
+                continue
+        else:
+            item = event_queue.get()
+        if item is done_marker:
+            return
+        if window <= 0 or not _is_coalescible(item):
+            yield item
+            continue
+
+        pending = item
+        batch_bytes = len(pending["delta"].encode("utf-8"))
+        deadline = clock() + window
+        while batch_bytes < max_batch_bytes:
+            try:
+                following = event_queue.get_nowait()
+            except queue.Empty:
+                # Sleep out the window once instead of waking per token.
+                remaining = deadline - clock()
+                if remaining <= 0:
+                    break
+                if cooperative:
+                    yield WaitForEvents(None, remaining)
+                else:
+                    sleep(remaining)
+                continue
+            if _is_coalescible(following) and _same_delta_stream(pending, following):
+                pending = merge_delta_events(pending, following)
+                batch_bytes += len(following["delta"].encode("utf-8"))
+                continue
+            carry, has_carry = following, True
+            break
+        yield pending
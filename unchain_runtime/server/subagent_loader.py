@@ -393,6 +393,44 @@ def _collect_main_tool_names(toolkits: tuple[Any, ...]) -> set[str]:
     return names
 
 
+def scan_templates(
+    user_dir: Path,
+    workspace_dir: Path | None,
+) -> tuple[ParsedTemplate, ...]:
+    """Parse user_dir + workspace_dir and apply precedence. Parse results do
+    not depend on the main agent's toolkits, so callers may reuse them across
+    sessions while ``templates_fingerprint`` is unchanged."""
+    parsed: list[ParsedTemplate] = []
+    parsed.extend(_scan_dir(user_dir, "user"))
+    if workspace_dir is not None:
+        parsed.extend(_scan_dir(workspace_dir, "workspace"))
+    return tuple(_dedupe_by_precedence(parsed))
+
+
+def templates_fingerprint(
+    user_dir: Path,
+    workspace_dir: Path | None,
+) -> tuple[tuple[str, int, int], ...]:
+    """Cheap (path, mtime_ns, size) listing of every template source file."""
+    entries: list[tuple[str, int, int]] = []
+    for directory in (user_dir, workspace_dir):
+        if directory is None:
+            continue
+        try:
+            paths = sorted(directory.iterdir())
+        except OSError:
+            continue
+        for path in paths:
+            if path.suffix not in (".soul", ".skeleton"):
+                continue
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(entries)
+
+
 def load_templates(
     *,
     toolkits: tuple[Any, ...],
@@ -407,21 +445,23 @@ def load_templates(
     PoliciesModule: Any,
     SubagentTemplate: Any,
     optimizer_module_factory: Any | None = None,
+    parsed_templates: tuple[ParsedTemplate, ...] | None = None,
 ) -> tuple[Any, ...]:
     """Scan user_dir + workspace_dir, parse files, validate, apply precedence,
     intersect allowed_tools against main agent's tools, and return a tuple of
     ready-to-register SubagentTemplate instances.
 
+    ``parsed_templates`` skips the scan with a previous ``scan_templates``
+    result.
+
     All failure modes (missing dirs, parse errors, validation failures, empty
     tool intersections) result in log warnings + skipping — never raises."""
     main_tool_names = _collect_main_tool_names(toolkits)
 
-    parsed: list[ParsedTemplate] = []
-    parsed.extend(_scan_dir(user_dir, "user"))
-    if workspace_dir is not None:
-        parsed.extend(_scan_dir(workspace_dir, "workspace"))
-
-    survivors = _dedupe_by_precedence(parsed)
+    if parsed_templates is None:
+        survivors = scan_templates(user_dir, workspace_dir)
+    else:
+        survivors = parsed_templates
 
     templates: list[Any] = []
     for tpl in survivors:
@@ -9,6 +9,8 @@ import json
 import logging
 from pathlib import Path
 
+from agent_blueprint_cache import invalidate_agent_blueprints
+
 logger = logging.getLogger(__name__)
 
 
@@ -141,6 +143,7 @@ def ensure_seeds_written(user_dir: Path) -> None:
         logger.info(
             "[subagent_seeds] wrote default Explore.skeleton to %s", target
         )
+        invalidate_agent_blueprints()
     except OSError as exc:
         logger.warning(
             "[subagent_seeds] failed to write %s: %s", target, exc
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from flask import Flask, Response, stream_with_context
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import app as miso_app  # noqa: E402
+import asgi_server  # noqa: E402
+import route_chat  # noqa: E402
+import routes as miso_routes  # noqa: E402
+from stream_coalescing import EventChannel, drain_event_queue  # noqa: E402
+
+
+def _scope(method: str, path: str, body: bytes = b"", query: bytes = b"") -> dict:
+    return {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "http_version": "1.1",
+        "scheme": "http",
+        "server": ("127.0.0.1", 5879),
+        "client": ("127.0.0.1", 50000),
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+
+
+async def _call(asgi_app, scope, body=b"", *, disconnect_when=None):
+    sent = []
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        if disconnect_when is None:
+            await asyncio.Event().wait()
+        while not disconnect_when():
+            await asyncio.sleep(0.01)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    await asyncio.wait_for(asgi_app(scope, receive, send), timeout=5)
+    return sent
+
+
+def _frames(sent) -> list:
+    text = b"".join(item.get("body", b"") for item in sent[1:]).decode()
+    frames = []
+    for block in text.split("\n\n"):
+        for line in block.splitlines():
+            if line.startswith("data:"):
+                frames.append(json.loads(line.split(":", 1)[1]))
+    return frames
+
+
+class AsgiServerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.asgi_app = asgi_server.UnchainAsgiApp(miso_app.create_app(), wsgi_threads=4)
+
+    def tearDown(self) -> None:
+        self.asgi_app.close()
+
+    def test_flask_routes_are_served_through_wsgi_bridge(self) -> None:
+        sent = asyncio.run(_call(self.asgi_app, _scope("GET", "/health")))
+
+        self.assertEqual(sent[0]["status"], 200)
+        body = b"".join(item.get("body", b"") for item in sent[1:])
+        self.assertEqual(json.loads(body)["status"], "ok")
+
+    def test_chat_stream_v2_runs_cooperatively_on_the_event_loop(self) -> None:
+        calls = {}
+
+        def fake_stream_chat_events(**kwargs):
+            calls.update(kwargs)
+            channel = EventChannel()
+            done = object()
+
+            def produce() -> None:
+                for index in range(3):
+                    channel.put(
+                        {
+                            "type": "token_delta",
+                            "run_id": "run-1",
+                            "iteration": 0,
+                            "timestamp": 1700000000.0,
+                            "delta": f"t{index}",
+                        }
+                    )
+                channel.put(done)
+
+            threading.Timer(0.05, produce).start()
+            yield from drain_event_queue(channel, done, cooperative=kwargs["cooperative"])
+
+        body = json.dumps({"message": "hello", "options": {"modelId": "openai:gpt-5"}}).encode()
+        with mock.patch.object(
+            miso_routes,
+            "stream_chat_events",
+            side_effect=fake_stream_chat_events,
+        ):
+            sent = asyncio.run(
+                _call(self.asgi_app, _scope("POST", "/chat/stream/v2", body), body)
+            )
+
+        self.assertTrue(calls["cooperative"])
+        self.assertEqual(sent[0]["status"], 200)
+        frames = _frames(sent)
+        self.assertEqual(
+            [frame["type"] for frame in frames],
+            ["stream_started", "token_delta", "token_delta", "token_delta", "done"],
+        )
+        self.assertEqual([frame["seq"] for frame in frames], [1, 2, 3, 4, 5])
+        self.assertFalse(sent[-1]["more_body"])
+
+    def test_client_disconnect_cancels_pending_confirmations(self) -> None:
+        captured = {}
+
+        def fake_stream_chat_events(**kwargs):
+            captured["cancel_event"] = kwargs["cancel_event"]
+            channel = EventChannel()
+            yield from drain_event_queue(channel, object(), cooperative=True)
+
+        body = json.dumps({"message": "hello"}).encode()
+        with mock.patch.object(
+            miso_routes,
+            "stream_chat_events",
+            side_effect=fake_stream_chat_events,
+        ):
+            asyncio.run(
+                _call(
+                    self.asgi_app,
+                    _scope("POST", "/chat/stream/v2", body),
+                    body,
+                    disconnect_when=lambda: "cancel_event" in captured,
+                )
+            )
+
+        self.assertTrue(captured["cancel_event"].is_set())
+
+    def test_disconnect_cancels_and_closes_a_blocked_wsgi_stream(self) -> None:
+        app = Flask(__name__)
+        blocked = threading.Event()
+        closed = threading.Event()
+        state = {}
+
+        @app.get("/blocked")
+        def blocked_stream():
+            cancel_event = route_chat._stream_cancel_event()
+
+            def frames():
+                try:
+                    yield "data: first\n\n"
+                    blocked.set()
+                    state["cancelled"] = cancel_event.wait(5)
+                    yield "data: late\n\n"
+                    yield "data: never\n\n"
+                finally:
+                    closed.set()
+
+            return Response(stream_with_context(frames()), mimetype="text/event-stream")
+
+        bridge = asgi_server.UnchainAsgiApp(app, wsgi_threads=2)
+        try:
+            sent = asyncio.run(
+                _call(bridge, _scope("GET", "/blocked"), disconnect_when=blocked.is_set)
+            )
+        finally:
+            bridge.close()
+
+        self.assertTrue(state["cancelled"])
+        self.assertTrue(closed.is_set())
+        body = b"".join(item.get("body", b"") for item in sent[1:])
+        self.assertEqual(body, b"data: first\n\n")
+
+    def test_chat_stream_v2_validation_errors_use_flask_responses(self) -> None:
+        body = json.dumps({"message": ""}).encode()
+        sent = asyncio.run(_call(self.asgi_app, _scope("POST", "/chat/stream/v2", body), body))
+
+        self.assertEqual(sent[0]["status"], 400)
+        self.assertEqual(json.loads(sent[1]["body"])["error"]["code"], "invalid_request")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,200 @@
+import json
+import sys
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import app as miso_app  # noqa: E402
+import chat_run_registry  # noqa: E402
+import routes as miso_routes  # noqa: E402
+
+
+def _frame_payloads(payload_text: str):
+    frames = []
+    for block in payload_text.split("\n\n"):
+        event_name = ""
+        event_id = ""
+        data_text = ""
+        for line in block.splitlines():
+            if line.startswith("event:"):
+                event_name = line.split(":", 1)[1].strip()
+            elif line.startswith("id:"):
+                event_id = line.split(":", 1)[1].strip()
+            elif line.startswith("data:"):
+                data_text = line.split(":", 1)[1].strip()
+        if event_name and data_text:
+            frames.append((event_name, event_id, json.loads(data_text)))
+    return frames
+
+
+class ChatRunRegistryTests(unittest.TestCase):
+    def test_reattach_replays_frames_after_seq(self) -> None:
+        release = threading.Event()
+
+        def frames(_run):
+            for seq in range(1, 4):
+                yield seq, f"event: frame\ndata: {seq}\n\n"
+            release.wait(timeout=5)
+            yield 4, "event: frame\ndata: 4\n\n"
+
+        run = chat_run_registry.start_chat_run("thread-replay", frames, resumable=True)
+        first = chat_run_registry.iter_chat_run_frames(run, keepalive_seconds=0.05)
+        self.assertIn("data: 1", next(first))
+        first.close()
+
+        self.assertFalse(run.cancelled)
+        release.set()
+        resumed = list(chat_run_registry.iter_chat_run_frames(run, after_seq=2))
+        self.assertEqual(
+            [text for text in resumed if not text.startswith(":")],
+            ["event: frame\ndata: 3\n\n", "event: frame\ndata: 4\n\n"],
+        )
+
+    def test_disconnect_cancels_non_resumable_run(self) -> None:
+        cancelled = threading.Event()
+        stop = threading.Event()
+
+        def frames(run):
+            yield 1, "event: frame\ndata: 1\n\n"
+            while not run.cancelled and not stop.is_set():
+                stop.wait(0.01)
+
+        run = chat_run_registry.start_chat_run(
+            "thread-abort",
+            frames,
+            resumable=False,
+            on_cancel=cancelled.set,
+        )
+        stream = chat_run_registry.iter_chat_run_frames(run)
+        next(stream)
+        stream.close()
+        stop.set()
+
+        self.assertTrue(cancelled.wait(timeout=1))
+        self.assertTrue(run.cancelled)
+
+    def test_evicted_frames_report_replay_gap(self) -> None:
+        with mock.patch.dict(
+            "os.environ",
+            {"UNCHAIN_CHAT_RESUME_BUFFER_FRAMES": "2", "UNCHAIN_CHAT_RESUME_SPILL": "0"},
+        ):
+            run = chat_run_registry.ChatRun("thread-gap", resumable=True)
+        for seq in range(1, 5):
+            run.append(seq, f"frame-{seq}")
+        run.finish()
+
+        frames = list(chat_run_registry.iter_chat_run_frames(run, after_seq=0))
+
+        self.assertTrue(frames[0].startswith("event: replay_gap"))
+        self.assertIn('"resumed_at_seq": 3', frames[0])
+        self.assertEqual(frames[1:], ["frame-3", "frame-4"])
+
+    def test_spilled_frames_are_replayed_from_disk(self) -> None:
+        import tempfile
+
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch.dict(
+            "os.environ",
+            {
+                "UNCHAIN_CHAT_RESUME_BUFFER_FRAMES": "2",
+                "UNCHAIN_CHAT_RESUME_SPILL": "1",
+                "UNCHAIN_DATA_DIR": tmp_dir,
+            },
+        ):
+            run = chat_run_registry.ChatRun("thread-spill", resumable=True)
+            for seq in range(1, 6):
+                run.append(seq, f"frame-{seq}")
+            run.finish()
+
+            frames = list(chat_run_registry.iter_chat_run_frames(run, after_seq=1))
+
+        self.assertEqual(frames, ["frame-2", "frame-3", "frame-4", "frame-5"])
+
+    def test_sweep_cancels_unattended_runs_after_idle_ttl(self) -> None:
+        run = chat_run_registry.ChatRun("thread-idle", resumable=True, now_fn=lambda: 100.0)
+        with mock.patch.dict("os.environ", {"UNCHAIN_CHAT_RESUME_IDLE_SECONDS": "30"}):
+            self.assertFalse(run.is_abandoned(120.0))
+            self.assertTrue(run.is_abandoned(131.0))
+
+
+class ChatStreamResumeRouteTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = miso_app.create_app().test_client()
+
+    def test_resumable_v2_stream_can_be_replayed_with_last_event_id(self) -> None:
+        def fake_stream_chat_events(**_kwargs):
+            for index in range(3):
+                yield {
+                    "type": "token_delta",
+                    "run_id": "run-1",
+                    "iteration": 0,
+                    "timestamp": 1700000000.0,
+                    "delta": f"t{index}",
+                }
+
+        with mock.patch.object(
+            miso_routes,
+            "stream_chat_events",
+            side_effect=fake_stream_chat_events,
+        ):
+            response = self.client.post(
+                "/chat/stream/v2",
+                json={
+                    "message": "hello",
+                    "threadId": "thread-route-resume",
+                    "resumable": True,
+                    "options": {"modelId": "openai:gpt-5"},
+                },
+            )
+            frames = _frame_payloads(response.get_data(as_text=True))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([event_id for _name, event_id, _data in frames], ["1", "2", "3", "4", "5"])
+        self.assertEqual(
+            [data["seq"] for _name, _event_id, data in frames],
+            [1, 2, 3, 4, 5],
+        )
+
+        resumed = self.client.get(
+            "/chat/stream/v2/resume?thread_id=thread-route-resume",
+            headers={"Last-Event-ID": "3"},
+        )
+        resumed_frames = _frame_payloads(resumed.get_data(as_text=True))
+
+        self.assertEqual(resumed.status_code, 200)
+        self.assertEqual([data["seq"] for _n, _i, data in resumed_frames], [4, 5])
+        self.assertEqual(resumed_frames[-1][2]["type"], "done")
+
+    def test_resume_unknown_thread_returns_404(self) -> None:
+        response = self.client.get("/chat/stream/v2/resume?thread_id=missing-thread")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_cancel_route_cancels_active_run(self) -> None:
+        stop = threading.Event()
+
+        def frames(run):
+            yield 1, "event: frame\ndata: {}\n\n"
+            while not run.cancelled and not stop.is_set():
+                stop.wait(0.01)
+
+        run = chat_run_registry.start_chat_run("thread-route-cancel", frames, resumable=True)
+        try:
+            response = self.client.post(
+                "/chat/stream/v2/cancel",
+                json={"threadId": "thread-route-cancel"},
+            )
+        finally:
+            stop.set()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get_json()["cancelled"])
+        self.assertTrue(run.cancelled)
+
+
+if __name__ == "__main__":
+    unittest.main()
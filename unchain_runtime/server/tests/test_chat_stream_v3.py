@@ -1,4 +1,5 @@
 import json
+import queue
 import sys
 import unittest
 from pathlib import Path
@@ -10,6 +11,7 @@ if str(SERVER_ROOT) not in sys.path:
 
 import app as miso_app  # noqa: E402
 import routes as miso_routes  # noqa: E402
+import stream_coalescing  # noqa: E402
 
 
 def _parse_sse_blocks(payload_text: str) -> list[tuple[str, dict]]:
@@ -188,3 +190,72 @@ class ChatStreamV3RouteTests(unittest.TestCase):
         failed = next(event for event in runtime_events if event["type"] == "run.failed")
         self.assertEqual(failed["payload"]["error"]["message"], "boom")
         self.assertEqual(failed["payload"]["error"]["code"], "stream_failed")
+
+
+class StreamCoalescingTests(unittest.TestCase):
+    def _drain(self, items, **kwargs):
+        event_queue: "queue.Queue[object]" = queue.Queue()
+        done = object()
+        for item in items:
+            event_queue.put(item)
+        event_queue.put(done)
+        return list(stream_coalescing.drain_event_queue(event_queue, done, **kwargs))
+
+    def _delta(self, text, **extra):
+        return {"type": "token_delta", "run_id": "run-1", "iteration": 0, "delta": text, **extra}
+
+    def test_disabled_passes_events_through(self) -> None:
+        items = [self._delta("a"), self._delta("b")]
+        self.assertEqual(self._drain(items), items)
+
+    def test_merges_consecutive_deltas_and_keeps_order(self) -> None:
+        tool_call = {"type": "tool_call", "run_id": "run-1", "iteration": 0}
+        items = [
+            self._delta("he", timestamp=1.0),
+            self._delta("llo", timestamp=2.0, accumulated_text="hello"),
+            tool_call,
+            self._delta("!", timestamp=3.0),
+        ]
+
+        drained = self._drain(items, coalesce_ms=50)
+
+        self.assertEqual([item["type"] for item in drained], ["token_delta", "tool_call", "token_delta"])
+        self.assertEqual(drained[0]["delta"], "hello")
+        self.assertEqual(drained[0]["timestamp"], 1.0)
+        self.assertEqual(drained[0]["accumulated_text"], "hello")
+        self.assertIs(drained[1], tool_call)
+        self.assertEqual(drained[2]["delta"], "!")
+
+    def test_does_not_merge_across_iterations_or_workflow_steps(self) -> None:
+        items = [
+            self._delta("a"),
+            self._delta("b", iteration=1),
+            {"type": "workflow_step_delta", "run_id": "wf", "workflow_step_index": 0, "delta": "x"},
+            {"type": "workflow_step_delta", "run_id": "wf", "workflow_step_index": 0, "delta": "y"},
+            {"type": "workflow_step_delta", "run_id": "wf", "workflow_step_index": 1, "delta": "z"},
+        ]
+
+        drained = self._drain(items, coalesce_ms=50)
+
+        self.assertEqual([item["delta"] for item in drained], ["a", "b", "xy", "z"])
+
+    def test_max_batch_bytes_caps_frame_size(self) -> None:
+        items = [self._delta("abcd") for _ in range(5)]
+
+        drained = self._drain(items, coalesce_ms=50, max_batch_bytes=8)
+
+        self.assertEqual([item["delta"] for item in drained], ["abcdabcd", "abcdabcd", "abcd"])
+
+    def test_resolve_options_defaults_and_clamps(self) -> None:
+        self.assertEqual(
+            stream_coalescing.resolve_coalescing_options({}),
+            (0.0, stream_coalescing.DEFAULT_MAX_BATCH_BYTES),
+        )
+        self.assertEqual(
+            stream_coalescing.resolve_coalescing_options({"coalesce_ms": "20", "max_batch_bytes": 512}),
+            (20.0, 512),
+        )
+        self.assertEqual(
+            stream_coalescing.resolve_coalescing_options({"coalesce_ms": 10_000})[0],
+            stream_coalescing.MAX_COALESCE_MS,
+        )
@@ -0,0 +1,88 @@
+import dataclasses
+import json
+import sys
+import unittest
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import json_codec  # noqa: E402
+
+
+class JsonCodecTests(unittest.TestCase):
+    def _backends(self):
+        backends = ["stdlib"]
+        if json_codec._orjson is not None:
+            backends.append("")
+        return backends
+
+    def test_numpy_values_encode_natively_on_every_backend(self) -> None:
+        payload = {
+            "coords": np.arange(6, dtype=np.float32).reshape(2, 3),
+            "variance": np.float64(0.25),
+            "count": np.int64(3),
+            "text": "héllo",
+        }
+        for backend in self._backends():
+            with self.subTest(backend=backend or "auto"), mock.patch.dict(
+                "os.environ", {"UNCHAIN_JSON_BACKEND": backend}
+            ):
+                decoded = json.loads(json_codec.dumps_bytes(payload))
+                self.assertEqual(decoded["coords"], [[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]])
+                self.assertEqual(decoded["variance"], 0.25)
+                self.assertEqual(decoded["count"], 3)
+                self.assertEqual(decoded["text"], "héllo")
+
+    def test_unknown_objects_fall_back_to_str(self) -> None:
+        marker = object()
+        for backend in self._backends():
+            with self.subTest(backend=backend or "auto"), mock.patch.dict(
+                "os.environ", {"UNCHAIN_JSON_BACKEND": backend}
+            ):
+                self.assertEqual(json.loads(json_codec.dumps_text({"x": marker})), {"x": str(marker)})
+
+    def test_stdlib_backend_keeps_legacy_wire_format(self) -> None:
+        with mock.patch.dict("os.environ", {"UNCHAIN_JSON_BACKEND": "stdlib"}):
+            text = json_codec.sse_event_text("frame", {"type": "done", "text": "ü"})
+
+        self.assertEqual(text, 'event: frame\ndata: {"type": "done", "text": "ü"}\n\n')
+
+
+    def test_json_response_matches_jsonify_output(self) -> None:
+        from flask import Flask, jsonify
+
+        @dataclasses.dataclass
+        class Point:
+            x: int
+            y: int
+
+        payload = {
+            "zeta": 1,
+            "alpha": {"b": 2, "a": 1},
+            "when": datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc),
+            "day": date(2024, 5, 2),
+            "amount": Decimal("1.50"),
+            "id": uuid.UUID(int=7),
+            "point": Point(1, 2),
+        }
+        with Flask(__name__).app_context():
+            expected = jsonify(payload).get_data()
+        for backend in self._backends():
+            with self.subTest(backend=backend or "auto"), mock.patch.dict(
+                "os.environ", {"UNCHAIN_JSON_BACKEND": backend}
+            ):
+                body = json_codec.json_response(payload).get_data()
+                self.assertEqual(json.loads(body), json.loads(expected))
+                self.assertEqual(list(json.loads(body)), sorted(payload))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import mcp_json_store  # noqa: E402
+from mcp_json_store import JsonDocumentStore  # noqa: E402
+
+
+def _normalize(raw):
+    if not isinstance(raw, dict) or not isinstance(raw.get("items"), list):
+        return None
+    return {"version": 1, "items": [item for item in raw["items"] if isinstance(item, dict)]}
+
+
+def _store(**kwargs):
+    return JsonDocumentStore(
+        empty=lambda: {"version": 1, "items": []},
+        normalize=_normalize,
+        index=lambda document: {item["id"]: item for item in document["items"]},
+        **kwargs,
+    )
+
+
+class JsonDocumentStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "items.json"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_reads_are_served_from_cache_until_the_file_changes(self):
+        store = _store()
+        store.write(self.path, {"version": 1, "items": [{"id": "a", "n": 1}]})
+
+        with mock.patch.object(mcp_json_store.json, "loads", wraps=json.loads) as loads:
+            self.assertEqual(store.lookup(self.path, "a")["n"], 1)
+            self.assertEqual(store.snapshot(self.path)["items"][0]["id"], "a")
+            self.assertEqual(loads.call_count, 0)
+
+            self.path.write_text(json.dumps({"items": [{"id": "b", "n": 22}]}))
+
+            self.assertIsNone(store.lookup(self.path, "a"))
+            self.assertEqual(store.lookup(self.path, "b")["n"], 22)
+            self.assertEqual(loads.call_count, 1)
+
+        copy = store.read(self.path)
+        copy["items"].append({"id": "c"})
+        self.assertIsNone(store.lookup(self.path, "c"))
+
+    def test_missing_or_corrupt_files_read_as_empty(self):
+        store = _store()
+        self.assertEqual(store.snapshot(self.path), {"version": 1, "items": []})
+
+        self.path.write_text("{not json")
+
+        self.assertEqual(store.read(self.path), {"version": 1, "items": []})
+
+    def test_writes_are_atomic_and_private_when_requested(self):
+        store = _store(private=True)
+        store.write(self.path, {"version": 1, "items": [{"id": "a"}]})
+
+        self.assertEqual(json.loads(self.path.read_text())["items"], [{"id": "a"}])
+        self.assertEqual(os.listdir(self.tmpdir.name), ["items.json"])
+        if os.name == "posix":
+            self.assertEqual(self.path.stat().st_mode & 0o777, 0o600)
+
+    def test_concurrent_batched_updates_are_not_lost(self):
+        store = _store()
+
+        def add_many(prefix):
+            for number in range(20):
+                store.update(
+                    self.path,
+                    lambda document, key=f"{prefix}{number}": document["items"].append({"id": key}),
+                )
+
+        threads = [threading.Thread(target=add_many, args=(prefix,)) for prefix in "wxyz"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(store.snapshot(self.path)["items"]), 80)
+        self.assertEqual(len(json.loads(self.path.read_text())["items"]), 80)
+
+
+if __name__ == "__main__":
+    unittest.main()
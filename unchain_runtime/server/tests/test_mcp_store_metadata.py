@@ -1,6 +1,9 @@
 import json
+import os
 import sys
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
 from unittest import mock
@@ -10,9 +13,11 @@ if str(SERVER_ROOT) not in sys.path:
     sys.path.insert(0, str(SERVER_ROOT))
 
 import app as miso_app  # noqa: E402
+import mcp_store_metadata  # noqa: E402
 import routes as miso_routes  # noqa: E402
 from mcp_store_metadata import (  # noqa: E402
     McpStoreMetadataError,
+    McpStoreMetadataNotModified,
     list_mcp_store_metadata,
     reload_mcp_store_metadata,
 )
@@ -115,6 +120,161 @@ class McpStoreMetadataTests(unittest.TestCase):
         self.assertEqual(record["metadata"]["stars"], 1234)
         self.assertIn("network down", record["lastError"])
 
+    def test_icons_are_content_addressed_and_304_keeps_cached_record(self):
+        def tagged_fetcher(url, headers, timeout):
+            self.assertNotIn("If-None-Match", headers)
+            return mcp_store_metadata._JsonResponse(
+                self._json_fetcher(url, headers, timeout),
+                {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+            )
+
+        reload_mcp_store_metadata(
+            entry_id="browser.playwright",
+            data_dir=self.data_dir,
+            now_fn=lambda: 1000.0,
+            http_json_fetcher=tagged_fetcher,
+            icon_fetcher=self._icon_fetcher,
+        )
+
+        cache_text = (self.data_dir / "mcp_store_metadata_cache.json").read_text()
+        self.assertNotIn("<svg></svg>", cache_text)
+        icon_files = list((self.data_dir / "mcp_store_icons").iterdir())
+        self.assertEqual(len(icon_files), 1)
+        self.assertEqual(icon_files[0].read_bytes(), b"<svg></svg>")
+
+        def not_modified(url, headers, timeout):
+            self.assertEqual(headers["If-None-Match"], '"v1"')
+            self.assertEqual(headers["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+            raise McpStoreMetadataNotModified()
+
+        def no_icon_fetch(url, timeout, max_bytes):
+            raise AssertionError("icon must not be refetched")
+
+        result = reload_mcp_store_metadata(
+            entry_id="browser.playwright",
+            data_dir=self.data_dir,
+            now_fn=lambda: 2000.0,
+            http_json_fetcher=not_modified,
+            icon_fetcher=no_icon_fetch,
+        )
+
+        record = result["entries"][0]
+        self.assertEqual(record["status"], "cached")
+        self.assertEqual(record["metadata"]["stars"], 1234)
+        self.assertEqual(record["lastFetchedAt"], 2000.0)
+        self.assertEqual(record["expiresAt"], 2000.0 + 86400.0)
+        self.assertEqual(record["icon"]["content"], "<svg></svg>")
+
+    def test_full_reload_fetches_concurrently_and_skips_fresh_entries(self):
+        lock = threading.Lock()
+        state = {"active": 0, "peak": 0, "calls": 0}
+
+        def slow_fetcher(url, headers, timeout):
+            with lock:
+                state["active"] += 1
+                state["calls"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            return {"description": url}
+
+        with mock.patch.dict(
+            os.environ,
+            {
+                "UNCHAIN_MCP_METADATA_HOST_CONCURRENCY": "3",
+                "UNCHAIN_MCP_METADATA_HOST_INTERVAL_SECONDS": "0",
+            },
+        ):
+            first = reload_mcp_store_metadata(
+                data_dir=self.data_dir,
+                now_fn=lambda: 1000.0,
+                http_json_fetcher=slow_fetcher,
+                icon_fetcher=self._icon_fetcher,
+            )
+            fetched = state["calls"]
+            cached = reload_mcp_store_metadata(
+                data_dir=self.data_dir,
+                now_fn=lambda: 5000.0,
+                http_json_fetcher=slow_fetcher,
+                icon_fetcher=self._icon_fetcher,
+            )
+            self.assertEqual(state["calls"], fetched)
+            reload_mcp_store_metadata(
+                force=True,
+                data_dir=self.data_dir,
+                now_fn=lambda: 5000.0,
+                http_json_fetcher=slow_fetcher,
+                icon_fetcher=self._icon_fetcher,
+            )
+
+        self.assertGreater(fetched, 3)
+        self.assertEqual(first["count"], fetched)
+        self.assertEqual(state["peak"], 3)
+        self.assertEqual(cached["count"], fetched)
+        self.assertTrue(all(entry["lastFetchedAt"] == 1000.0 for entry in cached["entries"]))
+        self.assertEqual(state["calls"], 2 * fetched)
+
+    def test_concurrent_reload_does_not_prune_an_icon_not_yet_stored(self):
+        other_entry_id = next(
+            entry["entry_id"]
+            for entry in mcp_store_metadata._entries_with_metadata(None, data_dir=self.data_dir)
+            if entry["entry_id"] != "browser.playwright"
+        )
+        icons_dir = self.data_dir / "mcp_store_icons"
+        icons_dir.mkdir(parents=True)
+        (icons_dir / "orphan.svg").write_bytes(b"<svg/>")
+        icon_written = threading.Event()
+        other_done = threading.Event()
+        write_icon = mcp_store_metadata._file_icon_payload
+        results = {}
+
+        def icon_then_block(*args):
+            icon = write_icon(*args)
+            if threading.current_thread() is first:
+                icon_written.set()
+                other_done.wait(5)
+            return icon
+
+        first = threading.Thread(
+            target=lambda: results.update(
+                reload_mcp_store_metadata(
+                    entry_id="browser.playwright",
+                    data_dir=self.data_dir,
+                    now_fn=lambda: 1000.0,
+                    http_json_fetcher=self._json_fetcher,
+                    icon_fetcher=self._icon_fetcher,
+                )
+            ),
+        )
+        with mock.patch.object(mcp_store_metadata, "_file_icon_payload", icon_then_block):
+            first.start()
+            self.assertTrue(icon_written.wait(5))
+            reload_mcp_store_metadata(
+                entry_id=other_entry_id,
+                data_dir=self.data_dir,
+                now_fn=lambda: 1000.0,
+                http_json_fetcher=lambda url, headers, timeout: {},
+                icon_fetcher=lambda url, timeout, max_bytes: {},
+            )
+            self.assertEqual(len(list(icons_dir.iterdir())), 2)
+            other_done.set()
+            first.join(5)
+
+        # the last reload to finish prunes, against a store holding both
+        self.assertEqual(results["entries"][0]["icon"]["content"], "<svg></svg>")
+        self.assertEqual(len(list(icons_dir.iterdir())), 1)
+        self.assertFalse((icons_dir / "orphan.svg").exists())
+
+    def test_icon_content_cache_is_bounded(self):
+        with mock.patch.object(mcp_store_metadata, "ICON_CACHE_MAX_CHARS", 10):
+            for digest in ("a", "b", "c"):
+                mcp_store_metadata._cache_icon_content(digest, "xxxx")
+
+            self.assertIsNone(mcp_store_metadata._cached_icon_content("a"))
+            self.assertEqual(mcp_store_metadata._cached_icon_content("c"), "xxxx")
+            self.assertLessEqual(mcp_store_metadata._icon_cache_chars, 10)
+
     def test_reload_missing_entry_raises_stable_error(self):
         with self.assertRaises(McpStoreMetadataError) as ctx:
             reload_mcp_store_metadata(
@@ -1,6 +1,8 @@
 import json
+import os
 import sys
 import tempfile
+import threading
 import unittest
 from pathlib import Path
 from unittest import mock
@@ -14,6 +16,8 @@ if str(TESTS_ROOT) not in sys.path:
     sys.path.insert(0, str(TESTS_ROOT))
 
 import app as miso_app  # noqa: E402
+import mcp_health_monitor  # noqa: E402
+import mcp_session_pool  # noqa: E402
 import routes as miso_routes  # noqa: E402
 import unchain_adapter  # noqa: E402
 from mcp_toolkits import (  # noqa: E402
@@ -24,9 +28,17 @@ from mcp_toolkits import (  # noqa: E402
     delete_mcp_toolkit,
     get_installed_mcp_toolkit,
     install_mcp_toolkit,
+    iter_reload_mcp_toolkits,
     list_installed_mcp_toolkits,
+    release_mcp_runtime_toolkit,
     reload_mcp_toolkits,
 )
+from mcp_session_pool import (  # noqa: E402
+    close_all_mcp_sessions,
+    evict_idle_mcp_sessions,
+    mcp_session_pool_stats,
+    warm_mcp_sessions,
+)
 from mcp_secrets import delete_mcp_secret_values, get_mcp_secret_value  # noqa: E402
 from mcp_oauth import (  # noqa: E402
     get_mcp_oauth_status,
@@ -746,6 +758,106 @@ class McpToolkitServiceTests(unittest.TestCase):
         self.assertEqual(result["toolkits"][0]["workspace_root"], "")
         self.assertNotIn("/tmp/project", FakeMCPToolkit.instances[-1].kwargs["args"])
 
+    def _install_two(self):
+        install_mcp_toolkit(
+            "memory.memory",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+        install_mcp_toolkit(
+            FIXTURE_STDIO_SECRET_ENTRY_ID,
+            secrets={
+                FIXTURE_SECRET_KEY_A: "fixture-a-value",
+                FIXTURE_SECRET_KEY_B: "fixture-b-value",
+            },
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+        FakeMCPToolkit.instances = []
+
+    def test_reload_times_out_hung_toolkit_without_blocking_the_rest(self):
+        self._install_two()
+        released = threading.Event()
+
+        class HangingToolkit(FakeMCPToolkit):
+            def _hangs(self):
+                return "fixture-mcp-server" in self.kwargs.get("args", [])
+
+            def connect(self):
+                if self._hangs():
+                    released.wait(5)
+                    raise RuntimeError("killed")
+                return super().connect()
+
+            def disconnect(self):
+                super().disconnect()
+                if self._hangs():
+                    released.set()
+
+        mcp_toolkits_module = sys.modules["mcp_toolkits"]
+        with mock.patch.dict(os.environ, {"UNCHAIN_MCP_HEALTH_TIMEOUT_SECONDS": "0.3"}), \
+                mock.patch.object(
+                    mcp_toolkits_module._STORE,
+                    "write",
+                    wraps=mcp_toolkits_module._STORE.write,
+                ) as write_store:
+            events = list(iter_reload_mcp_toolkits(
+                data_dir=self.data_dir,
+                toolkit_factory=HangingToolkit,
+                now_fn=lambda: 5000.0,
+            ))
+
+        progress = [event for event in events if event["type"] == "toolkit"]
+        self.assertEqual([event["completed"] for event in progress], [1, 2])
+        # the healthy toolkit is not held up behind the hung one
+        self.assertEqual(progress[0]["toolkit"]["status"], "available")
+        hung = progress[1]["toolkit"]
+        self.assertEqual(hung["toolkitId"], FIXTURE_STDIO_SECRET_TOOLKIT_ID)
+        self.assertEqual(hung["status"], "error")
+        self.assertIn("timed out", hung["lastError"])
+        self.assertTrue(released.wait(1))
+        self.assertEqual(events[-1]["type"], "done")
+        self.assertEqual(
+            [toolkit["status"] for toolkit in events[-1]["toolkits"]],
+            ["available", "error"],
+        )
+        self.assertEqual(write_store.call_count, 1)
+
+    def test_reload_does_not_resurrect_toolkits_deleted_while_checking(self):
+        self._install_two()
+        events = iter_reload_mcp_toolkits(data_dir=self.data_dir, toolkit_factory=FakeMCPToolkit)
+        next(events)
+        delete_mcp_toolkit("mcp.memory.memory", data_dir=self.data_dir)
+
+        done = list(events)[-1]
+
+        self.assertEqual(
+            [toolkit["toolkitId"] for toolkit in done["toolkits"]],
+            [FIXTURE_STDIO_SECRET_TOOLKIT_ID],
+        )
+
+    def test_reload_keeps_toolkits_configured_while_checking(self):
+        self._install_two()
+        events = iter_reload_mcp_toolkits(
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+            now_fn=lambda: 1.0,
+        )
+        next(events)
+        configured = configure_mcp_toolkit(
+            "mcp.memory.memory",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+            now_fn=lambda: 5000.0,
+        )
+
+        done = list(events)[-1]
+
+        by_id = {toolkit["toolkitId"]: toolkit for toolkit in done["toolkits"]}
+        self.assertEqual(configured["toolkit"]["lastCheckedAt"], 5000.0)
+        self.assertEqual(by_id["mcp.memory.memory"]["lastCheckedAt"], 5000.0)
+        self.assertEqual(by_id[FIXTURE_STDIO_SECRET_TOOLKIT_ID]["lastCheckedAt"], 1.0)
+
     def test_delete_removes_installed_toolkit(self):
         install_mcp_toolkit(
             "memory.memory",
@@ -924,6 +1036,335 @@ class McpToolkitServiceTests(unittest.TestCase):
         )
 
 
+class McpSessionPoolTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmpdir.name)
+        FakeMCPToolkit.instances = []
+        FakeMCPToolkit.fail_connect = False
+        close_all_mcp_sessions()
+        install_mcp_toolkit(
+            "memory.memory",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+        FakeMCPToolkit.instances = []
+
+    def tearDown(self):
+        close_all_mcp_sessions()
+        self.tmpdir.cleanup()
+
+    def _lease(self):
+        return build_mcp_runtime_toolkit(
+            "mcp.memory.memory",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+
+    def test_released_session_is_reused_by_next_lease(self):
+        first = self._lease()
+        self.assertTrue(release_mcp_runtime_toolkit(first))
+        self.assertFalse(first.disconnected)
+
+        second = self._lease()
+
+        self.assertIs(second, first)
+        self.assertEqual(len(FakeMCPToolkit.instances), 1)
+
+    def test_concurrent_leases_get_distinct_sessions(self):
+        first = self._lease()
+        second = self._lease()
+
+        self.assertIsNot(first, second)
+        self.assertEqual(len(FakeMCPToolkit.instances), 2)
+
+    def test_configure_invalidates_pooled_sessions(self):
+        first = self._lease()
+        release_mcp_runtime_toolkit(first)
+
+        configure_mcp_toolkit(
+            "mcp.memory.memory",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+
+        self.assertTrue(first.disconnected)
+        self.assertIsNot(self._lease(), first)
+
+    def test_delete_discards_session_leased_during_delete(self):
+        leased = self._lease()
+
+        delete_mcp_toolkit("mcp.memory.memory", data_dir=self.data_dir)
+        release_mcp_runtime_toolkit(leased)
+
+        self.assertTrue(leased.disconnected)
+        self.assertEqual(mcp_session_pool_stats()["idle"], 0)
+
+    def test_failed_health_probe_replaces_idle_session(self):
+        first = self._lease()
+        release_mcp_runtime_toolkit(first)
+        first.connected = False
+
+        second = self._lease()
+
+        self.assertIsNot(second, first)
+        self.assertTrue(first.disconnected)
+
+    def test_idle_sessions_are_evicted_after_ttl(self):
+        first = self._lease()
+        release_mcp_runtime_toolkit(first)
+
+        with mock.patch.dict("os.environ", {"UNCHAIN_MCP_POOL_IDLE_SECONDS": "1"}):
+            evicted = evict_idle_mcp_sessions(now_fn=lambda: 10_000_000_000.0)
+
+        self.assertEqual(evicted, 1)
+        self.assertTrue(first.disconnected)
+
+    def test_per_toolkit_cap_disconnects_overflow_sessions(self):
+        with mock.patch.dict("os.environ", {"UNCHAIN_MCP_POOL_MAX_PER_TOOLKIT": "1"}):
+            first = self._lease()
+            overflow = self._lease()
+            release_mcp_runtime_toolkit(first)
+            release_mcp_runtime_toolkit(overflow)
+
+        self.assertFalse(first.disconnected)
+        self.assertTrue(overflow.disconnected)
+
+    def test_warmer_keeps_a_connected_spare_for_used_stdio_toolkits(self):
+        spawns = mcp_session_pool_stats()["warm_spawns"]
+        first = self._lease()
+
+        self.assertEqual(warm_mcp_sessions(), 1)
+        self.assertEqual(warm_mcp_sessions(), 0)
+        spare = FakeMCPToolkit.instances[-1]
+        self.assertTrue(spare.connected)
+
+        second = self._lease()
+
+        self.assertIsNot(second, first)
+        self.assertIs(second, spare)
+        self.assertEqual(len(FakeMCPToolkit.instances), 2)
+        self.assertEqual(mcp_session_pool_stats()["warm_spawns"], spawns + 1)
+
+    def test_sessions_are_recycled_after_max_uses_or_rss_cap(self):
+        recycled = mcp_session_pool_stats()["recycled"]
+        with mock.patch.dict("os.environ", {"UNCHAIN_MCP_POOL_MAX_USES": "2"}):
+            first = self._lease()
+            release_mcp_runtime_toolkit(first)
+            self.assertIs(self._lease(), first)
+            release_mcp_runtime_toolkit(first)
+
+        self.assertTrue(first.disconnected)
+
+        with mock.patch.dict("os.environ", {"UNCHAIN_MCP_POOL_MAX_RSS_MB": "1"}):
+            bloated = self._lease()
+            bloated.pid = os.getpid()
+            release_mcp_runtime_toolkit(bloated)
+
+        if sys.platform.startswith("linux"):
+            self.assertTrue(bloated.disconnected)
+            self.assertEqual(mcp_session_pool_stats()["recycled"], recycled + 2)
+
+    def test_warmer_replaces_crashed_spares(self):
+        first = self._lease()
+        release_mcp_runtime_toolkit(first)
+        first.connected = False
+
+        self.assertEqual(warm_mcp_sessions(), 1)
+
+        self.assertTrue(first.disconnected)
+        self.assertIs(self._lease(), FakeMCPToolkit.instances[-1])
+
+    def test_oauth_token_refresh_rotates_pooled_http_session(self):
+        save_mcp_oauth_token(
+            "mcp.productivity.notion-remote",
+            {
+                "entry_id": "productivity.notion-remote",
+                "access_token": "token-a",
+                "expires_at": 9999999999.0,
+            },
+            data_dir=self.data_dir,
+        )
+        install_mcp_toolkit(
+            "productivity.notion-remote",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+        first = build_mcp_runtime_toolkit(
+            "mcp.productivity.notion-remote",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+        release_mcp_runtime_toolkit(first)
+
+        save_mcp_oauth_token(
+            "mcp.productivity.notion-remote",
+            {
+                "entry_id": "productivity.notion-remote",
+                "access_token": "token-b",
+                "expires_at": 9999999999.0,
+            },
+            data_dir=self.data_dir,
+        )
+        second = build_mcp_runtime_toolkit(
+            "mcp.productivity.notion-remote",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+
+        self.assertTrue(first.disconnected)
+        self.assertEqual(second.kwargs["headers"]["Authorization"], "Bearer token-b")
+
+    def test_disconnect_runtime_toolkits_returns_leased_sessions_to_pool(self):
+        leased = self._lease()
+
+        unchain_adapter._disconnect_runtime_toolkits([leased])
+
+        self.assertFalse(leased.disconnected)
+        self.assertEqual(mcp_session_pool_stats()["idle"], 1)
+
+    def test_failed_or_cancelled_runs_discard_their_sessions(self):
+        leased = self._lease()
+
+        unchain_adapter._disconnect_runtime_toolkits([leased], discard=True)
+
+        self.assertTrue(leased.disconnected)
+        self.assertEqual(mcp_session_pool_stats()["idle"], 0)
+        self.assertTrue(unchain_adapter._run_failed_or_cancelled({"error": RuntimeError("x")}))
+        cancelled = threading.Event()
+        cancelled.set()
+        self.assertTrue(unchain_adapter._run_failed_or_cancelled({"error": None}, cancelled))
+        self.assertFalse(unchain_adapter._run_failed_or_cancelled({"error": None}, threading.Event()))
+
+    def test_failed_toolkit_build_releases_sessions_already_leased(self):
+        leased_before = mcp_session_pool_stats()["leased"]
+        leased = self._lease()
+        with mock.patch.object(
+            unchain_adapter,
+            "build_mcp_runtime_toolkit",
+            side_effect=[leased, McpToolkitError("not_installed", "boom")],
+        ):
+            with self.assertRaises(RuntimeError):
+                unchain_adapter._build_selected_toolkits(
+                    {"toolkits": ["mcp.memory.memory", "mcp.broken.broken"]},
+                )
+
+        stats = mcp_session_pool_stats()
+        self.assertEqual((stats["leased"] - leased_before, stats["idle"]), (0, 1))
+
+    def test_idle_sessions_are_probed_outside_the_pool_lock(self):
+        first = self._lease()
+        release_mcp_runtime_toolkit(first)
+        lock_free = []
+
+        def ping():
+            probe = threading.Thread(
+                target=lambda: lock_free.append(mcp_session_pool._pool_lock.acquire(timeout=1)),
+            )
+            probe.start()
+            probe.join()
+            if lock_free[-1]:
+                mcp_session_pool._pool_lock.release()
+            return True
+
+        first.ping = ping
+        self.assertIs(self._lease(), first)
+        self.assertEqual(lock_free, [True])
+
+
+class McpHealthMonitorTests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.data_dir = Path(self.tmpdir.name)
+        FakeMCPToolkit.instances = []
+        FakeMCPToolkit.fail_connect = False
+        close_all_mcp_sessions()
+        install_mcp_toolkit(
+            "memory.memory",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+            now_fn=lambda: 1000.0,
+        )
+        FakeMCPToolkit.instances = []
+        self._env = mock.patch.dict(os.environ, {"UNCHAIN_MCP_HEALTH_INTERVAL_SECONDS": "100"})
+        self._env.start()
+
+    def tearDown(self):
+        self._env.stop()
+        FakeMCPToolkit.fail_connect = False
+        close_all_mcp_sessions()
+        self.tmpdir.cleanup()
+
+    def _run(self, now):
+        return mcp_health_monitor.run_mcp_health_checks(
+            self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+            now_fn=lambda: now,
+        )
+
+    def test_failing_toolkit_backs_off_and_recovers(self):
+        self.assertEqual(self._run(1050.0)["checked"], [])
+
+        FakeMCPToolkit.fail_connect = True
+        self.assertEqual(self._run(1200.0)["checked"], ["mcp.memory.memory"])
+        self.assertEqual(self._run(1259.0)["checked"], [])
+        self._run(1260.0)
+        failing = get_installed_mcp_toolkit("mcp.memory.memory", data_dir=self.data_dir)
+
+        self.assertEqual(failing["status"], "error")
+        self.assertEqual(failing["consecutiveFailures"], 2)
+        self.assertEqual(failing["nextCheckAt"], 1380.0)
+
+        FakeMCPToolkit.fail_connect = False
+        self._run(1380.0)
+        spawned = len(FakeMCPToolkit.instances)
+        recovered = list_installed_mcp_toolkits(data_dir=self.data_dir)[0]
+
+        self.assertEqual(recovered["status"], "available")
+        self.assertEqual(recovered["consecutiveFailures"], 0)
+        self.assertGreaterEqual(recovered["nextCheckAt"], 1480.0)
+        self.assertLess(recovered["nextCheckAt"], 1491.0)
+        # serving the cached status never starts a server
+        self.assertEqual(len(FakeMCPToolkit.instances), spawned)
+
+    def test_pooled_session_is_checked_without_spawning(self):
+        leased = build_mcp_runtime_toolkit(
+            "mcp.memory.memory",
+            data_dir=self.data_dir,
+            toolkit_factory=FakeMCPToolkit,
+        )
+        release_mcp_runtime_toolkit(leased)
+        FakeMCPToolkit.instances = []
+
+        summary = self._run(2000.0)
+
+        self.assertEqual(summary["pooled"], ["mcp.memory.memory"])
+        self.assertEqual(summary["schemaChanged"], [])
+        self.assertEqual(FakeMCPToolkit.instances, [])
+        self.assertFalse(leased.disconnected)
+        self.assertEqual(mcp_session_pool_stats()["idle"], 1)
+        toolkit = get_installed_mcp_toolkit("mcp.memory.memory", data_dir=self.data_dir)
+        self.assertEqual(toolkit["lastCheckedAt"], 2000.0)
+
+    def test_changed_tool_schema_invalidates_agent_blueprints(self):
+        before = get_installed_mcp_toolkit("mcp.memory.memory", data_dir=self.data_dir)
+        original_tools = FakeMCPToolkit.next_tools
+        FakeMCPToolkit.next_tools = {
+            "memory_read": {"description": "Read memory", "requires_confirmation": False},
+        }
+        try:
+            with mock.patch.object(mcp_health_monitor, "invalidate_agent_blueprints") as invalidate:
+                summary = self._run(2000.0)
+        finally:
+            FakeMCPToolkit.next_tools = original_tools
+
+        after = get_installed_mcp_toolkit("mcp.memory.memory", data_dir=self.data_dir)
+        self.assertEqual(summary["schemaChanged"], ["mcp.memory.memory"])
+        invalidate.assert_called_once_with()
+        self.assertNotEqual(after["toolsSchemaHash"], before["toolsSchemaHash"])
+        self.assertEqual([tool["name"] for tool in after["tools"]], ["memory_read"])
+
+
 class McpToolkitRouteTests(unittest.TestCase):
     def setUp(self):
         self.client = miso_app.create_app().test_client()
@@ -940,6 +1381,19 @@ class McpToolkitRouteTests(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.get_json(), expected)
 
+    def test_reload_stream_route_emits_progress_then_done(self):
+        events = [
+            {"type": "toolkit", "index": 0, "completed": 1, "total": 1, "toolkit": {"toolkitId": "a"}},
+            {"type": "done", "toolkits": [{"toolkitId": "a"}], "count": 1},
+        ]
+        with mock.patch.object(miso_routes, "iter_reload_mcp_toolkits", return_value=iter(events)):
+            response = self.client.post("/mcp/toolkits/reload/stream", json={})
+
+        body = response.get_data(as_text=True)
+        self.assertEqual(response.mimetype, "text/event-stream")
+        self.assertLess(body.index("event: toolkit"), body.index("event: done"))
+        self.assertIn('"count":1', body.replace(" ", ""))
+
     def test_install_route_returns_stable_error_payload(self):
         with mock.patch.object(
             miso_routes,
@@ -0,0 +1,175 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import memory_commit_worker  # noqa: E402
+import memory_factory  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+class _RecordingManager:
+    def __init__(self, calls, *, gate=None, fail_times=0):
+        self.calls = calls
+        self.gate = gate
+        self.fail_times = fail_times
+        self.last_commit_info = {}
+
+    def commit_messages(self, *, session_id, full_conversation, memory_namespace=None, model=""):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail_times:
+            self.fail_times -= 1
+            raise RuntimeError("embedding backend down")
+        self.calls.append((session_id, len(full_conversation), memory_namespace, model))
+        self.last_commit_info = {
+            "session_id": session_id,
+            "stored_message_count": len(full_conversation),
+        }
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class MemoryCommitWorkerTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+        self._env = mock.patch.dict(os.environ, {"UNCHAIN_DATA_DIR": self.data_dir})
+        self._env.start()
+
+    def tearDown(self) -> None:
+        memory_commit_worker.close_memory_commit_workers()
+        self._env.stop()
+        self._tmp.cleanup()
+
+    def _enqueue(self, session_id, count, manager, options=None):
+        return memory_commit_worker.enqueue_memory_commit(
+            session_id=session_id,
+            options=options or {"memory_enabled": True},
+            messages=[{"role": "user", "content": str(index)} for index in range(count)],
+            memory_namespace="ns",
+            model="gpt-test",
+            manager=manager,
+        )
+
+    def test_commits_for_one_session_run_in_order(self) -> None:
+        calls = []
+        gate = threading.Event()
+        first = self._enqueue("s1", 2, _RecordingManager(calls, gate=gate))
+        second = self._enqueue("s1", 4, _RecordingManager(calls))
+        other = self._enqueue("s2", 1, _RecordingManager(calls))
+
+        # s2 is not blocked behind s1's slow commit
+        self.assertTrue(_wait_for(lambda: ("s2", 1, "ns", "gpt-test") in calls))
+        self.assertEqual(
+            memory_commit_worker.get_memory_commit_job(second["job_id"])["status"],
+            "pending",
+        )
+        self.assertFalse(memory_commit_worker.wait_for_session_commits("s1", timeout=0.05))
+        gate.set()
+        self.assertTrue(memory_commit_worker.wait_for_session_commits("s1", timeout=5))
+
+        self.assertEqual([call[1] for call in calls if call[0] == "s1"], [2, 4])
+        job = memory_commit_worker.get_memory_commit_job(first["job_id"])
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["result"]["stored_message_count"], 2)
+        self.assertEqual(
+            memory_commit_worker.get_memory_commit_job(other["job_id"])["status"],
+            "done",
+        )
+
+    def test_failed_commit_is_retried_with_backoff(self) -> None:
+        calls = []
+        with mock.patch.dict(os.environ, {"UNCHAIN_MEMORY_COMMIT_MAX_ATTEMPTS": "2"}):
+            job = self._enqueue("s1", 2, _RecordingManager(calls, fail_times=5))
+            self.assertTrue(_wait_for(
+                lambda: memory_commit_worker.get_memory_commit_job(job["job_id"])["attempts"] == 1
+                and memory_commit_worker.get_memory_commit_job(job["job_id"])["status"] == "pending"
+            ))
+            state = memory_commit_worker.get_memory_commit_job(job["job_id"])
+            self.assertIn("embedding backend down", state["error"])
+
+    def test_interrupted_jobs_are_replayed_without_persisting_api_keys(self) -> None:
+        db_path = os.path.join(self.data_dir, "memory", "commit_queue.sqlite3")
+        # Enqueue through a queue whose workers never start, then "crash".
+        with mock.patch.object(memory_commit_worker._CommitQueue, "_ensure_workers_locked"):
+            job = self._enqueue(
+                "s1",
+                3,
+                None,
+                options={"memory_enabled": True, "openaiApiKey": "sk-secret", "modelId": "openai:gpt"},
+            )
+            queue = memory_commit_worker._queue()
+            queue._connection.execute(
+                "UPDATE commit_jobs SET status = 'running' WHERE id = ?",
+                (job["job_id"],),
+            )
+            memory_commit_worker.close_memory_commit_workers()
+
+        with open(db_path, "rb") as handle:
+            self.assertNotIn(b"sk-secret", handle.read())
+
+        calls = []
+        built_with = []
+
+        def fake_create(options, *, session_id=""):
+            built_with.append(dict(options))
+            return _RecordingManager(calls), ""
+
+        with mock.patch.object(memory_factory, "create_memory_manager_with_diagnostics", fake_create):
+            self.assertTrue(memory_commit_worker.start_memory_commit_worker())
+            state = memory_commit_worker.get_memory_commit_job(job["job_id"])
+            self.assertEqual(state["status"], "pending")
+            self.assertTrue(state["awaiting_credentials"])
+
+            # the session's next turn supplies the key and the job replays
+            self.assertTrue(memory_commit_worker.wait_for_session_commits(
+                "s1",
+                options={"openaiApiKey": "sk-secret"},
+                timeout=5,
+            ))
+
+        self.assertEqual(calls, [("s1", 3, "ns", "gpt-test")])
+        self.assertEqual(built_with[0]["openaiApiKey"], "sk-secret")
+        self.assertEqual(built_with[0]["modelId"], "openai:gpt")
+
+    def test_status_route_reports_session_jobs(self) -> None:
+        calls = []
+        job = self._enqueue("s1", 2, _RecordingManager(calls))
+        memory_commit_worker.wait_for_session_commits("s1", timeout=5)
+
+        app = create_app()
+        app.config["TESTING"] = True
+        client = app.test_client()
+
+        by_job = client.get(f"/memory/commit/status?job_id={job['job_id']}")
+        by_session = client.get("/memory/commit/status?session_id=s1")
+        missing = client.get("/memory/commit/status?job_id=999")
+
+        self.assertEqual(by_job.status_code, 200)
+        self.assertEqual(by_job.get_json()["job"]["status"], "done")
+        body = by_session.get_json()
+        self.assertEqual(body["pending"], 0)
+        self.assertEqual([item["job_id"] for item in body["jobs"]], [job["job_id"]])
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(json.loads(client.get("/memory/commit/status").data)["error"]["code"], "invalid_request")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,7 +15,10 @@ SERVER_ROOT = Path(__file__).resolve().parents[1]
 if str(SERVER_ROOT) not in sys.path:
     sys.path.insert(0, str(SERVER_ROOT))
 
+import memory_embed_cache  # noqa: E402
+import memory_embeddings  # noqa: E402
 import memory_factory  # noqa: E402
+import ollama_inventory  # noqa: E402
 
 
 class MemoryFactoryTests(unittest.TestCase):
@@ -567,7 +570,11 @@ class MemoryFactoryTests(unittest.TestCase):
         )
 
         with tempfile.TemporaryDirectory() as data_dir, \
-            mock.patch.dict(os.environ, {"UNCHAIN_DATA_DIR": data_dir}, clear=False), \
+            mock.patch.dict(
+                os.environ,
+                {"UNCHAIN_DATA_DIR": data_dir, "UNCHAIN_MEMORY_REINDEX": "0"},
+                clear=False,
+            ), \
             mock.patch.dict(sys.modules, modules), \
             mock.patch.object(memory_factory, "_QDRANT_AVAILABLE", True), \
             mock.patch.object(
@@ -613,6 +620,77 @@ class MemoryFactoryTests(unittest.TestCase):
             ["chat_legacytag_chat_1"],
         )
 
+    def test_create_memory_manager_reindexes_in_background_on_signature_change(self) -> None:
+        old_state = {
+            "chat-1": {
+                "messages": [
+                    {"role": "user", "content": "u1"},
+                    {"role": "assistant", "content": "a1"},
+                    {"role": "user", "content": "u2"},
+                    {"role": "assistant", "content": "a2"},
+                    {"role": "user", "content": "u3"},
+                ],
+                "vector_indexed_until": 4,
+                "vector_embedding_signature": "openai:text-embedding-3-small:1536",
+                "vector_collection_tag": "legacytag",
+            }
+        }
+
+        def fake_build_openai_embed_fn(*, model, broth_instance=None, payload=None):
+            del broth_instance, payload
+            size = 3072 if model == "text-embedding-3-large" else 1536
+            return (lambda texts: [[0.0] * size for _ in texts], size)
+
+        modules, fake_store_cls, fake_client, delete_calls = (
+            self._install_fake_miso_modules_for_manager(
+                build_openai_embed_fn=fake_build_openai_embed_fn,
+                initial_state_by_session=old_state,
+            )
+        )
+
+        with tempfile.TemporaryDirectory() as data_dir, \
+            mock.patch.dict(os.environ, {"UNCHAIN_DATA_DIR": data_dir}, clear=False), \
+            mock.patch.dict(sys.modules, modules), \
+            mock.patch.object(memory_factory, "_QDRANT_AVAILABLE", True), \
+            mock.patch.object(
+                memory_factory,
+                "_get_or_create_qdrant_client",
+                return_value=fake_client,
+            ), \
+            mock.patch.object(
+                memory_factory.uuid,
+                "uuid4",
+                return_value=uuid.UUID("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"),
+            ):
+            manager, reason = memory_factory.create_memory_manager_with_diagnostics(
+                {
+                    "memory_enabled": True,
+                    "memory_embedding_provider": "openai",
+                    "memory_embedding_model": "text-embedding-3-large",
+                    "openai_api_key": "openai-key-123",
+                },
+                session_id="chat-1",
+            )
+            adapter = manager.config.vector_adapter
+            serving_before = adapter._old._collection_prefix
+            adapter._job.join(5)
+
+        self.assertEqual(reason, "")
+        self.assertEqual(serving_before, "chat_legacytag")
+        self.assertEqual(adapter._old._vector_size, 1536)
+        self.assertEqual(adapter._collection_prefix, "chat_aaaaaaaaaaaa")
+        self.assertEqual(
+            [call["collection_prefix"] for call in delete_calls["add_texts"]],
+            ["chat_aaaaaaaaaaaa"],
+        )
+        self.assertEqual(len(delete_calls["add_texts"][0]["texts"]), 2)
+        state = fake_store_cls._state_by_session["chat-1"]
+        self.assertEqual(state["vector_collection_tag"], "aaaaaaaaaaaa")
+        self.assertEqual(state["vector_embedding_signature"], "openai:text-embedding-3-large:3072")
+        self.assertEqual(state["vector_indexed_until"], 4)
+        self.assertNotIn("vector_reindex", state)
+        self.assertEqual(delete_calls["collections"], ["chat_legacytag_chat_1"])
+
     def test_create_memory_manager_reuses_collection_tag_when_signature_matches(self) -> None:
         previous_state = {
             "chat-1": {
@@ -1113,6 +1191,47 @@ class MemoryFactoryTests(unittest.TestCase):
             },
         )
 
+    def test_patch_memory_commit_invalidates_long_term_only_after_extraction(self) -> None:
+        class FakeStore:
+            def load(self, _session_id: str):
+                return {"messages": []}
+
+        class FakeManager:
+            def __init__(self):
+                self.store = FakeStore()
+                self.last_commit_info = {}
+                self.next_info = {}
+
+            def commit_messages(self, *, session_id: str, full_conversation, memory_namespace=None):
+                self.last_commit_info = dict(self.next_info)
+
+        manager = FakeManager()
+        memory_factory._patch_memory_commit_with_overlap(manager)
+        with mock.patch.object(memory_factory, "_invalidate_projection_caches") as invalidate:
+            manager.next_info = {
+                "long_term_extraction_deferred": True,
+                "long_term_memory_indexed_count": 0,
+            }
+            manager.commit_messages(
+                session_id="chat-test",
+                full_conversation=[],
+                memory_namespace="pupu",
+            )
+            manager.next_info = {"long_term_fact_indexed_count": 2}
+            manager.commit_messages(
+                session_id="chat-test",
+                full_conversation=[],
+                memory_namespace="pupu",
+            )
+
+        self.assertEqual(
+            invalidate.call_args_list,
+            [
+                mock.call(session_id="chat-test", long_term=False),
+                mock.call(session_id="chat-test", long_term=True),
+            ],
+        )
+
     def test_patch_memory_prepare_with_diagnostics_sets_no_match_status(self) -> None:
         class FakeManager:
             def __init__(self):
@@ -1486,5 +1605,362 @@ class MemoryFactoryTests(unittest.TestCase):
         self.assertIn("query", adapter._client.calls[0])
 
 
+class OllamaEmbedRuntimeTests(unittest.TestCase):
+    class FakeResponse:
+        def __init__(self, status_code: int, payload: dict[str, object]) -> None:
+            self.status_code = status_code
+            self._payload = payload
+
+        def raise_for_status(self) -> None:
+            if self.status_code >= 400:
+                raise RuntimeError(f"HTTP {self.status_code}")
+
+        def json(self) -> dict[str, object]:
+            return self._payload
+
+    class FakeClient:
+        def __init__(self, *, batched: bool = True) -> None:
+            self.batched = batched
+            self.calls: list[tuple[str, dict[str, object]]] = []
+            self.lock = threading.Lock()
+
+        def post(self, path: str, *, json: dict[str, object], timeout: float):
+            del timeout
+            with self.lock:
+                self.calls.append((path, json))
+            if path == "/api/embed":
+                if not self.batched:
+                    return OllamaEmbedRuntimeTests.FakeResponse(404, {"error": "404 page not found"})
+                return OllamaEmbedRuntimeTests.FakeResponse(
+                    200,
+                    {"embeddings": [[float(len(text))] for text in json["input"]]},
+                )
+            return OllamaEmbedRuntimeTests.FakeResponse(
+                200,
+                {"embedding": [float(len(json["prompt"]))]},
+            )
+
+    def setUp(self) -> None:
+        memory_embeddings._ollama_legacy_embed_hosts.clear()
+
+    def tearDown(self) -> None:
+        memory_embeddings._ollama_legacy_embed_hosts.clear()
+
+    def _embed_fn(self, client, **config):
+        with mock.patch.object(memory_embeddings, "get_ollama_client", return_value=client):
+            embed_fn, vector_size = memory_factory._build_embed_runtime(
+                {
+                    "provider": "ollama",
+                    "model": "nomic-embed-text",
+                    "vector_size": 768,
+                    "base_url": "http://ollama.test",
+                    **config,
+                }
+            )
+            return embed_fn, vector_size
+
+    def test_ollama_embed_batches_texts_through_api_embed(self) -> None:
+        client = self.FakeClient()
+        embed_fn, vector_size = self._embed_fn(client, batch_size=2, max_concurrency=1)
+        texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+        with mock.patch.object(memory_embeddings, "get_ollama_client", return_value=client):
+            vectors = embed_fn(texts)
+
+        self.assertEqual(vector_size, 768)
+        self.assertEqual(vectors, [[1.0], [2.0], [3.0], [4.0], [5.0]])
+        self.assertEqual([path for path, _ in client.calls], ["/api/embed"] * 3)
+        self.assertEqual(client.calls[0][1], {"model": "nomic-embed-text", "input": ["a", "bb"]})
+
+    def test_ollama_embed_keeps_order_with_concurrent_batches(self) -> None:
+        client = self.FakeClient()
+        embed_fn, _ = self._embed_fn(client, batch_size=3, max_concurrency=4)
+        texts = ["x" * (index + 1) for index in range(20)]
+
+        with mock.patch.object(memory_embeddings, "get_ollama_client", return_value=client):
+            vectors = embed_fn(texts)
+
+        self.assertEqual(vectors, [[float(index + 1)] for index in range(20)])
+        self.assertEqual(len(client.calls), 7)
+
+    def test_ollama_embed_falls_back_to_legacy_endpoint(self) -> None:
+        client = self.FakeClient(batched=False)
+        embed_fn, _ = self._embed_fn(client, batch_size=8, max_concurrency=1)
+
+        with mock.patch.object(memory_embeddings, "get_ollama_client", return_value=client):
+            first = embed_fn(["a", "bb"])
+            second = embed_fn(["ccc"])
+
+        self.assertEqual(first, [[1.0], [2.0]])
+        self.assertEqual(second, [[3.0]])
+        self.assertEqual(
+            [path for path, _ in client.calls],
+            ["/api/embed", "/api/embeddings", "/api/embeddings", "/api/embeddings"],
+        )
+
+    def test_resolve_embedding_config_reads_ollama_batch_tuning(self) -> None:
+        config = memory_factory.resolve_embedding_config(
+            {
+                "memory_embedding_provider": "ollama",
+                "ollama_base_url": "http://ollama.test/",
+                "memory_embedding_batch_size": 16,
+            }
+        )
+
+        self.assertEqual(config["base_url"], "http://ollama.test")
+        self.assertEqual(config["batch_size"], 16)
+        self.assertGreaterEqual(config["max_concurrency"], 1)
+
+
+class OllamaInventoryTests(unittest.TestCase):
+    class FakeClient:
+        def __init__(self) -> None:
+            self.calls = 0
+            self.fail = False
+
+        def get(self, path: str, *, timeout: float):
+            del timeout
+            self.calls += 1
+            if self.fail:
+                raise OSError("connection refused")
+            return OllamaEmbedRuntimeTests.FakeResponse(
+                200,
+                {"models": [{"name": f"llama3:{self.calls}"}]},
+            )
+
+    def setUp(self) -> None:
+        ollama_inventory.clear_ollama_inventory()
+        self.client = self.FakeClient()
+        self.now = [1000.0]
+        for patcher in (
+            mock.patch.object(ollama_inventory, "get_ollama_client", return_value=self.client),
+            mock.patch.object(ollama_inventory, "start_ollama_inventory_refresher"),
+            mock.patch.dict(os.environ, {"UNCHAIN_OLLAMA_INVENTORY_TTL": "30"}, clear=False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(ollama_inventory.clear_ollama_inventory)
+
+    def _get(self):
+        return ollama_inventory.get_ollama_inventory(
+            "http://ollama.test",
+            now_fn=lambda: self.now[0],
+        )
+
+    def test_fresh_entry_is_served_without_refetching(self) -> None:
+        first = self._get()
+        second = self._get()
+
+        self.assertTrue(first["reachable"])
+        self.assertEqual(second["models"], [{"name": "llama3:1"}])
+        self.assertEqual(self.client.calls, 1)
+
+    def test_stale_entry_is_served_while_refresh_is_scheduled(self) -> None:
+        self._get()
+        self.now[0] += 31
+        self.client.fail = True
+
+        stale = self._get()
+
+        self.assertTrue(stale["stale"])
+        self.assertTrue(stale["reachable"])
+        self.assertEqual(self.client.calls, 1)
+        ollama_inventory.start_ollama_inventory_refresher.assert_called_with("http://ollama.test")
+
+        ollama_inventory.refresh_ollama_inventory("http://ollama.test", now_fn=lambda: self.now[0])
+        self.assertFalse(self._get()["reachable"])
+
+    def test_resolve_embedding_config_uses_cached_reachability(self) -> None:
+        options = {"ollama_base_url": "http://ollama.test"}
+        with mock.patch.dict(os.environ, {"OPENAI_API_KEY": ""}, clear=False):
+            first = memory_factory.resolve_embedding_config(options)
+            second = memory_factory.resolve_embedding_config(options)
+
+        self.assertEqual(first["provider"], "ollama")
+        self.assertEqual(second["provider"], "ollama")
+        self.assertEqual(self.client.calls, 1)
+
+
+class EmbeddingCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.cache_dir = self.tmpdir.name
+        self.calls: list[list[str]] = []
+        memory_embed_cache.clear_embed_cache_memory()
+
+    def tearDown(self) -> None:
+        memory_embed_cache.clear_embed_cache_memory()
+        self.tmpdir.cleanup()
+
+    def _provider(self, texts: list[str]) -> list[list[float]]:
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0, 2.0] for text in texts]
+
+    def _wrap(self, signature: str = "ollama:nomic-embed-text:3"):
+        return memory_embed_cache.wrap_embed_fn_with_cache(
+            self._provider,
+            signature=signature,
+            vector_size=3,
+            cache_dir=self.cache_dir,
+        )
+
+    def test_cached_embed_only_sends_unseen_texts_to_provider(self) -> None:
+        embed = self._wrap()
+
+        first = embed(["alpha", "beta", "alpha"])
+        second = embed(["beta", "gamma"])
+
+        self.assertEqual(first, [[5.0, 1.0, 2.0], [4.0, 1.0, 2.0], [5.0, 1.0, 2.0]])
+        self.assertEqual(second, [[4.0, 1.0, 2.0], [5.0, 1.0, 2.0]])
+        self.assertEqual(self.calls, [["alpha", "beta"], ["gamma"]])
+
+    def test_cached_embed_reads_disk_store_after_memory_reset(self) -> None:
+        self._wrap()(["alpha", "beta"])
+        memory_embed_cache.clear_embed_cache_memory()
+
+        vectors = self._wrap()(["beta", "alpha"])
+
+        self.assertEqual(vectors, [[4.0, 1.0, 2.0], [5.0, 1.0, 2.0]])
+        self.assertEqual(self.calls, [["alpha", "beta"]])
+
+    def test_cached_embed_isolates_signatures(self) -> None:
+        self._wrap("ollama:a:3")(["alpha"])
+        self._wrap("ollama:b:3")(["alpha"])
+
+        self.assertEqual(self.calls, [["alpha"], ["alpha"]])
+
+    def test_disk_store_compacts_to_recently_used_rows(self) -> None:
+        embed = self._wrap()
+        with mock.patch.dict(
+            os.environ,
+            {"UNCHAIN_EMBED_CACHE_MAX_ROWS": "4", "UNCHAIN_EMBED_CACHE_LRU_ENTRIES": "0"},
+        ):
+            embed(["a", "bb", "ccc", "dddd"])
+            embed(["a"])
+            embed(["eeeee"])
+            memory_embed_cache.clear_embed_cache_memory()
+            self.calls.clear()
+            embed(["a", "eeeee"])
+            embed(["bb"])
+
+        self.assertEqual(self.calls, [["bb"]])
+        self.assertGreaterEqual(memory_embed_cache.embed_cache_stats()["compactions"], 1)
+
+    def test_compaction_runs_off_the_request_path_and_keeps_new_rows(self) -> None:
+        embed = self._wrap()
+        gate = threading.Event()
+        started = threading.Event()
+        rmtree = memory_embed_cache.shutil.rmtree
+        calls = []
+
+        def blocking_rmtree(path, *args, **kwargs):
+            if not calls:
+                calls.append(path)
+                started.set()
+                gate.wait(5)
+            return rmtree(path, *args, **kwargs)
+
+        with (
+            mock.patch.dict(
+                os.environ,
+                {"UNCHAIN_EMBED_CACHE_MAX_ROWS": "4", "UNCHAIN_EMBED_CACHE_LRU_ENTRIES": "0"},
+            ),
+            mock.patch.object(memory_embed_cache.shutil, "rmtree", side_effect=blocking_rmtree),
+        ):
+            embed(["a", "bb", "ccc", "dddd"])
+            embed(["a"])
+            embed(["eeeee"])
+            self.assertTrue(started.wait(5))
+            # The compaction is parked outside the store lock: requests go on.
+            embed(["ffffff"])
+            gate.set()
+            memory_embed_cache.clear_embed_cache_memory()
+            self.calls.clear()
+            vectors = self._wrap()(["a", "eeeee", "ffffff"])
+
+        self.assertEqual(vectors, [[1.0, 1.0, 2.0], [5.0, 1.0, 2.0], [6.0, 1.0, 2.0]])
+        self.assertEqual(self.calls, [])
+        store_dirs = [path for path in Path(self.cache_dir).iterdir() if path.is_dir()]
+        self.assertEqual([path.name for path in store_dirs[0].iterdir() if path.is_dir()], ["gen-1"])
+        self.assertFalse((store_dirs[0] / "vectors.f32").exists())
+
+    def test_compaction_interrupted_before_the_switch_keeps_the_old_generation(self) -> None:
+        embed = self._wrap()
+        write_meta = memory_embed_cache._DiskEmbeddingStore._write_meta
+
+        def crash_on_switch(store, generation):
+            if generation > 0:
+                raise OSError("power loss")
+            write_meta(store, generation)
+
+        failures = memory_embed_cache.embed_cache_stats()["compaction_failures"]
+        with (
+            mock.patch.dict(os.environ, {"UNCHAIN_EMBED_CACHE_MAX_ROWS": "4"}),
+            mock.patch.object(memory_embed_cache._DiskEmbeddingStore, "_write_meta", crash_on_switch),
+        ):
+            embed(["a", "bb", "ccc", "dddd", "eeeee"])
+            memory_embed_cache.clear_embed_cache_memory()
+        self.calls.clear()
+
+        vectors = self._wrap()(["a", "bb", "ccc", "dddd", "eeeee"])
+
+        self.assertEqual(len(vectors), 5)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(memory_embed_cache.embed_cache_stats()["compaction_failures"], failures + 1)
+        store_dir = next(path for path in Path(self.cache_dir).iterdir() if path.is_dir())
+        self.assertFalse((store_dir / "gen-1").exists())
+
+    def test_vectors_with_the_wrong_length_are_counted_not_stored(self) -> None:
+        embed = memory_embed_cache.wrap_embed_fn_with_cache(
+            lambda texts: [[1.0, 2.0] for _ in texts],
+            signature="ollama:short:3",
+            vector_size=3,
+            cache_dir=self.cache_dir,
+        )
+        before = memory_embed_cache.embed_cache_stats()["dims_mismatches"]
+
+        self.assertEqual(embed(["alpha"]), [[1.0, 2.0]])
+        self.assertEqual(memory_embed_cache.embed_cache_stats()["dims_mismatches"], before + 1)
+
+    def test_failed_append_keeps_disk_rows_aligned(self) -> None:
+        embed = self._wrap()
+        embed(["a"])
+        append = memory_embed_cache._append_synced
+
+        def keys_fail(path, payload):
+            if path.endswith("keys.bin"):
+                raise OSError(28, "No space left on device")
+            append(path, payload)
+
+        with mock.patch.object(memory_embed_cache, "_append_synced", side_effect=keys_fail):
+            embed(["bb"])
+        embed(["ccc"])
+        memory_embed_cache.clear_embed_cache_memory()
+        self.calls.clear()
+
+        vectors = self._wrap()(["a", "ccc", "bb"])
+
+        self.assertEqual(vectors, [[1.0, 1.0, 2.0], [3.0, 1.0, 2.0], [2.0, 1.0, 2.0]])
+        self.assertEqual(self.calls, [["bb"]])
+
+    def test_build_cached_embed_runtime_places_store_under_data_dir(self) -> None:
+        with mock.patch.object(
+            memory_factory,
+            "_build_embed_runtime",
+            return_value=(self._provider, 3),
+        ):
+            embed_fn, vector_size = memory_factory._build_cached_embed_runtime(
+                {"provider": "ollama", "model": "nomic-embed-text"},
+                self.cache_dir,
+            )
+
+        embed_fn(["alpha"])
+        embed_fn(["alpha"])
+
+        self.assertEqual(vector_size, 3)
+        self.assertEqual(self.calls, [["alpha"]])
+        self.assertTrue((Path(self.cache_dir) / "memory" / "embed_cache").is_dir())
+
+
 if __name__ == "__main__":
     unittest.main()
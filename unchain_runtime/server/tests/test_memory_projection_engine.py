@@ -0,0 +1,162 @@
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import memory_projection_engine  # noqa: E402
+import route_projection  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+def _low_rank_vectors(n: int, dims: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    basis = rng.standard_normal((8, dims))
+    scales = np.array([20, 14, 10, 7, 5, 3, 2, 1.5])
+    signal = (rng.standard_normal((n, 8)) * scales) @ basis / np.sqrt(dims)
+    return (signal + rng.standard_normal((n, dims)) * 0.05 + 1.0).astype(np.float32)
+
+
+class StreamingProjectorTests(unittest.TestCase):
+    def test_paged_fit_matches_exact_svd(self) -> None:
+        vectors = _low_rank_vectors(3000, 256)
+        exact, exact_variance = route_projection._project_vectors(
+            vectors.astype(np.float64).tolist()
+        )
+
+        projector = memory_projection_engine.StreamingProjector(256)
+        for start in range(0, len(vectors), 500):
+            projector.partial_fit(vectors[start:start + 500])
+        coords, variance = projector.finish()
+
+        self.assertEqual(coords.shape, (3000, 5))
+        for component in range(5):
+            correlation = abs(np.corrcoef(exact[:, component], coords[:, component])[0, 1])
+            self.assertGreater(correlation, 0.99)
+            self.assertAlmostEqual(variance[component], exact_variance[component], delta=0.02)
+
+    def test_minibatch_kmeans_separates_blobs(self) -> None:
+        rng = np.random.default_rng(3)
+        centers = np.array([[0.0, 0.0], [50.0, 0.0], [0.0, 50.0]])
+        coords = np.vstack([center + rng.standard_normal((3000, 2)) for center in centers])
+
+        labels = np.asarray(memory_projection_engine.minibatch_kmeans_2d(coords, 3))
+
+        for blob in range(3):
+            blob_labels = labels[blob * 3000:(blob + 1) * 3000]
+            self.assertEqual(len(set(blob_labels.tolist())), 1)
+        self.assertEqual(len(set(labels.tolist())), 3)
+
+
+class VectorRowsTests(unittest.TestCase):
+    def test_rows_are_copied_into_float32_buffer_and_filtered(self) -> None:
+        page = [
+            types.SimpleNamespace(id="a", vector=[1.0, 2.0, 3.0], payload={"text": "a"}),
+            types.SimpleNamespace(id="b", vector={"dense": [4.0, 5.0, 6.0]}, payload={}),
+            types.SimpleNamespace(id="c", vector=[1.0, float("nan"), 0.0], payload={}),
+            types.SimpleNamespace(id="d", vector=[1.0, 2.0], payload={}),
+            types.SimpleNamespace(id="e", vector=["x", "y", "z"], payload={}),
+            types.SimpleNamespace(id="f", vector=None, payload={}),
+            types.SimpleNamespace(id="g", vector=(7, 8, 9), payload={}),
+        ]
+        vector_rows = route_projection._VectorRows(capacity=1)
+        vector_rows.add(page[:3])
+        vector_rows.add(page[3:])
+
+        rows, points = vector_rows.matrix()
+
+        self.assertEqual(rows.dtype, np.float32)
+        self.assertEqual([point.id for point in points], ["a", "b", "g"])
+        np.testing.assert_array_equal(rows, [[1, 2, 3], [4, 5, 6], [7, 8, 9]])
+        self.assertEqual(points[0].payload, {"text": "a"})
+
+
+class ProgressiveProjectionRouteTests(unittest.TestCase):
+    def setUp(self) -> None:
+        app = create_app()
+        app.config["TESTING"] = True
+        self.client = app.test_client()
+
+    def test_large_long_term_sets_are_served_progressively(self) -> None:
+        vectors = _low_rank_vectors(90, 16)
+        points = [
+            types.SimpleNamespace(
+                id=f"lt-{index}",
+                vector=vectors[index].tolist(),
+                payload={"text": f"memory {index}"},
+            )
+            for index in range(len(vectors))
+        ]
+        gate = threading.Event()
+
+        class FakeClient:
+            def get_collections(self):
+                return types.SimpleNamespace(
+                    collections=[types.SimpleNamespace(name="long_term_legacy")]
+                )
+
+            def count(self, **_kwargs):
+                return types.SimpleNamespace(count=len(points))
+
+            def scroll(self, **kwargs):
+                offset = int(kwargs.get("offset") or 0)
+                if kwargs["with_vectors"] and offset >= 40:
+                    gate.wait(5)
+                page = points[offset:offset + kwargs["limit"]]
+                next_offset = offset + len(page)
+                return page, (next_offset if next_offset < len(points) else None)
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            fake_memory_factory = types.SimpleNamespace(
+                _data_dir=lambda: data_dir,
+                _normalize_data_dir=lambda value: value,
+                _get_or_create_qdrant_client=lambda _data_dir: FakeClient(),
+            )
+            with (
+                mock.patch.dict(sys.modules, {"memory_factory": fake_memory_factory}),
+                mock.patch.object(route_projection, "_MEMORY_PROJECTION_MAX_POINTS", 30),
+                mock.patch.object(route_projection, "_MEMORY_PROJECTION_PAGE_SIZE", 20),
+                mock.patch.object(route_projection, "_PROJECTION_SNAPSHOT_POINTS", 40),
+                mock.patch.dict("os.environ", {"UNCHAIN_PROJECTION_LONG_TERM_MAX_POINTS": "1000"}),
+            ):
+                deadline = time.time() + 5
+                while True:
+                    pending = self.client.get("/memory/long-term/projection/v2").get_json()
+                    if pending["ids"] or time.time() > deadline:
+                        break
+                    time.sleep(0.01)
+                gate.set()
+
+                while time.time() < deadline:
+                    final = self.client.get("/memory/long-term/projection/v2").get_json()
+                    if final.get("status") != "computing":
+                        break
+                    time.sleep(0.01)
+
+                capped = self.client.get("/memory/long-term/projection").get_json()
+
+        self.assertEqual(pending["status"], "computing")
+        self.assertEqual(pending["progress"]["total"], 90)
+        self.assertEqual(len(pending["ids"]), 40)
+
+        self.assertNotIn("status", final)
+        self.assertEqual(final["total"], 90)
+        self.assertEqual(len(final["variance"]), 5)
+
+        # v1 carries full payloads, so it never goes past the synchronous cap.
+        self.assertNotIn("status", capped)
+        self.assertEqual(len(capped["points"]), 30)
+        self.assertEqual(capped["points"][5]["text"], "memory 5")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import os
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import memory_factory  # noqa: E402
+import memory_qdrant_policy  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+class _Model:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def model_copy(self, update):
+        return type(self)(**{**self.__dict__, **update})
+
+
+def _fake_qdrant_modules():
+    models = types.ModuleType("qdrant_client.http.models")
+    for name in (
+        "ScalarQuantization",
+        "ScalarQuantizationConfig",
+        "HnswConfigDiff",
+        "SearchParams",
+        "QuantizationSearchParams",
+        "VectorParams",
+        "VectorParamsDiff",
+    ):
+        setattr(models, name, type(name, (_Model,), {}))
+    models.ScalarType = types.SimpleNamespace(INT8="int8")
+    models.PayloadSchemaType = types.SimpleNamespace(KEYWORD="keyword", INTEGER="integer")
+    http = types.ModuleType("qdrant_client.http")
+    http.models = models
+    return {
+        "qdrant_client": types.ModuleType("qdrant_client"),
+        "qdrant_client.http": http,
+        "qdrant_client.http.models": models,
+    }, models
+
+
+class _Client:
+    def __init__(self, collections=()):
+        self.collections = list(collections)
+        self.created = {}
+        self.indexes = []
+        self.updates = {}
+        self.queries = []
+
+    def create_collection(self, collection_name, vectors_config=None, **kwargs):
+        self.created[collection_name] = {"vectors_config": vectors_config, **kwargs}
+        return True
+
+    def create_payload_index(self, *, collection_name, field_name, field_schema):
+        self.indexes.append((collection_name, field_name, field_schema))
+
+    def query_points(self, *, collection_name, query, limit, search_params=None):
+        self.queries.append((collection_name, search_params))
+        return []
+
+    def get_collections(self):
+        return types.SimpleNamespace(
+            collections=[types.SimpleNamespace(name=name) for name in self.collections]
+        )
+
+    def update_collection(self, *, collection_name, **kwargs):
+        if collection_name == "chat_broken_s1":
+            raise RuntimeError("collection is locked")
+        self.updates[collection_name] = kwargs
+
+
+class QdrantPolicyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        modules, self.models = _fake_qdrant_modules()
+        self._modules = mock.patch.dict(sys.modules, modules)
+        self._modules.start()
+
+    def tearDown(self) -> None:
+        self._modules.stop()
+
+    def test_memory_collections_are_created_and_searched_on_the_policy(self) -> None:
+        client = memory_qdrant_policy.apply_qdrant_policy(_Client())
+        memory_qdrant_policy.apply_qdrant_policy(client)
+
+        client.create_collection(
+            collection_name="chat_abc_s1",
+            vectors_config=self.models.VectorParams(size=768, distance="Cosine"),
+        )
+        client.create_collection(collection_name="scratch", vectors_config=None)
+        client.query_points(collection_name="chat_abc_s1", query=[0.1], limit=3)
+        custom = self.models.SearchParams(hnsw_ef=8)
+        client.query_points(collection_name="chat_abc_s1", query=[0.1], limit=3, search_params=custom)
+
+        created = client.created["chat_abc_s1"]
+        self.assertTrue(created["vectors_config"].on_disk)
+        self.assertEqual(created["vectors_config"].size, 768)
+        self.assertEqual(created["quantization_config"].scalar.type, "int8")
+        self.assertEqual(created["quantization_config"].scalar.quantile, 0.99)
+        self.assertEqual(created["hnsw_config"].m, 16)
+        self.assertEqual(client.created["scratch"], {"vectors_config": None})
+        self.assertEqual(
+            [(field, schema) for _, field, schema in client.indexes],
+            [("role", "keyword"), ("index", "integer"), ("turn_start_index", "integer")],
+        )
+        applied = client.queries[0][1]
+        self.assertEqual(applied.hnsw_ef, 64)
+        self.assertTrue(applied.quantization.rescore)
+        self.assertIs(client.queries[1][1], custom)
+
+    def test_policy_overrides_and_unknown_names(self) -> None:
+        with mock.patch.dict(os.environ, {"UNCHAIN_QDRANT_HNSW_M": "32"}):
+            self.assertEqual(memory_qdrant_policy.qdrant_policy("on_disk")["hnsw_m"], 32)
+        self.assertIsNone(memory_qdrant_policy.qdrant_policy("default")["hnsw_m"])
+        with self.assertRaises(ValueError):
+            memory_qdrant_policy.qdrant_policy("tiny")
+        with mock.patch.dict(os.environ, {"UNCHAIN_QDRANT_POLICY": "tiny"}):
+            client = memory_qdrant_policy.apply_qdrant_policy(_Client())
+        self.assertNotIn("create_collection", vars(client))
+
+    def test_migration_updates_memory_collections_in_place(self) -> None:
+        client = _Client(["chat_abc_s1", "chat_broken_s1", "long_term_0123456789ab_ns", "other"])
+
+        dry = memory_factory.migrate_qdrant_collections(client, dry_run=True)
+        self.assertEqual(client.updates, {})
+        self.assertEqual(len(dry["collections"]), 3)
+
+        summary = memory_factory.migrate_qdrant_collections(client)
+
+        self.assertEqual(summary["migrated"], 2)
+        self.assertEqual(summary["failed"], 1)
+        update = client.updates["long_term_0123456789ab_ns"]
+        self.assertTrue(update["vectors_config"][""].on_disk)
+        self.assertEqual(update["quantization_config"].scalar.always_ram, True)
+        self.assertNotIn("other", client.updates)
+        self.assertIn("collection is locked", summary["collections"][1]["error"])
+
+    def test_local_clients_are_left_unpatched(self) -> None:
+        client = _Client()
+        client._client = type("QdrantLocal", (), {})()
+
+        memory_qdrant_policy.apply_qdrant_policy(client)
+        client.create_collection(collection_name="chat_abc_s1", vectors_config=None)
+        client.query_points(collection_name="chat_abc_s1", query=[0.1], limit=3)
+
+        self.assertNotIn("create_collection", vars(client))
+        self.assertNotIn("query_points", vars(client))
+        self.assertEqual(client.created["chat_abc_s1"], {"vectors_config": None})
+        self.assertEqual(client.indexes, [])
+        self.assertIsNone(client.queries[0][1])
+
+    def test_migration_reports_local_mode_as_skipped(self) -> None:
+        client = _Client(["chat_abc_s1"])
+        client._client = type("QdrantLocal", (), {})()
+
+        summary = memory_factory.migrate_qdrant_collections(client)
+
+        self.assertEqual(summary["skipped"], "local_mode")
+        self.assertEqual(summary["migrated"], 0)
+        self.assertFalse(summary["collections"][0]["updated"])
+        self.assertEqual(client.updates, {})
+
+
+class QdrantMigrateRouteTests(unittest.TestCase):
+    def test_migrate_route(self) -> None:
+        app = create_app()
+        app.config["TESTING"] = True
+        http = app.test_client()
+        client = _Client(["chat_abc_s1"])
+        modules, _models = _fake_qdrant_modules()
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            with (
+                mock.patch.dict(os.environ, {"UNCHAIN_DATA_DIR": data_dir}),
+                mock.patch.dict(sys.modules, modules),
+                mock.patch.object(memory_factory, "_get_or_create_qdrant_client", return_value=client),
+            ):
+                body = http.post("/memory/qdrant/migrate", json={"policy": "on_disk"}).get_json()
+                bad = http.post("/memory/qdrant/migrate", json={"policy": "tiny"})
+                client._client = type("QdrantLocal", (), {})()
+                local = http.post("/memory/qdrant/migrate", json={"policy": "on_disk"})
+
+        self.assertEqual(body["policy"], "on_disk")
+        self.assertEqual(body["migrated"], 1)
+        self.assertNotIn("quantization_config", client.updates["chat_abc_s1"])
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(local.status_code, 409)
+        self.assertEqual(local.get_json()["error"]["code"], "qdrant_migrate_local_mode")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+import sys
+import threading
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import memory_factory  # noqa: E402
+import memory_recall_prefetch  # noqa: E402
+
+
+def _embed(texts):
+    vectors = []
+    for text in texts:
+        rng = np.random.default_rng(abs(hash(text)) % (2 ** 32))
+        vectors.append(rng.standard_normal(8).tolist())
+    return vectors
+
+
+class _FakeQdrant:
+    def __init__(self, collections):
+        self.collections = collections
+        self.calls = []
+
+    def get_collections(self):
+        return types.SimpleNamespace(
+            collections=[types.SimpleNamespace(name=name) for name in self.collections]
+        )
+
+    def query_points(self, *, collection_name, query, limit, with_payload=True,
+                     query_filter=None, score_threshold=None):
+        self.calls.append((collection_name, limit, query_filter))
+        query = np.asarray(query)
+        hits = []
+        for point_id, vector, payload in self.collections[collection_name]:
+            if query_filter:
+                wanted = {c["key"]: c["match"]["value"] for c in query_filter.get("must", [])}
+                if query_filter.get("should"):
+                    continue
+                if any(payload.get(key) != value for key, value in wanted.items()):
+                    continue
+            score = float(np.dot(query, vector))
+            if score_threshold is not None and score < score_threshold:
+                continue
+            hits.append(types.SimpleNamespace(id=point_id, score=score, payload=payload))
+        hits.sort(key=lambda hit: -hit.score)
+        return types.SimpleNamespace(points=hits[:limit])
+
+
+def _points(count, kinds=("fact", "episode", "playbook"), seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        (f"p{index}", rng.standard_normal(8), {"kind": kinds[index % len(kinds)]})
+        for index in range(count)
+    ]
+
+
+def _manager(client):
+    short_term = types.SimpleNamespace(
+        _client=client,
+        _embed_fn=_embed,
+        _collection_name=lambda session_id: f"chat_{session_id}",
+    )
+    long_term = types.SimpleNamespace(_client=client, _embed_fn=_embed)
+    return types.SimpleNamespace(
+        config=types.SimpleNamespace(
+            vector_adapter=short_term,
+            long_term=types.SimpleNamespace(vector_adapter=long_term),
+        )
+    )
+
+
+def _prefetch(manager, query="what did we decide?"):
+    return memory_recall_prefetch.RecallPrefetch(
+        session_id="s1",
+        query=query,
+        memory_namespace="ns",
+        build_manager=lambda: ({"requested": True, "available": True, "reason": ""}, manager),
+    )
+
+
+class RecallPrefetchTests(unittest.TestCase):
+    def test_filtered_searches_are_answered_from_prefetched_hits(self) -> None:
+        client = _FakeQdrant({
+            "chat_s1": _points(20, kinds=("turn",), seed=1),
+            "long_term_0123456789ab_ns": _points(60, seed=2),
+        })
+        manager = _manager(client)
+        prefetch = _prefetch(manager)
+        self.assertIs(prefetch.memory_runtime()[1], manager)
+        prefetch.join(timeout=5)
+        speculative_calls = len(client.calls)
+        self.assertEqual(speculative_calls, 2)
+
+        vector = _embed(["what did we decide?"])[0]
+        adapter_client = manager.config.long_term.vector_adapter._client
+        for kind in ("fact", "episode", "playbook"):
+            query_filter = {"must": [{"key": "kind", "match": {"value": kind}}]}
+            served = adapter_client.query_points(
+                collection_name="long_term_0123456789ab_ns",
+                query=vector,
+                limit=3,
+                with_payload=True,
+                query_filter=query_filter,
+            )
+            expected = client.query_points(
+                collection_name="long_term_0123456789ab_ns",
+                query=vector,
+                limit=3,
+                query_filter=query_filter,
+            )
+            self.assertEqual(
+                [hit.id for hit in served.points],
+                [hit.id for hit in expected.points],
+            )
+        short_term = manager.config.vector_adapter._client.query_points(
+            collection_name="chat_s1",
+            query=vector,
+            limit=4,
+            with_payload=True,
+        )
+        self.assertEqual(len(short_term.points), 4)
+
+        # three verification searches above went to the real client directly
+        self.assertEqual(len(client.calls), speculative_calls + 3)
+        self.assertEqual(prefetch.report()["prefetch"], {"hits": 4, "misses": 0})
+
+    def test_unprovable_requests_fall_through_to_the_client(self) -> None:
+        client = _FakeQdrant({"chat_s1": _points(200, kinds=("turn",), seed=3)})
+        manager = _manager(client)
+        with mock.patch.dict("os.environ", {"UNCHAIN_MEMORY_PREFETCH_LIMIT": "4"}):
+            prefetch = _prefetch(manager)
+            prefetch.memory_runtime()
+            prefetch.join(timeout=5)
+        vector = _embed(["what did we decide?"])[0]
+        adapter_client = manager.config.vector_adapter._client
+
+        adapter_client.query_points(collection_name="chat_s1", query=vector, limit=10)
+        adapter_client.query_points(
+            collection_name="chat_s1",
+            query=vector,
+            limit=2,
+            query_filter={"should": [{"key": "kind", "match": {"value": "turn"}}]},
+        )
+        prefetch.close()
+        adapter_client.query_points(collection_name="chat_s1", query=vector, limit=2)
+
+        self.assertEqual(len(client.calls), 4)
+        self.assertEqual(prefetch.report()["prefetch"], {"hits": 0, "misses": 2})
+
+    def test_prepare_joins_prefetch_and_reports_phase_timings(self) -> None:
+        client = _FakeQdrant({"chat_s1": _points(10, kinds=("turn",), seed=4)})
+        manager = _manager(client)
+
+        class FakeMemoryManager:
+            config = manager.config
+
+            def prepare_messages(self, session_id, incoming, *, max_context_window_tokens, model):
+                adapter = self.config.vector_adapter
+                vector = adapter._embed_fn([incoming[-1]["content"]])[0]
+                adapter._client.query_points(
+                    collection_name=adapter._collection_name(session_id),
+                    query=vector,
+                    limit=2,
+                    with_payload=True,
+                )
+                return list(incoming)
+
+        memory = memory_factory._patch_memory_prepare_with_diagnostics(FakeMemoryManager())
+        prefetch = _prefetch(memory, query="hello there")
+        prefetch.memory_runtime()
+
+        memory.prepare_messages(
+            "s1",
+            [{"role": "user", "content": "hello there"}],
+            max_context_window_tokens=1000,
+            model="gpt-test",
+        )
+
+        info = memory._last_prepare_info
+        for phase in ("manager_ms", "embed_ms", "short_term_search_ms", "join_wait_ms", "prepare_ms"):
+            self.assertIn(phase, info["timings"])
+        self.assertEqual(info["prefetch"]["hits"], 1)
+        self.assertEqual(len(client.calls), 1)
+
+    def test_cancel_drops_speculative_searches(self) -> None:
+        client = _FakeQdrant({"chat_s1": _points(10, kinds=("turn",), seed=5)})
+        manager = _manager(client)
+        release = threading.Event()
+
+        def build_manager():
+            release.wait(timeout=5)
+            return {"requested": True, "available": True, "reason": ""}, manager
+
+        prefetch = memory_recall_prefetch.RecallPrefetch(
+            session_id="s1",
+            query="what did we decide?",
+            memory_namespace="ns",
+            build_manager=build_manager,
+        )
+        prefetch.cancel()
+        release.set()
+        prefetch.join(timeout=5)
+
+        self.assertEqual(client.calls, [])
+        self.assertEqual(prefetch.report()["prefetch"], {"hits": 0, "misses": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,244 @@
+import copy
+import os
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import memory_factory  # noqa: E402
+import memory_reindex  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+def _collect_complete_turns_for_vector_index(messages, start_index=0):
+    texts, metadatas = [], []
+    index = start_index
+    while index + 1 < len(messages):
+        texts.append(f"{messages[index]['content']} | {messages[index + 1]['content']}")
+        metadatas.append({"turn_start_index": index})
+        index += 2
+    return texts, metadatas, index, len(texts)
+
+
+def _fake_unchain():
+    manager_module = types.ModuleType("unchain.memory.manager")
+    manager_module._collect_complete_turns_for_vector_index = _collect_complete_turns_for_vector_index
+    return {
+        "unchain": types.ModuleType("unchain"),
+        "unchain.memory": types.ModuleType("unchain.memory"),
+        "unchain.memory.manager": manager_module,
+    }
+
+
+class _DictStore:
+    def __init__(self, states=None):
+        self.states = states or {}
+
+    def load(self, session_id):
+        return copy.deepcopy(self.states.get(session_id, {}))
+
+    def save(self, session_id, state):
+        self.states[session_id] = copy.deepcopy(state)
+
+
+class _Client:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_collection(self, collection_name):
+        self.deleted.append(collection_name)
+
+
+class _Adapter:
+    def __init__(self, name):
+        self.name = name
+        self.batches = []
+
+    def add_texts(self, *, session_id, texts, metadatas):
+        self.batches.append([meta["turn_start_index"] for meta in metadatas])
+
+    def similarity_search(self, **_kwargs):
+        return [self.name]
+
+
+def _messages(count):
+    return [
+        {"role": "user" if index % 2 == 0 else "assistant", "content": f"m{index}"}
+        for index in range(count)
+    ]
+
+
+def _state(count, **extra):
+    return {
+        "messages": _messages(count),
+        "vector_embedding_signature": "openai:old-model:1536",
+        "vector_collection_tag": "oldtag",
+        "vector_indexed_until": count,
+        **extra,
+    }
+
+
+class PrepareVectorCollectionTagTests(unittest.TestCase):
+    def test_signature_change_keeps_old_collection_and_records_reindex(self) -> None:
+        store = _DictStore({"s1": _state(6)})
+        client = _Client()
+
+        tag = memory_factory._prepare_vector_collection_tag(
+            store=store,
+            client=client,
+            session_id="s1",
+            embedding_signature="ollama:nomic-embed-text:latest:768",
+        )
+        record = store.states["s1"]["vector_reindex"]
+
+        self.assertEqual(tag, "oldtag")
+        self.assertEqual(client.deleted, [])
+        self.assertEqual(store.states["s1"]["vector_embedding_signature"], "openai:old-model:1536")
+        self.assertEqual(record["target_until"], 6)
+        self.assertEqual(record["checkpoint"], 0)
+
+        # the same target again reuses the pending record
+        memory_factory._prepare_vector_collection_tag(
+            store=store,
+            client=client,
+            session_id="s1",
+            embedding_signature="ollama:nomic-embed-text:latest:768",
+        )
+        self.assertEqual(store.states["s1"]["vector_reindex"]["to_tag"], record["to_tag"])
+
+        # switching back abandons the half-built collection
+        tag = memory_factory._prepare_vector_collection_tag(
+            store=store,
+            client=client,
+            session_id="s1",
+            embedding_signature="openai:old-model:1536",
+        )
+        self.assertEqual(tag, "oldtag")
+        self.assertNotIn("vector_reindex", store.states["s1"])
+        self.assertEqual(client.deleted, [f"chat_{record['to_tag']}_s1"])
+
+    def test_old_embedding_config_is_rebuilt_from_its_signature(self) -> None:
+        config = memory_factory._embed_config_from_signature(
+            "ollama:nomic-embed-text:latest:768",
+            {"ollama_base_url": "http://box:11434"},
+        )
+        self.assertEqual(config["model"], "nomic-embed-text:latest")
+        self.assertEqual(config["vector_size"], 768)
+        self.assertEqual(config["base_url"], "http://box:11434")
+        self.assertIsNone(memory_factory._embed_config_from_signature("openai:m:1536", {}))
+
+
+class SessionReindexJobTests(unittest.TestCase):
+    def _run_job(self, store, client, adapter):
+        record = memory_reindex.reindex_record(store.load("s1"))
+        job = memory_reindex.SessionReindexJob(
+            data_dir="/tmp/data",
+            session_id="s1",
+            store=store,
+            client=client,
+            adapter=adapter,
+            record=record,
+        )
+        with (
+            mock.patch.dict(sys.modules, _fake_unchain()),
+            mock.patch.dict(os.environ, {"UNCHAIN_MEMORY_REINDEX_BATCH_MESSAGES": "4"}),
+        ):
+            job.start()
+            job.join(5)
+        return job
+
+    def test_job_backfills_in_batches_and_cuts_over(self) -> None:
+        state = _state(10)
+        memory_reindex.begin_session_reindex(
+            state,
+            from_tag="oldtag",
+            from_signature="openai:old-model:1536",
+            to_tag="newtag",
+            to_signature="openai:new-model:3072",
+        )
+        store = _DictStore({"s1": state})
+        client = _Client()
+        old_adapter, new_adapter = _Adapter("old"), _Adapter("new")
+
+        job = self._run_job(store, client, new_adapter)
+
+        self.assertEqual(job.status, "done")
+        self.assertEqual(new_adapter.batches, [[0, 2], [4, 6], [8]])
+        final = store.states["s1"]
+        self.assertEqual(final["vector_collection_tag"], "newtag")
+        self.assertEqual(final["vector_embedding_signature"], "openai:new-model:3072")
+        self.assertNotIn("vector_reindex", final)
+        self.assertEqual(client.deleted, ["chat_oldtag_s1"])
+        self.assertEqual(job.progress()["indexed_count"], 5)
+
+        served = memory_reindex.ReindexingVectorAdapter(job, old_adapter, new_adapter)
+        self.assertEqual(served.similarity_search(session_id="s1", query="q", k=1), ["new"])
+
+    def test_job_resumes_from_checkpoint(self) -> None:
+        state = _state(10)
+        record = memory_reindex.begin_session_reindex(
+            state,
+            from_tag="oldtag",
+            from_signature="openai:old-model:1536",
+            to_tag="newtag",
+            to_signature="openai:new-model:3072",
+        )
+        record["checkpoint"] = 6
+        record["indexed_count"] = 3
+        store = _DictStore({"s1": state})
+        new_adapter = _Adapter("new")
+
+        job = self._run_job(store, _Client(), new_adapter)
+
+        self.assertEqual(new_adapter.batches, [[6, 8]])
+        self.assertEqual(job.progress()["indexed_count"], 5)
+
+    def test_adapter_serves_old_collection_and_writes_both_before_cut_over(self) -> None:
+        job = types.SimpleNamespace(cut_over=False)
+        old_adapter, new_adapter = _Adapter("old"), _Adapter("new")
+        served = memory_reindex.ReindexingVectorAdapter(job, old_adapter, new_adapter)
+
+        served.add_texts(session_id="s1", texts=["t"], metadatas=[{"turn_start_index": 10}])
+
+        self.assertEqual(served.similarity_search(session_id="s1", query="q", k=1), ["old"])
+        self.assertEqual(old_adapter.batches, [[10]])
+        self.assertEqual(new_adapter.batches, [[10]])
+
+
+class ReindexProgressRouteTests(unittest.TestCase):
+    def test_progress_of_a_recorded_reindex(self) -> None:
+        app = create_app()
+        app.config["TESTING"] = True
+        client = app.test_client()
+        state = _state(8)
+        record = memory_reindex.begin_session_reindex(
+            state,
+            from_tag="oldtag",
+            from_signature="openai:old-model:1536",
+            to_tag="newtag",
+            to_signature="openai:new-model:3072",
+        )
+        record["checkpoint"] = 2
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            with (
+                mock.patch.dict(os.environ, {"UNCHAIN_DATA_DIR": data_dir}),
+                mock.patch.object(memory_factory, "_load_session_state", return_value=state),
+            ):
+                body = client.get("/memory/session/reindex?session_id=s1").get_json()
+                missing = client.get("/memory/session/reindex")
+
+        self.assertEqual(body["status"], "paused")
+        self.assertEqual(body["percent"], 25.0)
+        self.assertEqual(body["to_signature"], "openai:new-model:3072")
+        self.assertEqual(missing.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import memory_factory  # noqa: E402
+import memory_session_store  # noqa: E402
+from memory_session_store import SqliteSessionStore  # noqa: E402
+
+
+def _messages(count: int, start: int = 0) -> list:
+    return [
+        {"role": "user" if index % 2 == 0 else "assistant", "content": f"message {index}"}
+        for index in range(start, start + count)
+    ]
+
+
+class SqliteSessionStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.base_dir = self._tmp.name
+
+    def tearDown(self) -> None:
+        memory_session_store.close_session_stores()
+        self._tmp.cleanup()
+
+    def _changes(self) -> int:
+        connection, _lock = memory_session_store._connection(
+            os.path.join(self.base_dir, memory_session_store.DB_FILENAME)
+        )
+        return connection.total_changes
+
+    def test_round_trip_and_append_only_writes_the_delta(self) -> None:
+        store = SqliteSessionStore(self.base_dir)
+        state = {"messages": _messages(100), "vector_collection_tag": "abc"}
+        store.save("s1", state)
+        self.assertEqual(store.load("s1"), state)
+
+        before = self._changes()
+        state["messages"] = state["messages"] + _messages(2, start=100)
+        state["vector_indexed_until"] = 100
+        store.save("s1", state)
+
+        # two message rows plus the meta upsert
+        self.assertEqual(self._changes() - before, 3)
+        memory_session_store._row_cache.clear()
+        self.assertEqual(SqliteSessionStore(self.base_dir).load("s1"), state)
+
+    def test_rewritten_history_replaces_rows_from_first_change(self) -> None:
+        store = SqliteSessionStore(self.base_dir)
+        messages = _messages(10)
+        store.save("s1", {"messages": messages})
+
+        edited = messages[:4] + [{"role": "user", "content": "edited"}]
+        store.save("s1", {"messages": edited})
+
+        self.assertEqual(store.load("s1")["messages"], edited)
+        self.assertEqual(store.version("s1"), 2)
+
+    def test_loaded_state_is_a_private_copy(self) -> None:
+        store = SqliteSessionStore(self.base_dir)
+        store.save("s1", {"messages": _messages(2)})
+
+        loaded = store.load("s1")
+        loaded["messages"].append({"role": "user", "content": "not saved"})
+
+        self.assertEqual(len(store.load("s1")["messages"]), 2)
+
+    def test_missing_session_is_migrated_from_legacy_json(self) -> None:
+        legacy_path = os.path.join(self.base_dir, "s1.json")
+        legacy_state = {"messages": _messages(3), "vector_collection_tag": "old"}
+        with open(legacy_path, "w", encoding="utf-8") as handle:
+            json.dump(legacy_state, handle)
+
+        def legacy_loader(session_id):
+            path = os.path.join(self.base_dir, f"{session_id}.json")
+            if not os.path.exists(path):
+                return {}, ""
+            with open(path, encoding="utf-8") as handle:
+                return json.load(handle), path
+
+        store = SqliteSessionStore(self.base_dir, legacy_loader=legacy_loader)
+
+        self.assertEqual(store.load("s1"), legacy_state)
+        self.assertEqual(store.load("missing"), {})
+        self.assertFalse(os.path.exists(legacy_path))
+        self.assertTrue(os.path.exists(legacy_path + memory_session_store.MIGRATED_SUFFIX))
+
+    def test_memory_factory_uses_sqlite_store_when_enabled(self) -> None:
+        with mock.patch.dict(os.environ, {"UNCHAIN_SESSION_STORE": "sqlite"}):
+            store = memory_factory._open_session_store(self.base_dir)
+            self.assertIsInstance(store, SqliteSessionStore)
+            store.save("s1", {"messages": _messages(1)})
+            marker = memory_factory._session_state_marker(self.base_dir, "s1")
+
+            self.assertEqual(
+                memory_factory._load_session_state(self.base_dir, "s1")["messages"],
+                _messages(1),
+            )
+            self.assertEqual(marker, "v=1")
+            with mock.patch.object(
+                memory_factory,
+                "_session_store_path",
+                return_value=os.path.join(self.base_dir, "s1.json"),
+            ):
+                self.assertTrue(memory_factory._delete_session_state(self.base_dir, "s1"))
+            self.assertEqual(store.load("s1"), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
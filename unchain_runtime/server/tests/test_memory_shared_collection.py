@@ -0,0 +1,372 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+SERVER_ROOT = Path(__file__).resolve().parents[1]
+if str(SERVER_ROOT) not in sys.path:
+    sys.path.insert(0, str(SERVER_ROOT))
+
+import memory_factory  # noqa: E402
+import memory_shared_collection  # noqa: E402
+from memory_session_store import SqliteSessionStore, close_session_stores  # noqa: E402
+
+
+class _Model:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and self.__dict__ == other.__dict__
+
+
+def _fake_qdrant_modules():
+    models = types.ModuleType("qdrant_client.http.models")
+    for name in (
+        "FieldCondition",
+        "MatchValue",
+        "Filter",
+        "FilterSelector",
+        "PointStruct",
+        "VectorParams",
+        "VectorParamsDiff",
+        "ScalarQuantization",
+        "ScalarQuantizationConfig",
+        "HnswConfigDiff",
+        "SearchParams",
+        "QuantizationSearchParams",
+    ):
+        setattr(models, name, type(name, (_Model,), {}))
+    models.Distance = types.SimpleNamespace(COSINE="Cosine")
+    models.ScalarType = types.SimpleNamespace(INT8="int8")
+    models.PayloadSchemaType = types.SimpleNamespace(KEYWORD="keyword", INTEGER="integer")
+    http = types.ModuleType("qdrant_client.http")
+    http.models = models
+    return {
+        "qdrant_client": types.ModuleType("qdrant_client"),
+        "qdrant_client.http": http,
+        "qdrant_client.http.models": models,
+    }
+
+
+def _matches(query_filter, payload):
+    if query_filter is None:
+        return True
+    return all(payload.get(c.key) == c.match.value for c in query_filter.must)
+
+
+class _FakeQdrant:
+    """In-memory stand-in for the parts of QdrantClient the layout uses."""
+
+    def __init__(self):
+        self.collections = {}
+        self.indexes = []
+        self.deleted_collections = []
+
+    def collection_exists(self, *, collection_name):
+        return collection_name in self.collections
+
+    def create_collection(self, *, collection_name, vectors_config=None, **_kwargs):
+        self.collections[collection_name] = {}
+
+    def create_payload_index(self, *, collection_name, field_name, field_schema):
+        self.indexes.append((collection_name, field_name))
+
+    def get_collections(self):
+        return types.SimpleNamespace(
+            collections=[types.SimpleNamespace(name=name) for name in self.collections]
+        )
+
+    def delete_collection(self, collection_name):
+        self.deleted_collections.append(collection_name)
+        self.collections.pop(collection_name, None)
+
+    def upsert(self, *, collection_name, points, wait=True):
+        for point in points:
+            self.collections[collection_name][point.id] = (point.vector, dict(point.payload))
+
+    def query_points(self, *, collection_name, query, limit, with_payload=True, query_filter=None):
+        hits = [
+            types.SimpleNamespace(
+                id=point_id,
+                score=sum(a * b for a, b in zip(query, vector)),
+                payload=payload,
+            )
+            for point_id, (vector, payload) in self.collections[collection_name].items()
+            if _matches(query_filter, payload)
+        ]
+        hits.sort(key=lambda hit: -hit.score)
+        return types.SimpleNamespace(points=hits[:limit])
+
+    def delete(self, *, collection_name, points_selector, wait=True):
+        points = self.collections[collection_name]
+        for point_id in [pid for pid, (_v, p) in points.items() if _matches(points_selector.filter, p)]:
+            del points[point_id]
+
+    def scroll(self, *, collection_name, limit, with_payload=True, with_vectors=False,
+               offset=None, scroll_filter=None):
+        if collection_name not in self.collections:
+            raise ValueError(f"Collection {collection_name} not found")
+        records = [
+            types.SimpleNamespace(id=point_id, vector=vector, payload=payload)
+            for point_id, (vector, payload) in sorted(self.collections[collection_name].items())
+            if _matches(scroll_filter, payload)
+        ]
+        start = offset or 0
+        page = records[start:start + limit]
+        next_offset = start + limit if start + limit < len(records) else None
+        return page, next_offset
+
+    def count(self, *, collection_name, exact=True, count_filter=None):
+        return types.SimpleNamespace(count=sum(
+            1 for _v, payload in self.collections[collection_name].values()
+            if _matches(count_filter, payload)
+        ))
+
+
+def _embed(texts):
+    return [[float(len(text)), 1.0] for text in texts]
+
+
+def _shared_adapter(client, tag="t1"):
+    return memory_shared_collection.SharedSessionVectorAdapter(
+        client=client,
+        embed_fn=_embed,
+        vector_size=2,
+        embedding_signature="openai:text-embedding-3-small:2",
+        tag=tag,
+    )
+
+
+class SharedCollectionTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._modules = mock.patch.dict(sys.modules, _fake_qdrant_modules())
+        self._modules.start()
+        self.client = _FakeQdrant()
+
+    def tearDown(self) -> None:
+        self._modules.stop()
+
+
+class SharedSessionVectorAdapterTests(SharedCollectionTestCase):
+    def test_sessions_share_one_collection_and_search_only_their_own_turns(self) -> None:
+        adapter = _shared_adapter(self.client)
+        adapter.add_texts(
+            session_id="s1",
+            texts=["short", "a longer turn"],
+            metadatas=[{"turn_start_index": 0}, {"turn_start_index": 2}],
+        )
+        adapter.add_texts(session_id="s2", texts=["other thread"], metadatas=[{"turn_start_index": 0}])
+        # re-committing a turn overwrites its point instead of duplicating it
+        adapter.add_texts(session_id="s1", texts=["short"], metadatas=[{"turn_start_index": 0}])
+
+        self.assertEqual(list(self.client.collections), [adapter.collection_name])
+        self.assertEqual(len(self.client.collections[adapter.collection_name]), 3)
+        self.assertIn((adapter.collection_name, "session_id"), self.client.indexes)
+        self.assertIn((adapter.collection_name, "tag"), self.client.indexes)
+
+        recalled = adapter.similarity_search(session_id="s1", query="query", k=5)
+        self.assertEqual([item["text"] for item in recalled], ["a longer turn", "short"])
+
+        memory_shared_collection.delete_shared_session_points(self.client, "s1")
+        self.assertEqual(adapter.similarity_search(session_id="s1", query="query", k=5), [])
+        self.assertEqual(len(adapter.similarity_search(session_id="s2", query="q", k=5)), 1)
+
+    def test_session_scoped_client_scrolls_and_counts_one_session(self) -> None:
+        adapter = _shared_adapter(self.client)
+        adapter.add_texts(
+            session_id="s1",
+            texts=["a", "b"],
+            metadatas=[{"turn_start_index": 0}, {"turn_start_index": 2}],
+        )
+        adapter.add_texts(session_id="s2", texts=["c"], metadatas=[{"turn_start_index": 0}])
+        scoped = memory_shared_collection.SessionScopedClient(
+            self.client,
+            adapter.collection_name,
+            memory_shared_collection.session_filter("s1", "t1"),
+        )
+
+        records, _offset = scoped.scroll(collection_name=adapter.collection_name, limit=10)
+
+        self.assertEqual(sorted(record.payload["text"] for record in records), ["a", "b"])
+        self.assertEqual(scoped.count(collection_name=adapter.collection_name).count, 2)
+
+
+class SharedLayoutSessionTests(SharedCollectionTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.data_dir = self._tmp.name
+        self._env = mock.patch.dict(
+            os.environ,
+            {"UNCHAIN_DATA_DIR": self.data_dir, "UNCHAIN_SESSION_STORE": "sqlite"},
+        )
+        self._env.start()
+        self.store = SqliteSessionStore(memory_factory._sessions_dir(self.data_dir))
+
+    def tearDown(self) -> None:
+        close_session_stores()
+        self._env.stop()
+        self._tmp.cleanup()
+        super().tearDown()
+
+    def _patched(self):
+        return (
+            mock.patch.object(memory_factory, "_QDRANT_AVAILABLE", True),
+            mock.patch.object(memory_factory, "_get_or_create_qdrant_client", return_value=self.client),
+        )
+
+    def test_fresh_sessions_take_the_configured_layout(self) -> None:
+        with mock.patch.dict(os.environ, {"UNCHAIN_MEMORY_VECTOR_LAYOUT": "shared"}):
+            memory_factory._prepare_vector_collection_tag(
+                store=self.store,
+                client=self.client,
+                session_id="s1",
+                embedding_signature="openai:text-embedding-3-small:2",
+            )
+        memory_factory._prepare_vector_collection_tag(
+            store=self.store,
+            client=self.client,
+            session_id="s2",
+            embedding_signature="openai:text-embedding-3-small:2",
+        )
+
+        self.assertEqual(self.store.load("s1")["vector_layout"], "shared")
+        self.assertNotIn("vector_layout", self.store.load("s2"))
+
+    def test_delete_session_removes_shared_points_by_filter(self) -> None:
+        adapter = _shared_adapter(self.client)
+        adapter.add_texts(session_id="s1", texts=["a"], metadatas=[{"turn_start_index": 0}])
+        adapter.add_texts(session_id="s2", texts=["b"], metadatas=[{"turn_start_index": 0}])
+        self.store.save("s1", {"messages": [], "vector_collection_tag": "t1", "vector_layout": "shared"})
+
+        patches = self._patched()
+        with patches[0], patches[1]:
+            result = memory_factory.delete_short_term_session_memory(session_id="s1")
+
+        self.assertEqual(result["session_id"], "s1")
+        payloads = [p for _v, p in self.client.collections[adapter.collection_name].values()]
+        self.assertEqual([p["session_id"] for p in payloads], ["s2"])
+
+    def test_migration_copies_per_session_collections_into_the_shared_layout(self) -> None:
+        signature = "openai:text-embedding-3-small:2"
+        self.client.collections["chat_t1_s1"] = {
+            1: ([1.0, 0.0], {"text": "first", "turn_start_index": 0}),
+            2: ([0.0, 1.0], {"text": "second", "turn_start_index": 2}),
+        }
+        self.store.save("s1", {
+            "messages": [{"role": "user", "content": "x"}] * 4,
+            "vector_collection_tag": "t1",
+            "vector_embedding_signature": signature,
+            "vector_indexed_until": 4,
+        })
+        self.store.save("s2", {"messages": []})
+
+        patches = self._patched()
+        with patches[0], patches[1]:
+            dry = memory_factory.migrate_sessions_to_shared_layout(self.data_dir, dry_run=True)
+            summary = memory_factory.migrate_sessions_to_shared_layout(self.data_dir)
+            again = memory_factory.migrate_sessions_to_shared_layout(self.data_dir, session_ids=["s1"])
+
+        self.assertEqual([entry["status"] for entry in dry["sessions"]], ["would_migrate", "no_vectors"])
+        self.assertEqual(summary["migrated"], 1)
+        self.assertEqual(summary["sessions"][0]["points"], 2)
+        self.assertEqual(again["sessions"][0]["status"], "already_shared")
+        self.assertEqual(self.store.load("s1")["vector_layout"], "shared")
+        self.assertIn("chat_t1_s1", self.client.deleted_collections)
+
+        shared = _shared_adapter(self.client, tag="t1")
+        recalled = shared.similarity_search(session_id="s1", query="abc", k=5)
+        self.assertEqual(sorted(item["text"] for item in recalled), ["first", "second"])
+
+
+    def _per_session_fixture(self) -> str:
+        signature = "openai:text-embedding-3-small:2"
+        self.client.collections["chat_t1_s1"] = {
+            1: ([1.0, 0.0], {"text": "first", "turn_start_index": 0}),
+        }
+        self.store.save("s1", {
+            "messages": [{"role": "user", "content": "x"}] * 2,
+            "vector_collection_tag": "t1",
+            "vector_embedding_signature": signature,
+            "vector_indexed_until": 2,
+        })
+        return signature
+
+    def _committing_manager(self, on_commit):
+        manager = types.SimpleNamespace(commit_messages=on_commit)
+        return memory_shared_collection.guard_layout_commits(
+            manager,
+            client=self.client,
+            store=self.store,
+            session_id="s1",
+            layout="per_session",
+        )
+
+    def test_migration_flip_waits_for_an_in_flight_commit(self) -> None:
+        self._per_session_fixture()
+        loaded = threading.Event()
+        proceed = threading.Event()
+
+        def commit_messages():
+            state = self.store.load("s1")
+            loaded.set()
+            proceed.wait(5)
+            self.client.collections.setdefault("chat_t1_s1", {})[2] = (
+                [0.0, 1.0],
+                {"text": "second", "turn_start_index": 2},
+            )
+            state["vector_indexed_until"] = 4
+            self.store.save("s1", state)
+
+        manager = self._committing_manager(commit_messages)
+        committer = threading.Thread(target=manager.commit_messages)
+        committer.start()
+        loaded.wait(5)
+        summary = {}
+        patches = self._patched()
+        with patches[0], patches[1]:
+            migrator = threading.Thread(
+                target=lambda: summary.update(
+                    memory_factory.migrate_sessions_to_shared_layout(self.data_dir)
+                ),
+            )
+            migrator.start()
+            time.sleep(0.1)
+            proceed.set()
+            committer.join(5)
+            migrator.join(5)
+
+        self.assertEqual(summary["sessions"][0]["status"], "migrated")
+        self.assertEqual(self.store.load("s1")["vector_layout"], "shared")
+        self.assertNotIn("chat_t1_s1", self.client.collections)
+        recalled = _shared_adapter(self.client).similarity_search(session_id="s1", query="ab", k=5)
+        self.assertEqual(sorted(item["text"] for item in recalled), ["first", "second"])
+
+    def test_commit_from_a_pre_migration_manager_is_folded_into_shared(self) -> None:
+        self._per_session_fixture()
+
+        def commit_messages():
+            self.client.collections.setdefault("chat_t1_s1", {})[2] = (
+                [0.0, 1.0],
+                {"text": "late", "turn_start_index": 2},
+            )
+
+        manager = self._committing_manager(commit_messages)
+        patches = self._patched()
+        with patches[0], patches[1]:
+            memory_factory.migrate_sessions_to_shared_layout(self.data_dir)
+        manager.commit_messages()
+
+        self.assertNotIn("chat_t1_s1", self.client.collections)
+        recalled = _shared_adapter(self.client).similarity_search(session_id="s1", query="ab", k=5)
+        self.assertEqual(sorted(item["text"] for item in recalled), ["first", "late"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -482,7 +482,13 @@ class ModelsCatalogRouteTests(unittest.TestCase):
             payload_text = response.get_data(as_text=True)
 
         self.assertEqual(response.status_code, 200)
-        self.assertIn('"code": "memory_unavailable"', payload_text)
+        frames = [
+            json.loads(line.split(":", 1)[1])
+            for line in payload_text.splitlines()
+            if line.startswith("data:")
+        ]
+        error_frame = next(frame for frame in frames if frame.get("type") == "error")
+        self.assertEqual(error_frame["payload"]["code"], "memory_unavailable")
 
     def test_memory_projection_paginates_scroll_results(self) -> None:
         point_one = types.SimpleNamespace(
@@ -644,6 +650,203 @@ class ModelsCatalogRouteTests(unittest.TestCase):
             ["Cluster 1", "Cluster 1"],
         )
 
+    def test_long_term_projection_reuses_cached_coords_until_collection_changes(self) -> None:
+        import memory_projection_cache
+
+        points = [
+            types.SimpleNamespace(id="lt-1", vector=[1.0, 0.0, 0.0], payload={"text": "first"}),
+            types.SimpleNamespace(id="lt-2", vector=[0.0, 1.0, 0.0], payload={"text": "second"}),
+            types.SimpleNamespace(id="lt-3", vector=[0.0, 0.0, 1.0], payload={"text": "third"}),
+        ]
+
+        class FakeClient:
+            def __init__(self) -> None:
+                self.scroll_calls = []
+
+            def get_collections(self):
+                return types.SimpleNamespace(
+                    collections=[types.SimpleNamespace(name="long_term_legacy")]
+                )
+
+            def count(self, **_kwargs):
+                return types.SimpleNamespace(count=len(points))
+
+            def scroll(self, **kwargs):
+                self.scroll_calls.append(kwargs)
+                return list(points), None
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            fake_client = FakeClient()
+            fake_memory_factory = types.SimpleNamespace(
+                _data_dir=lambda: data_dir,
+                _normalize_data_dir=lambda value: value,
+                _get_or_create_qdrant_client=lambda _data_dir: fake_client,
+            )
+            kmeans = mock.Mock(return_value=[0, 1, 1])
+            with (
+                mock.patch.dict(sys.modules, {"memory_factory": fake_memory_factory}),
+                mock.patch.object(miso_routes, "_kmeans_2d_numpy", kmeans),
+            ):
+                first = self.client.get("/memory/long-term/projection").get_json()
+                second = self.client.get("/memory/long-term/projection").get_json()
+                memory_projection_cache.invalidate_projection_cache(
+                    data_dir,
+                    memory_projection_cache.LONG_TERM_SCOPE,
+                )
+                self.client.get("/memory/long-term/projection")
+
+        self.assertEqual(kmeans.call_count, 2)
+        self.assertEqual(first["points"], second["points"])
+        self.assertEqual(first["variance"], second["variance"])
+        self.assertEqual(
+            [call["with_vectors"] for call in fake_client.scroll_calls],
+            [True, False, True],
+        )
+
+    def test_long_term_projection_v2_pages_columns_and_fetches_text_lazily(self) -> None:
+        points = [
+            types.SimpleNamespace(
+                id=index,
+                vector=[float(index), float(index % 3), 1.0],
+                payload={"text": f"user: memory {index}"},
+            )
+            for index in range(6)
+        ]
+
+        class FakeClient:
+            def __init__(self) -> None:
+                self.retrieved = []
+
+            def get_collections(self):
+                return types.SimpleNamespace(
+                    collections=[types.SimpleNamespace(name="long_term_legacy")]
+                )
+
+            def count(self, **_kwargs):
+                return types.SimpleNamespace(count=len(points))
+
+            def scroll(self, **_kwargs):
+                return list(points), None
+
+            def retrieve(self, **kwargs):
+                self.retrieved.append(kwargs)
+                return [point for point in points if point.id in kwargs["ids"]]
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            profiles_dir = Path(data_dir) / "memory" / "long_term_profiles"
+            profiles_dir.mkdir(parents=True)
+            (profiles_dir / "pupu_default.json").write_text(
+                json.dumps({"name": "Ada", "notes": "x" * 500}),
+                encoding="utf-8",
+            )
+            fake_client = FakeClient()
+            fake_memory_factory = types.SimpleNamespace(
+                _data_dir=lambda: data_dir,
+                _normalize_data_dir=lambda value: value,
+                _get_or_create_qdrant_client=lambda _data_dir: fake_client,
+            )
+            with (
+                mock.patch.dict(sys.modules, {"memory_factory": fake_memory_factory}),
+                mock.patch.object(miso_routes, "_kmeans_2d_numpy", return_value=[0, 0, 0, 1, 1, 1]),
+            ):
+                first = self.client.get("/memory/long-term/projection/v2?limit=2&cluster=1").get_json()
+                second = self.client.get(
+                    f"/memory/long-term/projection/v2?limit=2&cluster=1&cursor={first['cursor']}"
+                ).get_json()
+                stale = self.client.get("/memory/long-term/projection/v2?cursor=deadbeef:2")
+                texts = self.client.post(
+                    "/memory/long-term/projection/v2/text",
+                    json={"ids": ["long_term_legacy:4", "long_term_legacy:99"]},
+                ).get_json()
+                profile = self.client.get("/memory/long-term/profiles/pupu_default").get_json()
+                bad_key = self.client.get("/memory/long-term/profiles/..secret")
+
+        self.assertEqual(first["total"], 6)
+        self.assertEqual(first["matched"], 3)
+        self.assertEqual(first["ids"], ["long_term_legacy:3", "long_term_legacy:4"])
+        self.assertEqual(first["cluster"], [1, 1])
+        self.assertEqual(len(first["x"]), 2)
+        self.assertNotIn("text", first)
+        self.assertEqual(first["profiles"][0]["storage_key"], "pupu_default")
+        self.assertNotIn("document", first["profiles"][0])
+        self.assertEqual(second["ids"], ["long_term_legacy:5"])
+        self.assertIsNone(second["cursor"])
+        self.assertNotIn("profiles", second)
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(texts["points"][0]["id"], "long_term_legacy:4")
+        self.assertEqual(texts["points"][0]["text"], "user: memory 4")
+        self.assertEqual(texts["points"][0]["label"], "memory 4")
+        self.assertEqual(texts["missing"], ["long_term_legacy:99"])
+        self.assertEqual(profile["document"]["name"], "Ada")
+        self.assertEqual(bad_key.status_code, 400)
+
+    def test_long_term_projection_v2_text_resolves_ids_per_collection(self) -> None:
+        point_uuid = "6f1c2d3e-4b5a-4978-8a1b-2c3d4e5f6a7b"
+        collections = {
+            "long_term_aaaaaaaaaaaa_ns": [
+                types.SimpleNamespace(id=1, payload={"text": "first collection"}),
+            ],
+            "long_term_bbbbbbbbbbbb_ns": [
+                types.SimpleNamespace(id=1, payload={"text": "second collection"}),
+                types.SimpleNamespace(id=point_uuid, payload={"text": "by uuid"}),
+            ],
+        }
+
+        class FakeClient:
+            def __init__(self) -> None:
+                self.retrieved = []
+
+            def get_collections(self):
+                return types.SimpleNamespace(
+                    collections=[types.SimpleNamespace(name=name) for name in collections]
+                )
+
+            def retrieve(self, **kwargs):
+                for point_id in kwargs["ids"]:
+                    if not isinstance(point_id, int) and point_id != point_uuid:
+                        raise ValueError(f"Unable to parse point id {point_id!r}")
+                self.retrieved.append(kwargs)
+                return [
+                    point
+                    for point in collections[kwargs["collection_name"]]
+                    if point.id in kwargs["ids"]
+                ]
+
+        with tempfile.TemporaryDirectory() as data_dir:
+            fake_client = FakeClient()
+            fake_memory_factory = types.SimpleNamespace(
+                _data_dir=lambda: data_dir,
+                _normalize_data_dir=lambda value: value,
+                _get_or_create_qdrant_client=lambda _data_dir: fake_client,
+            )
+            requested = [
+                "long_term_bbbbbbbbbbbb_ns:1",
+                "long_term_aaaaaaaaaaaa_ns:1",
+                f"long_term_bbbbbbbbbbbb_ns:{point_uuid}",
+                "long_term_aaaaaaaaaaaa_ns:not-an-id",
+                f"long_term_aaaaaaaaaaaa_ns:{point_uuid.upper()}",
+                "long_term_unknown:1",
+                "1",
+            ]
+            with mock.patch.dict(sys.modules, {"memory_factory": fake_memory_factory}):
+                response = self.client.post(
+                    "/memory/long-term/projection/v2/text",
+                    json={"ids": requested},
+                )
+
+        self.assertEqual(response.status_code, 200)
+        payload = response.get_json()
+        self.assertEqual(
+            [(point["id"], point["text"]) for point in payload["points"]],
+            [
+                ("long_term_bbbbbbbbbbbb_ns:1", "second collection"),
+                ("long_term_aaaaaaaaaaaa_ns:1", "first collection"),
+                (f"long_term_bbbbbbbbbbbb_ns:{point_uuid}", "by uuid"),
+            ],
+        )
+        self.assertEqual(payload["missing"], requested[3:])
+        self.assertEqual(len(fake_client.retrieved), 2)
+
     def test_chat_stream_v2_requires_message_or_attachments(self) -> None:
         response = self.client.post(
             "/chat/stream/v2",
@@ -93,6 +93,20 @@ class LoadRecipeTests(unittest.TestCase):
             with patch("pathlib.Path.home", return_value=Path(tmp)):
                 self.assertIsNone(load_recipe("bad/name"))
 
+    def test_reuses_parsed_recipe_until_file_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with patch("pathlib.Path.home", return_value=Path(tmp)):
+                save_recipe(SaveRecipeTests()._valid_dict("Cached"))
+                first = load_recipe("Cached")
+                self.assertIs(load_recipe("Cached"), first)
+
+                payload = SaveRecipeTests()._valid_dict("Cached")
+                payload["description"] = "edited on disk"
+                save_recipe(payload)
+                second = load_recipe("Cached")
+                self.assertIsNot(second, first)
+                self.assertEqual(second.description, "edited on disk")
+
 
 class SaveRecipeTests(unittest.TestCase):
     def _valid_dict(self, name="NewRecipe"):
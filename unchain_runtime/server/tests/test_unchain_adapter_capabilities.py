@@ -144,7 +144,11 @@ class MisoAdapterCapabilityCatalogTests(unittest.TestCase):
                     ]
                 }
 
-        fake_httpx = SimpleNamespace(get=mock.Mock(return_value=_FakeResponse()))
+        import ollama_inventory
+
+        fake_client = SimpleNamespace(get=mock.Mock(return_value=_FakeResponse()))
+        ollama_inventory.clear_ollama_inventory()
+        self.addCleanup(ollama_inventory.clear_ollama_inventory)
 
         with mock.patch.object(
             unchain_adapter,
@@ -153,7 +157,14 @@ class MisoAdapterCapabilityCatalogTests(unittest.TestCase):
         ), mock.patch.object(
             unchain_adapter,
             "_httpx",
-            fake_httpx,
+            SimpleNamespace(),
+        ), mock.patch.object(
+            ollama_inventory,
+            "get_ollama_client",
+            return_value=fake_client,
+        ), mock.patch.object(
+            ollama_inventory,
+            "start_ollama_inventory_refresher",
         ):
             providers = unchain_adapter.get_capability_catalog()
 
@@ -187,6 +198,41 @@ class MisoAdapterCapabilityCatalogTests(unittest.TestCase):
             },
         )
 
+    def test_capability_catalog_is_parsed_once_until_file_changes(self) -> None:
+        payload = {
+            "gpt-5": {"provider": "openai", "max_context_window_tokens": 400000},
+            "claude-opus-4.6": {"provider": "anthropic", "max_context_window_tokens": 200000},
+        }
+        temp_dir, capability_file = self._write_capability_file(payload)
+        self.addCleanup(temp_dir.cleanup)
+
+        real_loads = json.loads
+        with mock.patch.object(
+            unchain_adapter,
+            "_capability_file_candidates",
+            return_value=[capability_file],
+        ), mock.patch.object(
+            unchain_adapter.json, "loads", side_effect=real_loads
+        ) as loads_mock:
+            self.assertEqual(
+                unchain_adapter.get_max_context_window_tokens("anthropic", "claude-opus-4-6"),
+                200000,
+            )
+            self.assertEqual(unchain_adapter.get_max_context_window_tokens("openai", "gpt-5"), 400000)
+            self.assertEqual(unchain_adapter.get_max_context_window_tokens("openai", "missing"), 0)
+            self.assertEqual(loads_mock.call_count, 1)
+
+            payload["gpt-5"]["max_context_window_tokens"] = 128000
+            capability_file.write_text(json.dumps(payload), encoding="utf-8")
+            stat = capability_file.stat()
+            os.utime(capability_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+            self.assertEqual(unchain_adapter.get_max_context_window_tokens("openai", "gpt-5"), 128000)
+            self.assertEqual(loads_mock.call_count, 2)
+
+            unchain_adapter.reload_capability_catalog()
+            self.assertEqual(loads_mock.call_count, 3)
+
     def test_get_model_capability_catalog_normalizes_modalities_and_sources(self) -> None:
         payload = {
             "gpt-5": {
@@ -1426,6 +1472,27 @@ class MisoAdapterCapabilityCatalogTests(unittest.TestCase):
         self.assertEqual(events[1]["type"], "error")
         self.assertEqual(events[1]["code"], "memory_unavailable")
 
+    def test_stream_chat_events_cancels_recall_prefetch_when_agent_setup_fails(self) -> None:
+        prefetch = mock.Mock()
+
+        with mock.patch.object(
+            unchain_adapter, "_start_recall_prefetch", return_value=prefetch
+        ), mock.patch.object(
+            unchain_adapter, "_create_agent", side_effect=RuntimeError("toolkit failed")
+        ):
+            with self.assertRaises(RuntimeError):
+                list(
+                    unchain_adapter.stream_chat_events(
+                        message="hello",
+                        history=[],
+                        attachments=[],
+                        options={"memory_enabled": True},
+                        session_id="chat-1",
+                    )
+                )
+
+        prefetch.cancel.assert_called_once_with()
+
     def test_stream_chat_events_always_reports_developer_active_agent_in_bundle(self) -> None:
         class FakeAgent:
             def __init__(self):
@@ -3015,5 +3082,83 @@ class CreateAgentRecipeWiringTests(unittest.TestCase):
                 self.assertIn("gpt-4o", captured.get("model", ""))
 
 
+class AgentBlueprintCacheTests(unittest.TestCase):
+    class _FakeAgent:
+        def __init__(self, **kwargs):
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+
+    def setUp(self) -> None:
+        from agent_blueprint_cache import invalidate_agent_blueprints
+
+        invalidate_agent_blueprints()
+        self._baseline = self._stats()
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.home = Path(self._tmp.name)
+        for patcher in (
+            mock.patch("pathlib.Path.home", return_value=self.home),
+            mock.patch.dict(os.environ, {"UNCHAIN_API_KEY": "dummy"}, clear=False),
+            mock.patch.object(unchain_adapter, "_UnchainAgent", self._FakeAgent),
+            mock.patch.object(unchain_adapter, "_PoliciesModule", self._FakeAgent),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _save(self, prompt: str) -> None:
+        from recipe_loader import save_recipe
+
+        save_recipe({
+            "name": "Blueprint",
+            "description": "",
+            "model": None,
+            "max_iterations": None,
+            "agent": {"prompt_format": "soul", "prompt": prompt},
+            "toolkits": [],
+            "subagent_pool": [],
+        })
+
+    def _stats(self) -> dict:
+        from agent_blueprint_cache import agent_blueprint_stats
+
+        stats = agent_blueprint_stats()
+        baseline = getattr(self, "_baseline", None) or {}
+        return {
+            key: value if key == "entries" else value - baseline.get(key, 0)
+            for key, value in stats.items()
+        }
+
+    def test_second_request_reuses_blueprint_but_binds_fresh_state(self) -> None:
+        self._save("first prompt")
+        options = {"recipe_name": "Blueprint", "modelId": "openai:gpt-5"}
+
+        first = unchain_adapter._create_agent(options, session_id="a")
+        second = unchain_adapter._create_agent(options, session_id="b")
+
+        stats = self._stats()
+        self.assertEqual((stats["misses"], stats["hits"]), (1, 1))
+        self.assertIsNot(first, second)
+        self.assertIsNot(first._toolkits, second._toolkits)
+        self.assertEqual(second.instructions, "first prompt")
+
+    def test_saving_recipe_invalidates_blueprint(self) -> None:
+        self._save("first prompt")
+        options = {"recipe_name": "Blueprint", "modelId": "openai:gpt-5"}
+        unchain_adapter._create_agent(options)
+
+        self._save("second prompt, longer")
+        agent = unchain_adapter._create_agent(options)
+
+        self.assertEqual(agent.instructions, "second prompt, longer")
+        self.assertEqual(self._stats()["misses"], 2)
+
+    def test_different_models_use_separate_blueprints(self) -> None:
+        self._save("x")
+        unchain_adapter._create_agent({"recipe_name": "Blueprint", "modelId": "openai:gpt-5"})
+        unchain_adapter._create_agent({"recipe_name": "Blueprint", "modelId": "openai:gpt-4o"})
+
+        self.assertEqual(self._stats()["entries"], 2)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -18,11 +18,24 @@ from pathlib import Path
 from types import SimpleNamespace
 from typing import Any, Dict, Iterable, List
 
+from agent_blueprint_cache import (
+    AgentBlueprint,
+    get_agent_blueprint,
+    invalidate_agent_blueprints,
+)
+from ollama_inventory import get_ollama_inventory
+from stream_coalescing import (
+    EventChannel,
+    WaitForEvents,
+    drain_event_queue,
+    resolve_coalescing_options,
+)
 from mcp_toolkits import (
     McpToolkitError,
     build_mcp_runtime_toolkit,
     get_installed_mcp_toolkit,
     list_installed_mcp_toolkits,
+    release_mcp_runtime_toolkit,
 )
 
 _subagent_logger = logging.getLogger(__name__ + ".subagent")
@@ -899,11 +912,37 @@ def _capability_file_candidates() -> List[Path]:
     return unique_candidates
 
 
+_EMPTY_CAPABILITY_CATALOG: Dict[str, Dict[str, object]] = {}
+_capability_catalog_lock = threading.Lock()
+_capability_catalog_state: Dict[str, Any] = {
+    "signature": None,
+    "raw": None,
+    "index": None,
+}
+
+
+def _capability_file_signature(candidate: Path) -> tuple | None:
+    try:
+        stat = candidate.stat()
+    except OSError:
+        return None
+    if not candidate.is_file():
+        return None
+    return (str(candidate), stat.st_mtime_ns, stat.st_size)
+
+
 def _load_raw_capability_catalog() -> Dict[str, Dict[str, object]]:
+    """Return the parsed model_capabilities.json, re-read only when the
+    resolved file or its mtime/size changes."""
     for candidate in _capability_file_candidates():
-        if not candidate.exists() or not candidate.is_file():
+        signature = _capability_file_signature(candidate)
+        if signature is None:
             continue
 
+        with _capability_catalog_lock:
+            if _capability_catalog_state["signature"] == signature:
+                return _capability_catalog_state["raw"]
+
         try:
             raw = json.loads(candidate.read_text(encoding="utf-8"))
         except Exception:
@@ -917,9 +956,78 @@ def _load_raw_capability_catalog() -> Dict[str, Dict[str, object]]:
             if not isinstance(model_name, str) or not isinstance(capabilities, dict):
                 continue
             catalog[model_name] = capabilities
+        with _capability_catalog_lock:
+            _capability_catalog_state["signature"] = signature
+            _capability_catalog_state["raw"] = catalog
         return catalog
 
-    return {}
+    return _EMPTY_CAPABILITY_CATALOG
+
+
+def _build_capability_catalog_index(
+    raw_catalog: Dict[str, Dict[str, object]],
+) -> Dict[str, Any]:
+    chat_models: Dict[str, set] = {"openai": set(), "anthropic": set(), "ollama": set()}
+    embedding_models: set = set()
+    context_windows: Dict[tuple, int] = {}
+    model_capabilities: Dict[str, Dict[str, object]] = {}
+
+    for model_name, capabilities in raw_catalog.items():
+        provider = str(capabilities.get("provider", "")).strip().lower()
+        normalized_model = _normalize_provider_model_name(provider, model_name)
+        is_embedding = _is_embedding_model(capabilities)
+
+        # First valid entry wins, matching the order of the JSON file.
+        max_ctx = capabilities.get("max_context_window_tokens")
+        if isinstance(max_ctx, (int, float)) and max_ctx > 0:
+            context_windows.setdefault((provider, normalized_model), int(max_ctx))
+
+        if is_embedding:
+            if provider == "openai" and normalized_model:
+                embedding_models.add(normalized_model)
+            continue
+        if provider in chat_models and normalized_model:
+            chat_models[provider].add(normalized_model)
+        if provider in _SUPPORTED_PROVIDERS and normalized_model:
+            model_capabilities[f"{provider}:{normalized_model}"] = (
+                _normalize_model_capabilities(capabilities)
+            )
+
+    return {
+        "chat_models": {provider: sorted(names) for provider, names in chat_models.items()},
+        "embedding_models": sorted(embedding_models),
+        "context_windows": context_windows,
+        "model_capabilities": {
+            model_id: model_capabilities[model_id] for model_id in sorted(model_capabilities)
+        },
+    }
+
+
+def _capability_catalog_index() -> Dict[str, Any]:
+    raw_catalog = _load_raw_capability_catalog()
+    with _capability_catalog_lock:
+        index = _capability_catalog_state["index"]
+        if index is not None and index["raw"] is raw_catalog:
+            return index
+    index = {"raw": raw_catalog, **_build_capability_catalog_index(raw_catalog)}
+    with _capability_catalog_lock:
+        replaced = _capability_catalog_state["index"] is not None
+        _capability_catalog_state["index"] = index
+    if replaced:
+        # Blueprints carry the context-window size for their model.
+        invalidate_agent_blueprints()
+    return index
+
+
+def reload_capability_catalog() -> Dict[str, int]:
+    """Drop the cached capability catalog and re-read it from disk."""
+    with _capability_catalog_lock:
+        _capability_catalog_state["signature"] = None
+        _capability_catalog_state["raw"] = None
+        _capability_catalog_state["index"] = None
+    invalidate_agent_blueprints()
+    index = _capability_catalog_index()
+    return {"models": len(index["raw"])}
 
 
 def _normalize_input_modalities(raw_modalities: object) -> List[str]:
@@ -1036,122 +1144,67 @@ def get_default_model_capabilities() -> Dict[str, object]:
 
 
 def _fetch_ollama_models(chat_only: bool = False) -> List[str]:
-    """Query the local Ollama daemon for all installed model names.
+    """Return installed Ollama model names from the cached inventory.
 
-    Returns an empty list if Ollama is unreachable or httpx is unavailable.
+    Never blocks on a down daemon once the host has been probed; returns an
+    empty list if Ollama is unreachable or httpx is unavailable.
     """
     if _httpx is None:
         return []
 
-    ollama_host = os.environ.get("OLLAMA_HOST", "http://localhost:11434").rstrip("/")
-    try:
-        response = _httpx.get(f"{ollama_host}/api/tags", timeout=3.0)
-        response.raise_for_status()
-        data = response.json()
-        models = data.get("models") or []
-        names: List[str] = []
-        for entry in models:
-            name = str(entry.get("name") or entry.get("model") or "").strip()
-            if name:
-                if chat_only and _is_ollama_embedding_entry(entry):
-                    continue
-                names.append(name)
-        return names
-    except Exception:
-        return []
+    names: List[str] = []
+    for entry in get_ollama_inventory()["models"]:
+        name = str(entry.get("name") or entry.get("model") or "").strip()
+        if name:
+            if chat_only and _is_ollama_embedding_entry(entry):
+                continue
+            names.append(name)
+    return names
 
 
 def get_capability_catalog() -> Dict[str, List[str]]:
+    index = _capability_catalog_index()
     providers: Dict[str, List[str]] = {
-        "openai": [],
-        "anthropic": [],
-        "ollama": [],
+        provider: list(names) for provider, names in index["chat_models"].items()
     }
 
-    raw_catalog = _load_raw_capability_catalog()
-    for model_name, capabilities in raw_catalog.items():
-        provider = str(capabilities.get("provider", "")).strip().lower()
-        if provider not in providers:
-            continue
-        if _is_embedding_model(capabilities):
-            continue
-
-        providers[provider].append(
-            _normalize_provider_model_name(provider, model_name),
-        )
-
     # Merge dynamically discovered Ollama chat models so installed LLMs
     # appear as chips regardless of model_capabilities.json.
+    live_models = []
     for live_model in _fetch_ollama_models(chat_only=True):
         normalized = _normalize_provider_model_name("ollama", live_model)
         if normalized:
-            providers["ollama"].append(normalized)
-
-    for provider_key in providers:
-        providers[provider_key] = sorted({name for name in providers[provider_key] if name})
+            live_models.append(normalized)
+    if live_models:
+        providers["ollama"] = sorted({*providers["ollama"], *live_models})
 
     return providers
 
 
 def get_embedding_provider_catalog() -> Dict[str, List[str]]:
-    providers: Dict[str, List[str]] = {
-        "openai": [],
-    }
-
-    raw_catalog = _load_raw_capability_catalog()
-    for model_name, capabilities in raw_catalog.items():
-        provider = str(capabilities.get("provider", "")).strip().lower()
-        if provider != "openai":
-            continue
-        if not _is_embedding_model(capabilities):
-            continue
-
-        normalized_model = _normalize_provider_model_name(provider, model_name)
-        if not normalized_model:
-            continue
-        providers["openai"].append(normalized_model)
-
-    providers["openai"] = sorted({name for name in providers["openai"] if name})
-    return providers
+    return {"openai": list(_capability_catalog_index()["embedding_models"])}
 
 
 def get_max_context_window_tokens(provider: str, model: str) -> int:
     """Look up max_context_window_tokens for a provider:model pair."""
-    raw_catalog = _load_raw_capability_catalog()
+    normalized_provider = str(provider or "").strip().lower()
     normalized_model = _normalize_provider_model_name(
-        str(provider or "").strip().lower(),
+        normalized_provider,
         str(model or "").strip(),
     )
-    for model_name, caps in raw_catalog.items():
-        cap_provider = str(caps.get("provider", "")).strip().lower()
-        cap_model = _normalize_provider_model_name(cap_provider, model_name)
-        if cap_provider == str(provider or "").strip().lower() and cap_model == normalized_model:
-            val = caps.get("max_context_window_tokens")
-            if isinstance(val, (int, float)) and val > 0:
-                return int(val)
-    return 0
+    return _capability_catalog_index()["context_windows"].get(
+        (normalized_provider, normalized_model),
+        0,
+    )
 
 
 def get_model_capability_catalog() -> Dict[str, Dict[str, object]]:
-    catalog: Dict[str, Dict[str, object]] = {}
-
-    raw_catalog = _load_raw_capability_catalog()
-    for model_name, capabilities in raw_catalog.items():
-        provider = str(capabilities.get("provider", "")).strip().lower()
-        if provider not in _SUPPORTED_PROVIDERS:
-            continue
-        if _is_embedding_model(capabilities):
-            continue
-
-        normalized_model = _normalize_provider_model_name(provider, model_name)
-        if not normalized_model:
-            continue
-
-        model_id = f"{provider}:{normalized_model}"
-        catalog[model_id] = _normalize_model_capabilities(capabilities)
+    """Normalized per-model capabilities keyed by ``provider:model``.
 
-    ordered_model_ids = sorted(catalog)
-    return {model_id: catalog[model_id] for model_id in ordered_model_ids}
+    The nested capability dicts are shared with the cached index and must be
+    treated as read-only.
+    """
+    return dict(_capability_catalog_index()["model_capabilities"])
 
 
 def _resolve_toolkit_base():
@@ -3114,59 +3167,65 @@ def _build_selected_toolkits(
     result: list = []
     generic_toolkit_names: list[str] = []
 
-    for toolkit_name in toolkit_names:
-        if toolkit_name.startswith("mcp."):
-            try:
-                toolkit_instance = build_mcp_runtime_toolkit(toolkit_name)
-            except McpToolkitError as exc:
-                raise RuntimeError(str(exc)) from exc
-            _set_runtime_toolkit_metadata(
-                toolkit_instance,
-                toolkit_id=toolkit_name,
-                toolkit_name=toolkit_name,
-            )
-            result.append(toolkit_instance)
-            continue
-        generic_toolkit_names.append(toolkit_name)
+    # MCP toolkits come out of the session pool; hand them back if a later
+    # toolkit fails to build.
+    try:
+        for toolkit_name in toolkit_names:
+            if toolkit_name.startswith("mcp."):
+                try:
+                    toolkit_instance = build_mcp_runtime_toolkit(toolkit_name)
+                except McpToolkitError as exc:
+                    raise RuntimeError(str(exc)) from exc
+                _set_runtime_toolkit_metadata(
+                    toolkit_instance,
+                    toolkit_id=toolkit_name,
+                    toolkit_name=toolkit_name,
+                )
+                result.append(toolkit_instance)
+                continue
+            generic_toolkit_names.append(toolkit_name)
 
-    if not generic_toolkit_names:
-        return result
+        if not generic_toolkit_names:
+            return result
 
-    try:
-        toolkit_module = importlib.import_module("unchain.toolkits")
-    except Exception as import_error:
-        raise RuntimeError(
-            f"Failed to import unchain.toolkits for toolkit attachment: {import_error}"
-        ) from import_error
+        try:
+            toolkit_module = importlib.import_module("unchain.toolkits")
+        except Exception as import_error:
+            raise RuntimeError(
+                f"Failed to import unchain.toolkits for toolkit attachment: {import_error}"
+            ) from import_error
 
-    for toolkit_name in generic_toolkit_names:
-        normalized_toolkit_name = _TOOLKIT_NAME_ALIASES.get(toolkit_name, toolkit_name)
-        if normalized_toolkit_name == "WorkspaceToolkit":
-            continue
-        if toolkit_name == "builtin_toolkit":
-            continue
+        for toolkit_name in generic_toolkit_names:
+            normalized_toolkit_name = _TOOLKIT_NAME_ALIASES.get(toolkit_name, toolkit_name)
+            if normalized_toolkit_name == "WorkspaceToolkit":
+                continue
+            if toolkit_name == "builtin_toolkit":
+                continue
 
-        toolkit_factory = getattr(toolkit_module, normalized_toolkit_name, None)
-        if not callable(toolkit_factory):
-            raise RuntimeError(f"Requested toolkit is unavailable: {toolkit_name}")
+            toolkit_factory = getattr(toolkit_module, normalized_toolkit_name, None)
+            if not callable(toolkit_factory):
+                raise RuntimeError(f"Requested toolkit is unavailable: {toolkit_name}")
 
-        toolkit_instance = _build_generic_toolkit(
-            toolkit_factory,
-            workspace_root=workspace_root,
-        )
-        toolkit_class = (
-            toolkit_factory
-            if isinstance(toolkit_factory, type)
-            else toolkit_instance.__class__
-        )
-        class_name = str(getattr(toolkit_class, "__name__", "") or "").strip()
-        _set_runtime_toolkit_metadata(
-            toolkit_instance,
-            toolkit_id=_canonical_toolkit_id_for_class_name(class_name),
-            toolkit_name=_display_toolkit_name_for_class(toolkit_class),
-        )
-        _mark_workspace_tools_for_confirmation(toolkit_instance)
-        result.append(toolkit_instance)
+            toolkit_instance = _build_generic_toolkit(
+                toolkit_factory,
+                workspace_root=workspace_root,
+            )
+            toolkit_class = (
+                toolkit_factory
+                if isinstance(toolkit_factory, type)
+                else toolkit_instance.__class__
+            )
+            class_name = str(getattr(toolkit_class, "__name__", "") or "").strip()
+            _set_runtime_toolkit_metadata(
+                toolkit_instance,
+                toolkit_id=_canonical_toolkit_id_for_class_name(class_name),
+                toolkit_name=_display_toolkit_name_for_class(toolkit_class),
+            )
+            _mark_workspace_tools_for_confirmation(toolkit_instance)
+            result.append(toolkit_instance)
+    except Exception:
+        _disconnect_runtime_toolkits(result)
+        raise
 
     return result
 
@@ -3346,7 +3405,13 @@ def _resolve_memory_runtime(
     options: Dict[str, object] | None = None,
     *,
     session_id: str = "",
+    recall_prefetch: Any = None,
 ) -> tuple[Dict[str, Any], Any]:
+    if recall_prefetch is not None:
+        try:
+            return recall_prefetch.memory_runtime()
+        except Exception as prefetch_error:
+            _subagent_logger.warning("[memory] recall prefetch failed: %s", prefetch_error)
     memory_requested = bool(isinstance(options, dict) and options.get("memory_enabled"))
     memory_runtime = {
         "requested": memory_requested,
@@ -3358,6 +3423,14 @@ def _resolve_memory_runtime(
         memory_runtime["reason"] = "missing_session_id"
 
     if session_id and isinstance(options, dict) and memory_requested:
+        try:
+            from memory_commit_worker import wait_for_session_commits
+
+            # The previous turn's commit may still be queued; recall must see it.
+            if not wait_for_session_commits(session_id, options=options):
+                memory_runtime["commit_wait_timed_out"] = True
+        except Exception as wait_error:
+            _subagent_logger.warning("[memory] commit wait failed: %s", wait_error)
         try:
             from memory_factory import create_memory_manager_with_diagnostics
 
@@ -3377,24 +3450,106 @@ def _resolve_memory_runtime(
     return memory_runtime, memory_manager
 
 
+def _start_recall_prefetch(
+    options: Dict[str, object] | None,
+    *,
+    session_id: str,
+    messages: List[Dict[str, Any]],
+) -> Any:
+    """Begin building memory and recalling for this turn on the prefetch pool.
+
+    The returned handle is passed to _resolve_memory_runtime(), which joins
+    the manager it built; the recall searches keep running meanwhile.
+    """
+    try:
+        from memory_recall_prefetch import start_recall_prefetch
+
+        return start_recall_prefetch(
+            options=options,
+            session_id=session_id,
+            messages=messages,
+            build_manager=lambda: _resolve_memory_runtime(options, session_id=session_id),
+        )
+    except Exception as exc:
+        _subagent_logger.warning("[memory] recall prefetch unavailable: %s", exc)
+        return None
+
+
+def _cancel_recall_prefetch(recall_prefetch: Any) -> None:
+    """Abandon a prefetch whose turn failed before the agent took it over."""
+    if recall_prefetch is None:
+        return
+    try:
+        recall_prefetch.cancel()
+    except Exception as exc:
+        _subagent_logger.warning("[memory] recall prefetch cancel failed: %s", exc)
+
+
+def _enqueue_memory_commit(
+    options: Dict[str, object] | None,
+    *,
+    session_id: str,
+    messages: list,
+    memory_namespace: str = "",
+    model: str = "",
+    memory_manager: Any = None,
+) -> Dict[str, Any] | None:
+    """Hand the end-of-turn commit to the background worker.
+
+    Returns the queued job, or None when the commit should run inline
+    (async commits disabled or the queue is unavailable).
+    """
+    try:
+        from memory_commit_worker import commit_async_enabled, enqueue_memory_commit
+
+        if not commit_async_enabled():
+            return None
+        return enqueue_memory_commit(
+            session_id=session_id,
+            options=dict(options or {}),
+            messages=messages,
+            memory_namespace=str(memory_namespace or ""),
+            model=str(model or ""),
+            manager=memory_manager,
+        )
+    except Exception as exc:
+        _subagent_logger.warning("[memory] commit enqueue failed, committing inline: %s", exc)
+        return None
+
+
 def _build_requested_toolkits(
     options: Dict[str, object] | None = None,
     *,
     session_id: str = "",
 ) -> list:
     toolkits = _build_workspace_toolkits(options)
-    toolkits.extend(_build_selected_toolkits(options, session_id=session_id))
-    _validate_unique_tool_names(toolkits)
+    try:
+        toolkits.extend(_build_selected_toolkits(options, session_id=session_id))
+        _validate_unique_tool_names(toolkits)
+    except Exception:
+        _disconnect_runtime_toolkits(toolkits)
+        raise
     return toolkits
 
 
-def _disconnect_runtime_toolkits(toolkits: Iterable[Any]) -> None:
+def _disconnect_runtime_toolkits(toolkits: Iterable[Any], *, discard: bool = False) -> None:
+    """Return leased MCP sessions to the pool and disconnect everything else.
+
+    ``discard=True`` closes leased sessions instead: after a failed or
+    cancelled run a session may be mid tool call or otherwise broken and
+    must not be handed to the next chat.
+    """
     seen: set[int] = set()
     for toolkit in toolkits or []:
         identity = id(toolkit)
         if identity in seen:
             continue
         seen.add(identity)
+        try:
+            if release_mcp_runtime_toolkit(toolkit, discard=discard):
+                continue
+        except Exception as exc:
+            _subagent_logger.warning("[toolkit] pool release failed: %s", exc)
         disconnect = getattr(toolkit, "disconnect", None)
         if not callable(disconnect):
             continue
@@ -3404,6 +3559,15 @@ def _disconnect_runtime_toolkits(toolkits: Iterable[Any]) -> None:
             _subagent_logger.warning("[toolkit] disconnect failed: %s", exc)
 
 
+def _run_failed_or_cancelled(
+    output_holder: Dict[str, object],
+    cancel_event: threading.Event | None = None,
+) -> bool:
+    if output_holder.get("error") is not None:
+        return True
+    return isinstance(cancel_event, threading.Event) and cancel_event.is_set()
+
+
 _ANALYZER_READ_ONLY_TOOLS = (
     "read_files", "read_lines", "search_text", "list_directories",
     "file_exists", "pin_file_context", "unpin_file_context",
@@ -4456,6 +4620,8 @@ def _build_developer_agent(
     options: Dict[str, object] | None = None,
     recipe=None,
     optimizer_config: Any | None = None,
+    instructions: str | None = None,
+    parsed_subagent_templates: tuple | None = None,
 ):
     if recipe is not None:
         toolkits = _resolve_recipe_toolkits(toolkits, recipe, options=options)
@@ -4522,6 +4688,7 @@ def _build_developer_agent(
                     PoliciesModule=PoliciesModule,
                     SubagentTemplate=SubagentTemplate,
                     optimizer_module_factory=optimizer_module_factory,
+                    parsed_templates=parsed_subagent_templates,
                 )
             except Exception as exc:
                 _subagent_logger.warning(
@@ -4546,9 +4713,9 @@ def _build_developer_agent(
                 )
             )
 
-    if recipe is not None:
+    if instructions is None and recipe is not None:
         instructions = _resolve_recipe_prompt(recipe)
-    else:
+    elif instructions is None:
         instructions = _build_modular_prompt(
             builtin_modules=_BUILTIN_MODULES,
             agent_modules=_DEVELOPER_PROMPT_SECTIONS,
@@ -4569,21 +4736,40 @@ def _build_developer_agent(
     )
 
 
-def _create_agent(options: Dict[str, object] | None = None, session_id: str = ""):
-    UnchainAgent = _UnchainAgent
-    ToolsModule = _ToolsModule
-    MemoryModule = _MemoryModule
-    PoliciesModule = _PoliciesModule
-    SubagentModule = _SubagentModule
-    SubagentTemplate = _SubagentTemplate
-    SubagentPolicy = _SubagentPolicy
-    if UnchainAgent is None:
-        raise RuntimeError("unchain agent is unavailable — check unchain installation")
-
-    options = options or {}
+def _agent_blueprint_key(
+    options: Dict[str, object],
+    recipe: Any,
+    subagent_dirs: tuple,
+    optimizer_config: Any,
+) -> tuple:
+    runtime_config = get_runtime_config(options)
+    user_modules = _extract_user_prompt_modules(options)
+    subagent_fingerprint: tuple = ()
+    if recipe is None:
+        from subagent_loader import templates_fingerprint
+
+        subagent_fingerprint = templates_fingerprint(*subagent_dirs)
+    return (
+        runtime_config["provider"],
+        runtime_config["model"],
+        bool(options.get("modelId")),
+        str(getattr(recipe, "name", "") or ""),
+        tuple(_extract_toolkit_names(options)),
+        tuple(sorted(user_modules.items())),
+        json.dumps(optimizer_config, sort_keys=True, default=str),
+        _resolve_agent_max_iterations(options),
+        bool(options.get("max_iterations")),
+        tuple(str(directory) for directory in subagent_dirs),
+        subagent_fingerprint,
+    )
 
-    recipe = _load_recipe_from_options(options)
 
+def _build_agent_blueprint(
+    options: Dict[str, object],
+    recipe: Any,
+    subagent_dirs: tuple,
+    optimizer_config: Any,
+) -> AgentBlueprint:
     selected_config = get_runtime_config(options)
     if (not options.get("modelId")) and recipe is not None and recipe.model:
         selected_config = dict(selected_config)
@@ -4592,7 +4778,6 @@ def _create_agent(options: Dict[str, object] | None = None, session_id: str = ""
             selected_config["provider"] = prov
             selected_config["model"] = mdl
 
-    display_model = _format_model_id(selected_config["provider"], selected_config["model"])
     max_iterations = _resolve_agent_max_iterations(options)
     if (
         recipe is not None
@@ -4600,49 +4785,136 @@ def _create_agent(options: Dict[str, object] | None = None, session_id: str = ""
         and not options.get("max_iterations")
     ):
         max_iterations = recipe.max_iterations
-    api_key = _resolve_agent_api_key(options, selected_config["provider"])
-    memory_runtime, memory_manager = _resolve_memory_runtime(options, session_id=session_id)
-    toolkits = _build_requested_toolkits(options, session_id=session_id)
-    user_modules = _extract_user_prompt_modules(options)
 
-    # Developer agent is the sole agent with optional delegate/worker subagents.
-    agent = _build_developer_agent(
-        UnchainAgent=UnchainAgent,
-        ToolsModule=ToolsModule,
-        MemoryModule=MemoryModule,
-        PoliciesModule=PoliciesModule,
-        SubagentModule=SubagentModule,
-        SubagentTemplate=SubagentTemplate,
-        SubagentPolicy=SubagentPolicy,
+    subagent_templates = None
+    if recipe is not None:
+        instructions = _resolve_recipe_prompt(recipe)
+    else:
+        instructions = _build_modular_prompt(
+            builtin_modules=_BUILTIN_MODULES,
+            agent_modules=_DEVELOPER_PROMPT_SECTIONS,
+            user_modules=_extract_user_prompt_modules(options),
+        )
+        try:
+            from subagent_loader import scan_templates
+
+            subagent_templates = scan_templates(*subagent_dirs)
+        except Exception as exc:
+            _subagent_logger.warning("[subagent] template scan failed: %s", exc)
+
+    return AgentBlueprint(
+        recipe=recipe,
         provider=selected_config["provider"],
         model=selected_config["model"],
-        api_key=api_key,
-        user_modules=user_modules,
+        display_model=_format_model_id(selected_config["provider"], selected_config["model"]),
         max_iterations=max_iterations,
-        toolkits=toolkits,
-        memory_manager=memory_manager,
-        options=options,
+        instructions=instructions,
+        optimizer_config=_resolve_context_optimizer_config(optimizer_config),
+        subagent_templates=subagent_templates,
+        max_context_window_tokens=get_max_context_window_tokens(
+            selected_config["provider"], selected_config["model"],
+        ),
+    )
+
+
+def _resolve_agent_blueprint(
+    options: Dict[str, object],
+    optimizer_config: Any = None,
+) -> AgentBlueprint:
+    """Return the shared immutable blueprint for this request's options.
+
+    Recipes are reused while their file is unchanged (recipe_loader caches by
+    mtime), and parsed subagent templates while the template directories'
+    fingerprint is unchanged.
+    """
+    # Picks up model_capabilities.json edits (invalidating blueprints) before
+    # the lookup, since a cache hit never re-reads the context-window size.
+    _capability_catalog_index()
+    recipe = _load_recipe_from_options(options)
+    subagent_dirs = (
+        Path.home() / ".pupu" / "subagents",
+        _resolve_workspace_subagent_dir_for_loader(options),
+    )
+    key = _agent_blueprint_key(options, recipe, subagent_dirs, optimizer_config)
+    return get_agent_blueprint(
+        key,
+        lambda: _build_agent_blueprint(options, recipe, subagent_dirs, optimizer_config),
         recipe=recipe,
     )
+
+
+def _create_agent(
+    options: Dict[str, object] | None = None,
+    session_id: str = "",
+    *,
+    recall_prefetch: Any = None,
+):
+    UnchainAgent = _UnchainAgent
+    ToolsModule = _ToolsModule
+    MemoryModule = _MemoryModule
+    PoliciesModule = _PoliciesModule
+    SubagentModule = _SubagentModule
+    SubagentTemplate = _SubagentTemplate
+    SubagentPolicy = _SubagentPolicy
+    if UnchainAgent is None:
+        raise RuntimeError("unchain agent is unavailable — check unchain installation")
+
+    options = options or {}
+
+    blueprint = _resolve_agent_blueprint(options)
+
+    # Per-request state: credentials, memory and live toolkits. MCP sessions
+    # are leased exclusively to one run, so toolkits (and the subagent agents
+    # that wrap them) are never shared through the blueprint.
+    api_key = _resolve_agent_api_key(options, blueprint.provider)
+    toolkits = _build_requested_toolkits(options, session_id=session_id)
+    try:
+        memory_runtime, memory_manager = _resolve_memory_runtime(
+            options,
+            session_id=session_id,
+            recall_prefetch=recall_prefetch,
+        )
+
+        # Developer agent is the sole agent with optional delegate/worker subagents.
+        agent = _build_developer_agent(
+            UnchainAgent=UnchainAgent,
+            ToolsModule=ToolsModule,
+            MemoryModule=MemoryModule,
+            PoliciesModule=PoliciesModule,
+            SubagentModule=SubagentModule,
+            SubagentTemplate=SubagentTemplate,
+            SubagentPolicy=SubagentPolicy,
+            provider=blueprint.provider,
+            model=blueprint.model,
+            api_key=api_key,
+            max_iterations=blueprint.max_iterations,
+            toolkits=toolkits,
+            memory_manager=memory_manager,
+            options=options,
+            recipe=blueprint.recipe,
+            optimizer_config=blueprint.optimizer_config,
+            instructions=blueprint.instructions,
+            parsed_subagent_templates=blueprint.subagent_templates,
+        )
+    except Exception:
+        _disconnect_runtime_toolkits(toolkits)
+        raise
     agent._orchestration_role = "developer"
     agent._orchestration_mode = _AGENT_ORCHESTRATION_DEFAULT
     agent._orchestration_next_mode = _AGENT_ORCHESTRATION_DEFAULT
 
     agent._memory_runtime = memory_runtime
-    agent._max_iterations = max_iterations
+    agent._max_iterations = blueprint.max_iterations
     agent._toolkits = toolkits
-    agent._display_model = display_model
-    agent._selected_model = display_model
-    agent._developer_model_id = display_model
-    agent._general_model_id = display_model
-    raw_max_ctx = get_max_context_window_tokens(
-        selected_config["provider"], selected_config["model"],
-    )
+    agent._display_model = blueprint.display_model
+    agent._selected_model = blueprint.display_model
+    agent._developer_model_id = blueprint.display_model
+    agent._general_model_id = blueprint.display_model
     # Use 40% of the real context window as the effective budget.
     # This keeps the agent well within the quality zone (~60% is where
     # output quality starts degrading) and leaves headroom for tool
     # schemas, system prompts, and the current turn's output.
-    agent._max_context_window_tokens = int(raw_max_ctx * 0.40)
+    agent._max_context_window_tokens = int(blueprint.max_context_window_tokens * 0.40)
     return agent
 
 
@@ -4801,66 +5073,77 @@ def _stream_recipe_graph_events(
     session_id: str = "",
     cancel_event: threading.Event | None = None,
     run_id_override: str = "",
+    cooperative: bool = False,
 ) -> Iterable[Dict[str, Any]]:
     if _UnchainAgent is None:
         raise RuntimeError("unchain agent is unavailable — check unchain installation")
 
-    compiled = _compile_recipe_graph_for_runtime(recipe)
-    selected_config = get_runtime_config(options)
-    if (not options.get("modelId")) and getattr(recipe, "model", None):
-        recipe_model = str(recipe.model)
-        if ":" in recipe_model:
-            provider, model = recipe_model.split(":", 1)
-            selected_config = {**selected_config, "provider": provider, "model": model}
-    display_model = _format_model_id(selected_config["provider"], selected_config["model"])
-    max_iterations = _resolve_agent_max_iterations(options)
-    if (
-        getattr(recipe, "max_iterations", None) is not None
-        and not options.get("max_iterations")
-    ):
-        max_iterations = int(recipe.max_iterations)
+    base_messages = _normalize_messages(history, message, attachments)
+    recall_prefetch = _start_recall_prefetch(options, session_id=session_id, messages=base_messages)
+    try:
+        compiled = _compile_recipe_graph_for_runtime(recipe)
+        selected_config = get_runtime_config(options)
+        if (not options.get("modelId")) and getattr(recipe, "model", None):
+            recipe_model = str(recipe.model)
+            if ":" in recipe_model:
+                provider, model = recipe_model.split(":", 1)
+                selected_config = {**selected_config, "provider": provider, "model": model}
+        display_model = _format_model_id(selected_config["provider"], selected_config["model"])
+        max_iterations = _resolve_agent_max_iterations(options)
+        if (
+            getattr(recipe, "max_iterations", None) is not None
+            and not options.get("max_iterations")
+        ):
+            max_iterations = int(recipe.max_iterations)
 
-    memory_runtime, memory_manager = _resolve_memory_runtime(options, session_id=session_id)
-    if memory_runtime["requested"] and not memory_runtime["available"]:
-        fallback_reason = memory_runtime["reason"] or "memory_manager_unavailable"
-        yield {
-            "type": "memory_prepare",
-            "run_id": "",
-            "iteration": 0,
-            "timestamp": time.time(),
-            "session_id": session_id,
-            "applied": False,
-            "fallback_reason": fallback_reason,
-        }
-        if not history:
+        memory_runtime, memory_manager = _resolve_memory_runtime(
+            options,
+            session_id=session_id,
+            recall_prefetch=recall_prefetch,
+        )
+        if memory_runtime["requested"] and not memory_runtime["available"]:
+            fallback_reason = memory_runtime["reason"] or "memory_manager_unavailable"
             yield {
-                "type": "error",
+                "type": "memory_prepare",
                 "run_id": "",
                 "iteration": 0,
                 "timestamp": time.time(),
-                "code": _MEMORY_UNAVAILABLE_CODE,
-                "message": "Memory is enabled but unavailable for this request",
+                "session_id": session_id,
+                "applied": False,
                 "fallback_reason": fallback_reason,
             }
-            return
+            if not history:
+                yield {
+                    "type": "error",
+                    "run_id": "",
+                    "iteration": 0,
+                    "timestamp": time.time(),
+                    "code": _MEMORY_UNAVAILABLE_CODE,
+                    "message": "Memory is enabled but unavailable for this request",
+                    "fallback_reason": fallback_reason,
+                }
+                return
 
-    wants_user_toolkits = any(
-        _graph_node_type(pool) == "toolkit_pool" and pool.get("merge_with_user_selected") is True
-        for pools in compiled["attach_by_agent"].values()
-        for pool in pools
-    )
-    try:
-        user_toolkits = (
-            _build_requested_toolkits(options, session_id=session_id)
-            if wants_user_toolkits
-            else []
+        wants_user_toolkits = any(
+            _graph_node_type(pool) == "toolkit_pool" and pool.get("merge_with_user_selected") is True
+            for pools in compiled["attach_by_agent"].values()
+            for pool in pools
         )
-    except RuntimeError as exc:
-        raise RuntimeError(str(exc)) from exc
+        try:
+            user_toolkits = (
+                _build_requested_toolkits(options, session_id=session_id)
+                if wants_user_toolkits
+                else []
+            )
+        except RuntimeError as exc:
+            raise RuntimeError(str(exc)) from exc
+    except BaseException:
+        _cancel_recall_prefetch(recall_prefetch)
+        raise
     runtime_toolkits_to_disconnect = list(user_toolkits)
 
     workflow_run_id = str(run_id_override or _uuid.uuid4())
-    event_queue: "queue.Queue[object]" = queue.Queue()
+    event_queue: "queue.Queue[object]" = EventChannel()
     done_marker = object()
     output_holder: Dict[str, object] = {
         "error": None,
@@ -4871,10 +5154,9 @@ def _stream_recipe_graph_events(
         "final_text": "",
     }
 
-    base_messages = _normalize_messages(history, message, attachments)
     messages_without_attachments = _normalize_messages(history, message, [])
 
-    if isinstance(cancel_event, threading.Event):
+    if isinstance(cancel_event, threading.Event) and not cooperative:
         def watch_stream_cancel() -> None:
             cancel_event.wait()
             cancel_tool_confirmations(cancel_event)
@@ -5118,21 +5400,42 @@ def _stream_recipe_graph_events(
                         *base_messages,
                         {"role": "assistant", "content": final_text},
                     ]
-                    memory_manager.commit_messages(
+                    queued_commit = _enqueue_memory_commit(
+                        options,
                         session_id=session_id,
-                        full_conversation=commit_messages,
-                        memory_namespace=memory_namespace or None,
+                        messages=commit_messages,
+                        memory_namespace=memory_namespace,
                         model=selected_config["model"],
+                        memory_manager=memory_manager,
                     )
-                    commit_info = getattr(memory_manager, "last_commit_info", {}) or {}
-                    emit({
-                        "type": "memory_commit",
-                        "run_id": workflow_run_id,
-                        "iteration": int(output_holder.get("last_iteration") or 0),
-                        "timestamp": time.time(),
-                        "applied": True,
-                        **copy.deepcopy(commit_info),
-                    })
+                    if queued_commit is not None:
+                        emit({
+                            "type": "memory_commit",
+                            "run_id": workflow_run_id,
+                            "iteration": int(output_holder.get("last_iteration") or 0),
+                            "timestamp": time.time(),
+                            "applied": False,
+                            "queued": True,
+                            "session_id": session_id,
+                            "job_id": queued_commit.get("job_id"),
+                            "status": queued_commit.get("status", "pending"),
+                        })
+                    else:
+                        memory_manager.commit_messages(
+                            session_id=session_id,
+                            full_conversation=commit_messages,
+                            memory_namespace=memory_namespace or None,
+                            model=selected_config["model"],
+                        )
+                        commit_info = getattr(memory_manager, "last_commit_info", {}) or {}
+                        emit({
+                            "type": "memory_commit",
+                            "run_id": workflow_run_id,
+                            "iteration": int(output_holder.get("last_iteration") or 0),
+                            "timestamp": time.time(),
+                            "applied": True,
+                            **copy.deepcopy(commit_info),
+                        })
                 except Exception as exc:
                     emit({
                         "type": "memory_commit",
@@ -5159,7 +5462,10 @@ def _stream_recipe_graph_events(
             output_holder["error_traceback"] = _tb.format_exc()
             output_holder["error"] = run_error
         finally:
-            _disconnect_runtime_toolkits(runtime_toolkits_to_disconnect)
+            _disconnect_runtime_toolkits(
+                runtime_toolkits_to_disconnect,
+                discard=_run_failed_or_cancelled(output_holder, cancel_event),
+            )
             event_queue.put(done_marker)
 
     threading.Thread(
@@ -5168,11 +5474,15 @@ def _stream_recipe_graph_events(
         daemon=True,
     ).start()
 
-    while True:
-        item = event_queue.get()
-        if item is done_marker:
-            break
-        if isinstance(item, dict):
+    coalesce_ms, max_batch_bytes = resolve_coalescing_options(options)
+    for item in drain_event_queue(
+        event_queue,
+        done_marker,
+        coalesce_ms=coalesce_ms,
+        max_batch_bytes=max_batch_bytes,
+        cooperative=cooperative,
+    ):
+        if isinstance(item, (dict, WaitForEvents)):
             yield item
 
     error = output_holder.get("error")
@@ -5296,7 +5606,10 @@ def stream_chat(
         except Exception as run_error:  # pragma: no cover
             output_holder["error"] = run_error
         finally:
-            _disconnect_runtime_toolkits(getattr(agent, "_toolkits", []))
+            _disconnect_runtime_toolkits(
+                getattr(agent, "_toolkits", []),
+                discard=_run_failed_or_cancelled(output_holder),
+            )
             token_queue.put(done_marker)
 
     worker = threading.Thread(target=run_agent, name="unchain-runner", daemon=True)
@@ -5329,7 +5642,14 @@ def stream_chat_events(
     options: Dict[str, object],
     session_id: str = "",
     cancel_event: threading.Event | None = None,
+    cooperative: bool = False,
 ) -> Iterable[Dict[str, Any]]:
+    """Run one chat turn and yield its runtime events.
+
+    With ``cooperative=True`` the caller drives the generator from an event
+    loop: it yields ``WaitForEvents`` markers instead of blocking on the
+    runner queue, and the caller owns cancelling tool confirmations.
+    """
     recipe = _load_recipe_from_options(options)
     if _recipe_has_graph(recipe):
         yield from _stream_recipe_graph_events(
@@ -5340,11 +5660,17 @@ def stream_chat_events(
             options=options,
             session_id=session_id,
             cancel_event=cancel_event,
+            cooperative=cooperative,
         )
         return
 
-    agent = _create_agent(options, session_id=session_id)
     messages = _normalize_messages(history, message, attachments)
+    recall_prefetch = _start_recall_prefetch(options, session_id=session_id, messages=messages)
+    try:
+        agent = _create_agent(options, session_id=session_id, recall_prefetch=recall_prefetch)
+    except BaseException:
+        _cancel_recall_prefetch(recall_prefetch)
+        raise
     payload = _build_payload(agent.provider, options)
     memory_runtime = _memory_runtime_from_agent(agent)
     if memory_runtime["requested"] and not memory_runtime["available"]:
@@ -5370,7 +5696,7 @@ def stream_chat_events(
             }
             return
 
-    event_queue: "queue.Queue[object]" = queue.Queue()
+    event_queue: "queue.Queue[object]" = EventChannel()
     done_marker = object()
     output_holder: Dict[str, object] = {
         "error": None,
@@ -5445,7 +5771,7 @@ def stream_chat_events(
         lambda event: event_queue.put(event),
         cancel_event=cancel_event,
     )
-    if isinstance(cancel_event, threading.Event):
+    if isinstance(cancel_event, threading.Event) and not cooperative:
         def watch_stream_cancel() -> None:
             cancel_event.wait()
             cancel_tool_confirmations(cancel_event)
@@ -5498,17 +5824,24 @@ def stream_chat_events(
             output_holder["error_traceback"] = _tb.format_exc()
             output_holder["error"] = run_error
         finally:
-            _disconnect_runtime_toolkits(getattr(agent, "_toolkits", []))
+            _disconnect_runtime_toolkits(
+                getattr(agent, "_toolkits", []),
+                discard=_run_failed_or_cancelled(output_holder, cancel_event),
+            )
             event_queue.put(done_marker)
 
     worker = threading.Thread(target=run_agent, name="unchain-runner-events", daemon=True)
     worker.start()
 
-    while True:
-        item = event_queue.get()
-        if item is done_marker:
-            break
-        if isinstance(item, dict):
+    coalesce_ms, max_batch_bytes = resolve_coalescing_options(options)
+    for item in drain_event_queue(
+        event_queue,
+        done_marker,
+        coalesce_ms=coalesce_ms,
+        max_batch_bytes=max_batch_bytes,
+        cooperative=cooperative,
+    ):
+        if isinstance(item, (dict, WaitForEvents)):
             yield item
 
     error = output_holder.get("error")